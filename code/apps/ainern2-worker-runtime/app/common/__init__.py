@@ -1,4 +1,5 @@
 from .base_worker import BaseWorker
+from .http_clients import ProviderClientRegistry, get_client_registry
 from .job_loop import JobLoop
 
-__all__ = ["BaseWorker", "JobLoop"]
+__all__ = ["BaseWorker", "JobLoop", "ProviderClientRegistry", "get_client_registry"]
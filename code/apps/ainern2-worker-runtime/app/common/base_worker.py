@@ -2,11 +2,12 @@
 
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
 
 from ainern2d_shared.config.setting import settings
-from ainern2d_shared.queue.rabbitmq import RabbitMQPublisher
+from ainern2d_shared.queue.rabbitmq import get_publisher
 from ainern2d_shared.queue.topics import SYSTEM_TOPICS
 from ainern2d_shared.schemas.events import EventEnvelope
 from ainern2d_shared.schemas.worker import WorkerResult
@@ -16,12 +17,24 @@ logger = get_logger(__name__)
 
 
 class BaseWorker(ABC):
-    """Abstract base class every concrete worker must extend."""
+    """Abstract base class every concrete worker must extend.
 
-    def __init__(self, worker_type: str, settings=settings) -> None:
+    ``execute`` may run for several jobs at once on the same event loop
+    (up to ``max_concurrency``), so implementations must keep per-job state
+    local to the call.
+    """
+
+    def __init__(
+        self,
+        worker_type: str,
+        settings=settings,
+        max_concurrency: int | None = None,
+    ) -> None:
         self.worker_type = worker_type
         self.settings = settings
-        self._publisher = RabbitMQPublisher(settings.rabbitmq_url)
+        self.max_concurrency = max_concurrency or settings.worker_max_in_flight
+        self.gpu_tier = settings.worker_gpu_tier
+        self._publisher = get_publisher(settings.rabbitmq_url)
 
     # ------------------------------------------------------------------
     # Abstract – each worker implements its own execution logic
@@ -31,6 +44,9 @@ class BaseWorker(ABC):
         """Run the worker-specific task and return a result."""
         ...
 
+    async def aclose(self) -> None:
+        """Release loop-bound resources (sessions, sockets) when the JobLoop exits."""
+
     # ------------------------------------------------------------------
     # Result / heartbeat reporting
     # ------------------------------------------------------------------
@@ -62,7 +78,10 @@ class BaseWorker(ABC):
                     merged_metrics[key] = result.output[key]
             result.metrics = merged_metrics
 
-        self._publisher.publish(
+        # The pooled publisher is blocking; keep it off the event loop so
+        # other in-flight jobs are not stalled.
+        await asyncio.to_thread(
+            self._publisher.publish,
             SYSTEM_TOPICS.WORKER_DETAIL,
             result.model_dump(mode="json"),
         )
@@ -84,4 +103,25 @@ class BaseWorker(ABC):
             correlation_id=f"cr_{job_id}",
             payload={"worker_type": self.worker_type},
         )
-        self._publisher.publish(SYSTEM_TOPICS.JOB_STATUS, envelope.model_dump(mode="json"))
+        await asyncio.to_thread(
+            self._publisher.publish, SYSTEM_TOPICS.JOB_STATUS, envelope.model_dump(mode="json"),
+        )
+
+    async def report_progress(self, job_id: str, run_id: str | None, payload: dict) -> None:
+        """Publish an incremental ``job.progress`` event (e.g. coalesced LLM tokens)."""
+        envelope = EventEnvelope(
+            event_type="job.progress",
+            producer=self.worker_type,
+            occurred_at=datetime.now(timezone.utc),
+            tenant_id="t_unknown",
+            project_id="p_unknown",
+            idempotency_key=f"idem_progress_{job_id}_{payload.get('seq', 0)}",
+            run_id=run_id,
+            job_id=job_id,
+            trace_id=f"tr_{job_id}",
+            correlation_id=f"cr_{job_id}",
+            payload={"worker_type": self.worker_type, **payload},
+        )
+        await asyncio.to_thread(
+            self._publisher.publish, SYSTEM_TOPICS.JOB_STATUS, envelope.model_dump(mode="json"),
+        )
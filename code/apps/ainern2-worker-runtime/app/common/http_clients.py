@@ -0,0 +1,106 @@
+"""Per-process registry of pooled HTTP / OpenAI-compatible clients for provider workers."""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+from typing import Any
+
+import httpx
+
+from ainern2d_shared.config.setting import settings
+from ainern2d_shared.telemetry.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional ``h2`` package (``pip install httpx[http2]``)."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class ProviderClientRegistry:
+    """Long-lived clients shared by every job a worker process runs.
+
+    OpenAI-compatible clients are keyed by ``(base_url, api_key)``; the
+    generic adapter worker shares one ``httpx.AsyncClient`` across hosts.
+    Each client keeps its connection pool (keep-alive, HTTP/2 when ``h2``
+    is installed) so jobs skip TCP/TLS setup after the first request.
+
+    Clients belong to the event loop that first used them – the JobLoop
+    runs one persistent loop per process. Call :meth:`aclose` on shutdown.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+    ) -> None:
+        self._limits = {
+            "max_connections": max_connections,
+            "max_keepalive_connections": max_keepalive_connections,
+            "keepalive_expiry": keepalive_expiry,
+        }
+        self.http2 = http2 and http2_available()
+        self._openai: dict[tuple[str, str], Any] = {}
+        self._http: httpx.AsyncClient | None = None
+
+    def openai(self, base_url: str, api_key: str) -> Any:
+        """Shared ``AsyncOpenAI`` client for one provider endpoint and key."""
+        key = (base_url.rstrip("/"), api_key)
+        client = self._openai.get(key)
+        if client is None:
+            try:
+                import openai
+            except ImportError:
+                raise RuntimeError("openai SDK not installed; run: pip install openai")
+            # Build Limits from the transport the installed SDK uses.
+            limits = type(openai.DEFAULT_CONNECTION_LIMITS)(**self._limits)
+            client = openai.AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=openai.DefaultAsyncHttpxClient(limits=limits, http2=self.http2),
+            )
+            self._openai[key] = client
+            logger.info("provider client created base_url=%s http2=%s", key[0], self.http2)
+        return client
+
+    def http(self) -> httpx.AsyncClient:
+        """Shared ``httpx.AsyncClient``; pass per-request ``timeout`` / ``headers``."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(limits=httpx.Limits(**self._limits), http2=self.http2)
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close every pooled client; the registry can be reused afterwards."""
+        closers = [client.close() for client in self._openai.values()]
+        if self._http is not None:
+            closers.append(self._http.aclose())
+        self._openai.clear()
+        self._http = None
+        results = await asyncio.gather(*closers, return_exceptions=True)
+        for exc in results:
+            if isinstance(exc, Exception):
+                logger.warning("provider client close failed: %s", exc)
+
+
+_registry: ProviderClientRegistry | None = None
+
+
+def get_client_registry() -> ProviderClientRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ProviderClientRegistry(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive,
+            keepalive_expiry=settings.llm_http_keepalive_expiry_sec,
+            http2=settings.llm_http2,
+        )
+    return _registry
+
+
+async def close_client_registry() -> None:
+    if _registry is not None:
+        await _registry.aclose()
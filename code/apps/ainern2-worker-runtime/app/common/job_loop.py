@@ -3,36 +3,150 @@
 from __future__ import annotations
 
 import asyncio
+import os
+import socket
 import traceback
 
+import httpx
+
 from ainern2d_shared.config.setting import settings
-from ainern2d_shared.queue.rabbitmq import RabbitMQConsumer
-from ainern2d_shared.queue.topics import SYSTEM_TOPICS
+from ainern2d_shared.queue.aio_consumer import AsyncQueueConsumer
+from ainern2d_shared.queue.topics import (
+    DISPATCH_ROUTING_LEGACY,
+    SYSTEM_TOPICS,
+    dispatch_queue,
+    dispatch_routing_key,
+)
 from ainern2d_shared.schemas.worker import WorkerResult
 from ainern2d_shared.telemetry.logging import get_logger
 
 from .base_worker import BaseWorker
+from .http_clients import close_client_registry
 
 logger = get_logger(__name__)
 
 
 class JobLoop:
-    """Consumes dispatched jobs and delegates execution to a concrete worker."""
+    """Consumes dispatched jobs and delegates execution to a concrete worker.
+
+    Runs on a single persistent event loop; up to ``worker.max_concurrency``
+    jobs execute concurrently and each message is acked only after its
+    result has been reported.
+
+    In routed mode (default) the loop consumes its own durable queue on
+    ``SYSTEM_TOPICS.DISPATCH_EXCHANGE``, bound to the routing key of its
+    worker type on ``worker.gpu_tier``.  The hub resolves family names and
+    aliases to one concrete worker type, so each job reaches one queue.
+    ``AINER_DISPATCH_ROUTING=legacy`` falls back to the shared JOB_DISPATCH
+    queue with client-side worker_type filtering during migration.
 
-    def __init__(self, worker: BaseWorker) -> None:
+    A routed loop also registers its node (``worker.max_concurrency`` slots)
+    with the hub at ``WORKER_HUB_URL`` and heartbeats it while it runs: the
+    hub only dispatches to nodes it has a live registration for.
+    """
+
+    def __init__(self, worker: BaseWorker, connect=None, hub_client: httpx.AsyncClient | None = None) -> None:
         self.worker = worker
-        self._consumer = RabbitMQConsumer(settings.rabbitmq_url)
+        self.routed = settings.dispatch_routing != DISPATCH_ROUTING_LEGACY
+        self.node_id = f"{worker.worker_type}-{socket.gethostname()}-{os.getpid()}"
+        self._hub_client = hub_client
+        self._consumer = AsyncQueueConsumer(
+            settings.rabbitmq_url,
+            max_in_flight=worker.max_concurrency,
+            connect=connect,
+        )
+
+    @property
+    def queue_name(self) -> str:
+        if not self.routed:
+            return SYSTEM_TOPICS.JOB_DISPATCH
+        return dispatch_queue(self.worker.worker_type, self.worker.gpu_tier)
+
+    @property
+    def routing_keys(self) -> list[str]:
+        return [dispatch_routing_key(self.worker.worker_type, self.worker.gpu_tier)]
 
     def start(self) -> None:
-        """Begin consuming from the JOB_DISPATCH topic, filtering by worker_type."""
-        logger.info("JobLoop starting for worker_type=%s", self.worker.worker_type)
-        self._consumer.consume(
-            topic=SYSTEM_TOPICS.JOB_DISPATCH,
-            handler=self._on_message,
+        """Begin consuming this worker's dispatch queue."""
+        asyncio.run(self.run())
+
+    async def run(self) -> None:
+        logger.info(
+            "JobLoop starting for worker_type=%s queue=%s concurrency=%d",
+            self.worker.worker_type, self.queue_name, self.worker.max_concurrency,
         )
+        registration: asyncio.Task | None = None
+        try:
+            if not self.routed:
+                await self._consumer.run(SYSTEM_TOPICS.JOB_DISPATCH, self._handle_message)
+                return
+            registration = asyncio.create_task(self._keep_registered())
+            await self._consumer.run(
+                self.queue_name,
+                self._handle_message,
+                exchange=SYSTEM_TOPICS.DISPATCH_EXCHANGE,
+                routing_keys=self.routing_keys,
+            )
+        finally:
+            if registration is not None:
+                registration.cancel()
+                await asyncio.gather(registration, return_exceptions=True)
+                await self._deregister()
+            # Pooled provider clients are bound to this loop; close them with it.
+            await close_client_registry()
+            await self.worker.aclose()
+
+    def stop(self) -> None:
+        """Stop taking new jobs and drain the in-flight ones."""
+        self._consumer.request_stop()
+
+    # ------------------------------------------------------------------
+    # Hub node registration
+    # ------------------------------------------------------------------
+    def _hub(self) -> httpx.AsyncClient:
+        if self._hub_client is None:
+            self._hub_client = httpx.AsyncClient(base_url=settings.worker_hub_url, timeout=5.0)
+        return self._hub_client
+
+    async def _keep_registered(self) -> None:
+        """Register this node and heartbeat it until cancelled.
 
-    def _on_message(self, payload: dict) -> None:
-        asyncio.run(self._handle_message(payload))
+        A heartbeat the hub does not recognise (hub restart, missed TTL)
+        registers the node again. Hub errors are logged and retried on the
+        next beat; they never stop job consumption.
+        """
+        interval = max(1.0, settings.worker_hub_node_ttl_sec / 3)
+        registered = False
+        while True:
+            try:
+                if registered:
+                    resp = await self._hub().post(f"/internal/nodes/{self.node_id}/heartbeat")
+                    if resp.status_code == 404:
+                        registered = False
+                    else:
+                        resp.raise_for_status()
+                if not registered:
+                    resp = await self._hub().post("/internal/nodes/register", json={
+                        "node_id": self.node_id,
+                        "worker_type": self.worker.worker_type,
+                        "capacity": self.worker.max_concurrency,
+                        "gpu_tier": self.worker.gpu_tier,
+                    })
+                    resp.raise_for_status()
+                    registered = True
+                    logger.info("node %s registered with the hub", self.node_id)
+            except httpx.HTTPError as exc:
+                logger.warning("hub registration for node %s failed: %s", self.node_id, exc)
+            await asyncio.sleep(interval)
+
+    async def _deregister(self) -> None:
+        try:
+            await self._hub().delete(f"/internal/nodes/{self.node_id}")
+        except httpx.HTTPError as exc:
+            logger.warning("could not deregister node %s: %s", self.node_id, exc)
+        finally:
+            await self._hub_client.aclose()
+            self._hub_client = None
 
     async def _handle_message(self, message: dict) -> None:
         """Deserialize an incoming job message, execute, and report the outcome."""
@@ -42,8 +156,9 @@ class JobLoop:
         # The message is an EventEnvelope, the actual job payload is enclosed inside it.
         payload: dict = message.get("payload", {})
 
-        # Only process jobs targeted at this worker type
-        if payload.get("worker_type") != self.worker.worker_type:
+        # Legacy shared queue: only process jobs targeted at this worker type.
+        # Routed queues only ever receive this worker's jobs.
+        if not self.routed and payload.get("worker_type") != self.worker.worker_type:
             return
 
         try:
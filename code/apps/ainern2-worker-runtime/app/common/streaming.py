@@ -0,0 +1,146 @@
+"""Token streaming for LLM workers – chunk coalescing into ``job.progress`` events."""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from ainern2d_shared.telemetry.logging import get_logger
+
+logger = get_logger(__name__)
+
+ProgressEmitter = Callable[[dict], Awaitable[None]]
+
+
+@dataclass
+class ChatCompletion:
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    first_token_ms: int | None = None
+
+
+class ProgressCoalescer:
+    """Buffers streamed text and emits it at most every ``interval_ms``.
+
+    A flush also happens once ``max_chars`` are buffered, so a fast model
+    does not build up one huge event. Each emitted payload carries the new
+    ``delta`` plus running totals; the assembled text is kept for the final
+    result.
+    """
+
+    def __init__(self, emit: ProgressEmitter, interval_ms: int = 500, max_chars: int = 2048) -> None:
+        self._emit = emit
+        self._interval = interval_ms / 1000.0
+        self._max_chars = max_chars
+        self._parts: list[str] = []
+        self._pending: list[str] = []
+        self._pending_chars = 0
+        self._seq = 0
+        self._started = time.monotonic()
+        self._last_flush = self._started
+        self.first_token_ms: int | None = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    async def feed(self, delta: str) -> None:
+        if not delta:
+            return
+        if self.first_token_ms is None:
+            self.first_token_ms = int((time.monotonic() - self._started) * 1000)
+        self._parts.append(delta)
+        self._pending.append(delta)
+        self._pending_chars += len(delta)
+        # The first token goes out immediately so time-to-first-byte stays low.
+        if (
+            self._seq == 0
+            or self._pending_chars >= self._max_chars
+            or time.monotonic() - self._last_flush >= self._interval
+        ):
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        delta = "".join(self._pending)
+        self._pending.clear()
+        self._pending_chars = 0
+        self._seq += 1
+        self._last_flush = time.monotonic()
+        payload = {
+            "seq": self._seq,
+            "delta": delta,
+            "text_length": sum(len(p) for p in self._parts),
+            "elapsed_ms": int((self._last_flush - self._started) * 1000),
+            "first_token_ms": self.first_token_ms,
+        }
+        try:
+            await self._emit(payload)
+        except Exception as exc:  # progress is best-effort; the final result still goes out
+            logger.warning("job.progress emit failed: %s", exc)
+
+
+def progress_for(worker, job_id: str, run_id: str | None) -> ProgressCoalescer:
+    """Coalescer publishing through ``worker.report_progress``."""
+    return ProgressCoalescer(
+        lambda payload: worker.report_progress(job_id, run_id, payload),
+        interval_ms=worker.settings.llm_stream_flush_ms,
+    )
+
+
+async def complete_chat(client: Any, progress: ProgressCoalescer | None = None, **create_kwargs) -> ChatCompletion:
+    """``chat.completions.create``; streams through *progress* when given."""
+    if progress is None:
+        response = await client.chat.completions.create(**create_kwargs)
+        usage = response.usage
+        return ChatCompletion(
+            text=response.choices[0].message.content or "",
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            total_tokens=usage.total_tokens if usage else 0,
+        )
+
+    usage = None
+    stream = await client.chat.completions.create(
+        stream=True, stream_options={"include_usage": True}, **create_kwargs,
+    )
+    async for chunk in stream:
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+        if chunk.choices:
+            await progress.feed(chunk.choices[0].delta.content or "")
+    await progress.flush()
+    return ChatCompletion(
+        text=progress.text,
+        prompt_tokens=usage.prompt_tokens if usage else 0,
+        completion_tokens=usage.completion_tokens if usage else 0,
+        total_tokens=usage.total_tokens if usage else 0,
+        first_token_ms=progress.first_token_ms,
+    )
+
+
+async def iter_sse_json(lines: AsyncIterator[str]) -> AsyncIterator[dict]:
+    """Decode ``data: {...}`` server-sent events until ``data: [DONE]``."""
+    async for line in lines:
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            logger.debug("skipping non-JSON SSE data: %s", data[:80])
+
+
+def openai_stream_delta(event: dict) -> str:
+    """Text delta of an OpenAI-style ``chat.completion.chunk`` event."""
+    choices = event.get("choices") or []
+    if not choices:
+        return ""
+    return str((choices[0].get("delta") or {}).get("content") or "")
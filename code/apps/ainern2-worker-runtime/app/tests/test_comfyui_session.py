@@ -0,0 +1,149 @@
+"""worker-video ComfyUI websocket session 单元测试"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import types
+
+import pytest
+
+_VIDEO_DIR = os.path.join(os.path.dirname(__file__), "..", "worker-video")
+
+
+def _load_worker_video():
+    # The package lives in ``worker-video`` but imports itself as ``app.worker_video``.
+    if "app.worker_video" not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            "app.worker_video", os.path.join(_VIDEO_DIR, "__init__.py"), submodule_search_locations=[_VIDEO_DIR],
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["app.worker_video"] = module
+        spec.loader.exec_module(module)
+    return sys.modules["app.worker_video.comfyui_session"]
+
+
+comfyui_session = _load_worker_video()
+ComfyUISession = comfyui_session.ComfyUISession
+ComfyUIExecutionError = comfyui_session.ComfyUIExecutionError
+
+
+class _FakeClient:
+    base_url = "http://comfy.local:8188"
+
+    def __init__(self) -> None:
+        self.history: dict[str, dict] = {}
+        self.polls = 0
+
+    async def get_status(self, prompt_id: str) -> dict:
+        self.polls += 1
+        return {prompt_id: self.history[prompt_id]} if prompt_id in self.history else {}
+
+
+def _session(client: _FakeClient, **kwargs) -> ComfyUISession:
+    session = ComfyUISession(client, **kwargs)
+    session.start = lambda: None  # drive the socket by hand
+    return session
+
+
+def _msg(kind: str, **data) -> str:
+    return json.dumps({"type": kind, "data": data})
+
+
+def test_early_completion_resolves_without_waiting():
+    async def scenario():
+        session = _session(_FakeClient())
+        session._dispatch(_msg("executed", prompt_id="p1", node="9", output={"images": [{"filename": "a.png"}]}))
+        session._dispatch(_msg("execution_success", prompt_id="p1"))
+        return await asyncio.wait_for(session.wait("p1", timeout_s=5), 0.5), session
+
+    outputs, session = asyncio.run(scenario())
+    assert outputs == {"9": {"images": [{"filename": "a.png"}]}}
+    assert not session._pending and not session._recent
+
+
+def test_execution_error_raises_and_drops_the_prompt():
+    async def scenario():
+        session = _session(_FakeClient())
+        session.connected.set()
+        waiter = asyncio.ensure_future(session.wait("p2", timeout_s=5))
+        await asyncio.sleep(0)
+        session._dispatch(_msg("execution_error", prompt_id="p2", node_id="3", node_type="KSampler",
+                               exception_message="CUDA out of memory\n"))
+        with pytest.raises(ComfyUIExecutionError, match="KSampler.*CUDA out of memory"):
+            await waiter
+        return session
+
+    assert not asyncio.run(scenario())._pending
+
+
+def test_polls_history_while_the_socket_is_down():
+    async def scenario():
+        client = _FakeClient()
+        session = _session(client, poll_interval_s=0.02)
+        waiter = asyncio.ensure_future(session.wait("p3", timeout_s=5))
+        await asyncio.sleep(0.05)
+        client.history["p3"] = {"status": {"status_str": "success"}, "outputs": {"7": {"gifs": []}}}
+        return await asyncio.wait_for(waiter, 0.5), client
+
+    outputs, client = asyncio.run(scenario())
+    assert outputs == {"7": {"gifs": []}}
+    assert client.polls >= 2
+
+
+def test_reconnect_sweeps_prompts_finished_while_disconnected(monkeypatch):
+    client = _FakeClient()
+    connects: list[str] = []
+
+    class _Socket:
+        def __init__(self, messages):
+            self._messages = list(messages)
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            if self._messages:
+                return self._messages.pop(0)
+            if len(connects) == 1:
+                client.history["p4"] = {"status": {"status_str": "success"}, "outputs": {"1": {}}}
+                raise ConnectionError("socket dropped")  # completion message lost with it
+            await asyncio.sleep(3600)
+
+    def _connect(url, **_kwargs):
+        connects.append(url)
+        return _Socket([_msg("executing", prompt_id="p4", node="1")] if len(connects) == 1 else [])
+
+    monkeypatch.setitem(sys.modules, "websockets", types.SimpleNamespace(connect=_connect))
+
+    async def scenario():
+        session = ComfyUISession(client, reconnect_delay_s=0.01, poll_interval_s=60)
+        try:
+            return await asyncio.wait_for(session.wait("p4", timeout_s=5), 1.0)
+        finally:
+            await session.close()
+
+    assert asyncio.run(scenario()) == {"1": {}}
+    assert len(connects) == 2
+
+
+def test_timeout_raises_and_stops_tracking():
+    async def scenario():
+        client = _FakeClient()
+        session = _session(client, poll_interval_s=0.01)
+        session.connected.set()  # connected: no polling until the final check
+        with pytest.raises(TimeoutError):
+            await session.wait("p5", timeout_s=0.05)
+        return session, client
+
+    session, client = asyncio.run(scenario())
+    assert "p5" not in session._pending
+    assert client.polls == 1
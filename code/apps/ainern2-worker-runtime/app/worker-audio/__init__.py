@@ -2,5 +2,6 @@ from .align import AudioAligner
 from .bgm import BGMWorker
 from .sfx import SFXWorker
 from .tts import TTSWorker
+from .tts_batch import TTSBatchWorker
 
-__all__ = ["TTSWorker", "BGMWorker", "SFXWorker", "AudioAligner"]
+__all__ = ["TTSWorker", "TTSBatchWorker", "BGMWorker", "SFXWorker", "AudioAligner"]
@@ -0,0 +1,137 @@
+"""Single-pass loudness normalization for a batch of dialogue lines.
+
+All lines go through one ffmpeg process: every input is resampled to mono
+PCM and fed both into a raw per-line output, whose byte size gives the
+exact line duration, and into ``concat → loudnorm``, so every line of the
+chapter is normalized against the same loudness target. The normalized
+stream is then cut back into one WAV per line at the measured sample
+boundaries. There is no per-file ffprobe and no second ffmpeg pass.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import wave
+from dataclasses import dataclass
+
+from ainern2d_shared.telemetry.logging import get_logger
+
+logger = get_logger(__name__)
+
+SAMPLE_RATE = 24000
+_SAMPLE_WIDTH = 2  # s16le mono
+_CHUNK_FRAMES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class NormalizedLine:
+    path: str
+    duration_ms: float  # of the synthesized line, before normalization
+    normalized: bool
+
+
+def _filter_graph(count: int, lufs: float, true_peak: float, lra: float) -> str:
+    fmt = f"aresample={SAMPLE_RATE},aformat=sample_fmts=s16:channel_layouts=mono"
+    parts = [f"[{i}:a]{fmt},asplit=2[c{i}][r{i}]" for i in range(count)]
+    concat_in = "".join(f"[c{i}]" for i in range(count))
+    parts.append(
+        f"{concat_in}concat=n={count}:v=0:a=1,"
+        f"loudnorm=I={lufs}:TP={true_peak}:LRA={lra},{fmt}[norm]"
+    )
+    return ";".join(parts)
+
+
+def _split_pcm(norm_pcm: str, raw_frames: list[int], out_dir: str) -> list[str]:
+    """Cut *norm_pcm* into WAVs, one per line, at the raw line boundaries.
+
+    loudnorm resamples internally, so the normalized stream can differ
+    from the raw total by a few samples; boundaries are scaled to match.
+    """
+    total_norm = os.path.getsize(norm_pcm) // _SAMPLE_WIDTH
+    total_raw = sum(raw_frames) or 1
+    scale = total_norm / total_raw
+    outputs: list[str] = []
+    cumulative = 0
+    start = 0
+    with open(norm_pcm, "rb") as src:
+        for i, frames in enumerate(raw_frames):
+            cumulative += frames
+            end = total_norm if i == len(raw_frames) - 1 else round(cumulative * scale)
+            out_path = os.path.join(out_dir, f"line_{i:04d}.wav")
+            with wave.open(out_path, "wb") as dst:
+                dst.setnchannels(1)
+                dst.setsampwidth(_SAMPLE_WIDTH)
+                dst.setframerate(SAMPLE_RATE)
+                remaining = max(0, end - start)
+                while remaining > 0:
+                    chunk = src.read(min(remaining, _CHUNK_FRAMES) * _SAMPLE_WIDTH)
+                    if not chunk:
+                        break
+                    dst.writeframes(chunk)
+                    remaining -= len(chunk) // _SAMPLE_WIDTH
+            outputs.append(out_path)
+            start = end
+    return outputs
+
+
+async def normalize_lines(
+    inputs: list[str],
+    out_dir: str,
+    lufs: float = -16.0,
+    true_peak: float = -1.5,
+    lra: float = 11.0,
+    timeout_s: float = 600.0,
+) -> list[NormalizedLine]:
+    """Normalize *inputs* together; one WAV per input lands in *out_dir*.
+
+    Without ffmpeg on PATH the inputs are returned unchanged with
+    ``normalized=False`` and a zero duration.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if not inputs:
+        return []
+    if not ffmpeg:
+        logger.warning("ffmpeg not found on PATH; skipping loudness normalization")
+        return [NormalizedLine(path, 0.0, False) for path in inputs]
+
+    os.makedirs(out_dir, exist_ok=True)
+    norm_pcm = os.path.join(out_dir, "normalized.pcm")
+    raw_paths = [os.path.join(out_dir, f"raw_{i:04d}.pcm") for i in range(len(inputs))]
+
+    cmd = [ffmpeg, "-y", "-hide_banner", "-loglevel", "error"]
+    for path in inputs:
+        cmd += ["-i", path]
+    cmd += ["-filter_complex", _filter_graph(len(inputs), lufs, true_peak, lra)]
+    cmd += ["-map", "[norm]", "-f", "s16le", norm_pcm]
+    for i, raw in enumerate(raw_paths):
+        cmd += ["-map", f"[r{i}]", "-f", "s16le", raw]
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout_s)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg loudnorm failed: {stderr.decode(errors='replace')[-300:]}")
+
+    raw_frames = [os.path.getsize(raw) // _SAMPLE_WIDTH for raw in raw_paths]
+    try:
+        outputs = await asyncio.to_thread(_split_pcm, norm_pcm, raw_frames, out_dir)
+    finally:
+        for path in (norm_pcm, *raw_paths):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+    return [
+        NormalizedLine(path, frames * 1000.0 / SAMPLE_RATE, True)
+        for path, frames in zip(outputs, raw_frames)
+    ]
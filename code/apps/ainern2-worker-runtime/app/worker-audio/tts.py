@@ -2,6 +2,10 @@
 
 Primary backend: OpenAI TTS API (tts-1 / tts-1-hd).
 Fallback backend: edge-tts (free Microsoft Edge voices, no API key needed).
+
+Synthesized audio goes through the content-addressed :mod:`.tts_cache`, so a
+line already rendered with the same voice, model, format and backend is
+returned from storage instead of being paid for again.
 """
 
 from __future__ import annotations
@@ -14,6 +18,10 @@ from ainern2d_shared.schemas.worker import WorkerResult
 from ainern2d_shared.telemetry.logging import get_logger
 
 from app.common.base_worker import BaseWorker
+from app.common.http_clients import get_client_registry
+
+from .align import _probe_duration_ms
+from .tts_cache import TTSCache, get_tts_cache, tts_cache_key
 
 logger = get_logger(__name__)
 
@@ -31,11 +39,21 @@ _DEFAULT_VOICE = ("alloy", "zh-CN-YunxiNeural")
 _TTS_COST_PER_1K_CHARS = {"tts-1": 0.015, "tts-1-hd": 0.030}
 
 
+def _edge_ext(fmt: str) -> str:
+    return "mp3" if fmt in ("mp3", "audio-24khz-48kbitrate-mono-mp3") else fmt
+
+
+def _provider_voice(voice_id: str, tts_model: str, use_openai: bool) -> tuple[str, str]:
+    """``(voice, model)`` the backend is called with; edge-tts has no model."""
+    openai_voice, edge_voice = _VOICE_MAP.get(voice_id, _DEFAULT_VOICE)
+    return (openai_voice, tts_model) if use_openai else (edge_voice, "")
+
+
 class TTSWorker(BaseWorker):
     """Generate speech audio from text and a voice profile."""
 
-    def __init__(self, **kwargs) -> None:
-        super().__init__(worker_type="worker-audio-tts", **kwargs)
+    def __init__(self, worker_type: str = "worker-audio-tts", **kwargs) -> None:
+        super().__init__(worker_type=worker_type, **kwargs)
 
     async def execute(self, job_payload: dict) -> WorkerResult:
         job_id: str = job_payload.get("job_id", "")
@@ -52,39 +70,57 @@ class TTSWorker(BaseWorker):
             )
 
             t0 = time.monotonic()
-            openai_voice, edge_voice = _VOICE_MAP.get(voice_id, _DEFAULT_VOICE)
-
             api_key = self.settings.openai_api_key
-            if api_key:
-                audio_uri = await self._synthesize_openai(
-                    job_id, text, openai_voice, tts_model, output_format
-                )
-                backend = "openai"
+            voice, model = _provider_voice(voice_id, tts_model, bool(api_key))
+            backend = "openai" if api_key else "edge-tts"
+            ext = output_format if api_key else _edge_ext(output_format)
+            cost = len(text) / 1000 * _TTS_COST_PER_1K_CHARS.get(tts_model, 0.015) if api_key else 0.0
+
+            cache = None
+            if self.settings.tts_cache_enabled and job_payload.get("use_cache", True):
+                cache = get_tts_cache(self.settings)
+            cache_key = tts_cache_key(text, voice, model, output_format, backend)
+            cached = await cache.get(cache_key, ext) if cache is not None else None
+
+            cost_saved = 0.0
+            if cached is not None:
+                audio_uri, duration_ms = cached.audio_uri, cached.duration_ms
+                cost_saved, cost = cost, 0.0
             else:
-                audio_uri = await self._synthesize_edge_tts(
-                    job_id, text, edge_voice, output_format
-                )
-                backend = "edge-tts"
+                if api_key:
+                    local_path = await self._synthesize_openai(text, voice, tts_model, output_format)
+                else:
+                    local_path = await self._synthesize_edge_tts(text, voice, ext)
+                audio_uri, duration_ms = await self._store(local_path, job_id, ext, cache, cache_key)
 
             latency_ms = int((time.monotonic() - t0) * 1000)
-            cost = len(text) / 1000 * _TTS_COST_PER_1K_CHARS.get(tts_model, 0.015) if api_key else 0.0
 
             logger.info(
-                "job %s: TTS done backend=%s latency=%dms cost=$%.6f",
-                job_id, backend, latency_ms, cost,
+                "job %s: TTS done backend=%s cache=%s latency=%dms cost=$%.6f",
+                job_id, backend, "hit" if cached else "miss", latency_ms, cost,
             )
 
             return WorkerResult(
                 job_id=job_id,
                 run_id=run_id,
                 status="success",
+                artifact_uri=audio_uri,
+                metrics={
+                    "tts_cache_hits": 1 if cached is not None else 0,
+                    "tts_cache_misses": 1 if cache is not None and cached is None else 0,
+                    "tts_cost_saved": cost_saved,
+                    "latency_ms": latency_ms,
+                },
                 output={
                     "audio_uri": audio_uri,
                     "voice_id": voice_id,
                     "backend": backend,
                     "latency_ms": latency_ms,
+                    "duration_ms": duration_ms,
                     "cost_estimate": cost,
                     "char_count": len(text),
+                    "cache_key": cache_key,
+                    "cache_hit": cached is not None,
                 },
             )
         except Exception as exc:
@@ -99,60 +135,67 @@ class TTSWorker(BaseWorker):
 
     async def _synthesize_openai(
         self,
-        job_id: str,
         text: str,
         voice: str,
         model: str,
         fmt: str,
     ) -> str:
-        """Synthesize via OpenAI TTS API and upload to object storage."""
-        try:
-            from openai import AsyncOpenAI
-        except ImportError:
-            raise RuntimeError("openai SDK not installed; run: pip install openai")
-
-        client = AsyncOpenAI(
-            api_key=self.settings.openai_api_key,
-            base_url=self.settings.openai_base_url,
-        )
+        """Synthesize via OpenAI TTS API into a local temp file; return its path."""
+        client = get_client_registry().openai(self.settings.openai_base_url, self.settings.openai_api_key)
         response = await client.audio.speech.create(
             model=model,
             voice=voice,
             input=text,
             response_format=fmt,
         )
-        # Write to temp file then upload
         with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as tmp:
             tmp.write(await response.aread())
-            tmp_path = tmp.name
-
-        audio_uri = await self._upload(tmp_path, job_id, fmt)
-        os.unlink(tmp_path)
-        return audio_uri
+            return tmp.name
 
     async def _synthesize_edge_tts(
         self,
-        job_id: str,
         text: str,
         voice: str,
-        fmt: str,
+        ext: str,
     ) -> str:
-        """Synthesize via edge-tts (free Microsoft Neural voices)."""
+        """Synthesize via edge-tts (free Microsoft Neural voices); return the temp path."""
         try:
             import edge_tts
         except ImportError:
             raise RuntimeError("edge-tts not installed; run: pip install edge-tts")
 
-        ext = "mp3" if fmt in ("mp3", "audio-24khz-48kbitrate-mono-mp3") else fmt
         with tempfile.NamedTemporaryFile(suffix=f".{ext}", delete=False) as tmp:
             tmp_path = tmp.name
 
         communicate = edge_tts.Communicate(text=text, voice=voice)
         await communicate.save(tmp_path)
+        return tmp_path
 
-        audio_uri = await self._upload(tmp_path, job_id, ext)
-        os.unlink(tmp_path)
-        return audio_uri
+    async def _store(
+        self,
+        local_path: str,
+        job_id: str,
+        ext: str,
+        cache: TTSCache | None,
+        cache_key: str,
+    ) -> tuple[str, float]:
+        """Persist freshly synthesized audio; return ``(audio_uri, duration_ms)``.
+
+        Goes to the content-addressed cache when enabled, otherwise (or if
+        that upload fails) to the per-job ``tts/{job_id}`` key.
+        """
+        duration_ms = await _probe_duration_ms(local_path)
+        if cache is not None:
+            try:
+                entry = await cache.put(cache_key, ext, local_path, duration_ms)
+                os.unlink(local_path)
+                return entry.audio_uri, duration_ms
+            except Exception as exc:
+                logger.warning("TTS cache store failed (%s); uploading per job", exc)
+        audio_uri = await self._upload(local_path, job_id, ext)
+        if not audio_uri.startswith("file://"):
+            os.unlink(local_path)
+        return audio_uri, duration_ms
 
     async def _upload(self, local_path: str, job_id: str, ext: str) -> str:
         """Upload local file to object storage and return URI.
@@ -0,0 +1,240 @@
+"""Chapter-level TTS batch worker.
+
+One job carries every dialogue line of a chapter (``payload["lines"]``)
+instead of one broker round trip per line. Lines are synthesized with
+bounded concurrency, going through the same content-addressed cache as
+:class:`TTSWorker`. They are then loudness-normalized together in a single
+ffmpeg pass (:mod:`.loudness`) and uploaded as one WAV per line.
+
+Each line's result carries its ``audio_uri`` and the measured
+``actual_duration_ms``, and passes through the caller's own keys
+(``track_unit_id``, ``shot_id``, ``tts_task_id``, …). The results can
+therefore go straight into SKILL 06 ``audio_results`` without probing any
+files. A line that fails is reported on its own and does not fail the
+rest of the batch: if the shared loudness pass fails, each line is
+normalized on its own, and a line that still cannot be normalized is
+published as synthesized.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+
+from ainern2d_shared.schemas.worker import WorkerResult
+from ainern2d_shared.storage.client import get_storage_client
+from ainern2d_shared.telemetry.logging import get_logger
+
+from .align import _probe_duration_ms
+from .loudness import NormalizedLine, normalize_lines
+from .tts import _TTS_COST_PER_1K_CHARS, TTSWorker, _edge_ext, _provider_voice
+from .tts_cache import CachedAudio, get_tts_cache, tts_cache_key
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _LineAudio:
+    index: int
+    line: dict
+    local_path: str
+    cache_key: str
+    cached: CachedAudio | None
+    cost: float
+
+
+class TTSBatchWorker(TTSWorker):
+    """Synthesize and loudness-normalize all dialogue lines of a chapter."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(worker_type="worker-audio-tts-batch", **kwargs)
+
+    async def execute(self, job_payload: dict) -> WorkerResult:
+        job_id: str = job_payload.get("job_id", "")
+        run_id: str = job_payload.get("run_id", "")
+        work_dir = tempfile.mkdtemp(prefix="tts_batch_")
+        try:
+            lines: list[dict] = list(job_payload.get("lines") or [])
+            if not lines:
+                raise ValueError("tts batch job has no lines")
+            tts_model: str = job_payload.get("tts_model", "tts-1")
+            output_format: str = job_payload.get("output_format", "mp3")
+            lufs = float(job_payload.get("loudness_lufs", self.settings.tts_loudness_lufs))
+
+            logger.info("job %s: TTS batch lines=%d", job_id, len(lines))
+            t0 = time.monotonic()
+
+            cache = None
+            if self.settings.tts_cache_enabled and job_payload.get("use_cache", True):
+                cache = get_tts_cache(self.settings)
+            gate = asyncio.Semaphore(max(1, self.settings.tts_batch_concurrency))
+
+            async def _one(index: int, line: dict) -> _LineAudio:
+                async with gate:
+                    return await self._synthesize_line(index, line, tts_model, output_format, cache, work_dir)
+
+            outcomes = await asyncio.gather(
+                *(_one(i, line) for i, line in enumerate(lines)), return_exceptions=True,
+            )
+            audios = [o for o in outcomes if isinstance(o, _LineAudio)]
+            results: list[dict] = [
+                self._line_result(line, error=outcome) if isinstance(outcome, BaseException) else {}
+                for line, outcome in zip(lines, outcomes)
+            ]
+
+            normalized = await self._normalize(audios, os.path.join(work_dir, "norm"), lufs)
+            uploaded = await asyncio.gather(
+                *(self._publish_line(job_id, a, n, cache, gate) for a, n in zip(audios, normalized)),
+                return_exceptions=True,
+            )
+            for audio, outcome in zip(audios, uploaded):
+                if isinstance(outcome, BaseException):
+                    outcome = self._line_result(audio.line, error=outcome)
+                results[audio.index] = outcome
+
+            ok = [r for r in results if r["status"] == "succeeded"]
+            hits = sum(1 for a in audios if a.cached is not None)
+            latency_ms = int((time.monotonic() - t0) * 1000)
+            logger.info(
+                "job %s: TTS batch done lines=%d ok=%d cache_hits=%d latency=%dms",
+                job_id, len(lines), len(ok), hits, latency_ms,
+            )
+            if not ok:
+                raise RuntimeError(f"all {len(lines)} lines failed: {results[0].get('error_message')}")
+
+            return WorkerResult(
+                job_id=job_id,
+                run_id=run_id,
+                status="success",
+                metrics={
+                    "line_count": len(lines),
+                    "failed_lines": len(lines) - len(ok),
+                    "tts_cache_hits": hits,
+                    "tts_cache_misses": len(audios) - hits if cache is not None else 0,
+                    "tts_cost_saved": sum(a.cost for a in audios if a.cached is not None),
+                    "cost_estimate": sum(a.cost for a in audios if a.cached is None),
+                    "latency_ms": latency_ms,
+                },
+                output={
+                    "lines": results,
+                    "normalized": bool(normalized) and all(n.normalized for n in normalized),
+                    "loudness_lufs": lufs,
+                    "latency_ms": latency_ms,
+                },
+            )
+        except Exception as exc:
+            logger.exception("TTSBatchWorker failed for job %s", job_id)
+            return WorkerResult(
+                job_id=job_id,
+                run_id=run_id,
+                status="error",
+                error_code="TTS_BATCH_EXECUTION_ERROR",
+                error_message=str(exc),
+            )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    async def _synthesize_line(
+        self,
+        index: int,
+        line: dict,
+        tts_model: str,
+        output_format: str,
+        cache,
+        work_dir: str,
+    ) -> _LineAudio:
+        text = str(line.get("text") or "")
+        if not text.strip():
+            raise ValueError("empty text")
+        voice_id = line.get("voice_id") or line.get("speaker_id") or "narrator"
+        api_key = self.settings.openai_api_key
+        voice, model = _provider_voice(voice_id, tts_model, bool(api_key))
+        backend = "openai" if api_key else "edge-tts"
+        ext = output_format if api_key else _edge_ext(output_format)
+        cost = len(text) / 1000 * _TTS_COST_PER_1K_CHARS.get(tts_model, 0.015) if api_key else 0.0
+
+        key = tts_cache_key(text, voice, model, output_format, backend)
+        cached = await cache.get(key, ext) if cache is not None else None
+        if cached is not None:
+            local_path = os.path.join(work_dir, f"src_{index:04d}.{ext}")
+            await get_storage_client(self.settings).download_file(cached.audio_uri, local_path)
+        elif api_key:
+            local_path = await self._synthesize_openai(text, voice, tts_model, output_format)
+        else:
+            local_path = await self._synthesize_edge_tts(text, voice, ext)
+        if cached is None:
+            # Keep all sources in the batch work dir so they are cleaned up together.
+            moved = os.path.join(work_dir, f"src_{index:04d}.{ext}")
+            shutil.move(local_path, moved)
+            local_path = moved
+        return _LineAudio(index, line, local_path, key, cached, cost)
+
+    async def _normalize(self, audios: list[_LineAudio], out_dir: str, lufs: float) -> list[NormalizedLine]:
+        """One loudness pass for the batch; per-line passes if the shared one fails."""
+        try:
+            return await normalize_lines([a.local_path for a in audios], out_dir, lufs=lufs)
+        except Exception as exc:
+            logger.warning("batch loudness pass failed (%s); normalizing %d lines one by one", exc, len(audios))
+
+        async def _alone(audio: _LineAudio) -> NormalizedLine:
+            try:
+                (norm,) = await normalize_lines(
+                    [audio.local_path], os.path.join(out_dir, f"line_{audio.index:04d}"), lufs=lufs,
+                )
+                return norm
+            except Exception as exc:
+                logger.warning("loudness pass failed for line %s: %s", audio.index, exc)
+                return NormalizedLine(audio.local_path, 0.0, False)
+
+        return list(await asyncio.gather(*(_alone(a) for a in audios)))
+
+    async def _publish_line(self, job_id: str, audio: _LineAudio, norm, cache, gate: asyncio.Semaphore) -> dict:
+        async with gate:
+            # The raw synthesis is what the cache stores; normalization depends on the batch.
+            if cache is not None and audio.cached is None:
+                try:
+                    await cache.put(audio.cache_key, audio.local_path.rsplit(".", 1)[-1], audio.local_path, norm.duration_ms)
+                except Exception as exc:
+                    logger.warning("TTS cache store failed for line %s: %s", audio.index, exc)
+
+            line_id = audio.line.get("line_id") or audio.line.get("track_unit_id") or f"{audio.index:04d}"
+            ext = "wav" if norm.normalized else audio.local_path.rsplit(".", 1)[-1]
+            audio_uri = await self._upload(norm.path, f"{job_id}/{line_id}", ext)
+            if audio_uri.startswith("file://"):
+                raise RuntimeError("upload failed")  # the batch work dir is removed afterwards
+            duration_ms = norm.duration_ms or (audio.cached.duration_ms if audio.cached else 0.0)
+            if not duration_ms:
+                duration_ms = await _probe_duration_ms(audio.local_path)
+        return self._line_result(
+            audio.line,
+            audio_uri=audio_uri,
+            duration_ms=duration_ms,
+            cache_hit=audio.cached is not None,
+        )
+
+    @staticmethod
+    def _line_result(
+        line: dict,
+        *,
+        error: BaseException | None = None,
+        audio_uri: str | None = None,
+        duration_ms: float = 0.0,
+        cache_hit: bool = False,
+    ) -> dict:
+        """Per-line result; ``actual_duration_ms`` is ``None`` when it could not be measured."""
+        result = {k: v for k, v in line.items() if k != "text"}
+        result.setdefault("task_type", "tts")
+        if error is not None:
+            result.update(status="failed", error_message=str(error) or type(error).__name__)
+            return result
+        result.update(
+            status="succeeded",
+            audio_uri=audio_uri,
+            actual_duration_ms=int(round(duration_ms)) if duration_ms else None,
+            cache_hit=cache_hit,
+        )
+        return result
@@ -0,0 +1,139 @@
+"""Content-addressed cache of synthesized TTS audio.
+
+The same line is synthesized again and again: on retries, on
+``rerun_stage`` and for every A/B variant. Audio is stored once under
+``<prefix>/<key[:2]>/<key>.<ext>``, where the key is the sha256 of
+everything that determines the bytes: normalized text, the voice and
+model the provider is actually called with, output format and backend. A hit hands back the stored URI and duration
+without calling the provider.
+
+An in-process LRU index answers repeat hits without touching storage.
+Index misses fall back to a ``HEAD`` on the content-addressed key, so
+workers share hits through object storage and survive restarts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from ainern2d_shared.storage.client import StorageClient, get_storage_client
+from ainern2d_shared.telemetry.logging import get_logger
+
+logger = get_logger(__name__)
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_tts_text(text: str) -> str:
+    """NFKC + collapsed whitespace – differences that do not change the audio."""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def tts_cache_key(text: str, voice: str, model: str, output_format: str, backend: str) -> str:
+    """Key on the resolved provider *voice* and *model*, not the logical ``voice_id``.
+
+    Logical ids that map to the same provider voice share entries, and a
+    remapped voice misses instead of serving the old voice's audio.
+    """
+    raw = json.dumps(
+        {
+            "text": normalize_tts_text(text),
+            "voice": voice,
+            "model": model,
+            "output_format": output_format,
+            "backend": backend,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedAudio:
+    key: str
+    audio_uri: str
+    duration_ms: float
+
+
+class TTSCache:
+    def __init__(self, storage: StorageClient, prefix: str = "tts/cas", max_entries: int = 10000) -> None:
+        self._storage = storage
+        self._prefix = prefix.strip("/")
+        self._max_entries = max(1, max_entries)
+        self._index: OrderedDict[str, CachedAudio] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def object_key(self, key: str, ext: str) -> str:
+        return f"{self._prefix}/{key[:2]}/{key}.{ext}"
+
+    async def get(self, key: str, ext: str) -> CachedAudio | None:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None:
+                self._index.move_to_end(key)
+        if entry is None:
+            try:
+                obj = await self._storage.stat(self.object_key(key, ext))
+            except FileNotFoundError:
+                obj = None
+            except Exception as exc:
+                logger.warning("tts cache lookup failed for %s: %s", key, exc)
+                obj = None
+            if obj is not None:
+                entry = CachedAudio(key, obj.uri, float(obj.metadata.get("duration_ms") or 0.0))
+                self._remember(entry)
+        self._count("hits" if entry is not None else "misses")
+        return entry
+
+    async def put(self, key: str, ext: str, local_path: str, duration_ms: float) -> CachedAudio:
+        """Upload *local_path* under the content key and index it."""
+        obj = await self._storage.upload_file(
+            local_path,
+            self.object_key(key, ext),
+            metadata={"duration_ms": f"{duration_ms:.1f}"},
+        )
+        entry = CachedAudio(key, obj.uri, duration_ms)
+        self._remember(entry)
+        return entry
+
+    def _remember(self, entry: CachedAudio) -> None:
+        with self._lock:
+            self._index[entry.key] = entry
+            self._index.move_to_end(entry.key)
+            while len(self._index) > self._max_entries:
+                self._index.popitem(last=False)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+
+_caches: dict[tuple, TTSCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_tts_cache(settings: Any) -> TTSCache:
+    """Process-wide cache for *settings* (one LRU index per storage target)."""
+    key = (
+        settings.storage_backend, settings.s3_endpoint, settings.s3_bucket,
+        settings.storage_local_root, settings.tts_cache_prefix,
+    )
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = TTSCache(
+                get_storage_client(settings),
+                prefix=settings.tts_cache_prefix,
+                max_entries=settings.tts_cache_index_max_entries,
+            )
+        return cache
@@ -1,50 +1,20 @@
 """Lipsync alignment quality report generator.
 
-Uses ffprobe-based A/V sync measurement as a lightweight proxy for
-SyncNet confidence scores when the full SyncNet model is not available.
+Uses ffprobe-based A/V sync measurement (through the shared media probe
+service) as a lightweight proxy for SyncNet confidence scores when the full
+SyncNet model is not available.
 """
 
 from __future__ import annotations
 
-import asyncio
-import json
-import shutil
-
+from ainern2d_shared.services.media_probe import get_media_probe_service
 from ainern2d_shared.telemetry.logging import get_logger
 
-from app.worker_video.pipeline_i2v import _download_to_temp
-
 logger = get_logger(__name__)
 
-_FFPROBE_BIN = shutil.which("ffprobe") or "ffprobe"
-
-
-async def _probe_av_streams(local_path: str) -> dict:
-    """Run ffprobe and return stream info as a dict."""
-    cmd = [
-        _FFPROBE_BIN,
-        "-v", "quiet",
-        "-print_format", "json",
-        "-show_streams",
-        local_path,
-    ]
-    proc = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, _ = await proc.communicate()
-    if proc.returncode != 0:
-        return {}
-    try:
-        return json.loads(stdout.decode())
-    except json.JSONDecodeError:
-        return {}
-
-
-def _parse_drift_ms(stream_info: dict) -> float:
+
+def _parse_drift_ms(streams: list[dict] | tuple[dict, ...]) -> float:
     """Estimate A/V drift from start_time differences of audio and video streams."""
-    streams = stream_info.get("streams", [])
     video_start: float | None = None
     audio_start: float | None = None
     for s in streams:
@@ -106,10 +76,8 @@ class AlignmentReporter:
         )
 
         try:
-            local_output = await _download_to_temp(output_uri)
-            stream_info = await _probe_av_streams(local_output)
-
-            drift_ms = _parse_drift_ms(stream_info)
+            probe = await get_media_probe_service().probe(output_uri)
+            drift_ms = _parse_drift_ms(probe.streams)
             sync_accuracy = _compute_sync_accuracy(drift_ms)
 
             # Phoneme match rate: no light-weight model available without
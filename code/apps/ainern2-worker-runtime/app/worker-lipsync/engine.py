@@ -14,6 +14,7 @@ import tempfile
 import time
 
 from ainern2d_shared.schemas.worker import WorkerResult
+from ainern2d_shared.services.media_probe import MediaProbe, get_media_probe_service
 from ainern2d_shared.telemetry.logging import get_logger
 
 from app.common.base_worker import BaseWorker
@@ -22,6 +23,25 @@ from app.worker_video.pipeline_i2v import _download_to_temp
 logger = get_logger(__name__)
 
 
+def _duration_ms(probe: MediaProbe | BaseException) -> float | None:
+    return probe.duration_ms if isinstance(probe, MediaProbe) else None
+
+
+def _check_inputs(job_id: str, audio: MediaProbe | BaseException, video: MediaProbe | BaseException) -> None:
+    """Fail fast on inputs the lipsync backends cannot use.
+
+    A probe that could not run (no ffprobe, unreadable header) is only
+    logged; the backend then gets to try the file itself.
+    """
+    for name, probe in (("audio", audio), ("video", video)):
+        if isinstance(probe, BaseException):
+            logger.warning("job %s: could not probe %s input: %s", job_id, name, probe)
+    if isinstance(audio, MediaProbe) and not audio.has_audio:
+        raise ValueError("audio input has no audio stream")
+    if isinstance(video, MediaProbe) and not video.has_video:
+        raise ValueError("video input has no video stream")
+
+
 class LipsyncEngine(BaseWorker):
     """Generate a lip-synced video from audio + source video."""
 
@@ -46,6 +66,8 @@ class LipsyncEngine(BaseWorker):
             # Download inputs
             local_audio = await _download_to_temp(audio_uri)
             local_video = await _download_to_temp(video_uri)
+            audio_probe, video_probe = await get_media_probe_service().probe_many([local_audio, local_video])
+            _check_inputs(job_id, audio_probe, video_probe)
 
             output_path, used_backend = await self._run_lipsync(
                 job_id, local_audio, local_video, backend, pads
@@ -76,6 +98,8 @@ class LipsyncEngine(BaseWorker):
                     "audio_uri": audio_uri,
                     "source_video_uri": video_uri,
                     "backend": used_backend,
+                    "audio_duration_ms": _duration_ms(audio_probe),
+                    "video_duration_ms": _duration_ms(video_probe),
                     "latency_ms": latency_ms,
                 },
             )
@@ -3,14 +3,14 @@
 from __future__ import annotations
 import time
 
-import httpx
-
 from ainern2d_shared.schemas.worker import WorkerResult
 from ainern2d_shared.telemetry.logging import get_logger
 from ainern2d_shared.adapters.worker_llm_adapter import LLMWorkerAdapter
 from ainern2d_shared.ainer_db_models.provider_models import ProviderAdapter
 
 from app.common.base_worker import BaseWorker
+from app.common.http_clients import get_client_registry
+from app.common.streaming import iter_sse_json, openai_stream_delta, progress_for
 
 logger = get_logger(__name__)
 
@@ -53,15 +53,29 @@ class GenericLLMWorker(BaseWorker):
             
             t0 = time.monotonic()
             
-            async with httpx.AsyncClient(timeout=timeout) as client:
+            client = get_client_registry().http()
+            stream = bool(job_payload.get("stream", False)) and method.upper() == "POST"
+            first_token_ms = None
+            if stream:
+                # OpenAI-compatible SSE; the assembled text replaces data_path extraction.
+                progress = progress_for(self, job_id, run_id)
+                async with client.stream(
+                    "POST", url, headers=headers, json={**body, "stream": True}, timeout=timeout,
+                ) as resp:
+                    resp.raise_for_status()
+                    async for event in iter_sse_json(resp.aiter_lines()):
+                        await progress.feed(openai_stream_delta(event))
+                await progress.flush()
+                first_token_ms = progress.first_token_ms
+                data = {"streamed_text": progress.text}
+            else:
                 if method.upper() == "POST":
-                    resp = await client.post(url, headers=headers, json=body)
+                    resp = await client.post(url, headers=headers, json=body, timeout=timeout)
                 else:
-                    resp = await client.request(method, url, headers=headers)
-                
+                    resp = await client.request(method, url, headers=headers, timeout=timeout)
                 resp.raise_for_status()
                 data = resp.json()
-                
+
             latency_ms = int((time.monotonic() - t0) * 1000)
             
             # The adapter should parse the result based on response_json data_path 
@@ -69,7 +83,9 @@ class GenericLLMWorker(BaseWorker):
             # But the spec says: 依据 response_json.data_path 提取结果
             output_text = data
             data_path = adapter_spec_dict.get("response_json", {}).get("data_path")
-            if data_path:
+            if stream:
+                output_text = data["streamed_text"]
+            elif data_path:
                 # e.g., "choices.0.message.content"
                 for p in data_path.split("."):
                     if isinstance(output_text, list):
@@ -88,7 +104,9 @@ class GenericLLMWorker(BaseWorker):
                     "output_text": output_text,
                     "latency_ms": latency_ms,
                     "model_id": job_payload.get("model_profile_id", "generic"),
-                    "raw_response": data
+                    "raw_response": data,
+                    "streamed": stream,
+                    "first_token_ms": first_token_ms,
                 },
             )
         except Exception as exc:
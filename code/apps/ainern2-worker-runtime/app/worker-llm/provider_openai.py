@@ -8,6 +8,8 @@ from ainern2d_shared.schemas.worker import WorkerResult
 from ainern2d_shared.telemetry.logging import get_logger
 
 from app.common.base_worker import BaseWorker
+from app.common.http_clients import get_client_registry
+from app.common.streaming import complete_chat, progress_for
 
 logger = get_logger(__name__)
 
@@ -37,21 +39,13 @@ class OpenAIProvider(BaseWorker):
             temperature: float = job_payload.get("temperature", 0.7)
             system_prompt: str = job_payload.get("system_prompt", "You are a helpful assistant.")
             rag_fragments: list[str] = job_payload.get("rag_fragments", [])
-
-            # Import lazily so the worker still runs even without the SDK
-            try:
-                from openai import AsyncOpenAI
-            except ImportError:
-                raise RuntimeError("openai SDK not installed; run: pip install openai")
+            stream: bool = bool(job_payload.get("stream", False))
 
             api_key: str = self.settings.openai_api_key
             if not api_key:
                 raise RuntimeError("OPENAI_API_KEY environment variable is not set")
 
-            client = AsyncOpenAI(
-                api_key=api_key,
-                base_url=self.settings.openai_base_url,
-            )
+            client = get_client_registry().openai(self.settings.openai_base_url, api_key)
 
             messages: list[dict] = [{"role": "system", "content": system_prompt}]
             if rag_fragments:
@@ -61,12 +55,14 @@ class OpenAIProvider(BaseWorker):
                 messages.append({"role": "user", "content": prompt})
 
             logger.info(
-                "job %s: calling OpenAI model=%s max_tokens=%d",
-                job_id, model_id, max_tokens,
+                "job %s: calling OpenAI model=%s max_tokens=%d stream=%s",
+                job_id, model_id, max_tokens, stream,
             )
 
             t0 = time.monotonic()
-            response = await client.chat.completions.create(
+            completion = await complete_chat(
+                client,
+                progress=progress_for(self, job_id, run_id) if stream else None,
                 model=model_id,
                 messages=messages,
                 max_tokens=max_tokens,
@@ -74,11 +70,10 @@ class OpenAIProvider(BaseWorker):
             )
             latency_ms = int((time.monotonic() - t0) * 1000)
 
-            output_text = response.choices[0].message.content or ""
-            usage = response.usage
-            prompt_tokens = usage.prompt_tokens if usage else 0
-            completion_tokens = usage.completion_tokens if usage else 0
-            total_tokens = usage.total_tokens if usage else 0
+            output_text = completion.text
+            prompt_tokens = completion.prompt_tokens
+            completion_tokens = completion.completion_tokens
+            total_tokens = completion.total_tokens
 
             in_cost, out_cost = _COST_TABLE.get(model_id, _DEFAULT_COST)
             cost_estimate = (prompt_tokens / 1000 * in_cost) + (completion_tokens / 1000 * out_cost)
@@ -102,6 +97,8 @@ class OpenAIProvider(BaseWorker):
                     "cost_estimate": cost_estimate,
                     "latency_ms": latency_ms,
                     "model_id": model_id,
+                    "streamed": stream,
+                    "first_token_ms": completion.first_token_ms,
                 },
             )
         except Exception as exc:
@@ -1,6 +1,7 @@
 from .comfyui_client import ComfyUIClient
+from .comfyui_session import ComfyUISession
 from .pipeline_i2v import I2VPipeline
 from .pipeline_v2v import V2VPipeline
 from .postprocess import VideoPostProcessor
 
-__all__ = ["ComfyUIClient", "I2VPipeline", "V2VPipeline", "VideoPostProcessor"]
+__all__ = ["ComfyUIClient", "ComfyUISession", "I2VPipeline", "V2VPipeline", "VideoPostProcessor"]
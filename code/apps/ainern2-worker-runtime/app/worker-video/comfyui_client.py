@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
 from typing import Any
 
@@ -23,13 +24,18 @@ class ComfyUIClient:
     # Public API
     # ------------------------------------------------------------------
 
-    async def queue_prompt(self, workflow: dict) -> str:
+    async def queue_prompt(self, workflow: dict, client_id: str | None = None) -> str:
         """POST a workflow to ``/prompt`` and return the *prompt_id*.
 
+        Progress and completion messages for the prompt go to the ``/ws``
+        subscriber registered under *client_id*.
+
         Returns:
             The prompt_id assigned by ComfyUI.
         """
         payload: dict[str, Any] = {"prompt": workflow}
+        if client_id:
+            payload["client_id"] = client_id
         resp = await self._client.post("/prompt", json=payload)
         resp.raise_for_status()
         data = resp.json()
@@ -43,34 +49,55 @@ class ComfyUIClient:
         resp.raise_for_status()
         return resp.json()
 
-    async def download_output(self, prompt_id: str, output_dir: str) -> list[str]:
+    async def download_output(
+        self,
+        prompt_id: str,
+        output_dir: str,
+        outputs: dict[str, dict] | None = None,
+        max_concurrency: int = 4,
+    ) -> list[str]:
         """Download generated images/videos for *prompt_id* into *output_dir*.
 
+        *outputs* (node id → output, as collected from the websocket) saves
+        the ``/history`` lookup. Files are streamed to disk concurrently.
+
         Returns:
-            List of local file paths that were downloaded.
+            List of local file paths that were downloaded, in node order.
         """
         os.makedirs(output_dir, exist_ok=True)
 
-        status = await self.get_status(prompt_id)
-        outputs = status.get(prompt_id, {}).get("outputs", {})
-        downloaded: list[str] = []
-
-        for _node_id, node_out in outputs.items():
-            for item in node_out.get("images", []) + node_out.get("videos", []):
-                filename = item.get("filename", "")
-                if not filename:
-                    continue
-                subfolder = item.get("subfolder", "")
-                url = f"{self.base_url}/view?filename={filename}&subfolder={subfolder}"
-                resp = await self._client.get(url)
-                resp.raise_for_status()
-                dest = os.path.join(output_dir, filename)
-                with open(dest, "wb") as fh:
-                    fh.write(resp.content)
-                downloaded.append(dest)
-                logger.info("downloaded %s", dest)
-
-        return downloaded
+        if not outputs:
+            status = await self.get_status(prompt_id)
+            outputs = status.get(prompt_id, {}).get("outputs", {})
+        items = [
+            item
+            for node_out in outputs.values()
+            for item in node_out.get("images", []) + node_out.get("videos", []) + node_out.get("gifs", [])
+            if item.get("filename")
+        ]
+        gate = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _fetch(item: dict) -> str:
+            async with gate:
+                return await self._download_file(item, output_dir)
+
+        return list(await asyncio.gather(*(_fetch(item) for item in items)))
+
+    async def _download_file(self, item: dict, output_dir: str) -> str:
+        filename = item["filename"]
+        params = {
+            "filename": filename,
+            "subfolder": item.get("subfolder", ""),
+            "type": item.get("type", "output"),
+        }
+        dest = os.path.join(output_dir, os.path.basename(filename))
+        async with self._client.stream("GET", "/view", params=params) as resp:
+            resp.raise_for_status()
+            with open(dest, "wb") as fh:
+                async for chunk in resp.aiter_bytes(1024 * 1024):
+                    fh.write(chunk)
+        logger.info("downloaded %s", dest)
+        return dest
 
     async def close(self) -> None:
         """Close the underlying HTTP client."""
@@ -0,0 +1,332 @@
+"""ComfyUI completion tracking over the ``/ws`` progress stream.
+
+Polling ``GET /history/{prompt_id}`` for every in-flight job puts steady
+load on the GPU node and adds up to one poll interval of latency.
+Instead, one :class:`ComfyUISession` per backend holds a single websocket
+subscription under its own ``client_id``. Prompts queued with that
+``client_id`` report their node progress, their outputs (``executed``)
+and their completion on that socket. The session multiplexes them onto
+one future per ``prompt_id``.
+
+The socket reconnects with backoff. While it is down, waiters poll
+``/history`` every ``poll_interval_s`` themselves, so a backend whose
+socket never connects costs one poll interval of latency rather than the
+whole timeout. After every reconnect, pending prompts are checked once
+against ``/history``, so a completion missed while the socket was down is
+still picked up. A prompt that finishes before
+:meth:`ComfyUISession.wait` is called (e.g. a fully cached workflow) is
+remembered briefly and resolved immediately.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from ainern2d_shared.telemetry.logging import get_logger
+
+from app.worker_video.comfyui_client import ComfyUIClient
+
+logger = get_logger(__name__)
+
+ProgressCallback = Callable[[dict], "Awaitable[None] | None"]
+
+_RECENT_MAX = 256
+
+
+class ComfyUIExecutionError(RuntimeError):
+    pass
+
+
+class _Pending:
+    __slots__ = ("future", "outputs", "on_progress")
+
+    def __init__(self, future: asyncio.Future, on_progress: ProgressCallback | None) -> None:
+        self.future = future
+        self.outputs: dict[str, dict] = {}
+        self.on_progress = on_progress
+
+
+class ComfyUISession:
+    """One websocket subscription to a ComfyUI backend, shared by all jobs."""
+
+    def __init__(
+        self,
+        client: ComfyUIClient,
+        reconnect_delay_s: float = 1.0,
+        max_reconnect_delay_s: float = 30.0,
+        poll_interval_s: float = 3.0,
+    ) -> None:
+        self.client = client
+        self.client_id = uuid.uuid4().hex
+        self._reconnect_delay_s = reconnect_delay_s
+        self._max_reconnect_delay_s = max_reconnect_delay_s
+        self._poll_interval_s = poll_interval_s
+        self._pending: dict[str, _Pending] = {}
+        # Outcomes of prompts nobody was waiting for yet: prompt_id → outputs | error.
+        self._recent: OrderedDict[str, dict | BaseException] = OrderedDict()
+        self._early_outputs: dict[str, dict[str, dict]] = {}
+        self._reader: asyncio.Task | None = None
+        self._callbacks: set[asyncio.Task] = set()
+        self.connected = asyncio.Event()
+
+    @property
+    def ws_url(self) -> str:
+        base = self.client.base_url
+        scheme = "wss" if base.startswith("https://") else "ws"
+        return f"{scheme}://{base.split('://', 1)[-1]}/ws?clientId={self.client_id}"
+
+    def start(self) -> None:
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read_forever(), name=f"comfyui-ws-{self.client_id[:8]}")
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader = None
+        for pending in self._pending.values():
+            if not pending.future.done():
+                pending.future.set_exception(ComfyUIExecutionError("ComfyUI session closed"))
+        self._pending.clear()
+
+    # ── waiting ──────────────────────────────────────────────────────
+    async def wait(
+        self,
+        prompt_id: str,
+        timeout_s: float,
+        on_progress: ProgressCallback | None = None,
+    ) -> dict[str, dict]:
+        """Wait for *prompt_id* to finish and return its outputs by node id.
+
+        The outputs come from the ``executed`` messages and can be empty
+        when every output node was cached; callers then read ``/history``.
+        While the socket is not connected, ``/history`` is polled every
+        ``poll_interval_s``. Raises :class:`ComfyUIExecutionError` on
+        ``execution_error`` or interruption, and :class:`TimeoutError`
+        after *timeout_s*; either way the prompt stops being tracked.
+        """
+        self.start()
+        recent = self._recent.pop(prompt_id, None)
+        if recent is not None:
+            if isinstance(recent, BaseException):
+                raise recent
+            return recent
+
+        pending = self._pending.get(prompt_id)
+        if pending is None:
+            pending = self._pending[prompt_id] = _Pending(asyncio.get_running_loop().create_future(), on_progress)
+            pending.outputs.update(self._early_outputs.pop(prompt_id, {}))
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout_s
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    return await asyncio.wait_for(
+                        asyncio.shield(pending.future), timeout=min(remaining, self._poll_interval_s),
+                    )
+                except asyncio.TimeoutError:
+                    if not self.connected.is_set() and await self._check_history(prompt_id):
+                        return pending.future.result()
+            # One last look, in case the completion message was lost.
+            if await self._check_history(prompt_id):
+                return pending.future.result()
+            raise TimeoutError(f"ComfyUI prompt {prompt_id} timed out after {timeout_s}s")
+        finally:
+            if self._pending.get(prompt_id) is pending:
+                del self._pending[prompt_id]
+
+    async def _check_history(self, prompt_id: str) -> bool:
+        try:
+            return await self._resolve_from_history(prompt_id)
+        except Exception as exc:
+            logger.debug("history check for %s failed: %s", prompt_id, exc)
+            return False
+
+    # ── socket ───────────────────────────────────────────────────────
+    async def _read_forever(self) -> None:
+        import websockets
+
+        delay = self._reconnect_delay_s
+        while True:
+            try:
+                async with websockets.connect(self.ws_url, max_size=None, ping_interval=20) as ws:
+                    self.connected.set()
+                    delay = self._reconnect_delay_s
+                    logger.info("ComfyUI ws connected %s", self.client.base_url)
+                    await self._sweep_history()
+                    async for message in ws:
+                        if isinstance(message, str):
+                            self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("ComfyUI ws %s disconnected: %s; retrying in %.0fs", self.client.base_url, exc, delay)
+            finally:
+                self.connected.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self._max_reconnect_delay_s)
+
+    async def _sweep_history(self) -> None:
+        for prompt_id in list(self._pending):
+            await self._check_history(prompt_id)
+
+    async def _resolve_from_history(self, prompt_id: str) -> bool:
+        history = await self.client.get_status(prompt_id)
+        entry = history.get(prompt_id)
+        if not entry:
+            return False
+        status = entry.get("status") or {}
+        if status.get("status_str") == "error":
+            self._finish(prompt_id, error=ComfyUIExecutionError(f"ComfyUI prompt {prompt_id} failed"))
+        else:
+            self._finish(prompt_id, outputs=entry.get("outputs") or {})
+        return True
+
+    def _dispatch(self, raw: str) -> None:
+        try:
+            message = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        kind = message.get("type")
+        data = message.get("data") or {}
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return
+
+        if kind == "executed":
+            outputs = self._pending[prompt_id].outputs if prompt_id in self._pending \
+                else self._early_outputs.setdefault(prompt_id, {})
+            outputs[str(data.get("node"))] = data.get("output") or {}
+        elif kind == "execution_success" or (kind == "executing" and data.get("node") is None):
+            pending = self._pending.get(prompt_id)
+            self._finish(prompt_id, outputs=pending.outputs if pending else self._early_outputs.pop(prompt_id, {}))
+        elif kind == "execution_error":
+            self._finish(prompt_id, error=ComfyUIExecutionError(
+                f"ComfyUI node {data.get('node_id')} ({data.get('node_type')}) failed: "
+                f"{data.get('exception_message', '').strip()}"
+            ))
+        elif kind == "execution_interrupted":
+            self._finish(prompt_id, error=ComfyUIExecutionError(f"ComfyUI prompt {prompt_id} was interrupted"))
+        elif kind in ("progress", "executing"):
+            pending = self._pending.get(prompt_id)
+            if pending is not None and pending.on_progress is not None:
+                self._notify(pending.on_progress, {
+                    "event": kind,
+                    "prompt_id": prompt_id,
+                    "node": data.get("node"),
+                    "value": data.get("value"),
+                    "max": data.get("max"),
+                    "ts": time.time(),
+                })
+
+    def _finish(self, prompt_id: str, *, outputs: dict | None = None, error: BaseException | None = None) -> None:
+        pending = self._pending.get(prompt_id)
+        self._early_outputs.pop(prompt_id, None)
+        if pending is None:
+            self._recent[prompt_id] = error if error is not None else (outputs or {})
+            while len(self._recent) > _RECENT_MAX:
+                self._recent.popitem(last=False)
+            return
+        if pending.future.done():
+            return
+        if error is not None:
+            pending.future.set_exception(error)
+        else:
+            pending.future.set_result(outputs or {})
+
+    def _notify(self, callback: ProgressCallback, payload: dict) -> None:
+        try:
+            result = callback(payload)
+        except Exception as exc:
+            logger.warning("ComfyUI progress callback failed: %s", exc)
+            return
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._callbacks.add(task)
+            task.add_done_callback(self._callbacks.discard)
+
+
+class NodeProgressReporter:
+    """Turns ComfyUI ``executing``/``progress`` messages into ``job.progress`` events.
+
+    A node change always goes out. Sampler steps are throttled to one event
+    per ``interval_ms``, except the last step of a node.
+    """
+
+    def __init__(self, emit: Callable[[dict], Awaitable[None]], prompt_id: str, interval_ms: int = 1000) -> None:
+        self._emit = emit
+        self._prompt_id = prompt_id
+        self._interval = interval_ms / 1000.0
+        self._started = time.monotonic()
+        self._last = 0.0
+        self._seq = 0
+        self._node: str | None = None
+
+    async def __call__(self, event: dict) -> None:
+        now = time.monotonic()
+        node = event.get("node")
+        if event["event"] == "executing":
+            if node == self._node:
+                return
+            self._node = node
+        else:
+            value, maximum = event.get("value") or 0, event.get("max") or 0
+            if value < maximum and now - self._last < self._interval:
+                return
+        self._seq += 1
+        self._last = now
+        payload = {
+            "seq": self._seq,
+            "stage": "comfyui",
+            "prompt_id": self._prompt_id,
+            "node": node,
+            "elapsed_ms": int((now - self._started) * 1000),
+        }
+        if event["event"] == "progress" and event.get("max"):
+            payload.update(step=event["value"], steps=event["max"], percent=round(100.0 * event["value"] / event["max"], 1))
+        try:
+            await self._emit(payload)
+        except Exception as exc:  # progress is best-effort
+            logger.warning("job.progress emit failed: %s", exc)
+
+
+_sessions: dict[str, ComfyUISession] = {}
+
+
+def websocket_available() -> bool:
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_comfyui_session(client: ComfyUIClient) -> ComfyUISession:
+    """Process-wide session per backend URL; the first caller's client is used.
+
+    Like the pooled provider clients, a session belongs to the event loop
+    that first used it – the JobLoop runs one persistent loop per process.
+    """
+    session = _sessions.get(client.base_url)
+    if session is None:
+        session = _sessions[client.base_url] = ComfyUISession(client)
+    session.start()
+    return session
+
+
+async def close_comfyui_sessions() -> None:
+    sessions = list(_sessions.values())
+    _sessions.clear()
+    await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
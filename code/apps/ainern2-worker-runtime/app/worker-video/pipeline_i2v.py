@@ -14,6 +14,13 @@ from ainern2d_shared.telemetry.logging import get_logger
 
 from app.common.base_worker import BaseWorker
 from app.worker_video.comfyui_client import ComfyUIClient
+from app.worker_video.comfyui_session import (
+    ComfyUISession,
+    NodeProgressReporter,
+    close_comfyui_sessions,
+    get_comfyui_session,
+    websocket_available,
+)
 
 logger = get_logger(__name__)
 
@@ -101,15 +108,12 @@ class I2VPipeline(BaseWorker):
             workflow["4"]["inputs"]["seed"] = seed
 
             # 4. Queue workflow on ComfyUI
-            prompt_id = await self._comfy.queue_prompt(workflow)
+            session = _comfy_session(self, self._comfy)
+            prompt_id = await self._comfy.queue_prompt(workflow, client_id=session.client_id if session else None)
             logger.info("job %s: queued ComfyUI prompt %s", job_id, prompt_id)
 
-            # 5. Poll until complete (with timeout)
-            await _poll_until_done(self._comfy, prompt_id)
-
-            # 6. Download output files
-            output_dir = tempfile.mkdtemp(prefix="i2v_")
-            output_files = await self._comfy.download_output(prompt_id, output_dir)
+            # 5-6. Wait for completion (with timeout) and download output files
+            output_files = await _wait_and_download(self, self._comfy, session, prompt_id, job_id, run_id, "i2v_")
             if not output_files:
                 raise RuntimeError("ComfyUI produced no output files")
 
@@ -135,6 +139,9 @@ class I2VPipeline(BaseWorker):
                 error_message=str(exc),
             )
 
+    async def aclose(self) -> None:
+        await close_comfyui_sessions()
+
     async def _upload_image_to_comfy(self, local_path: str, job_id: str) -> str:
         """Upload a local image to ComfyUI and return the filename it assigned."""
         async with httpx.AsyncClient(base_url=self._comfy.base_url, timeout=30.0) as client:
@@ -163,28 +170,50 @@ class I2VPipeline(BaseWorker):
 # ---------------------------------------------------------------------------
 
 async def _download_to_temp(uri: str) -> str:
-    """Download a URI (http/s3/file) to a local temp file; return path."""
-    if uri.startswith("file://"):
-        return uri[len("file://"):]
-
-    suffix = os.path.splitext(uri)[-1] or ".png"
-    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-        tmp_path = tmp.name
-
-    if uri.startswith("s3://"):
-        # Parse bucket/key and use boto3
-        parts = uri[5:].split("/", 1)
-        bucket, key = parts[0], parts[1] if len(parts) > 1 else ""
-        import boto3
-        s3 = boto3.client("s3")
-        await asyncio.to_thread(s3.download_file, bucket, key, tmp_path)
+    """Download a URI (http/s3/file) to a local temp file; return path.
+
+    Streams straight to disk through the shared storage client, so memory
+    stays flat however large the video is.
+    """
+    from ainern2d_shared.storage.client import get_storage_client
+
+    return await get_storage_client().download_to_temp(uri, default_suffix=".png")
+
+
+def _comfy_session(worker: BaseWorker, comfy: ComfyUIClient) -> ComfyUISession | None:
+    """Shared ``/ws`` session for *comfy*, or ``None`` to fall back to polling."""
+    if not worker.settings.comfyui_ws_enabled:
+        return None
+    if not websocket_available():
+        logger.warning("websockets not installed; polling ComfyUI /history instead")
+        return None
+    return get_comfyui_session(comfy)
+
+
+async def _wait_and_download(
+    worker: BaseWorker,
+    comfy: ComfyUIClient,
+    session: ComfyUISession | None,
+    prompt_id: str,
+    job_id: str,
+    run_id: str,
+    prefix: str,
+) -> list[str]:
+    """Wait for *prompt_id* (websocket or polling) and stream its outputs to a temp dir."""
+    outputs = None
+    if session is not None:
+        reporter = NodeProgressReporter(
+            lambda payload: worker.report_progress(job_id, run_id, payload),
+            prompt_id,
+            interval_ms=worker.settings.comfyui_progress_interval_ms,
+        )
+        outputs = await session.wait(prompt_id, _POLL_TIMEOUT_S, on_progress=reporter)
     else:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.get(uri)
-            resp.raise_for_status()
-            with open(tmp_path, "wb") as fh:
-                fh.write(resp.content)
-    return tmp_path
+        await _poll_until_done(comfy, prompt_id)
+    output_dir = tempfile.mkdtemp(prefix=prefix)
+    return await comfy.download_output(
+        prompt_id, output_dir, outputs, max_concurrency=worker.settings.comfyui_download_concurrency,
+    )
 
 
 async def _poll_until_done(
@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import os
-import tempfile
 import time
 
 from ainern2d_shared.schemas.worker import WorkerResult
@@ -11,7 +10,8 @@ from ainern2d_shared.telemetry.logging import get_logger
 
 from app.common.base_worker import BaseWorker
 from app.worker_video.comfyui_client import ComfyUIClient
-from app.worker_video.pipeline_i2v import _download_to_temp, _poll_until_done
+from app.worker_video.comfyui_session import close_comfyui_sessions
+from app.worker_video.pipeline_i2v import _comfy_session, _download_to_temp, _wait_and_download
 
 logger = get_logger(__name__)
 
@@ -94,15 +94,12 @@ class V2VPipeline(BaseWorker):
             workflow["4"]["inputs"]["denoise"] = denoise
 
             # 3. Queue on ComfyUI
-            prompt_id = await self._comfy.queue_prompt(workflow)
+            session = _comfy_session(self, self._comfy)
+            prompt_id = await self._comfy.queue_prompt(workflow, client_id=session.client_id if session else None)
             logger.info("job %s: queued ComfyUI prompt %s", job_id, prompt_id)
 
-            # 4. Poll until done (with timeout)
-            await _poll_until_done(self._comfy, prompt_id)
-
-            # 5. Download outputs
-            output_dir = tempfile.mkdtemp(prefix="v2v_")
-            output_files = await self._comfy.download_output(prompt_id, output_dir)
+            # 4-5. Wait until done (with timeout) and download outputs
+            output_files = await _wait_and_download(self, self._comfy, session, prompt_id, job_id, run_id, "v2v_")
             if not output_files:
                 raise RuntimeError("ComfyUI produced no output files")
             os.unlink(local_video)
@@ -129,6 +126,9 @@ class V2VPipeline(BaseWorker):
                 error_message=str(exc),
             )
 
+    async def aclose(self) -> None:
+        await close_comfyui_sessions()
+
     async def _upload_output(self, local_path: str, job_id: str) -> str:
         try:
             from ainern2d_shared.storage.s3 import S3Client
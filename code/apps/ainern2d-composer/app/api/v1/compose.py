@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import asyncio
+import os
+import threading
+import time
 from datetime import datetime, timezone
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from ainern2d_shared.ainer_db_models.enum_models import JobStatus, JobType, RenderStage
@@ -11,22 +16,51 @@ from ainern2d_shared.ainer_db_models.pipeline_models import Job
 from ainern2d_shared.config.setting import settings
 from ainern2d_shared.db.session import SessionLocal, get_db
 from ainern2d_shared.db.repositories.pipeline import JobRepository
-from ainern2d_shared.queue.rabbitmq import RabbitMQConsumer, RabbitMQPublisher
+from ainern2d_shared.queue.rabbitmq import RabbitMQConsumer, get_publisher
 from ainern2d_shared.queue.topics import SYSTEM_TOPICS
 from ainern2d_shared.schemas.events import EventEnvelope
 from ainern2d_shared.schemas.task import ComposeRequest
+from ainern2d_shared.schemas.timeline import TimelinePlanDto
+from ainern2d_shared.storage.client import get_storage_client
 from ainern2d_shared.telemetry.logging import get_logger
 
+from app.compose import ComposeEngine, ComposeProgress, ComposeResult, SegmentCache
+
 router = APIRouter(prefix="/internal", tags=["composer"])
 
 _logger = get_logger("composer")
 
 
 @router.post("/compose", status_code=202)
-def compose(request: ComposeRequest, db: Session = Depends(get_db)) -> dict[str, str]:
-    compose_job_id = f"compose_{uuid4().hex}"
-    now = datetime.now(timezone.utc)
+def compose(
+    request: ComposeRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+) -> dict[str, str]:
+    compose_job_id = _create_compose_job(db, request)
+    background_tasks.add_task(run_compose_job, compose_job_id, request)
+    return {"compose_job_id": compose_job_id, "status": "started"}
+
+
+@router.get("/compose/{compose_job_id}")
+def get_compose(compose_job_id: str, db: Session = Depends(get_db)) -> dict:
+    job = JobRepository(db).get(compose_job_id)
+    if job is None or job.job_type != JobType.compose_final:
+        raise HTTPException(status_code=404, detail="compose job not found")
+    result = job.result_json or {}
+    return {
+        "compose_job_id": job.id,
+        "status": job.status.value,
+        "progress": result.get("progress"),
+        "artifact_uri": result.get("artifact_uri"),
+        "error_code": job.error_code,
+        "error_message": job.error_message,
+    }
+
 
+def _create_compose_job(db: Session, request: ComposeRequest) -> str:
+    """Persist the compose job as queued and commit, so it is visible before rendering starts."""
+    compose_job_id = f"compose_{uuid4().hex}"
     job = Job(
         id=compose_job_id,
         tenant_id=request.tenant_id,
@@ -37,16 +71,98 @@ def compose(request: ComposeRequest, db: Session = Depends(get_db)) -> dict[str,
         run_id=request.run_id,
         job_type=JobType.compose_final,
         stage=RenderStage.compose,
-        status=JobStatus.running,
+        status=JobStatus.queued,
         priority=0,
         payload_json={"timeline_final": request.timeline_final, "artifact_refs": request.artifact_refs},
+        result_json={"progress": {"done": 0, "total": 0, "fraction": 0.0}},
     )
-    job_repo = JobRepository(db)
-    job_repo.create(job)
+    JobRepository(db).create(job)
+    db.commit()
+    return compose_job_id
+
 
-    # Mock: auto-complete for dev
-    completed = EventEnvelope(
-        event_type="compose.completed",
+def run_compose_job(compose_job_id: str, request: ComposeRequest) -> None:
+    """Render a queued compose job, persisting progress and the final status.
+
+    Every DB write uses its own short-lived session, so no connection is held
+    while ffmpeg runs. The rendered file is uploaded to object storage and its
+    URI is the job's artifact. Any failure, including a storage or DB error,
+    fails the job and publishes ``compose.failed``.
+    """
+    result: ComposeResult | None = None
+    artifact_uri = f"s3://{settings.s3_bucket}/{request.run_id}/final.mp4"
+    error: str | None = None
+    try:
+        _update_job(compose_job_id, status=JobStatus.running)
+        timeline = _renderable_timeline(request.timeline_final)
+        if timeline is not None:
+            output_path = os.path.join(settings.composer_output_dir, request.run_id, "final.mp4")
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            engine = ComposeEngine(max_workers=settings.composer_max_workers or None, cache=_segment_cache())
+            result = engine.compose(
+                timeline, output_path, on_progress=_persist_progress(compose_job_id),
+            )
+            artifact_uri = _upload_artifact(result.output_uri, request)
+    except Exception as exc:
+        _logger.error("compose failed job={} reason={}", compose_job_id, str(exc))
+        error = str(exc) or type(exc).__name__
+
+    if error is not None:
+        event_type = "compose.failed"
+        payload = {
+            "compose_job_id": compose_job_id,
+            "error_code": "COMPOSE-FFMPEG-001",
+            "error_message": error[:1024],
+        }
+    elif result is not None:
+        event_type = "compose.completed"
+        payload = {
+            "compose_job_id": compose_job_id,
+            "artifact_uri": artifact_uri,
+            "segments": len(result.segments),
+            "rendered_segments": result.rendered,
+            "reused_segments": len(result.reused),
+            "timings_ms": result.timings_ms,
+        }
+    else:
+        # Mock: auto-complete for dev when the timeline has no rendered clips
+        event_type = "compose.completed"
+        payload = {
+            "compose_job_id": compose_job_id,
+            "artifact_uri": artifact_uri,
+        }
+
+    try:
+        if error is not None:
+            _update_job(
+                compose_job_id,
+                status=JobStatus.failed,
+                error_code=payload["error_code"],
+                error_message=payload["error_message"],
+            )
+        else:
+            total = len(result.segments) if result else 0
+            _update_job(
+                compose_job_id,
+                status=JobStatus.success,
+                result_json={
+                    **payload,
+                    "progress": {"done": total, "total": total, "fraction": 1.0},
+                    "segment_timings": [
+                        {
+                            "index": seg.index, "start_ms": seg.start_ms, "end_ms": seg.end_ms,
+                            "elapsed_ms": seg.elapsed_ms, "cache_key": seg.cache_key, "cached": seg.cached,
+                        }
+                        for seg in (result.segments if result else [])
+                    ],
+                },
+            )
+    except Exception as exc:
+        # The status event below still reports the outcome.
+        _logger.error("compose status write failed job={} reason={}", compose_job_id, str(exc))
+
+    status_event = EventEnvelope(
+        event_type=event_type,
         producer="composer",
         occurred_at=datetime.now(timezone.utc),
         tenant_id=request.tenant_id,
@@ -55,23 +171,99 @@ def compose(request: ComposeRequest, db: Session = Depends(get_db)) -> dict[str,
         run_id=request.run_id,
         trace_id=request.trace_id,
         correlation_id=request.correlation_id,
-        payload={
-            "compose_job_id": compose_job_id,
-            "artifact_uri": f"s3://ainer-artifacts/{request.run_id}/final.mp4",
-        },
+        payload=payload,
     )
     try:
-        publisher = RabbitMQPublisher(settings.rabbitmq_url)
-        publisher.publish(SYSTEM_TOPICS.COMPOSE_STATUS, completed.model_dump(mode="json"))
-        publisher.close()
+        get_publisher(settings.rabbitmq_url).publish(SYSTEM_TOPICS.COMPOSE_STATUS, status_event.model_dump(mode="json"))
     except Exception as exc:
         _logger.warning("publish compose.status failed reason={}", str(exc))
 
-    job.status = JobStatus.success
-    job.result_json = completed.payload
-    db.commit()
 
-    return {"compose_job_id": compose_job_id, "status": "started"}
+def _upload_artifact(path: str, request: ComposeRequest) -> str:
+    """Upload the rendered file as ``<run_id>/final.mp4``; returns its ``s3://`` URI."""
+    stored = asyncio.run(get_storage_client().upload_file(
+        path,
+        f"{request.run_id}/final.mp4",
+        content_type="video/mp4",
+        metadata={"run_id": request.run_id, "tenant_id": request.tenant_id, "project_id": request.project_id},
+    ))
+    return stored.uri
+
+
+def _update_job(compose_job_id: str, **fields) -> None:
+    db = SessionLocal()
+    try:
+        job = JobRepository(db).get(compose_job_id)
+        if job is None:
+            return
+        for name, value in fields.items():
+            setattr(job, name, value)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _renderable_timeline(timeline_final: dict) -> TimelinePlanDto | None:
+    """The timeline when every shot has a rendered clip; ``None`` keeps the dev mock."""
+    try:
+        timeline = TimelinePlanDto.model_validate(timeline_final)
+    except ValidationError:
+        return None
+    if not timeline.video_tracks or any(not v.artifact_uri for v in timeline.video_tracks):
+        return None
+    return timeline
+
+
+_segment_cache_instance: SegmentCache | None = None
+
+
+def _segment_cache() -> SegmentCache | None:
+    """Process-wide segment cache so re-composes after a patch reuse clean segments."""
+    global _segment_cache_instance
+    if not settings.composer_segment_cache_dir:
+        return None
+    if _segment_cache_instance is None:
+        _segment_cache_instance = SegmentCache(
+            settings.composer_segment_cache_dir,
+            max_bytes=settings.composer_segment_cache_max_mb * 1024 * 1024,
+            min_age_s=settings.composer_segment_cache_min_age_s,
+        )
+    return _segment_cache_instance
+
+
+_PROGRESS_WRITE_INTERVAL_S = 1.0
+
+
+def _persist_progress(compose_job_id: str, interval_s: float = _PROGRESS_WRITE_INTERVAL_S):
+    """Progress callback writing ``result_json.progress`` at most once per ``interval_s``.
+
+    Segment renders report from worker threads; the lock keeps writes ordered.
+    """
+    lock = threading.Lock()
+    last_write = [0.0]
+
+    def _on_progress(progress: ComposeProgress) -> None:
+        _logger.info(
+            "compose progress job={} segments={}/{} last={}ms",
+            compose_job_id, progress.done, progress.total, progress.segment.elapsed_ms,
+        )
+        with lock:
+            now = time.monotonic()
+            if progress.done < progress.total and now - last_write[0] < interval_s:
+                return
+            last_write[0] = now
+            try:
+                _update_job(compose_job_id, result_json={"progress": {
+                    "done": progress.done,
+                    "total": progress.total,
+                    "fraction": round(progress.fraction, 4),
+                }})
+            except Exception as exc:
+                _logger.warning("compose progress write failed job={} reason={}", compose_job_id, str(exc))
+    return _on_progress
 
 
 def handle_compose_dispatch(payload: dict) -> None:
@@ -90,14 +282,17 @@ def handle_compose_dispatch(payload: dict) -> None:
         idempotency_key=event.idempotency_key,
     )
 
+    # The consumer thread is already off the request path: render inline so
+    # the broker ack waits for the compose to finish.
     db = SessionLocal()
     try:
-        compose(compose_request, db=db)
+        compose_job_id = _create_compose_job(db, compose_request)
     except Exception:
         db.rollback()
         raise
     finally:
         db.close()
+    run_compose_job(compose_job_id, compose_request)
 
 
 def consume_compose_dispatch() -> None:
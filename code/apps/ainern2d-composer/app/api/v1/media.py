@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-import subprocess
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Response
+from pydantic import BaseModel, Field
 from app.ffmpeg.commands import FFmpegCommandBuilder
+from app.services.media_jobs import MediaJob, get_media_job_service, media_request_key, SUCCEEDED
 from ainern2d_shared.telemetry.logging import get_logger
 
 logger = get_logger("media_api")
@@ -17,34 +19,58 @@ class TrimRequest(BaseModel):
 class RetimeRequest(BaseModel):
     input_uri: str
     output_uri: str
-    speed_factor: float
+    speed_factor: float = Field(gt=0)
     has_video: bool = True
     has_audio: bool = True
 
-@router.post("/trim")
-def trim_media(req: TrimRequest) -> dict:
-    builder = FFmpegCommandBuilder()
-    cmd = builder.trim_media(req.input_uri, req.output_uri, req.start_sec, req.end_sec)
-    
-    logger.info("Executing trim: %s", " ".join(cmd))
-    try:
-        # Note: In production, consider using async subprocess or task queue for heavier operations.
-        # This implementation serves the immediate requirement for synchronous endpoint.
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        return {"status": "success", "output_uri": req.output_uri}
-    except subprocess.CalledProcessError as e:
-        logger.error("FFmpeg trim failed: %s", e.stderr)
-        raise HTTPException(status_code=500, detail=f"FFmpeg trim error: {e.stderr}")
-
-@router.post("/retime")
-def retime_media(req: RetimeRequest) -> dict:
-    builder = FFmpegCommandBuilder()
-    cmd = builder.change_speed(req.input_uri, req.output_uri, req.speed_factor, req.has_video, req.has_audio)
-    
-    logger.info("Executing retime: %s", " ".join(cmd))
-    try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        return {"status": "success", "output_uri": req.output_uri}
-    except subprocess.CalledProcessError as e:
-        logger.error("FFmpeg retime failed: %s", e.stderr)
-        raise HTTPException(status_code=500, detail=f"FFmpeg retime error: {e.stderr}")
+def _job_response(job: MediaJob, deduplicated: bool = False) -> dict:
+    return {**job.as_dict(), "deduplicated": deduplicated}
+
+async def _submit(
+    kind: str, req: BaseModel, cmd: list[str], wait: bool, response: Response, **job_kwargs,
+) -> dict:
+    service = get_media_job_service()
+    # Fingerprinting an s3/http input is a blocking HEAD; keep it off the event loop.
+    key = await asyncio.to_thread(media_request_key, kind, req.model_dump(), req.input_uri)
+    job, deduplicated = service.submit(kind, cmd, key, req.output_uri, **job_kwargs)
+    logger.info("%s job %s (dedup=%s): %s", kind, job.job_id, deduplicated, " ".join(cmd))
+    if not wait:
+        return _job_response(job, deduplicated)
+
+    # Legacy synchronous contract: await the job without blocking a worker thread.
+    await service.wait(job.job_id)
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=500, detail=f"FFmpeg {kind} {job.status}: {job.error}")
+    response.status_code = 200
+    return {"status": "success", "output_uri": job.output_uri, "job_id": job.job_id}
+
+@router.post("/trim", status_code=202)
+async def trim_media(req: TrimRequest, response: Response, wait: bool = False) -> dict:
+    if req.end_sec <= req.start_sec:
+        raise HTTPException(status_code=400, detail="end_sec must be greater than start_sec")
+    cmd = FFmpegCommandBuilder().trim_media(req.input_uri, req.output_uri, req.start_sec, req.end_sec)
+    return await _submit(
+        "trim", req, cmd, wait, response, expected_duration_ms=int((req.end_sec - req.start_sec) * 1000),
+    )
+
+@router.post("/retime", status_code=202)
+async def retime_media(req: RetimeRequest, response: Response, wait: bool = False) -> dict:
+    cmd = FFmpegCommandBuilder().change_speed(
+        req.input_uri, req.output_uri, req.speed_factor, req.has_video, req.has_audio,
+    )
+    # Output runs input_duration / speed; the input duration is read from ffmpeg's banner.
+    return await _submit("retime", req, cmd, wait, response, duration_scale=1.0 / req.speed_factor)
+
+@router.get("/jobs/{job_id}")
+async def get_media_job(job_id: str) -> dict:
+    job = get_media_job_service().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="media job not found")
+    return _job_response(job)
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_media_job(job_id: str) -> dict:
+    job = get_media_job_service().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="media job not found")
+    return _job_response(job)
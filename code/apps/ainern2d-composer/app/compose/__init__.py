@@ -0,0 +1,15 @@
+from .cache import SegmentCache, segment_cache_key
+from .engine import ComposeEngine, ComposeProgress, ComposeResult, RenderProfile, SegmentResult
+from .segments import ComposeSegment, plan_segments
+
+__all__ = [
+    "ComposeEngine",
+    "ComposeProgress",
+    "ComposeResult",
+    "RenderProfile",
+    "SegmentResult",
+    "ComposeSegment",
+    "SegmentCache",
+    "segment_cache_key",
+    "plan_segments",
+]
@@ -0,0 +1,200 @@
+"""Content-addressed cache of rendered compose segments."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+from uuid import uuid4
+
+from ainern2d_shared.telemetry.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def segment_cache_key(descriptor: dict) -> str:
+    """Stable hash of everything that determines a segment's rendered bytes."""
+    raw = json.dumps(descriptor, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+_REMOTE_SCHEMES = ("s3://", "http://", "https://")
+_REMOTE_TTL_S = 30.0
+_REMOTE_MEMO_MAX = 4096
+_remote_memo: dict[str, tuple[float, str]] = {}
+_remote_lock = threading.Lock()
+
+
+def input_fingerprint(uri: str) -> str:
+    """URI plus its content identity, so a clip replaced under the same URI misses the cache.
+
+    Local files use size/mtime, ``s3://`` objects their stored sha256 and
+    ``http(s)://`` inputs their ETag (or Last-Modified) plus length. A remote
+    input whose identity cannot be read gets a one-off fingerprint and is
+    never served from the cache.
+    """
+    if uri.startswith(_REMOTE_SCHEMES):
+        return f"{uri}#{_remote_identity(uri)}"
+    try:
+        st = os.stat(uri)
+    except (OSError, ValueError):
+        return uri
+    return f"{uri}#{st.st_size}:{st.st_mtime_ns}"
+
+
+def _remote_identity(uri: str) -> str:
+    """Memoised for ``_REMOTE_TTL_S`` so one compose heads each input once.
+
+    Only verified identities are memoised; an unverifiable input gets a
+    fresh one-off identity on every call.
+    """
+    now = time.monotonic()
+    with _remote_lock:
+        memo = _remote_memo.get(uri)
+        if memo is not None and now - memo[0] < _REMOTE_TTL_S:
+            return memo[1]
+    try:
+        identity = _head_s3(uri) if uri.startswith("s3://") else _head_http(uri)
+    except Exception as exc:
+        logger.warning("could not fingerprint %s: %s", uri, exc)
+        identity = None
+    if not identity:
+        return f"unverified:{uuid4().hex}"
+    with _remote_lock:
+        if len(_remote_memo) >= _REMOTE_MEMO_MAX:
+            _remote_memo.clear()
+        _remote_memo[uri] = (now, identity)
+    return identity
+
+
+def _head_s3(uri: str) -> str | None:
+    from ainern2d_shared.storage.client import SHA256_META, parse_s3_uri, storage_backend_for
+
+    backend = storage_backend_for()[0]
+    size, metadata = backend.head(*parse_s3_uri(uri))
+    sha256 = metadata.get(SHA256_META)
+    return f"sha256:{sha256}:{size}" if sha256 else None
+
+
+def _head_http(uri: str) -> str | None:
+    import httpx
+
+    resp = httpx.head(uri, timeout=10.0, follow_redirects=True)
+    resp.raise_for_status()
+    tag = resp.headers.get("etag") or resp.headers.get("last-modified")
+    return f"{tag}:{resp.headers.get('content-length', '')}" if tag else None
+
+
+class SegmentCache:
+    """Rendered segments stored on disk under their content key.
+
+    Entries are written atomically (temp file + ``os.replace``) so concurrent
+    composes of the same run never stitch a half-written segment. When
+    ``max_bytes`` is set the least recently used entries are pruned after
+    each store.
+
+    Pruning never removes a segment a compose may still be reading: entries
+    leased in this process (:meth:`lease`) are skipped, and so is anything
+    used within ``min_age_s`` -- :meth:`get` touches the file, which covers
+    composes in other processes sharing the directory.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int | None = None,
+        ext: str = ".mp4",
+        min_age_s: float = 3600.0,
+    ) -> None:
+        self.root = root
+        self.max_bytes = max_bytes or None
+        self.min_age_s = max(0.0, min_age_s)
+        self._ext = ext
+        self._lock = threading.Lock()
+        self._leases: Counter[str] = Counter()
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}{self._ext}")
+
+    def get(self, key: str) -> str | None:
+        path = self.path_for(key)
+        if not os.path.isfile(path):
+            return None
+        try:
+            os.utime(path)  # mark as recently used for pruning
+        except OSError:
+            pass
+        return path
+
+    @contextmanager
+    def lease(self, keys: Iterable[str]) -> Iterator[None]:
+        """Keep the entries for *keys* from being pruned while the block runs."""
+        paths = [self.path_for(key) for key in keys]
+        with self._lock:
+            self._leases.update(paths)
+        try:
+            yield
+        finally:
+            with self._lock:
+                for path in paths:
+                    self._leases[path] -= 1
+                    if self._leases[path] <= 0:
+                        del self._leases[path]
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.isfile(self.path_for(key))
+
+    def put(self, key: str, source_path: str) -> str:
+        """Move *source_path* into the cache and return the cached path."""
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid4().hex[:8]}.tmp"
+        shutil.move(source_path, tmp)
+        os.replace(tmp, path)
+        if self.max_bytes:
+            self.prune(self.max_bytes, keep={path})
+        return path
+
+    def prune(self, max_bytes: int, keep: set[str] | None = None) -> int:
+        """Delete least recently used entries until the cache fits *max_bytes*.
+
+        Leased entries and entries used within ``min_age_s`` are kept even if
+        the cache stays over budget.
+        """
+        keep = keep or set()
+        with self._lock:
+            cutoff = time.time() - self.min_age_s
+            entries: list[tuple[float, int, str]] = []
+            for dirpath, _dirs, files in os.walk(self.root):
+                for name in files:
+                    if not name.endswith(self._ext):
+                        continue
+                    full = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(full)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, full))
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for mtime, size, full in sorted(entries):
+                if total <= max_bytes:
+                    break
+                if full in keep or self._leases[full] or mtime > cutoff:
+                    continue
+                try:
+                    os.remove(full)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+        if removed:
+            logger.info("segment cache pruned %d entr(ies) under %s", removed, self.root)
+        return removed
@@ -0,0 +1,398 @@
+"""Segment-parallel final compose: plan → render video segments → stitch + mux audio."""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable
+
+from ainern2d_shared.schemas.timeline import TimelinePlanDto
+from ainern2d_shared.telemetry.logging import get_logger
+
+from app.ffmpeg.commands import FFmpegCommandBuilder
+from app.ffmpeg.concat import ConcatComposer
+from app.ffmpeg.runners import FFmpegRunner
+from app.timeline.exporter import TimelineExporter
+
+from .cache import SegmentCache, input_fingerprint, segment_cache_key
+from .segments import DEFAULT_SEGMENT_MS, ComposeSegment, plan_segments
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    """Encoding parameters shared by every segment so they stitch with ``-c copy``.
+
+    The audio fields apply to the single audio track muxed at the stitch.
+    """
+
+    width: int = 1280
+    height: int = 720
+    fps: int = 24
+    video_codec: str = "libx264"
+    preset: str = "veryfast"
+    crf: int = 20
+    pix_fmt: str = "yuv420p"
+    gop_sec: float = 2.0
+    audio_codec: str = "aac"
+    sample_rate: int = 48000
+    channels: int = 2
+
+    @property
+    def gop_frames(self) -> int:
+        return max(1, int(round(self.fps * self.gop_sec)))
+
+
+@dataclass
+class SegmentResult:
+    index: int
+    start_ms: int
+    end_ms: int
+    output_uri: str
+    elapsed_ms: float = 0.0
+    cache_key: str | None = None
+    cached: bool = False
+
+
+@dataclass
+class ComposeProgress:
+    done: int
+    total: int
+    segment: SegmentResult
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 1.0
+
+
+@dataclass
+class ComposeResult:
+    output_uri: str
+    segments: list[SegmentResult] = field(default_factory=list)
+    timings_ms: dict[str, float] = field(default_factory=dict)
+    workers: int = 1
+
+    @property
+    def rendered(self) -> list[int]:
+        return [s.index for s in self.segments if not s.cached]
+
+    @property
+    def reused(self) -> list[int]:
+        return [s.index for s in self.segments if s.cached]
+
+
+ProgressCallback = Callable[[ComposeProgress], None]
+
+
+def _filter_path(path: str) -> str:
+    """Escape a path for use as a filter option value."""
+    return path.replace("\\", "\\\\").replace(":", "\\:").replace("'", "\\'")
+
+
+class ComposeEngine:
+    """Renders a timeline as GOP-aligned segments in parallel, then stitches them.
+
+    Segments are video-only. The stitch stream-copies them and mixes the
+    timeline's audio once, as one continuous track: per-segment AAC tracks
+    would each carry encoder priming and pad to a frame boundary, which
+    adds a gap at every joint and drifts A/V across segments.
+
+    Segment renders are independent ffmpeg processes run through
+    :meth:`FFmpegRunner.run_parallel`, at most ``max_workers`` at a time
+    (CPU count by default). Each process gets ``cpu_count // workers``
+    encoder threads so the node is not oversubscribed.
+
+    With a :class:`SegmentCache` each segment is keyed by its clips, time
+    ranges and subtitles; only segments missing from the cache are
+    rendered, so after a one-shot edit only the segment containing that
+    shot is re-encoded before the stitch. Audio-only edits re-render no
+    segment at all. A cached segment may come from another encoder build
+    (different H.264 profile or level), so when reused and fresh segments
+    meet, the :class:`ConcatComposer` probes them and re-encodes the
+    outliers before the copy stitch.
+    """
+
+    def __init__(
+        self,
+        runner: FFmpegRunner | None = None,
+        builder: FFmpegCommandBuilder | None = None,
+        exporter: TimelineExporter | None = None,
+        profile: RenderProfile | None = None,
+        max_workers: int | None = None,
+        segment_ms: int = DEFAULT_SEGMENT_MS,
+        timeout: int = 1800,
+        cache: SegmentCache | None = None,
+        concat: ConcatComposer | None = None,
+    ) -> None:
+        self._runner = runner or FFmpegRunner()
+        self._builder = builder or FFmpegCommandBuilder()
+        self._exporter = exporter or TimelineExporter()
+        self.profile = profile or RenderProfile()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.segment_ms = segment_ms
+        self._timeout = timeout
+        self._cache = cache
+        self._concat = concat or ConcatComposer(
+            builder=self._builder, runner=self._runner, max_workers=self.max_workers, timeout=timeout,
+        )
+
+    def compose(
+        self,
+        timeline: TimelinePlanDto,
+        output_uri: str,
+        workdir: str | None = None,
+        on_progress: ProgressCallback | None = None,
+    ) -> ComposeResult:
+        if workdir is not None:
+            os.makedirs(workdir, exist_ok=True)
+            return self._compose_in(timeline, output_uri, workdir, on_progress)
+        with tempfile.TemporaryDirectory(prefix="ainer-compose-") as tmp:
+            return self._compose_in(timeline, output_uri, tmp, on_progress)
+
+    def segment_key(self, timeline: TimelinePlanDto, segment: ComposeSegment) -> str:
+        """Content key of a segment; times are relative to the segment start."""
+        return segment_cache_key({
+            "profile": asdict(self.profile),
+            "duration_ms": segment.duration_ms,
+            "video": [
+                [input_fingerprint(uri), shown_ms, lead_ms, hold_ms]
+                for uri, shown_ms, lead_ms, hold_ms in self._shot_layout(segment)
+            ],
+            "subtitles": self._exporter.to_srt(timeline, window_ms=segment.window_ms),
+        })
+
+    def dirty_segments(self, timeline: TimelinePlanDto) -> list[ComposeSegment]:
+        """Segments that would be re-rendered by :meth:`compose` (all of them without a cache)."""
+        segments = plan_segments(timeline, self.segment_ms)
+        if self._cache is None:
+            return segments
+        return [seg for seg in segments if self.segment_key(timeline, seg) not in self._cache]
+
+    # ------------------------------------------------------------------
+
+    def _compose_in(
+        self,
+        timeline: TimelinePlanDto,
+        output_uri: str,
+        workdir: str,
+        on_progress: ProgressCallback | None,
+    ) -> ComposeResult:
+        started = time.perf_counter()
+        segments = plan_segments(timeline, self.segment_ms)
+        if not segments:
+            raise ValueError("timeline has no video tracks")
+
+        results: list[SegmentResult] = [
+            SegmentResult(
+                index=seg.index, start_ms=seg.start_ms, end_ms=seg.end_ms,
+                output_uri=os.path.join(workdir, f"seg_{seg.index:05d}.mp4"),
+            )
+            for seg in segments
+        ]
+        if self._cache is not None:
+            for seg, res in zip(segments, results):
+                res.cache_key = self.segment_key(timeline, seg)
+            # Leased before the lookups so a concurrent store can't prune a hit.
+            lease = self._cache.lease(res.cache_key for res in results)
+        else:
+            lease = contextlib.nullcontext()
+        with lease:
+            if self._cache is not None:
+                for res in results:
+                    hit = self._cache.get(res.cache_key)
+                    if hit is not None:
+                        res.output_uri, res.cached = hit, True
+            dirty = [seg for seg in segments if not results[seg.index].cached]
+
+            workers = max(1, min(self.max_workers, len(dirty)))
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            commands = [
+                self.segment_command(timeline, seg, results[seg.index].output_uri, workdir, threads)
+                for seg in dirty
+            ]
+            planned = time.perf_counter()
+
+            lock = threading.Lock()
+            done = len(segments) - len(dirty)
+
+            def _on_result(pos: int, result: tuple[int, str, str], elapsed_ms: float) -> None:
+                nonlocal done
+                seg_result = results[dirty[pos].index]
+                seg_result.elapsed_ms = round(elapsed_ms, 3)
+                if result[0] != 0:
+                    return
+                with lock:
+                    done += 1
+                    progress = ComposeProgress(done=done, total=len(segments), segment=seg_result)
+                logger.debug("segment %d/%d rendered in %.0fms", progress.done, progress.total, elapsed_ms)
+                if on_progress is not None:
+                    on_progress(progress)
+
+            rendered = self._runner.run_parallel(
+                commands, max_workers=workers, timeout=self._timeout, on_result=_on_result,
+            ) if commands else []
+            failed = [pos for pos, (rc, _out, _err) in enumerate(rendered) if rc != 0]
+            if failed:
+                raise RuntimeError(
+                    f"segment render failed for segment(s) {[dirty[pos].index for pos in failed]}: "
+                    f"{rendered[failed[0]][2][:300]}"
+                )
+            if self._cache is not None:
+                for seg in dirty:
+                    res = results[seg.index]
+                    res.output_uri = self._cache.put(res.cache_key, res.output_uri)
+            render_done = time.perf_counter()
+
+            clips = [res.output_uri for res in results]
+            if any(res.cached for res in results):
+                clips = self._uniform_clips(clips, workdir)
+            list_path = os.path.join(workdir, "segments.txt")
+            with open(list_path, "w", encoding="utf-8") as fh:
+                fh.write(self._builder.concat_list(clips))
+            returncode, _stdout, stderr = self._runner.run(
+                self.stitch_command(timeline, list_path, output_uri, results[-1].end_ms),
+                timeout=self._timeout,
+            )
+            if returncode != 0:
+                raise RuntimeError(f"segment stitch failed: {stderr[:300]}")
+            finished = time.perf_counter()
+
+        timings = {
+            "plan": round((planned - started) * 1000.0, 3),
+            "render": round((render_done - planned) * 1000.0, 3),
+            "stitch": round((finished - render_done) * 1000.0, 3),
+            "total": round((finished - started) * 1000.0, 3),
+        }
+        logger.info(
+            "compose done: %d segment(s), %d rendered, %d reused, %d worker(s), total=%.0fms",
+            len(segments), len(dirty), len(segments) - len(dirty), workers, timings["total"],
+        )
+        return ComposeResult(output_uri=output_uri, segments=results, timings_ms=timings, workers=workers)
+
+    def _uniform_clips(self, clips: list[str], workdir: str) -> list[str]:
+        """Segments re-encoded where their format differs from the majority."""
+        try:
+            uniform, plan = self._concat.normalize(clips, workdir)
+        except (RuntimeError, ValueError) as exc:
+            logger.warning("segment probe failed, stitching segments as cached: %s", exc)
+            return clips
+        if plan.mismatched:
+            logger.info("re-encoded %d cached segment(s) to match the stitch format", len(plan.mismatched))
+        return uniform
+
+    def segment_command(
+        self,
+        timeline: TimelinePlanDto,
+        segment: ComposeSegment,
+        output_uri: str,
+        workdir: str,
+        threads: int = 1,
+    ) -> list[str]:
+        """ffmpeg args rendering one video-only segment: shots + burned-in subtitles."""
+        p = self.profile
+        inputs: list[str] = []
+        duration = segment.duration_ms / 1000.0
+
+        filters: list[str] = []
+        labels: list[str] = []
+        for pos, (uri, shown_ms, lead_ms, hold_ms) in enumerate(self._shot_layout(segment)):
+            if uri not in inputs:
+                inputs.append(uri)
+            idx = inputs.index(uri)
+            chain = (
+                f"[{idx}:v:0]scale={p.width}:{p.height}:force_original_aspect_ratio=decrease,"
+                f"pad={p.width}:{p.height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={p.fps},format={p.pix_fmt},"
+                f"trim=duration={shown_ms / 1000:.3f},setpts=PTS-STARTPTS"
+            )
+            if lead_ms > 0 or hold_ms > 0:
+                chain += (
+                    f",tpad=start_mode=clone:start_duration={lead_ms / 1000:.3f}"
+                    f":stop_mode=clone:stop_duration={hold_ms / 1000:.3f}"
+                )
+            filters.append(f"{chain}[v{pos}]")
+            labels.append(f"[v{pos}]")
+        video_out = "[vcat]"
+        filters.append(f"{''.join(labels)}concat=n={len(labels)}:v=1:a=0{video_out}")
+
+        srt = self._exporter.to_srt(timeline, window_ms=segment.window_ms)
+        if srt:
+            srt_path = os.path.join(workdir, f"seg_{segment.index:05d}.srt")
+            with open(srt_path, "w", encoding="utf-8") as fh:
+                fh.write(srt)
+            filters.append(f"{video_out}subtitles=filename='{_filter_path(srt_path)}'[vsub]")
+            video_out = "[vsub]"
+
+        cmd = ["ffmpeg", "-y"]
+        for uri in inputs:
+            cmd += ["-i", uri]
+        cmd += [
+            "-filter_complex", ";".join(filters),
+            "-map", video_out, "-an",
+            "-c:v", p.video_codec, "-preset", p.preset, "-crf", str(p.crf),
+            "-pix_fmt", p.pix_fmt, "-r", str(p.fps),
+            "-g", str(p.gop_frames), "-keyint_min", str(p.gop_frames), "-sc_threshold", "0",
+            "-threads", str(threads),
+            "-t", f"{duration:.3f}",
+            output_uri,
+        ]
+        return cmd
+
+    def stitch_command(
+        self,
+        timeline: TimelinePlanDto,
+        list_path: str,
+        output_uri: str,
+        duration_ms: int,
+    ) -> list[str]:
+        """ffmpeg args joining the segments with ``-c:v copy`` and muxing one mixed audio track."""
+        p = self.profile
+        duration = duration_ms / 1000.0
+        # Audio inputs come first so the exporter's [i:a] labels stay valid;
+        # the segment list is the last input.
+        spec = self._exporter.to_ffmpeg_spec(timeline.model_copy(update={"video_tracks": []}))
+        inputs: list[str] = list(spec["inputs"])
+
+        cmd = ["ffmpeg", "-y"]
+        for uri in inputs:
+            cmd += ["-i", uri]
+        filters: list[str] = []
+        if spec["filter_complex"]:
+            filters.append(spec["filter_complex"])
+            audio_src = "[aout]"
+        else:
+            layout = "mono" if p.channels == 1 else "stereo"
+            cmd += ["-f", "lavfi", "-t", f"{duration:.3f}",
+                    "-i", f"anullsrc=channel_layout={layout}:sample_rate={p.sample_rate}"]
+            audio_src = f"[{len(inputs)}:a]"
+            inputs.append("anullsrc")
+        # Pad a short mix so the audio spans the whole video.
+        filters.append(f"{audio_src}aresample={p.sample_rate},apad[amix]")
+        cmd += ["-f", "concat", "-safe", "0", "-i", list_path]
+
+        cmd += [
+            "-filter_complex", ";".join(filters),
+            "-map", f"{len(inputs)}:v:0", "-map", "[amix]",
+            "-c:v", "copy",
+            "-c:a", p.audio_codec, "-ar", str(p.sample_rate), "-ac", str(p.channels),
+            "-t", f"{duration:.3f}",
+            "-movflags", "+faststart",
+            output_uri,
+        ]
+        return cmd
+
+    @staticmethod
+    def _shot_layout(segment: ComposeSegment) -> list[tuple[str, int, int, int]]:
+        """``(uri, shown_ms, lead_ms, hold_ms)`` per shot; gaps hold the neighbouring frame."""
+        layout: list[tuple[str, int, int, int]] = []
+        for pos, shot in enumerate(segment.shots):
+            next_start = segment.shots[pos + 1].start_time_ms if pos + 1 < len(segment.shots) else segment.end_ms
+            shown_ms = max(0, min(shot.duration_ms, next_start - shot.start_time_ms))
+            hold_ms = next_start - shot.start_time_ms - shown_ms
+            lead_ms = shot.start_time_ms - segment.start_ms if pos == 0 else 0
+            layout.append((shot.artifact_uri or f"missing_{shot.id}", shown_ms, lead_ms, hold_ms))
+        return layout
@@ -0,0 +1,60 @@
+"""Split a timeline into independently renderable segments."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from ainern2d_shared.schemas.timeline import TimelinePlanDto, TimelineVideoItemDto
+
+DEFAULT_SEGMENT_MS = 10_000
+
+
+@dataclass(frozen=True)
+class ComposeSegment:
+    index: int
+    start_ms: int
+    end_ms: int
+    shots: tuple[TimelineVideoItemDto, ...]
+
+    @property
+    def duration_ms(self) -> int:
+        return self.end_ms - self.start_ms
+
+    @property
+    def window_ms(self) -> tuple[int, int]:
+        return self.start_ms, self.end_ms
+
+
+def plan_segments(
+    timeline: TimelinePlanDto,
+    target_ms: int = DEFAULT_SEGMENT_MS,
+) -> list[ComposeSegment]:
+    """Group consecutive shots into segments of roughly *target_ms*.
+
+    Boundaries only fall on shot cuts. Each segment is encoded on its own,
+    so it starts on a keyframe and the segments can be joined with
+    ``-c copy``. A segment runs until the next segment's first shot, or
+    until the end of the timeline, so gaps between shots are covered.
+    """
+    shots = sorted(timeline.video_tracks, key=lambda v: v.start_time_ms)
+    if not shots:
+        return []
+    end_of_timeline = max(
+        timeline.total_duration_ms,
+        max(v.start_time_ms + v.duration_ms for v in shots),
+    )
+
+    groups: list[list[TimelineVideoItemDto]] = [[]]
+    group_start = shots[0].start_time_ms
+    for shot in shots:
+        if groups[-1] and shot.start_time_ms - group_start >= target_ms:
+            groups.append([])
+            group_start = shot.start_time_ms
+        groups[-1].append(shot)
+
+    segments: list[ComposeSegment] = []
+    for idx, group in enumerate(groups):
+        start = 0 if idx == 0 else group[0].start_time_ms
+        end = groups[idx + 1][0].start_time_ms if idx + 1 < len(groups) else end_of_timeline
+        segments.append(ComposeSegment(index=idx, start_ms=start, end_ms=end, shots=tuple(group)))
+    return segments
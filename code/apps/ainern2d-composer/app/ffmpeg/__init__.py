@@ -1,4 +1,17 @@
 from .commands import FFmpegCommandBuilder
-from .runners import FFmpegRunner
+from .concat import ConcatComposer, ConcatResult, plan_concat
+from .probe import ClipFormat, ClipProbe, MediaProber
+from .runners import AsyncFFmpegRunner, FFmpegProgress, FFmpegRunner
 
-__all__ = ["FFmpegCommandBuilder", "FFmpegRunner"]
+__all__ = [
+    "FFmpegCommandBuilder",
+    "FFmpegRunner",
+    "AsyncFFmpegRunner",
+    "FFmpegProgress",
+    "ConcatComposer",
+    "ConcatResult",
+    "plan_concat",
+    "ClipFormat",
+    "ClipProbe",
+    "MediaProber",
+]
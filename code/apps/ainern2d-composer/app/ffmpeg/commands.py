@@ -2,16 +2,38 @@
 
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
 from ainern2d_shared.telemetry.logging import get_logger
 
+if TYPE_CHECKING:
+    from .probe import ClipFormat
+
 logger = get_logger(__name__)
 
+_VIDEO_ENCODERS = {"h264": "libx264", "hevc": "libx265", "vp9": "libvpx-vp9", "av1": "libaom-av1"}
+_AUDIO_ENCODERS = {"aac": "aac", "mp3": "libmp3lame", "opus": "libopus", "vorbis": "libvorbis"}
+# ffprobe profile names -> libx264 ``-profile:v`` values.
+_X264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+    "High 10": "high10",
+    "High 4:2:2": "high422",
+    "High 4:4:4 Predictive": "high444",
+}
+
 
 class FFmpegCommandBuilder:
     """Builds ffmpeg command-line argument lists for common operations."""
 
     def concat_videos(self, input_uris: list[str], output_uri: str) -> list[str]:
-        """Return ffmpeg args to concatenate video files via the concat demuxer."""
+        """Return ffmpeg args to concatenate video files via the concat filter.
+
+        Re-encodes every input; prefer :meth:`concat_copy` when the clips
+        share one format (see ``app.ffmpeg.concat.ConcatComposer``).
+        """
         if not input_uris:
             raise ValueError("input_uris must not be empty")
 
@@ -32,6 +54,89 @@ class FFmpegCommandBuilder:
         logger.debug("concat_videos: %d inputs -> %s", n, output_uri)
         return cmd
 
+    def concat_list(self, input_uris: list[str]) -> str:
+        """Return the concat demuxer list-file body for *input_uris*."""
+        lines = []
+        for uri in input_uris:
+            path = uri[7:] if uri.startswith("file://") else uri
+            lines.append("file '" + path.replace("'", "'\\''") + "'")
+        return "\n".join(lines) + "\n"
+
+    def concat_copy(self, list_uri: str, output_uri: str) -> list[str]:
+        """Return ffmpeg args to join uniform clips via the concat demuxer without re-encoding."""
+        cmd = [
+            "ffmpeg", "-y",
+            "-f", "concat", "-safe", "0",
+            "-i", list_uri,
+            "-c", "copy",
+            "-movflags", "+faststart",
+            output_uri,
+        ]
+        logger.debug("concat_copy: %s -> %s", list_uri, output_uri)
+        return cmd
+
+    def normalize_clip(
+        self,
+        input_uri: str,
+        output_uri: str,
+        target: ClipFormat,
+        has_audio: bool = True,
+    ) -> list[str]:
+        """Return ffmpeg args to re-encode a clip into *target* so it can be stream-copied.
+
+        A clip without audio gets a silent track when the target has one.
+        """
+        cmd = ["ffmpeg", "-y", "-i", input_uri]
+        add_silence = target.has_audio and not has_audio
+        if add_silence:
+            layout = target.channel_layout or ("mono" if target.channels == 1 else "stereo")
+            cmd += ["-f", "lavfi", "-i", f"anullsrc=channel_layout={layout}:sample_rate={target.sample_rate or 48000}"]
+
+        video_filter = (
+            f"scale={target.width}:{target.height}:force_original_aspect_ratio=decrease,"
+            f"pad={target.width}:{target.height}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+        )
+        if target.frame_rate:
+            video_filter += f",fps={target.frame_rate}"
+        if target.pix_fmt:
+            video_filter += f",format={target.pix_fmt}"
+        cmd += ["-map", "0:v:0", "-vf", video_filter,
+                "-c:v", _VIDEO_ENCODERS.get(target.video_codec, target.video_codec),
+                "-preset", "veryfast", "-crf", "18"]
+        if target.video_codec == "h264":
+            if target.profile in _X264_PROFILES:
+                cmd += ["-profile:v", _X264_PROFILES[target.profile]]
+            if target.level and target.level > 0:
+                cmd += ["-level", f"{target.level / 10:.1f}"]
+        _, _, timescale = target.time_base.partition("/")
+        if timescale.isdigit():
+            cmd += ["-video_track_timescale", timescale]
+
+        if target.has_audio:
+            cmd += ["-map", "1:a:0" if add_silence else "0:a:0",
+                    "-c:a", _AUDIO_ENCODERS.get(target.audio_codec or "", target.audio_codec or "aac")]
+            if target.sample_rate:
+                cmd += ["-ar", str(target.sample_rate)]
+            if target.channels:
+                cmd += ["-ac", str(target.channels)]
+            if add_silence:
+                cmd.append("-shortest")
+        else:
+            cmd.append("-an")
+
+        cmd.append(output_uri)
+        logger.debug("normalize_clip: %s -> %s", input_uri, output_uri)
+        return cmd
+
+    def probe_media(self, input_uri: str) -> list[str]:
+        """Return ffprobe args that print stream and container info as JSON."""
+        return [
+            "ffprobe", "-v", "error",
+            "-print_format", "json",
+            "-show_streams", "-show_format",
+            input_uri,
+        ]
+
     def mix_audio(
         self, video_uri: str, audio_uris: list[str], output_uri: str
     ) -> list[str]:
@@ -0,0 +1,158 @@
+"""Shot concatenation – stream-copy when clips are uniform, re-encode only the outliers."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from ainern2d_shared.telemetry.logging import get_logger
+
+from .commands import FFmpegCommandBuilder
+from .probe import ClipFormat, ClipProbe, MediaProber
+from .runners import FFmpegRunner
+
+logger = get_logger(__name__)
+
+CONCAT_COPY = "copy"                  # all clips uniform: concat demuxer, -c copy
+CONCAT_NORMALIZED = "normalize_copy"  # outliers re-encoded, then -c copy
+CONCAT_REENCODE = "reencode"          # concat filter over every input
+
+
+@dataclass
+class ConcatPlan:
+    target: ClipFormat
+    mismatched: list[int] = field(default_factory=list)
+
+    @property
+    def mode(self) -> str:
+        return CONCAT_NORMALIZED if self.mismatched else CONCAT_COPY
+
+
+@dataclass
+class ConcatResult:
+    output_uri: str
+    mode: str
+    clips: int
+    normalized: int = 0
+
+
+def plan_concat(probes: list[ClipProbe]) -> ConcatPlan:
+    """Pick the most common clip format as the target; every other clip is an outlier.
+
+    Ties go to the format that appears first in the timeline.
+    """
+    if not probes:
+        raise ValueError("probes must not be empty")
+    counts = Counter(p.format for p in probes)
+    best = max(counts.values())
+    target = next(p.format for p in probes if counts[p.format] == best)
+    mismatched = [i for i, p in enumerate(probes) if p.format != target]
+    return ConcatPlan(target=target, mismatched=mismatched)
+
+
+class ConcatComposer:
+    """Joins shot clips, stream-copying whenever their formats allow it.
+
+    1. probe every clip concurrently
+    2. uniform clips → concat demuxer with ``-c copy`` (I/O bound)
+    3. otherwise re-encode only the mismatched clips, in parallel, into the
+       majority format and then stream-copy
+    4. if probing or normalisation fails, fall back to the concat filter
+    """
+
+    def __init__(
+        self,
+        builder: FFmpegCommandBuilder | None = None,
+        runner: FFmpegRunner | None = None,
+        prober: MediaProber | None = None,
+        max_workers: int = 4,
+        timeout: int = 1800,
+    ) -> None:
+        self._builder = builder or FFmpegCommandBuilder()
+        self._runner = runner or FFmpegRunner()
+        self._prober = prober or MediaProber(self._runner, self._builder)
+        self._max_workers = max(max_workers, 1)
+        self._timeout = timeout
+
+    def concat(self, input_uris: list[str], output_uri: str, workdir: str | None = None) -> ConcatResult:
+        if not input_uris:
+            raise ValueError("input_uris must not be empty")
+        if workdir is not None:
+            return self._concat_in(input_uris, output_uri, workdir)
+        with tempfile.TemporaryDirectory(prefix="ainer-concat-") as tmp:
+            return self._concat_in(input_uris, output_uri, tmp)
+
+    def concat_spec(self, spec: dict, output_uri: str, workdir: str | None = None) -> ConcatResult:
+        """Concatenate the ``concat_demuxer`` entries of ``TimelineExporter.to_ffmpeg_spec``."""
+        return self.concat([entry["file"] for entry in spec.get("concat_demuxer", [])], output_uri, workdir)
+
+    def normalize(self, input_uris: list[str], workdir: str) -> tuple[list[str], ConcatPlan]:
+        """Probe *input_uris* and re-encode the outliers into the majority format.
+
+        Returns the clip list to stream-copy (normalised clips are written to
+        *workdir*) and the plan. Raises :class:`RuntimeError` or
+        :class:`ValueError` when probing or normalisation fails.
+        """
+        probes = self._prober.probe_many(input_uris, max_workers=self._max_workers)
+        plan = plan_concat(probes)
+        clips = list(input_uris)
+        if plan.mismatched:
+            logger.info(
+                "concat: normalising %d/%d clip(s) to %sx%s %s",
+                len(plan.mismatched), len(clips), plan.target.width, plan.target.height, plan.target.video_codec,
+            )
+            normalized = self._normalize(probes, plan, workdir)
+            if normalized is None:
+                raise RuntimeError(f"normalising {len(plan.mismatched)} clip(s) failed")
+            for idx, uri in normalized.items():
+                clips[idx] = uri
+        return clips, plan
+
+    # ------------------------------------------------------------------
+
+    def _concat_in(self, input_uris: list[str], output_uri: str, workdir: str) -> ConcatResult:
+        try:
+            clips, plan = self.normalize(input_uris, workdir)
+        except (RuntimeError, ValueError) as exc:
+            logger.warning("concat normalisation failed, re-encoding all clips: %s", exc)
+            return self._reencode(input_uris, output_uri)
+
+        list_path = os.path.join(workdir, "concat.txt")
+        with open(list_path, "w", encoding="utf-8") as fh:
+            fh.write(self._builder.concat_list(clips))
+        returncode, _stdout, stderr = self._runner.run(
+            self._builder.concat_copy(list_path, output_uri), timeout=self._timeout,
+        )
+        if returncode != 0:
+            logger.warning("concat copy failed, re-encoding all clips: %s", stderr[:300])
+            return self._reencode(input_uris, output_uri)
+        return ConcatResult(output_uri=output_uri, mode=plan.mode, clips=len(clips), normalized=len(plan.mismatched))
+
+    def _normalize(self, probes: list[ClipProbe], plan: ConcatPlan, workdir: str) -> dict[int, str] | None:
+        ext = os.path.splitext(probes[0].uri)[1] or ".mp4"
+
+        def _run(idx: int) -> tuple[int, str, int]:
+            out = os.path.join(workdir, f"norm_{idx:05d}{ext}")
+            cmd = self._builder.normalize_clip(
+                probes[idx].uri, out, plan.target, has_audio=probes[idx].format.has_audio,
+            )
+            returncode, _stdout, _stderr = self._runner.run(cmd, timeout=self._timeout)
+            return idx, out, returncode
+
+        workers = min(self._max_workers, len(plan.mismatched))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ffmpeg-normalize") as pool:
+            results = list(pool.map(_run, plan.mismatched))
+        if any(rc != 0 for _, _, rc in results):
+            return None
+        return {idx: out for idx, out, _ in results}
+
+    def _reencode(self, input_uris: list[str], output_uri: str) -> ConcatResult:
+        returncode, _stdout, stderr = self._runner.run(
+            self._builder.concat_videos(input_uris, output_uri), timeout=self._timeout,
+        )
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg concat failed: {stderr[:300]}")
+        return ConcatResult(output_uri=output_uri, mode=CONCAT_REENCODE, clips=len(input_uris))
@@ -0,0 +1,108 @@
+"""ffprobe wrapper – stream parameters that decide whether clips can be stream-copied."""
+
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from ainern2d_shared.telemetry.logging import get_logger
+
+from .commands import FFmpegCommandBuilder
+from .runners import FFmpegRunner
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ClipFormat:
+    """Stream parameters that must match for the concat demuxer with ``-c copy``.
+
+    ``profile`` and ``level`` are part of it: clips from different encoder
+    builds can agree on codec and size yet carry incompatible parameter
+    sets, which a stream-copied join cannot reconcile.
+    """
+
+    video_codec: str
+    width: int
+    height: int
+    pix_fmt: str
+    frame_rate: str
+    time_base: str
+    audio_codec: str | None = None
+    sample_rate: int | None = None
+    channels: int | None = None
+    channel_layout: str | None = None
+    profile: str | None = None
+    level: int | None = None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_codec is not None
+
+
+@dataclass(frozen=True)
+class ClipProbe:
+    uri: str
+    format: ClipFormat
+    duration_sec: float = 0.0
+
+
+def parse_ffprobe(uri: str, data: dict) -> ClipProbe:
+    """Build a :class:`ClipProbe` from ``ffprobe -of json`` output."""
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    if video is None:
+        raise ValueError(f"no video stream in {uri}")
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    level = video.get("level")
+
+    fmt = ClipFormat(
+        video_codec=str(video.get("codec_name", "")),
+        width=int(video.get("width") or 0),
+        height=int(video.get("height") or 0),
+        pix_fmt=str(video.get("pix_fmt", "")),
+        frame_rate=str(video.get("r_frame_rate") or video.get("avg_frame_rate") or ""),
+        time_base=str(video.get("time_base", "")),
+        audio_codec=str(audio.get("codec_name", "")) if audio else None,
+        sample_rate=int(audio.get("sample_rate") or 0) if audio else None,
+        channels=int(audio.get("channels") or 0) if audio else None,
+        channel_layout=audio.get("channel_layout") if audio else None,
+        profile=str(video["profile"]) if video.get("profile") else None,
+        level=int(level) if level not in (None, -99) else None,  # ffprobe reports -99 when unknown
+    )
+    try:
+        duration = float(data.get("format", {}).get("duration") or video.get("duration") or 0.0)
+    except (TypeError, ValueError):
+        duration = 0.0
+    return ClipProbe(uri=uri, format=fmt, duration_sec=duration)
+
+
+class MediaProber:
+    """Runs ffprobe through :class:`FFmpegRunner` and parses the result."""
+
+    def __init__(
+        self,
+        runner: FFmpegRunner | None = None,
+        builder: FFmpegCommandBuilder | None = None,
+        timeout: int = 60,
+    ) -> None:
+        self._runner = runner or FFmpegRunner()
+        self._builder = builder or FFmpegCommandBuilder()
+        self._timeout = timeout
+
+    def probe(self, uri: str) -> ClipProbe:
+        returncode, stdout, stderr = self._runner.run(self._builder.probe_media(uri), timeout=self._timeout)
+        if returncode != 0:
+            raise RuntimeError(f"ffprobe failed for {uri}: {stderr[:300]}")
+        try:
+            return parse_ffprobe(uri, json.loads(stdout or "{}"))
+        except json.JSONDecodeError as exc:
+            raise RuntimeError(f"ffprobe returned invalid JSON for {uri}") from exc
+
+    def probe_many(self, uris: list[str], max_workers: int = 8) -> list[ClipProbe]:
+        """Probe clips concurrently; results keep the input order."""
+        if len(uris) <= 1:
+            return [self.probe(uri) for uri in uris]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(uris)), thread_name_prefix="ffprobe") as pool:
+            return list(pool.map(self.probe, uris))
@@ -2,7 +2,14 @@
 
 from __future__ import annotations
 
+import asyncio
+import os
+import re
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
 
 from ainern2d_shared.telemetry.logging import get_logger
 
@@ -45,4 +52,129 @@ class FFmpegRunner:
                 logger.error("pipeline aborted at step %d: %s", idx + 1, stderr[:300])
                 return False
         logger.info("pipeline completed: %d step(s)", len(commands))
-        return True
\ No newline at end of file
+        return True
+
+    def run_parallel(
+        self,
+        commands: list[list[str]],
+        max_workers: int | None = None,
+        timeout: int = 300,
+        on_result: Callable[[int, tuple[int, str, str], float], None] | None = None,
+    ) -> list[tuple[int, str, str]]:
+        """Run independent ffmpeg commands concurrently, at most *max_workers* at a time.
+
+        Each command is its own ffmpeg process, so threads only wait on
+        subprocesses. ``max_workers`` defaults to the CPU count.
+        ``on_result(index, result, elapsed_ms)`` is called as each finishes.
+        Results keep the input order.
+        """
+        if not commands:
+            return []
+        workers = max(1, min(max_workers or os.cpu_count() or 1, len(commands)))
+
+        def _run(idx: int) -> tuple[int, str, str]:
+            started = time.perf_counter()
+            result = self.run(commands[idx], timeout=timeout)
+            if on_result is not None:
+                on_result(idx, result, (time.perf_counter() - started) * 1000.0)
+            return result
+
+        logger.info("parallel run: %d command(s), %d worker(s)", len(commands), workers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ffmpeg") as pool:
+            return list(pool.map(_run, range(len(commands))))
+
+
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+@dataclass
+class FFmpegProgress:
+    """One ``-progress`` report; ``input_duration_ms`` comes from the stderr banner."""
+
+    out_time_ms: int = 0
+    input_duration_ms: int | None = None
+    speed: float | None = None
+    done: bool = False
+
+
+def parse_progress_line(line: str, progress: FFmpegProgress) -> bool:
+    """Apply one ``key=value`` line of ``-progress`` output; ``True`` at the end of a block."""
+    key, sep, value = line.strip().partition("=")
+    if not sep:
+        return False
+    if key in ("out_time_us", "out_time_ms") and value.lstrip("-").isdigit():
+        # ffmpeg reports out_time_ms in microseconds as well (historical quirk).
+        progress.out_time_ms = max(0, int(value) // 1000)
+    elif key == "speed" and value.endswith("x"):
+        try:
+            progress.speed = float(value[:-1])
+        except ValueError:
+            pass
+    elif key == "progress":
+        progress.done = value == "end"
+        return True
+    return False
+
+
+def parse_duration_ms(line: str) -> int | None:
+    match = _DURATION_RE.search(line)
+    if match is None:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int((int(hours) * 3600 + int(minutes) * 60 + float(seconds)) * 1000)
+
+
+class AsyncFFmpegRunner:
+    """Runs ffmpeg via ``asyncio.create_subprocess_exec`` without blocking the event loop.
+
+    ffmpeg commands get ``-progress pipe:1 -nostats`` so progress can be read
+    from stdout while stderr is drained concurrently. Cancelling the awaiting
+    task (or hitting *timeout*) kills the process.
+    """
+
+    async def run(
+        self,
+        cmd_args: list[str],
+        timeout: float | None = 300,
+        on_progress: Callable[[FFmpegProgress], None] | None = None,
+    ) -> tuple[int, str]:
+        """Returns ``(returncode, stderr)``; raises ``TimeoutError`` after *timeout* seconds."""
+        cmd = list(cmd_args)
+        if cmd and os.path.basename(cmd[0]) == "ffmpeg" and "-progress" not in cmd:
+            cmd[1:1] = ["-progress", "pipe:1", "-nostats"]
+        logger.info("ffmpeg async run: %s", " ".join(cmd[:6]))
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        progress = FFmpegProgress()
+        stderr_lines: list[str] = []
+
+        async def _read_stdout() -> None:
+            assert proc.stdout is not None
+            async for raw in proc.stdout:
+                if parse_progress_line(raw.decode("utf-8", "replace"), progress) and on_progress:
+                    on_progress(progress)
+
+        async def _read_stderr() -> None:
+            assert proc.stderr is not None
+            async for raw in proc.stderr:
+                line = raw.decode("utf-8", "replace")
+                if progress.input_duration_ms is None:
+                    progress.input_duration_ms = parse_duration_ms(line)
+                stderr_lines.append(line)
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(_read_stdout(), _read_stderr(), proc.wait()), timeout=timeout,
+            )
+        except asyncio.TimeoutError as exc:
+            logger.error("ffmpeg timed out after %ss: %s", timeout, cmd_args[:4])
+            raise TimeoutError(f"ffmpeg timed out after {timeout}s") from exc
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        stderr = "".join(stderr_lines)
+        if proc.returncode != 0:
+            logger.error("ffmpeg failed (rc=%d): %s", proc.returncode, stderr[-500:])
+        return proc.returncode, stderr
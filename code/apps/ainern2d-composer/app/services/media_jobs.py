@@ -0,0 +1,203 @@
+"""Media job service – trim/retime as polled, cancellable async ffmpeg jobs."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any
+from uuid import uuid4
+
+from ainern2d_shared.config.setting import settings
+from ainern2d_shared.telemetry.logging import get_logger
+
+from app.compose.cache import input_fingerprint
+from app.ffmpeg.runners import AsyncFFmpegRunner, FFmpegProgress
+
+logger = get_logger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_ACTIVE = {QUEUED, RUNNING}
+_REUSABLE = _ACTIVE | {SUCCEEDED}
+
+
+def media_request_key(kind: str, params: dict[str, Any], input_uri: str) -> str:
+    """Dedup key: job kind, its parameters and the input's current fingerprint."""
+    raw = json.dumps(
+        {"kind": kind, "params": params, "input": input_fingerprint(input_uri)},
+        sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class MediaJob:
+    job_id: str
+    kind: str
+    request_key: str
+    output_uri: str
+    command: list[str]
+    expected_duration_ms: int | None = None
+    duration_scale: float = 1.0
+    status: str = QUEUED
+    progress: float = 0.0
+    out_time_ms: int = 0
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    _task: asyncio.Task | None = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in _ACTIVE
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "out_time_ms": self.out_time_ms,
+            "output_uri": self.output_uri,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class MediaJobService:
+    """Runs media jobs in the background, at most ``max_concurrency`` ffmpeg processes at once.
+
+    Identical requests (same kind, parameters and input fingerprint) that are
+    queued, running or already succeeded return the existing job instead of
+    spawning another ffmpeg. Finished jobs are kept for polling until
+    ``max_finished`` newer ones have completed.
+    """
+
+    def __init__(
+        self,
+        runner: AsyncFFmpegRunner | None = None,
+        max_concurrency: int = 2,
+        timeout: float | None = 600,
+        max_finished: int = 500,
+    ) -> None:
+        self._runner = runner or AsyncFFmpegRunner()
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._timeout = timeout
+        self._max_finished = max_finished
+        self._jobs: dict[str, MediaJob] = {}
+        self._by_key: dict[str, str] = {}
+
+    def submit(
+        self,
+        kind: str,
+        command: list[str],
+        request_key: str,
+        output_uri: str,
+        expected_duration_ms: int | None = None,
+        duration_scale: float = 1.0,
+    ) -> tuple[MediaJob, bool]:
+        """Start a job (must be called from the event loop); returns ``(job, deduplicated)``."""
+        existing_id = self._by_key.get(request_key)
+        existing = self._jobs.get(existing_id) if existing_id else None
+        if existing is not None and existing.status in _REUSABLE:
+            return existing, True
+
+        job = MediaJob(
+            job_id=f"media_{uuid4().hex}",
+            kind=kind,
+            request_key=request_key,
+            output_uri=output_uri,
+            command=command,
+            expected_duration_ms=expected_duration_ms,
+            duration_scale=duration_scale,
+        )
+        self._jobs[job.job_id] = job
+        self._by_key[request_key] = job.job_id
+        job._task = asyncio.get_running_loop().create_task(self._run(job), name=job.job_id)
+        job._task.add_done_callback(lambda task: self._settle(job, task))
+        return job, False
+
+    def get(self, job_id: str) -> MediaJob | None:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> MediaJob | None:
+        job = self._jobs.get(job_id)
+        if job is not None and not job.finished and job._task is not None:
+            job._task.cancel()
+        return job
+
+    async def wait(self, job_id: str) -> MediaJob | None:
+        job = self._jobs.get(job_id)
+        if job is not None and job._task is not None:
+            await asyncio.shield(job._task)
+        return job
+
+    # ------------------------------------------------------------------
+
+    async def _run(self, job: MediaJob) -> None:
+        try:
+            async with self._semaphore:
+                job.status = RUNNING
+                job.started_at = time.time()
+                returncode, stderr = await self._runner.run(
+                    job.command, timeout=self._timeout, on_progress=lambda p: self._on_progress(job, p),
+                )
+            if returncode == 0:
+                job.status, job.progress = SUCCEEDED, 1.0
+            else:
+                job.status, job.error = FAILED, stderr[-1024:]
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            logger.info("media job cancelled: %s", job.job_id)
+        except (TimeoutError, OSError) as exc:
+            job.status, job.error = FAILED, str(exc)
+        finally:
+            job.finished_at = time.time()
+            self._evict_finished()
+
+    def _settle(self, job: MediaJob, task: asyncio.Task) -> None:
+        # A task cancelled before its first step never enters _run.
+        if not job.finished:
+            job.status = CANCELLED if task.cancelled() else FAILED
+            job.finished_at = time.time()
+            self._evict_finished()
+        job._task = None
+
+    @staticmethod
+    def _on_progress(job: MediaJob, progress: FFmpegProgress) -> None:
+        job.out_time_ms = progress.out_time_ms
+        expected = job.expected_duration_ms
+        if expected is None and progress.input_duration_ms:
+            expected = int(progress.input_duration_ms * job.duration_scale)
+        if expected:
+            job.progress = min(progress.out_time_ms / expected, 0.99)
+
+    def _evict_finished(self) -> None:
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda j: j.finished_at or 0)[: max(0, len(finished) - self._max_finished)]:
+            self._jobs.pop(job.job_id, None)
+            if self._by_key.get(job.request_key) == job.job_id:
+                self._by_key.pop(job.request_key, None)
+
+
+_service: MediaJobService | None = None
+
+
+def get_media_job_service() -> MediaJobService:
+    global _service
+    if _service is None:
+        _service = MediaJobService(
+            max_concurrency=settings.composer_media_max_concurrency,
+            timeout=settings.composer_media_timeout_sec or None,
+        )
+    return _service
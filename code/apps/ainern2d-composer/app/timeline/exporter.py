@@ -9,11 +9,29 @@ from ainern2d_shared.telemetry.logging import get_logger
 
 logger = get_logger(__name__)
 
+_NON_DIALOGUE_ROLES = {"BGM", "SFX"}
+
+
+def _overlaps(start_ms: int, duration_ms: int, window_ms: tuple[int, int]) -> bool:
+    return start_ms < window_ms[1] and start_ms + duration_ms > window_ms[0]
+
+
+def _srt_time(ms: int) -> str:
+    ms = max(ms, 0)
+    hours, rem = divmod(ms, 3_600_000)
+    minutes, rem = divmod(rem, 60_000)
+    seconds, millis = divmod(rem, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
 
 class TimelineExporter:
     """Exports a validated TimelinePlanDto to downstream formats."""
 
-    def to_ffmpeg_spec(self, timeline: TimelinePlanDto) -> dict:
+    def to_ffmpeg_spec(
+        self,
+        timeline: TimelinePlanDto,
+        window_ms: tuple[int, int] | None = None,
+    ) -> dict:
         """Convert timeline to an ffmpeg concat / filter_complex spec dict.
 
         The returned dict contains:
@@ -21,11 +39,17 @@ class TimelineExporter:
         - ``filter_complex``: filter graph string for audio mixing
         - ``concat_demuxer``: list of dicts for the concat demuxer file
         - ``total_duration_ms``: overall duration
+
+        With ``window_ms=(start, end)`` only items overlapping the window are
+        kept and audio is re-timed relative to ``start``; audio that began
+        earlier is trimmed with ``atrim`` (used for segment renders).
         """
         inputs: list[str] = []
         concat_entries: list[dict] = []
 
         for idx, video in enumerate(timeline.video_tracks):
+            if window_ms and not _overlaps(video.start_time_ms, video.duration_ms, window_ms):
+                continue
             uri = video.artifact_uri or f"missing_{video.id}"
             inputs.append(uri)
             concat_entries.append({
@@ -36,15 +60,21 @@ class TimelineExporter:
 
         # Build audio filter_complex
         audio_filters: list[str] = []
-        for idx, audio in enumerate(timeline.audio_tracks):
+        for audio in timeline.audio_tracks:
+            trim_ms = 0
+            delay_ms = audio.start_time_ms
+            if window_ms:
+                if not _overlaps(audio.start_time_ms, audio.duration_ms, window_ms):
+                    continue
+                trim_ms = max(0, window_ms[0] - audio.start_time_ms)
+                delay_ms = max(0, audio.start_time_ms - window_ms[0])
             uri = audio.artifact_uri or f"missing_{audio.id}"
             if uri not in inputs:
                 inputs.append(uri)
             input_idx = inputs.index(uri)
-            delay_ms = audio.start_time_ms
-            volume = audio.volume
+            trim = f"atrim=start={trim_ms / 1000:.3f},asetpts=PTS-STARTPTS," if trim_ms else ""
             audio_filters.append(
-                f"[{input_idx}:a]adelay={delay_ms}|{delay_ms},volume={volume}[a{idx}]"
+                f"[{input_idx}:a]{trim}adelay={delay_ms}|{delay_ms},volume={audio.volume}[a{len(audio_filters)}]"
             )
 
         filter_complex = ""
@@ -59,11 +89,39 @@ class TimelineExporter:
             "inputs": inputs,
             "concat_demuxer": concat_entries,
             "filter_complex": filter_complex,
-            "total_duration_ms": timeline.total_duration_ms,
+            "total_duration_ms": (
+                window_ms[1] - window_ms[0] if window_ms else timeline.total_duration_ms
+            ),
         }
         logger.debug("ffmpeg spec: %d inputs, filter_complex length=%d", len(inputs), len(filter_complex))
         return spec
 
+    def to_srt(
+        self,
+        timeline: TimelinePlanDto,
+        window_ms: tuple[int, int] | None = None,
+    ) -> str:
+        """Render audio items that carry ``text_content`` as SRT cues.
+
+        With ``window_ms`` cues are clipped to the window and re-timed to it.
+        """
+        offset = window_ms[0] if window_ms else 0
+        cues: list[str] = []
+        for audio in sorted(timeline.audio_tracks, key=lambda a: a.start_time_ms):
+            if not audio.text_content or audio.role.upper() in _NON_DIALOGUE_ROLES:
+                continue
+            start = audio.start_time_ms
+            end = audio.start_time_ms + audio.duration_ms
+            if window_ms:
+                if not _overlaps(audio.start_time_ms, audio.duration_ms, window_ms):
+                    continue
+                start, end = max(start, window_ms[0]), min(end, window_ms[1])
+            cues.append(
+                f"{len(cues) + 1}\n{_srt_time(start - offset)} --> {_srt_time(end - offset)}\n"
+                f"{audio.text_content.strip()}\n"
+            )
+        return "\n".join(cues)
+
     def to_json(self, timeline: TimelinePlanDto) -> str:
         """Serialize the timeline to a JSON string for storage."""
         return json.dumps(timeline.model_dump(mode="json"), ensure_ascii=False)
\ No newline at end of file
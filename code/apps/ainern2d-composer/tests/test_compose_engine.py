@@ -0,0 +1,327 @@
+"""Unit tests for the segment-parallel compose engine."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../../shared"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../"))
+
+from ainern2d_shared.schemas.timeline import (  # noqa: E402
+    TimelineAudioItemDto,
+    TimelinePlanDto,
+    TimelineVideoItemDto,
+)
+
+from app.compose import ComposeEngine, SegmentCache, plan_segments  # noqa: E402
+from app.ffmpeg.runners import FFmpegRunner  # noqa: E402
+from app.timeline.exporter import TimelineExporter  # noqa: E402
+
+
+def _timeline(shots: int = 6, shot_ms: int = 4000) -> TimelinePlanDto:
+    total = shots * shot_ms
+    return TimelinePlanDto(
+        run_id="run_c",
+        total_duration_ms=total,
+        video_tracks=[
+            TimelineVideoItemDto(
+                id=f"v{i}", shot_id=f"shot{i}", scene_id="sc1",
+                start_time_ms=i * shot_ms, duration_ms=shot_ms, artifact_uri=f"/clips/shot{i}.mp4",
+            )
+            for i in range(shots)
+        ],
+        audio_tracks=[
+            TimelineAudioItemDto(id="bgm", role="BGM", start_time_ms=0, duration_ms=total,
+                                 artifact_uri="/audio/bgm.mp3", volume=0.4),
+            TimelineAudioItemDto(id="line1", role="narrator", text_content="The gate closes.",
+                                 start_time_ms=9000, duration_ms=2000, artifact_uri="/audio/line1.wav"),
+        ],
+    )
+
+
+class FakeRunner(FFmpegRunner):
+    def __init__(self, fail_on: str | None = None, write_outputs: bool = False):
+        self.commands: list[list[str]] = []
+        self.fail_on = fail_on
+        self.write_outputs = write_outputs
+        self._lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def run(self, cmd_args, timeout=300):
+        with self._lock:
+            self.commands.append(cmd_args)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.01)
+        with self._lock:
+            self.active -= 1
+        if self.fail_on and self.fail_on in cmd_args[-1]:
+            return 1, "", "encode error"
+        if self.write_outputs and os.path.basename(cmd_args[-1]).startswith("seg_"):
+            with open(cmd_args[-1], "wb") as fh:
+                fh.write(b"segment")
+        return 0, "", ""
+
+
+def test_plan_segments_cuts_on_shot_boundaries():
+    segments = plan_segments(_timeline(), target_ms=8000)
+    assert [(s.start_ms, s.end_ms) for s in segments] == [(0, 8000), (8000, 16000), (16000, 24000)]
+    assert [len(s.shots) for s in segments] == [2, 2, 2]
+
+
+def test_segment_window_retimes_and_trims_audio():
+    spec = TimelineExporter().to_ffmpeg_spec(_timeline(), window_ms=(8000, 16000))
+    assert spec["inputs"] == ["/clips/shot2.mp4", "/clips/shot3.mp4", "/audio/bgm.mp3", "/audio/line1.wav"]
+    assert "[2:a]atrim=start=8.000,asetpts=PTS-STARTPTS,adelay=0|0,volume=0.4[a0]" in spec["filter_complex"]
+    assert "[3:a]adelay=1000|1000" in spec["filter_complex"]
+    assert spec["total_duration_ms"] == 8000
+
+
+def test_srt_cues_are_relative_to_the_window():
+    srt = TimelineExporter().to_srt(_timeline(), window_ms=(8000, 16000))
+    assert srt.splitlines()[:3] == ["1", "00:00:01,000 --> 00:00:03,000", "The gate closes."]
+    assert TimelineExporter().to_srt(_timeline(), window_ms=(0, 8000)) == ""
+
+
+def test_compose_renders_segments_in_parallel_then_stitches(tmp_path):
+    runner = FakeRunner()
+    progress = []
+    engine = ComposeEngine(runner=runner, max_workers=2, segment_ms=8000)
+
+    result = engine.compose(_timeline(), "/out/final.mp4", workdir=str(tmp_path), on_progress=progress.append)
+
+    *renders, stitch = runner.commands
+    assert len(renders) == 3 and runner.peak <= 2
+    assert stitch[stitch.index("-c:v") + 1] == "copy" and stitch[-1] == "/out/final.mp4"
+    # One audio track for the whole timeline, mixed at the stitch.
+    assert stitch[stitch.index("-c:a") + 1] == "aac" and "-t" in stitch and stitch[stitch.index("-t") + 1] == "24.000"
+    assert stitch[stitch.index("-map") + 1] == "2:v:0"
+    assert "[0:a]atrim" not in stitch[stitch.index("-filter_complex") + 1]
+    assert sorted(p.done for p in progress) == [1, 2, 3] and progress[-1].fraction == 1.0
+    assert [s.index for s in result.segments] == [0, 1, 2]
+    assert all(s.elapsed_ms > 0 for s in result.segments)
+    assert set(result.timings_ms) == {"plan", "render", "stitch", "total"}
+
+    middle = " ".join(next(c for c in renders if c[-1].endswith("seg_00001.mp4")))
+    assert "subtitles=filename=" in middle
+    assert "-sc_threshold 0" in middle and "-t 8.000" in middle
+    assert "-an" in middle and "/audio/" not in middle and "-c:a" not in middle
+
+
+def test_timeline_without_audio_is_stitched_with_silence(tmp_path):
+    timeline = _timeline(shots=2)
+    timeline.audio_tracks = []
+    engine = ComposeEngine(runner=FakeRunner(), segment_ms=60_000)
+    cmd = engine.stitch_command(timeline, str(tmp_path / "segments.txt"), "/tmp/final.mp4", 8000)
+    assert any(arg.startswith("anullsrc=") for arg in cmd)
+    assert cmd[cmd.index("-filter_complex") + 1] == "[0:a]aresample=48000,apad[amix]"
+    assert cmd[cmd.index("-map") + 1] == "1:v:0"
+
+
+def test_failed_segment_raises(tmp_path):
+    engine = ComposeEngine(runner=FakeRunner(fail_on="seg_00001"), segment_ms=8000)
+    with pytest.raises(RuntimeError, match=r"segment\(s\) \[1\]"):
+        engine.compose(_timeline(), "/out/final.mp4", workdir=str(tmp_path))
+
+
+def _render_outputs(runner):
+    return [c[-1] for c in runner.commands if os.path.basename(c[-1]).startswith("seg_")]
+
+
+def test_recompose_after_one_shot_edit_renders_only_its_segment(tmp_path):
+    cache = SegmentCache(str(tmp_path / "cache"))
+    runner = FakeRunner(write_outputs=True)
+    engine = ComposeEngine(runner=runner, segment_ms=8000, cache=cache)
+    timeline = _timeline()
+
+    first = engine.compose(timeline, "/out/final.mp4", workdir=str(tmp_path / "w1"))
+    assert first.rendered == [0, 1, 2] and first.reused == []
+
+    timeline.video_tracks[3].artifact_uri = "/clips/shot3_v2.mp4"
+    assert [seg.index for seg in engine.dirty_segments(timeline)] == [1]
+    runner.commands.clear()
+    second = engine.compose(timeline, "/out/final.mp4", workdir=str(tmp_path / "w2"))
+
+    assert second.rendered == [1] and second.reused == [0, 2]
+    assert len(_render_outputs(runner)) == 1
+    assert [s.output_uri for s in second.segments] == [cache.path_for(s.cache_key) for s in second.segments]
+    assert first.segments[0].cache_key == second.segments[0].cache_key
+    assert first.segments[1].cache_key != second.segments[1].cache_key
+
+
+class _ProbingRunner(FakeRunner):
+    """Answers ffprobe; segments listed in ``legacy`` report another H.264 level."""
+
+    def __init__(self, legacy: set[str]):
+        super().__init__(write_outputs=True)
+        self.legacy = legacy
+
+    def run(self, cmd_args, timeout=300):
+        if cmd_args[0] != "ffprobe":
+            return super().run(cmd_args, timeout)
+        with self._lock:
+            self.commands.append(cmd_args)
+        level = 40 if cmd_args[-1] in self.legacy else 31
+        return 0, json.dumps({"streams": [{
+            "codec_type": "video", "codec_name": "h264", "width": 1280, "height": 720, "pix_fmt": "yuv420p",
+            "r_frame_rate": "24/1", "time_base": "1/12288", "profile": "High", "level": level,
+        }]}), ""
+
+
+def test_reused_segments_from_another_encoder_are_normalized_before_stitch(tmp_path):
+    cache = SegmentCache(str(tmp_path / "cache"))
+    timeline = _timeline()
+    first = ComposeEngine(runner=FakeRunner(write_outputs=True), segment_ms=8000, cache=cache).compose(
+        timeline, "/out/final.mp4", workdir=str(tmp_path / "w1"),
+    )
+
+    runner = _ProbingRunner(legacy={first.segments[0].output_uri})
+    timeline.video_tracks[3].artifact_uri = "/clips/shot3_v2.mp4"
+    ComposeEngine(runner=runner, segment_ms=8000, cache=cache).compose(
+        timeline, "/out/final.mp4", workdir=str(tmp_path / "w2"),
+    )
+
+    assert sum(1 for c in runner.commands if c[0] == "ffprobe") == 3
+    (normalize,) = [c for c in runner.commands if "-profile:v" in c]
+    assert normalize[3] == first.segments[0].output_uri
+    listing = (tmp_path / "w2" / "segments.txt").read_text().splitlines()
+    assert listing[0].endswith("norm_00000.mp4'") and listing[2] == f"file '{first.segments[2].output_uri}'"
+
+
+def test_segment_key_ignores_audio_mix_but_tracks_subtitles(tmp_path):
+    engine = ComposeEngine(runner=FakeRunner(), segment_ms=8000)
+    timeline = _timeline()
+    before = [engine.segment_key(timeline, seg) for seg in plan_segments(timeline, 8000)]
+
+    timeline.audio_tracks[0].volume = 0.2  # audio is mixed at the stitch
+    timeline.audio_tracks[1].volume = 0.5
+    assert [engine.segment_key(timeline, seg) for seg in plan_segments(timeline, 8000)] == before
+
+    timeline.audio_tracks[1].text_content = "The gate opens."  # burned-in subtitle in segment 1
+    after = [engine.segment_key(timeline, seg) for seg in plan_segments(timeline, 8000)]
+    assert [b == a for b, a in zip(before, after)] == [True, False, True]
+
+
+def test_segment_cache_prunes_least_recently_used(tmp_path):
+    cache = SegmentCache(str(tmp_path / "cache"))
+    for i, key in enumerate(["aa" * 32, "bb" * 32, "cc" * 32]):
+        src = tmp_path / f"s{i}.mp4"
+        src.write_bytes(b"x" * 10)
+        path = cache.put(key, str(src))
+        os.utime(path, (1000 + i, 1000 + i))
+    cache.get("aa" * 32)  # touch the oldest entry
+
+    assert cache.prune(max_bytes=20) == 1
+    assert "bb" * 32 not in cache and "aa" * 32 in cache and "cc" * 32 in cache
+
+
+def test_segment_cache_keeps_leased_and_recently_used_entries(tmp_path):
+    cache = SegmentCache(str(tmp_path / "cache"), min_age_s=600)
+    for i, key in enumerate(["aa" * 32, "bb" * 32, "cc" * 32]):
+        src = tmp_path / f"s{i}.mp4"
+        src.write_bytes(b"x" * 10)
+        path = cache.put(key, str(src))
+        os.utime(path, (1000 + i, 1000 + i))
+    cache.get("cc" * 32)  # in use by another process: too recent to prune
+
+    with cache.lease(["aa" * 32]):
+        assert cache.prune(max_bytes=0) == 1
+    assert "bb" * 32 not in cache and "aa" * 32 in cache and "cc" * 32 in cache
+    assert cache.prune(max_bytes=0) == 1 and "aa" * 32 not in cache
+
+
+def test_remote_inputs_are_fingerprinted_by_content(monkeypatch):
+    from app.compose import cache as cache_mod
+
+    heads = {"s3://b/clip.mp4": "etag-1", "https://cdn/clip.mp4": None}
+    monkeypatch.setattr(cache_mod, "_remote_memo", {})
+    monkeypatch.setattr(cache_mod, "_head_s3", lambda uri: heads[uri])
+    monkeypatch.setattr(cache_mod, "_head_http", lambda uri: heads[uri])
+
+    first = cache_mod.input_fingerprint("s3://b/clip.mp4")
+    assert first == "s3://b/clip.mp4#etag-1"
+    heads["s3://b/clip.mp4"] = "etag-2"
+    cache_mod._remote_memo.clear()
+    assert cache_mod.input_fingerprint("s3://b/clip.mp4") != first
+
+    # Unverifiable remote inputs never share a fingerprint, not even within the memo TTL.
+    unverified = cache_mod.input_fingerprint("https://cdn/clip.mp4")
+    assert cache_mod.input_fingerprint("https://cdn/clip.mp4") != unverified
+    assert "https://cdn/clip.mp4" not in cache_mod._remote_memo
+
+
+def _compose_request():
+    from ainern2d_shared.schemas.task import ComposeRequest
+
+    return ComposeRequest(
+        run_id="run_c", timeline_final=_timeline(2).model_dump(mode="json"), artifact_refs=[],
+        tenant_id="t1", project_id="p1", trace_id="tr1", correlation_id="c1", idempotency_key="k1",
+    )
+
+
+def _capture_job(monkeypatch, compose_api):
+    updates: list[dict] = []
+    published: list[tuple[str, dict]] = []
+
+    class _Publisher:
+        def publish(self, topic, message):
+            published.append((topic, message))
+
+    monkeypatch.setattr(compose_api, "_update_job", lambda job_id, **fields: updates.append(fields))
+    monkeypatch.setattr(compose_api, "get_publisher", lambda url: _Publisher())
+    return updates, published
+
+
+def test_any_compose_error_fails_the_job_and_publishes_it(tmp_path, monkeypatch):
+    from app.api.v1 import compose as compose_api
+
+    updates, published = _capture_job(monkeypatch, compose_api)
+    monkeypatch.setattr(compose_api.settings, "composer_output_dir", str(tmp_path))
+
+    class _Engine:
+        def __init__(self, **kwargs):
+            pass
+
+        def compose(self, timeline, output_path, on_progress=None):
+            raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(compose_api, "ComposeEngine", _Engine)
+    compose_api.run_compose_job("compose_1", _compose_request())
+
+    assert updates[-1]["status"].value == "failed"
+    assert "No space left" in updates[-1]["error_message"]
+    assert [m["event_type"] for _, m in published] == ["compose.failed"]
+
+
+def test_composed_file_is_uploaded_and_its_uri_reported(tmp_path, monkeypatch):
+    from app.api.v1 import compose as compose_api
+    from app.compose import ComposeResult
+
+    updates, published = _capture_job(monkeypatch, compose_api)
+    monkeypatch.setattr(compose_api.settings, "composer_output_dir", str(tmp_path / "out"))
+    monkeypatch.setattr(compose_api.settings, "storage_backend", "local")
+    monkeypatch.setattr(compose_api.settings, "storage_local_root", str(tmp_path / "store"))
+
+    class _Engine:
+        def __init__(self, **kwargs):
+            pass
+
+        def compose(self, timeline, output_path, on_progress=None):
+            with open(output_path, "wb") as fh:
+                fh.write(b"mp4")
+            return ComposeResult(output_uri=output_path)
+
+    monkeypatch.setattr(compose_api, "ComposeEngine", _Engine)
+    compose_api.run_compose_job("compose_1", _compose_request())
+
+    uri = f"s3://{compose_api.settings.s3_bucket}/run_c/final.mp4"
+    assert updates[-1]["status"].value == "success"
+    assert updates[-1]["result_json"]["artifact_uri"] == uri
+    assert published[0][1]["payload"]["artifact_uri"] == uri
+    assert (tmp_path / "store" / compose_api.settings.s3_bucket / "run_c" / "final.mp4").read_bytes() == b"mp4"
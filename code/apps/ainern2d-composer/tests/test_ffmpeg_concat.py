@@ -0,0 +1,157 @@
+"""Unit tests for the composer's stream-copy concat path."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../../shared"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../"))
+
+from app.ffmpeg.concat import (  # noqa: E402
+    CONCAT_COPY,
+    CONCAT_NORMALIZED,
+    CONCAT_REENCODE,
+    ConcatComposer,
+    plan_concat,
+)
+from app.ffmpeg.probe import parse_ffprobe  # noqa: E402
+
+
+def _ffprobe_json(width=1280, height=720, fps="24/1", audio=True, codec="h264", profile="High", level=31):
+    streams = [{
+        "codec_type": "video", "codec_name": codec, "width": width, "height": height,
+        "pix_fmt": "yuv420p", "r_frame_rate": fps, "time_base": "1/12288",
+        "profile": profile, "level": level,
+    }]
+    if audio:
+        streams.append({
+            "codec_type": "audio", "codec_name": "aac", "sample_rate": "48000",
+            "channels": 2, "channel_layout": "stereo",
+        })
+    return {"streams": streams, "format": {"duration": "2.5"}}
+
+
+class FakeRunner:
+    """Answers ffprobe from a table and records every ffmpeg invocation."""
+
+    def __init__(self, probes: dict[str, dict], fail_on: str | None = None):
+        self.probes = probes
+        self.fail_on = fail_on
+        self.commands: list[list[str]] = []
+        self._lock = threading.Lock()
+
+    def run(self, cmd_args, timeout=300):
+        with self._lock:
+            self.commands.append(cmd_args)
+        if cmd_args[0] == "ffprobe":
+            return 0, json.dumps(self.probes[cmd_args[-1]]), ""
+        if self.fail_on and self.fail_on in cmd_args:
+            return 1, "", "boom"
+        return 0, "", ""
+
+    def ffmpeg_commands(self):
+        return [c for c in self.commands if c[0] == "ffmpeg"]
+
+
+def test_parse_ffprobe_reads_video_and_audio_layout():
+    probe = parse_ffprobe("a.mp4", _ffprobe_json())
+    assert probe.format.video_codec == "h264"
+    assert (probe.format.width, probe.format.height) == (1280, 720)
+    assert probe.format.sample_rate == 48000 and probe.format.channel_layout == "stereo"
+    assert probe.duration_sec == 2.5
+
+
+def test_plan_concat_targets_majority_format():
+    probes = [
+        parse_ffprobe("a.mp4", _ffprobe_json(width=640, height=360)),
+        parse_ffprobe("b.mp4", _ffprobe_json()),
+        parse_ffprobe("c.mp4", _ffprobe_json()),
+    ]
+    plan = plan_concat(probes)
+    assert plan.target.width == 1280
+    assert plan.mismatched == [0]
+
+
+def test_profile_and_level_mismatches_are_normalized_to_the_target(tmp_path):
+    uris = ["/clips/a.mp4", "/clips/b.mp4", "/clips/c.mp4"]
+    runner = FakeRunner({
+        "/clips/a.mp4": _ffprobe_json(audio=False),
+        "/clips/b.mp4": _ffprobe_json(audio=False, profile="Main", level=40),
+        "/clips/c.mp4": _ffprobe_json(audio=False, level=-99),
+    })
+
+    clips, plan = ConcatComposer(runner=runner).normalize(uris, str(tmp_path))
+
+    assert plan.target.profile == "High" and plan.target.level == 31
+    assert plan.mismatched == [1, 2]
+    assert clips[0] == "/clips/a.mp4" and clips[1].endswith("norm_00001.mp4")
+    cmd = runner.ffmpeg_commands()[0]
+    assert cmd[cmd.index("-profile:v") + 1] == "high" and cmd[cmd.index("-level") + 1] == "3.1"
+    assert "-an" in cmd
+
+
+def test_uniform_clips_are_stream_copied(tmp_path):
+    uris = [f"/clips/shot_{i}.mp4" for i in range(5)]
+    runner = FakeRunner({uri: _ffprobe_json() for uri in uris})
+
+    result = ConcatComposer(runner=runner).concat(uris, "/out/final.mp4", workdir=str(tmp_path))
+
+    assert result.mode == CONCAT_COPY and result.normalized == 0
+    (cmd,) = runner.ffmpeg_commands()
+    assert cmd[cmd.index("-f") + 1] == "concat" and cmd[cmd.index("-c") + 1] == "copy"
+    assert "-filter_complex" not in cmd
+    listing = (tmp_path / "concat.txt").read_text().splitlines()
+    assert listing == [f"file '{uri}'" for uri in uris]
+
+
+def test_only_mismatched_clips_are_normalized(tmp_path):
+    uris = ["/clips/a.mp4", "/clips/b.mp4", "/clips/c.mp4", "/clips/d.mp4"]
+    runner = FakeRunner({
+        "/clips/a.mp4": _ffprobe_json(),
+        "/clips/b.mp4": _ffprobe_json(fps="30/1"),
+        "/clips/c.mp4": _ffprobe_json(),
+        "/clips/d.mp4": _ffprobe_json(audio=False),
+    })
+
+    result = ConcatComposer(runner=runner).concat(uris, "/out/final.mp4", workdir=str(tmp_path))
+
+    assert result.mode == CONCAT_NORMALIZED and result.normalized == 2
+    *normalize, join = runner.ffmpeg_commands()
+    assert sorted(cmd[3] for cmd in normalize) == ["/clips/b.mp4", "/clips/d.mp4"]
+    silent = next(cmd for cmd in normalize if cmd[3] == "/clips/d.mp4")
+    assert any(arg.startswith("anullsrc=channel_layout=stereo") for arg in silent)
+    assert all("fps=24/1" in " ".join(cmd) for cmd in normalize)
+    assert join[join.index("-c") + 1] == "copy"
+    listing = (tmp_path / "concat.txt").read_text().splitlines()
+    assert listing[0] == "file '/clips/a.mp4'"
+    assert listing[1].endswith("norm_00001.mp4'") and listing[3].endswith("norm_00003.mp4'")
+
+
+def test_failed_normalization_falls_back_to_filter_concat(tmp_path):
+    uris = ["/clips/a.mp4", "/clips/b.mp4", "/clips/c.mp4"]
+    runner = FakeRunner(
+        {"/clips/a.mp4": _ffprobe_json(), "/clips/b.mp4": _ffprobe_json(codec="hevc"), "/clips/c.mp4": _ffprobe_json()},
+        fail_on="libx264",
+    )
+
+    result = ConcatComposer(runner=runner).concat(uris, "/out/final.mp4", workdir=str(tmp_path))
+
+    assert result.mode == CONCAT_REENCODE
+    assert "-filter_complex" in runner.ffmpeg_commands()[-1]
+
+
+def test_concat_spec_consumes_exporter_demuxer_entries(tmp_path):
+    spec = {"concat_demuxer": [{"file": "/clips/a.mp4"}, {"file": "/clips/b.mp4"}]}
+    runner = FakeRunner({"/clips/a.mp4": _ffprobe_json(), "/clips/b.mp4": _ffprobe_json()})
+
+    result = ConcatComposer(runner=runner).concat_spec(spec, "/out/final.mp4", workdir=str(tmp_path))
+    assert result.clips == 2 and result.mode == CONCAT_COPY
+
+
+def test_empty_input_is_rejected():
+    with pytest.raises(ValueError):
+        ConcatComposer(runner=FakeRunner({})).concat([], "/out/final.mp4")
@@ -0,0 +1,140 @@
+"""Unit tests for the async media job service."""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../../shared"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../"))
+
+from app.ffmpeg.runners import FFmpegProgress, parse_duration_ms, parse_progress_line  # noqa: E402
+from app.services.media_jobs import (  # noqa: E402
+    CANCELLED,
+    FAILED,
+    SUCCEEDED,
+    MediaJobService,
+    media_request_key,
+)
+
+# Stand-in for ffmpeg: prints a Duration banner on stderr and -progress blocks on stdout.
+_FAKE_FFMPEG = """
+import sys, time
+sys.stderr.write("  Duration: 00:00:04.00, start: 0.000000, bitrate: 1 kb/s\\n"); sys.stderr.flush()
+for us in (1000000, 2000000):
+    print(f"out_time_us={us}\\nspeed=2.0x\\nprogress=continue", flush=True)
+    time.sleep({delay})
+print("out_time_us=2000000\\nprogress=end", flush=True)
+sys.exit({rc})
+"""
+
+
+def _cmd(delay: float = 0.01, rc: int = 0) -> list[str]:
+    return [sys.executable, "-c", _FAKE_FFMPEG.replace("{delay}", str(delay)).replace("{rc}", str(rc))]
+
+
+def test_parse_progress_block_and_duration_banner():
+    progress = FFmpegProgress()
+    assert not parse_progress_line("out_time_us=1500000", progress)
+    parse_progress_line("speed=1.5x", progress)
+    assert parse_progress_line("progress=end", progress)
+    assert (progress.out_time_ms, progress.speed, progress.done) == (1500, 1.5, True)
+    assert parse_duration_ms("  Duration: 00:01:02.50, start: 0.0") == 62500
+
+
+def test_job_reports_progress_and_succeeds():
+    async def scenario():
+        service = MediaJobService(max_concurrency=1)
+        seen = []
+        job, dedup = service.submit("retime", _cmd(delay=0.05), "k1", "/out/a.mp4", duration_scale=0.5)
+        while not job.finished:
+            seen.append(job.progress)
+            await asyncio.sleep(0.01)
+        return job, dedup, seen
+
+    job, dedup, seen = asyncio.run(scenario())
+    assert job.status == SUCCEEDED and not dedup
+    assert job.progress == 1.0 and job.out_time_ms == 2000
+    assert 0.5 in seen  # 1s of a 4s input at 2x speed
+
+
+def test_identical_requests_share_one_job():
+    async def scenario():
+        service = MediaJobService()
+        key = media_request_key("trim", {"start_sec": 1, "end_sec": 2}, "/in/missing.mp4")
+        first, _ = service.submit("trim", _cmd(), key, "/out/t.mp4")
+        second, dedup = service.submit("trim", _cmd(), key, "/out/t.mp4")
+        await service.wait(first.job_id)
+        third, dedup_after = service.submit("trim", _cmd(), key, "/out/t.mp4")
+        return first, second, dedup, third, dedup_after
+
+    first, second, dedup, third, dedup_after = asyncio.run(scenario())
+    assert second is first and dedup
+    assert third is first and dedup_after
+
+
+def test_concurrency_is_bounded_and_queued_jobs_can_be_cancelled():
+    async def scenario():
+        service = MediaJobService(max_concurrency=1)
+        running, _ = service.submit("trim", _cmd(delay=0.2), "a", "/out/a.mp4")
+        queued, _ = service.submit("trim", _cmd(), "b", "/out/b.mp4")
+        await asyncio.sleep(0.05)
+        states = (running.status, queued.status)
+        service.cancel(queued.job_id)
+        service.cancel(running.job_id)
+        await asyncio.sleep(0.05)
+        return states, running, queued
+
+    states, running, queued = asyncio.run(scenario())
+    assert states == ("running", "queued")
+    assert running.status == CANCELLED and queued.status == CANCELLED
+
+
+def test_failed_job_is_not_reused():
+    async def scenario():
+        service = MediaJobService()
+        failed, _ = service.submit("trim", _cmd(rc=1), "k", "/out/f.mp4")
+        await service.wait(failed.job_id)
+        retry, dedup = service.submit("trim", _cmd(), "k", "/out/f.mp4")
+        await service.wait(retry.job_id)
+        return failed, retry, dedup
+
+    failed, retry, dedup = asyncio.run(scenario())
+    assert failed.status == FAILED and "Duration" in failed.error
+    assert retry is not failed and not dedup and retry.status == SUCCEEDED
+
+
+def test_media_routes_fingerprint_off_the_loop_and_keep_200_for_waits(monkeypatch):
+    import threading
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api.v1 import media as media_api
+    from app.services import media_jobs
+
+    class _Builder:
+        def trim_media(self, *args):
+            return _cmd()
+
+    key_threads: list[str] = []
+
+    def _key(kind, params, input_uri):
+        key_threads.append(threading.current_thread().name)
+        return media_request_key(kind, params, input_uri)
+
+    monkeypatch.setattr(media_api, "FFmpegCommandBuilder", _Builder)
+    monkeypatch.setattr(media_api, "media_request_key", _key)
+    monkeypatch.setattr(media_jobs, "_service", None)
+    app = FastAPI()
+    app.include_router(media_api.router)
+    body = {"input_uri": "/in/missing.mp4", "output_uri": "/out/w.mp4", "start_sec": 0, "end_sec": 1}
+
+    with TestClient(app) as client:
+        loop_thread = client.portal.call(lambda: threading.current_thread().name)
+        waited = client.post("/internal/media/trim?wait=true", json=body)
+        queued = client.post("/internal/media/trim", json={**body, "end_sec": 2})
+
+    assert waited.status_code == 200 and waited.json()["status"] == "success"
+    assert queued.status_code == 202
+    assert key_threads and loop_thread not in key_threads
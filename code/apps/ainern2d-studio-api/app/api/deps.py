@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
 from typing import Any, Generator
 
 from fastapi import Depends
@@ -12,7 +14,8 @@ from ainern2d_shared.db.repositories.pipeline import (
 	RenderRunRepository,
 	WorkflowEventRepository,
 )
-from ainern2d_shared.queue.rabbitmq import RabbitMQPublisher
+from ainern2d_shared.queue.rabbitmq import get_publisher
+from ainern2d_shared.services.skill_events import add_skill_event_observer
 from ainern2d_shared.telemetry.logging import get_logger
 
 
@@ -53,9 +56,7 @@ def get_event_repo(db: Session = Depends(get_db)) -> WorkflowEventRepository:
 
 def publish(topic: str, payload: dict[str, Any]) -> None:
 	try:
-		publisher = RabbitMQPublisher(settings.rabbitmq_url)
-		publisher.publish(topic=topic, message=payload)
-		publisher.close()
+		get_publisher(settings.rabbitmq_url).publish(topic=topic, message=payload)
 	except Exception as exc:
 		_logger.warning("publish fallback topic={} reason={}", topic, str(exc))
 
@@ -65,12 +66,41 @@ def get_db_session() -> Session:
 	return SessionLocal()
 
 
+_OBSERVER_MAX_EVENTS_PER_RUN = 1000
+_OBSERVER_MAX_RUNS = 200
+
+
 class _ObserverStore:
-	def __init__(self) -> None:
-		self.events: dict[str, list[dict[str, Any]]] = {}
+	def __init__(self, max_runs: int = _OBSERVER_MAX_RUNS) -> None:
+		self.events: OrderedDict[str, list[dict[str, Any]]] = OrderedDict()
+		self._max_runs = max(1, max_runs)
+		self._lock = threading.Lock()
+
+	def append(self, event: dict[str, Any]) -> None:
+		"""Keep the latest events of a run for ``/internal/observer/runs/{run_id}/trace``.
+
+		Only the ``max_runs`` most recently active runs are kept; older runs
+		are evicted whole.
+		"""
+		run_id = event.get("run_id")
+		if not run_id:
+			return
+		with self._lock:
+			events = self.events.get(run_id)
+			if events is None:
+				events = self.events[run_id] = []
+			else:
+				self.events.move_to_end(run_id)
+			events.append(event)
+			if len(events) > _OBSERVER_MAX_EVENTS_PER_RUN:
+				del events[: len(events) - _OBSERVER_MAX_EVENTS_PER_RUN]
+			while len(self.events) > self._max_runs:
+				self.events.popitem(last=False)
 
 
 _OBSERVER_STORE = _ObserverStore()
+# SKILL state transitions stream here as they happen, ahead of their buffered DB write.
+add_skill_event_observer(_OBSERVER_STORE.append)
 
 
 def get_store() -> _ObserverStore:
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 import json
+import re
 import requests
 from uuid import uuid4
 
@@ -14,6 +15,7 @@ from ainern2d_shared.ainer_db_models.governance_models import CreativePolicyStac
 from ainern2d_shared.ainer_db_models.provider_models import ModelProvider
 
 from app.api.deps import get_db
+from app.api.v1.translation import _call_provider_batched
 
 router = APIRouter(prefix="/api/v1/culture-packs", tags=["culture_packs"])
 
@@ -593,6 +595,11 @@ def _load_culture_pack_provider_settings(
     return dict(row.stack_json or {})
 
 
+def _extract_constraints(content: str) -> dict:
+    json_match = re.search(r'\{.*\}', content, re.DOTALL)
+    return json.loads(json_match.group()) if json_match else {}
+
+
 @router.post("/llm-extract", response_model=CulturePackLlmExtractResponse)
 def llm_extract_culture_pack(
     body: CulturePackLlmExtractRequest,
@@ -616,8 +623,6 @@ def llm_extract_culture_pack(
 
     endpoint = (provider.endpoint or "").strip().rstrip("/")
     token = str(provider_settings.get("access_token") or "").strip()
-    model_catalog = list(provider_settings.get("model_catalog") or [])
-    model_name = model_catalog[0] if model_catalog else "gpt-4o-mini"
 
     if not endpoint or not token:
         raise HTTPException(status_code=422, detail="provider endpoint/token not configured")
@@ -625,36 +630,17 @@ def llm_extract_culture_pack(
     prompt = _CULTURE_PACK_LLM_PROMPT.format(world_description=body.world_description[:4000])
 
     try:
-        response = requests.post(
-            f"{endpoint}/chat/completions",
-            json={
-                "model": model_name,
-                "messages": [
-                    {"role": "system", "content": "你是专业的世界观设计师，擅长提取文化约束规则。"},
-                    {"role": "user", "content": prompt},
-                ],
-                "temperature": 0.3,
-                "max_tokens": 1500,
-            },
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json",
-            },
-            timeout=90.0,
+        content = _call_provider_batched(
+            provider=provider,
+            provider_settings=provider_settings,
+            messages=[
+                {"role": "system", "content": "你是专业的世界观设计师，擅长提取文化约束规则。"},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=1500,
+            validate=_extract_constraints,
         )
-        if response.status_code < 200 or response.status_code >= 300:
-            raise ValueError(f"provider_http_status_{response.status_code}")
-
-        parsed = response.json() if response.text else {}
-        choices = parsed.get("choices") or []
-        content = str((choices[0].get("message") or {}).get("content") or "").strip() if choices else ""
-
-        import re as _re
-        json_match = _re.search(r'\{.*\}', content, _re.DOTALL)
-        if json_match:
-            constraints = json.loads(json_match.group())
-        else:
-            constraints = {}
+        constraints = _extract_constraints(content)
     except (requests.RequestException, ValueError, json.JSONDecodeError) as exc:
         raise HTTPException(status_code=502, detail=f"LLM call failed: {exc}") from exc
 
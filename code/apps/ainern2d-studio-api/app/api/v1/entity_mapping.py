@@ -33,7 +33,7 @@ from ainern2d_shared.ainer_db_models.content_models import (
 from ainern2d_shared.ainer_db_models.provider_models import ModelProvider
 
 from app.api.deps import get_db
-from app.api.v1.translation import _call_provider_with_messages, _load_provider_settings
+from app.api.v1.translation import _call_provider_batched, _load_provider_settings
 
 router = APIRouter(prefix="/api/v1", tags=["entity-mapping"])
 logger = logging.getLogger(__name__)
@@ -509,11 +509,12 @@ def translate_entity_mapping(
                     ),
                 },
             ]
-            raw = _call_provider_with_messages(
+            raw = _call_provider_batched(
                 provider=candidate_provider,
                 provider_settings=candidate_settings,
                 messages=messages,
                 max_tokens=512,
+                validate=_parse_json_object,
             )
             translations = _parse_json_object(raw)
             for lang in body.target_languages:
@@ -5,13 +5,14 @@
 """
 from __future__ import annotations
 
+import importlib
 import re
 from datetime import datetime, timezone
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from sqlalchemy import and_, select
 from sqlalchemy.orm import Session
 
 from ainern2d_shared.ainer_db_models.enum_models import KBPackStatus, KBSourceType, RagScope, RagSourceType
@@ -19,12 +20,16 @@ from ainern2d_shared.ainer_db_models.governance_models import PersonaPack
 from ainern2d_shared.ainer_db_models.rag_models import (
     KBPack, KBSource,
     KbVersion, NovelKBMap, PersonaKBMap, RagCollection, RagDocument,
-    RoleKBMap,
+    RagEmbedding, RoleKBMap,
 )
+from ainern2d_shared.config.setting import settings
 from app.api.deps import get_db
 
 router = APIRouter(prefix="/api/v1/kb", tags=["kb-assets"])
 
+# 目录名含连字符，只能用 importlib 加载
+_asset_knowledge = importlib.import_module("app.modules.asset-knowledge")
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # Pydantic 模型
@@ -187,6 +192,13 @@ def _get_pack_or_404(pack_id: str, db: Session) -> KBPack:
     return pack
 
 
+def _pack_changed(db: Session, kb_pack_id: str) -> None:
+    """pack 或其绑定变更后，提交时失效底层 collection 的检索缓存。"""
+    pack = db.get(KBPack, kb_pack_id)
+    if pack is not None:
+        _asset_knowledge.collection_changed(db, pack.collection_id)
+
+
 def _std_columns(prefix: str, name_suffix: str, tenant_id: str, project_id: str) -> dict:
     uid = uuid4().hex
     return {
@@ -330,6 +342,7 @@ def delete_kb_pack(
                 detail="kb pack is still bound to role/persona/novel; use ?force=true to delete anyway"
             )
     pack.deleted_at = datetime.now(timezone.utc)
+    _asset_knowledge.collection_changed(db, pack.collection_id)
     db.commit()
     return {"status": "deleted"}
 
@@ -385,6 +398,7 @@ async def upload_kb_source(
     db.add(src)
 
     # 写 RagDocument（chunk 一一写入 pack 的底层 RagCollection）
+    docs: list[RagDocument] = []
     if pack.collection_id and chunks:
         for idx, chunk in enumerate(chunks):
             doc = RagDocument(
@@ -402,6 +416,9 @@ async def upload_kb_source(
                 metadata_json={"chunk_index": idx, "source_name": file.filename, "kb_pack_id": pack_id},
             )
             db.add(doc)
+            docs.append(doc)
+        # 提交后再更新检索缓存，回滚则丢弃
+        _asset_knowledge.documents_changed(db, docs)
 
     # 更新 pack status → embedded（如果 chunks > 0）
     if chunks and pack.status == KBPackStatus.draft:
@@ -453,15 +470,41 @@ def trigger_embed(
     project_id: str = Query(...),
     db: Session = Depends(get_db),
 ) -> dict:
-    """触发 KBPack 的 embedding 生成（异步占位，当前为同步标记）。"""
+    """为 KBPack 中尚无主向量的文档批量生成 embedding。
+
+    文本未变化的 chunk 命中 sha256(model, text) 缓存，不再调用 embedding 服务，
+    因此重新同步的开销只与变化的内容成正比。
+    """
     pack = _get_pack_or_404(pack_id, db)
-    # 实际 embedding 应通过 worker-hub 异步执行，这里先标记状态
+    embedded = 0
+    stats: dict[str, int] = {}
+    if pack.collection_id:
+        docs = db.execute(
+            select(RagDocument)
+            .outerjoin(
+                RagEmbedding,
+                and_(RagEmbedding.doc_id == RagDocument.id, RagEmbedding.is_primary.is_(True)),
+            )
+            .where(
+                RagDocument.collection_id == pack.collection_id,
+                RagDocument.deleted_at.is_(None),
+                RagEmbedding.id.is_(None),
+            )
+        ).scalars().all()
+        if docs:
+            generator = _asset_knowledge.EmbeddingGenerator(
+                db, api_key=settings.openai_api_key, base_url=settings.openai_base_url,
+            )
+            embedded = len(generator.embed_documents(docs))
+            stats = generator.last_stats.as_dict()
     pack.status = KBPackStatus.embedded
     db.commit()
     return {
         "kb_pack_id": pack_id,
-        "status": "embedding_queued",
-        "message": "Embedding will be processed by worker. Current status set to 'embedded'.",
+        "status": "embedded",
+        "embedded_docs": embedded,
+        "embedding_stats": stats,
+        "message": f"Embedded {embedded} document(s); {stats.get('cache_hits', 0)} served from cache.",
     }
 
 
@@ -569,6 +612,7 @@ def delete_role_kb_binding(binding_id: str, db: Session = Depends(get_db)) -> di
     if row is None or row.deleted_at is not None:
         raise HTTPException(status_code=404, detail="binding not found")
     row.deleted_at = datetime.now(timezone.utc)
+    _pack_changed(db, row.kb_pack_id)
     db.commit()
     return {"status": "deleted"}
 
@@ -677,6 +721,7 @@ def delete_persona_kb_binding(binding_id: str, db: Session = Depends(get_db)) ->
     if row is None or row.deleted_at is not None:
         raise HTTPException(status_code=404, detail="binding not found")
     row.deleted_at = datetime.now(timezone.utc)
+    _pack_changed(db, row.kb_pack_id)
     db.commit()
     return {"status": "deleted"}
 
@@ -785,6 +830,7 @@ def delete_novel_kb_binding(binding_id: str, db: Session = Depends(get_db)) -> d
     if row is None or row.deleted_at is not None:
         raise HTTPException(status_code=404, detail="binding not found")
     row.deleted_at = datetime.now(timezone.utc)
+    _pack_changed(db, row.kb_pack_id)
     db.commit()
     return {"status": "deleted"}
 
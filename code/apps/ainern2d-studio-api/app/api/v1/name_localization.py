@@ -26,8 +26,8 @@ from ainern2d_shared.ainer_db_models.content_models import Novel, SkillRun, Skil
 from ainern2d_shared.ainer_db_models.provider_models import ModelProvider
 
 from app.api.deps import get_db
-from app.api.v1.translation import _call_provider_with_messages, _load_provider_settings
-from app.api.v1.entity_mapping import _split_display_and_birth_name
+from app.api.v1.translation import _call_provider_batched, _load_provider_settings
+from app.api.v1.entity_mapping import _parse_json_object, _split_display_and_birth_name
 
 router = APIRouter(prefix="/api/v1", tags=["name-localization"])
 
@@ -339,11 +339,14 @@ def suggest_names(
 
     for attempt in range(2):
         try:
-            raw = _call_provider_with_messages(
+            raw = _call_provider_batched(
                 provider=provider,
                 provider_settings=settings,
                 messages=current_messages,
-                max_tokens=3000,
+                # ~300 tokens per entity (3 candidates with rationales); small
+                # requests stay small enough to share a batched call.
+                max_tokens=min(3000, 300 * max(1, len(entity_list))),
+                validate=_parse_json_object,
             )
             cleaned = re.sub(r"^```(?:json)?\s*", "", raw.strip(), flags=re.MULTILINE)
             cleaned = re.sub(r"\s*```$", "", cleaned.strip(), flags=re.MULTILINE)
@@ -30,6 +30,12 @@ from ainern2d_shared.queue.rabbitmq import RabbitMQConsumer
 
 from app.api.deps import get_db, get_db_session, publish
 from ainern2d_shared.telemetry.logging import get_logger
+from app.services.job_progress import (
+    deliver_job_event,
+    enable_broadcast,
+    relay_job_event,
+    streams_progress,
+)
 from app.services.telegram_notify import notify_telegram_event
 from app.modules.model_router.router import ModelRouter
 from app.modules.model_router.provider_registry import ProviderRegistry
@@ -323,15 +329,16 @@ def _refresh_track_rollups(db: Session, run) -> None:
         run.stage = RenderStage.execute
 
 
-def _find_attempt_for_job(db: Session, job_id: str) -> TrackUnitAttempt | None:
+def _find_attempt_for_job(db: Session, job_id: str, track_unit_id: str | None = None) -> TrackUnitAttempt | None:
+    stmt = select(TrackUnitAttempt).where(
+        TrackUnitAttempt.job_id == job_id,
+        TrackUnitAttempt.deleted_at.is_(None),
+    )
+    if track_unit_id:
+        # Batch jobs have one attempt per unit.
+        stmt = stmt.where(TrackUnitAttempt.track_unit_id == track_unit_id)
     return db.execute(
-        select(TrackUnitAttempt)
-        .where(
-            TrackUnitAttempt.job_id == job_id,
-            TrackUnitAttempt.deleted_at.is_(None),
-        )
-        .order_by(TrackUnitAttempt.created_at.desc())
-        .limit(1)
+        stmt.order_by(TrackUnitAttempt.created_at.desc()).limit(1)
     ).scalars().first()
 
 
@@ -356,6 +363,182 @@ def _sync_unit_segment_artifact(db: Session, run_id: str, track_type: str, unit_
         seg.meta_json = meta
 
 
+def _apply_track_unit_success(
+    db: Session,
+    run,
+    track_run: TrackRun,
+    unit: TrackUnit,
+    job: Job,
+    result: dict,
+    now: datetime,
+) -> bool:
+    """Record *result* as the unit's new artifact; False if its lineage is invalid."""
+    artifact_uri_raw = _extract_artifact_uri(result)
+    artifact_id = f"art_{uuid4().hex}"
+    artifact_uri, lineage_meta, missing_keys = _build_artifact_lineage(
+        db=db,
+        run=run,
+        track_run=track_run,
+        unit=unit,
+        artifact_id=artifact_id,
+        artifact_uri_raw=artifact_uri_raw,
+    )
+    worker_meta = _extract_worker_artifact_meta(result)
+    media_meta = {
+        **worker_meta,
+        **lineage_meta,
+        "track_run_id": track_run.id,
+        "track_unit_id": unit.id,
+        "track_type": track_run.track_type,
+        "unit_ref_id": unit.unit_ref_id,
+        "dialogue_id": unit.dialogue_id,
+        "model_profile_id": track_run.model_profile_id,
+    }
+
+    if missing_keys:
+        unit.status = "failed"
+        unit.attempt_count = int(unit.attempt_count or 0) + 1
+        unit.last_error_code = "ARTIFACT-META-001"
+        unit.last_error_message = f"artifact lineage meta invalid: missing {','.join(missing_keys)}"
+        attempt = _find_attempt_for_job(db, job.id, unit.id)
+        if attempt is not None:
+            attempt.status = "failed"
+            attempt.error_code = unit.last_error_code
+            attempt.error_message = unit.last_error_message
+            attempt.finished_at = now
+            if attempt.started_at:
+                attempt.duration_ms = max(
+                    0,
+                    int((attempt.finished_at - attempt.started_at).total_seconds() * 1000),
+                )
+        return False
+
+    artifact = Artifact(
+        id=artifact_id,
+        tenant_id=run.tenant_id,
+        project_id=run.project_id,
+        trace_id=run.trace_id,
+        correlation_id=run.correlation_id,
+        idempotency_key=f"idem_track_artifact_{unit.id}_{uuid4().hex[:8]}",
+        run_id=run.id,
+        shot_id=unit.shot_id,
+        type=_artifact_type_for_track(track_run.track_type),
+        uri=artifact_uri,
+        media_meta_json=media_meta,
+    )
+    db.add(artifact)
+    db.flush()
+
+    chapter_row = db.get(Chapter, run.chapter_id)
+    lineage_index = ArtifactLineageIndex(
+        id=f"ali_{uuid4().hex}",
+        tenant_id=run.tenant_id,
+        project_id=run.project_id,
+        trace_id=run.trace_id,
+        correlation_id=run.correlation_id,
+        idempotency_key=f"idem_ali_{artifact.id}",
+        artifact_id=artifact.id,
+        run_id=run.id,
+        track_run_id=track_run.id,
+        track_unit_id=unit.id,
+        novel_id=chapter_row.novel_id if chapter_row else None,
+        chapter_id=run.chapter_id,
+        source_language=lineage_meta.get("source_language"),
+        target_language=lineage_meta.get("target_language"),
+        culture_pack_id=lineage_meta.get("culture_pack_id"),
+        world_pack_version=lineage_meta.get("world_pack_version"),
+        track_type=lineage_meta.get("track_type"),
+        unit_ref_id=lineage_meta.get("unit_ref_id"),
+        canonical_path=lineage_meta.get("artifact_path_canonical"),
+        model_profile_id=track_run.model_profile_id,
+        extra_meta_json=media_meta,
+    )
+    db.add(lineage_index)
+
+    candidates = list(unit.output_candidates_json or [])
+    candidates.append(
+        {
+            "job_id": job.id,
+            "artifact_id": artifact_id,
+            "artifact_uri": artifact_uri,
+            "origin_artifact_uri": artifact_uri_raw,
+            "lineage_path": lineage_meta.get("artifact_path_canonical"),
+            "at": now.isoformat(),
+        }
+    )
+    unit.output_candidates_json = candidates
+    unit.selected_asset_id = artifact_id or unit.selected_asset_id
+    unit.selected_job_id = job.id
+    unit.status = "success"
+    unit.blocked_reason = None
+    unit.last_error_code = None
+    unit.last_error_message = None
+    attempt = _find_attempt_for_job(db, job.id, unit.id)
+    if attempt is not None:
+        attempt.status = "success"
+        attempt.artifact_id = artifact.id
+        attempt.error_code = None
+        attempt.error_message = None
+        attempt.finished_at = now
+        if attempt.started_at:
+            attempt.duration_ms = max(
+                0,
+                int((attempt.finished_at - attempt.started_at).total_seconds() * 1000),
+            )
+
+    _sync_unit_segment_artifact(
+        db=db,
+        run_id=run.id,
+        track_type=track_run.track_type,
+        unit_id=unit.id,
+        artifact_id=unit.selected_asset_id or artifact.id,
+        lineage_path=lineage_meta.get("artifact_path_canonical"),
+    )
+    return True
+
+
+def _apply_track_unit_failure(
+    db: Session,
+    run,
+    track_run: TrackRun,
+    unit: TrackUnit,
+    job: Job,
+    error_code: str,
+    error_message: str,
+    now: datetime,
+) -> None:
+    unit.status = "failed"
+    unit.attempt_count = int(unit.attempt_count or 0) + 1
+    unit.last_error_code = error_code
+    unit.last_error_message = error_message
+    attempt = _find_attempt_for_job(db, job.id, unit.id)
+    if attempt is not None:
+        attempt.status = "failed"
+        attempt.error_code = unit.last_error_code
+        attempt.error_message = unit.last_error_message
+        attempt.finished_at = now
+        if attempt.started_at:
+            attempt.duration_ms = max(
+                0,
+                int((attempt.finished_at - attempt.started_at).total_seconds() * 1000),
+            )
+    segments = db.execute(
+        select(TimelineSegment)
+        .where(
+            TimelineSegment.run_id == run.id,
+            TimelineSegment.track == track_run.track_type,
+            TimelineSegment.deleted_at.is_(None),
+        )
+    ).scalars().all()
+    for seg in segments:
+        meta = seg.meta_json or {}
+        if meta.get("track_unit_id") == unit.id:
+            meta["status"] = "failed"
+            meta["error_code"] = unit.last_error_code
+            meta["error_message"] = unit.last_error_message
+            seg.meta_json = meta
+
+
 def _handle_track_unit_job_event(db: Session, event: EventEnvelope, run) -> bool:
     job_id = event.payload.get("job_id") or event.job_id
     if not job_id:
@@ -370,6 +553,8 @@ def _handle_track_unit_job_event(db: Session, event: EventEnvelope, run) -> bool
         or job.track_unit_id
     )
     if not track_unit_id:
+        if (job.payload_json or {}).get("lines"):
+            return _handle_track_batch_job_event(db, event, run, job)
         return False
 
     unit = db.get(TrackUnit, track_unit_id)
@@ -396,171 +581,92 @@ def _handle_track_unit_job_event(db: Session, event: EventEnvelope, run) -> bool
     if event.event_type == "job.succeeded":
         job.status = JobStatus.success
         job.result_json = event.payload
-        artifact_uri_raw = _extract_artifact_uri(event.payload or {})
-        artifact_id = f"art_{uuid4().hex}"
-        artifact_uri, lineage_meta, missing_keys = _build_artifact_lineage(
-            db=db,
-            run=run,
-            track_run=track_run,
-            unit=unit,
-            artifact_id=artifact_id,
-            artifact_uri_raw=artifact_uri_raw,
-        )
-        worker_meta = _extract_worker_artifact_meta(event.payload or {})
-        media_meta = {
-            **worker_meta,
-            **lineage_meta,
-            "track_run_id": track_run.id,
-            "track_unit_id": unit.id,
-            "track_type": track_run.track_type,
-            "unit_ref_id": unit.unit_ref_id,
-            "dialogue_id": unit.dialogue_id,
-            "model_profile_id": track_run.model_profile_id,
-        }
-
-        if missing_keys:
+        if not _apply_track_unit_success(db, run, track_run, unit, job, event.payload or {}, now):
             job.status = JobStatus.failed
-            unit.status = "failed"
-            unit.attempt_count = int(unit.attempt_count or 0) + 1
-            unit.last_error_code = "ARTIFACT-META-001"
-            unit.last_error_message = f"artifact lineage meta invalid: missing {','.join(missing_keys)}"
-            attempt = _find_attempt_for_job(db, job.id)
-            if attempt is not None:
-                attempt.status = "failed"
-                attempt.error_code = unit.last_error_code
-                attempt.error_message = unit.last_error_message
-                attempt.finished_at = now
-                if attempt.started_at:
-                    attempt.duration_ms = max(
-                        0,
-                        int((attempt.finished_at - attempt.started_at).total_seconds() * 1000),
-                    )
-            _refresh_track_rollups(db, run)
-            return True
-
-        artifact = Artifact(
-            id=artifact_id,
-            tenant_id=run.tenant_id,
-            project_id=run.project_id,
-            trace_id=run.trace_id,
-            correlation_id=run.correlation_id,
-            idempotency_key=f"idem_track_artifact_{unit.id}_{uuid4().hex[:8]}",
-            run_id=run.id,
-            shot_id=unit.shot_id,
-            type=_artifact_type_for_track(track_run.track_type),
-            uri=artifact_uri,
-            media_meta_json=media_meta,
-        )
-        db.add(artifact)
-        db.flush()
-
-        chapter_row = db.get(Chapter, run.chapter_id)
-        lineage_index = ArtifactLineageIndex(
-            id=f"ali_{uuid4().hex}",
-            tenant_id=run.tenant_id,
-            project_id=run.project_id,
-            trace_id=run.trace_id,
-            correlation_id=run.correlation_id,
-            idempotency_key=f"idem_ali_{artifact.id}",
-            artifact_id=artifact.id,
-            run_id=run.id,
-            track_run_id=track_run.id,
-            track_unit_id=unit.id,
-            novel_id=chapter_row.novel_id if chapter_row else None,
-            chapter_id=run.chapter_id,
-            source_language=lineage_meta.get("source_language"),
-            target_language=lineage_meta.get("target_language"),
-            culture_pack_id=lineage_meta.get("culture_pack_id"),
-            world_pack_version=lineage_meta.get("world_pack_version"),
-            track_type=lineage_meta.get("track_type"),
-            unit_ref_id=lineage_meta.get("unit_ref_id"),
-            canonical_path=lineage_meta.get("artifact_path_canonical"),
-            model_profile_id=track_run.model_profile_id,
-            extra_meta_json=media_meta,
-        )
-        db.add(lineage_index)
-
-        candidates = list(unit.output_candidates_json or [])
-        candidates.append(
-            {
-                "job_id": job.id,
-                "artifact_id": artifact_id,
-                "artifact_uri": artifact_uri,
-                "origin_artifact_uri": artifact_uri_raw,
-                "lineage_path": lineage_meta.get("artifact_path_canonical"),
-                "at": now.isoformat(),
-            }
-        )
-        unit.output_candidates_json = candidates
-        unit.selected_asset_id = artifact_id or unit.selected_asset_id
-        unit.selected_job_id = job.id
-        unit.status = "success"
-        unit.blocked_reason = None
-        unit.last_error_code = None
-        unit.last_error_message = None
-        attempt = _find_attempt_for_job(db, job.id)
-        if attempt is not None:
-            attempt.status = "success"
-            attempt.artifact_id = artifact.id
-            attempt.error_code = None
-            attempt.error_message = None
-            attempt.finished_at = now
-            if attempt.started_at:
-                attempt.duration_ms = max(
-                    0,
-                    int((attempt.finished_at - attempt.started_at).total_seconds() * 1000),
-                )
-
-        _sync_unit_segment_artifact(
-            db=db,
-            run_id=run.id,
-            track_type=track_run.track_type,
-            unit_id=unit.id,
-            artifact_id=unit.selected_asset_id or artifact.id,
-            lineage_path=lineage_meta.get("artifact_path_canonical"),
-        )
         _refresh_track_rollups(db, run)
         return True
 
     if event.event_type == "job.failed":
         job.status = JobStatus.failed
         job.result_json = event.payload
-        unit.status = "failed"
-        unit.attempt_count = int(unit.attempt_count or 0) + 1
-        unit.last_error_code = event.payload.get("error_code", "WORKER-EXEC-002")
-        unit.last_error_message = event.payload.get("error_message", "job failed")
-        attempt = _find_attempt_for_job(db, job.id)
-        if attempt is not None:
-            attempt.status = "failed"
-            attempt.error_code = unit.last_error_code
-            attempt.error_message = unit.last_error_message
-            attempt.finished_at = now
-            if attempt.started_at:
-                attempt.duration_ms = max(
-                    0,
-                    int((attempt.finished_at - attempt.started_at).total_seconds() * 1000),
-                )
-        segments = db.execute(
-            select(TimelineSegment)
-            .where(
-                TimelineSegment.run_id == run.id,
-                TimelineSegment.track == track_run.track_type,
-                TimelineSegment.deleted_at.is_(None),
-            )
-        ).scalars().all()
-        for seg in segments:
-            meta = seg.meta_json or {}
-            if meta.get("track_unit_id") == unit.id:
-                meta["status"] = "failed"
-                meta["error_code"] = unit.last_error_code
-                meta["error_message"] = unit.last_error_message
-                seg.meta_json = meta
+        _apply_track_unit_failure(
+            db, run, track_run, unit, job,
+            event.payload.get("error_code", "WORKER-EXEC-002"),
+            event.payload.get("error_message", "job failed"),
+            now,
+        )
         _refresh_track_rollups(db, run)
         return True
 
     return False
 
 
+def _handle_track_batch_job_event(db: Session, event: EventEnvelope, run, job: Job) -> bool:
+    """Fan a chapter-level TTS batch job's events out to its track units.
+
+    The batch result lists one entry per line (``output.lines``), keyed by
+    ``track_unit_id``; each line succeeds or fails on its own. Units the
+    result does not mention are failed with the job's error.
+    """
+    lines = [line for line in (job.payload_json or {}).get("lines") or [] if line.get("track_unit_id")]
+    units: dict[str, tuple[TrackUnit, TrackRun]] = {}
+    for line in lines:
+        unit = db.get(TrackUnit, line["track_unit_id"])
+        if unit is None or unit.deleted_at is not None:
+            continue
+        track_run = db.get(TrackRun, unit.track_run_id)
+        if track_run is None or track_run.deleted_at is not None:
+            continue
+        units[unit.id] = (unit, track_run)
+    if not units:
+        return False
+
+    now = datetime.now(timezone.utc)
+    if event.event_type == "job.claimed":
+        job.status = JobStatus.claimed
+        for unit, track_run in units.values():
+            unit.status = "running"
+            attempt = _find_attempt_for_job(db, job.id, unit.id)
+            if attempt is not None:
+                attempt.status = "running"
+                attempt.started_at = attempt.started_at or now
+            track_run.status = "running"
+            track_run.started_at = track_run.started_at or now
+        run.status = RunStatus.running
+        run.stage = RenderStage.execute
+        return True
+
+    if event.event_type not in ("job.succeeded", "job.failed"):
+        return False
+
+    payload = event.payload or {}
+    output = payload.get("output") if isinstance(payload.get("output"), dict) else {}
+    results = {
+        r.get("track_unit_id"): r
+        for r in (output.get("lines") or [])
+        if isinstance(r, dict) and r.get("track_unit_id")
+    }
+    job.status = JobStatus.success if event.event_type == "job.succeeded" else JobStatus.failed
+    job.result_json = payload
+    for unit_id, (unit, track_run) in units.items():
+        line = results.get(unit_id)
+        if line is not None and line.get("status") == "succeeded":
+            line_result = {
+                "artifact_uri": line.get("audio_uri"),
+                "output": {**line, "duration_ms": line.get("actual_duration_ms")},
+            }
+            _apply_track_unit_success(db, run, track_run, unit, job, line_result, now)
+        else:
+            _apply_track_unit_failure(
+                db, run, track_run, unit, job,
+                payload.get("error_code") or "WORKER-EXEC-002",
+                (line or {}).get("error_message") or payload.get("error_message") or "batch line failed",
+                now,
+            )
+    _refresh_track_rollups(db, run)
+    return True
+
+
 def handle_task_submitted(payload: dict) -> None:
     event = EventEnvelope.model_validate(payload)
     run_id = event.run_id
@@ -633,6 +739,7 @@ def handle_task_submitted(payload: dict) -> None:
                 "chapter_id": event.payload.get("chapter_id"),
                 "requested_quality": event.payload.get("requested_quality"),
                 "language_context": event.payload.get("language_context"),
+                "stream": streams_progress(decision.worker_type),
             },
         )
         publish(SYSTEM_TOPICS.JOB_DISPATCH, dispatch_event.model_dump(mode="json"))
@@ -649,6 +756,15 @@ def handle_job_status(payload: dict) -> None:
     event = EventEnvelope.model_validate(payload)
     run_id = event.run_id
 
+    # Streamed token progress is fanned out to SSE subscribers only; it is
+    # high-volume and superseded by the terminal event, so never persisted.
+    if event.event_type == "job.progress":
+        if event.job_id:
+            relay_job_event(event.job_id, event.event_type, event.payload)
+        return
+    if event.job_id and event.event_type in ("job.succeeded", "job.failed"):
+        relay_job_event(event.job_id, event.event_type, event.payload)
+
     db = get_db_session()
     try:
         run_repo = RenderRunRepository(db)
@@ -859,6 +975,9 @@ def consume_orchestrator_topic(topic: str) -> None:
         consumer.consume(topic, handle_skill_event)
     elif topic == SYSTEM_TOPICS.ALERT_EVENTS:
         consumer.consume(topic, handle_alert_event)
+    elif topic == SYSTEM_TOPICS.JOB_PROGRESS_EXCHANGE:
+        enable_broadcast()
+        consumer.subscribe(topic, deliver_job_event)
 
 
 @router.post("/events", status_code=202)
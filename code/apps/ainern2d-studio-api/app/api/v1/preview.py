@@ -19,6 +19,7 @@ from ainern2d_shared.ainer_db_models.preview_models import (
 	EntityInstanceLink,
 	EntityPreviewVariant,
 )
+from ainern2d_shared.queue.lanes import JOB_PRIORITY, LANE_INTERACTIVE
 from ainern2d_shared.queue.topics import SYSTEM_TOPICS
 from ainern2d_shared.schemas.events import EventEnvelope
 
@@ -333,6 +334,7 @@ def generate_preview_variants(
 			job_type=JobType.render_video,
 			stage=RenderStage.execute,
 			status=JobStatus.queued,
+			priority=JOB_PRIORITY[LANE_INTERACTIVE],
 			payload_json=payload,
 			idempotency_key=idem,
 		)
@@ -463,6 +465,7 @@ def review_preview_variant(
 			job_type=JobType.render_video,
 			stage=RenderStage.execute,
 			status=JobStatus.queued,
+			priority=JOB_PRIORITY[LANE_INTERACTIVE],
 			payload_json=payload,
 			idempotency_key=idem,
 		)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 import hashlib
+import importlib
 import json
 import re
 import requests
@@ -18,13 +19,18 @@ from ainern2d_shared.ainer_db_models.governance_models import CreativePolicyStac
 from ainern2d_shared.ainer_db_models.governance_models import PersonaPack, PersonaPackVersion
 from ainern2d_shared.ainer_db_models.preview_models import PersonaDatasetBinding, PersonaIndexBinding
 from ainern2d_shared.ainer_db_models.provider_models import ModelProvider
-from ainern2d_shared.ainer_db_models.rag_models import KbVersion, RagCollection, RagDocument
+from ainern2d_shared.ainer_db_models.rag_models import (
+    KBPack, KbVersion, PersonaKBMap, RagCollection, RagDocument,
+)
 
 from app.api.deps import get_db
 from app.services.telegram_notify import notify_telegram_event
 
 router = APIRouter(prefix="/api/v1/rag", tags=["rag"])
 
+# Package directory has a hyphen, so it cannot be imported with a from-import.
+_asset_knowledge = importlib.import_module("app.modules.asset-knowledge")
+
 
 class RagCollectionCreateRequest(BaseModel):
     tenant_id: str
@@ -147,6 +153,41 @@ class PersonaPreviewResponse(BaseModel):
     chunks: list[PersonaPreviewChunk] = Field(default_factory=list)
 
 
+class RetrievalRequest(BaseModel):
+    tenant_id: str
+    project_id: str
+    query: str
+    collection_ids: list[str] = Field(min_length=1)
+    kb_version_ids: list[str] = Field(default_factory=list)
+    top_k: int = Field(default=10, ge=1, le=50)
+    fusion: str = Field(default="rrf", pattern="^(rrf|weighted)$")
+    alpha: float = Field(default=0.6, ge=0.0, le=1.0)
+
+
+class RetrievalHitResponse(BaseModel):
+    doc_id: str
+    collection_id: str | None = None
+    kb_version_id: str | None = None
+    title: str | None = None
+    source_type: str | None = None
+    source_id: str | None = None
+    score: float
+    keyword_score: float = 0.0
+    vector_score: float = 0.0
+    keyword_rank: int | None = None
+    vector_rank: int | None = None
+    rerank_score: float | None = None
+    snippet: str
+
+
+class RetrievalResponse(BaseModel):
+    query: str
+    fusion: str
+    candidates: int
+    hits: list[RetrievalHitResponse] = Field(default_factory=list)
+    timings_ms: dict[str, float] = Field(default_factory=dict)
+
+
 class KnowledgePackBootstrapRequest(BaseModel):
     tenant_id: str
     project_id: str
@@ -837,6 +878,32 @@ def persona_preview(body: PersonaPreviewRequest, db: Session = Depends(get_db))
     collection_ids = [item.collection_id for item in dataset_bindings]
     kb_version_ids = [item.kb_version_id for item in index_bindings]
 
+    if collection_ids:
+        result = _retrieval_pipeline(db).run(
+            body.query,
+            collection_ids,
+            top_k=body.top_k,
+            kb_version_ids=kb_version_ids or None,
+        )
+        return PersonaPreviewResponse(
+            persona_pack_version_id=body.persona_pack_version_id,
+            query=body.query,
+            top_k=body.top_k,
+            chunks=[
+                PersonaPreviewChunk(
+                    doc_id=hit.doc_id,
+                    collection_id=hit.collection_id,
+                    kb_version_id=hit.kb_version_id,
+                    title=hit.title,
+                    source_type=hit.source_type or "",
+                    source_id=hit.source_id,
+                    score=hit.score,
+                    snippet=hit.content[:240],
+                )
+                for hit in result.hits
+            ],
+        )
+
     docs_stmt = select(RagDocument).where(
         RagDocument.tenant_id == body.tenant_id,
         RagDocument.project_id == body.project_id,
@@ -886,6 +953,60 @@ def persona_preview(body: PersonaPreviewRequest, db: Session = Depends(get_db))
     )
 
 
+def _retrieval_pipeline(db: Session):
+    # Keyword and vector stages each run on their own session in parallel.
+    return _asset_knowledge.RetrievalPipeline(
+        db, session_factory=_asset_knowledge.parallel_session_factory(db),
+    )
+
+
+@router.post("/retrieve", response_model=RetrievalResponse)
+def retrieve(body: RetrievalRequest, db: Session = Depends(get_db)) -> RetrievalResponse:
+    collections = db.execute(
+        select(RagCollection.id).where(
+            RagCollection.id.in_(body.collection_ids),
+            RagCollection.tenant_id == body.tenant_id,
+            RagCollection.project_id == body.project_id,
+            RagCollection.deleted_at.is_(None),
+        )
+    ).scalars().all()
+    if not collections:
+        raise HTTPException(status_code=404, detail="REQ-VALIDATION-001: collection not found")
+
+    result = _retrieval_pipeline(db).run(
+        body.query,
+        list(collections),
+        top_k=body.top_k,
+        fusion=body.fusion,
+        alpha=body.alpha,
+        kb_version_ids=body.kb_version_ids or None,
+    )
+    return RetrievalResponse(
+        query=result.query,
+        fusion=result.fusion,
+        candidates=result.candidates,
+        hits=[
+            RetrievalHitResponse(
+                doc_id=hit.doc_id,
+                collection_id=hit.collection_id,
+                kb_version_id=hit.kb_version_id,
+                title=hit.title,
+                source_type=hit.source_type,
+                source_id=hit.source_id,
+                score=hit.score,
+                keyword_score=hit.keyword_score,
+                vector_score=hit.vector_score,
+                keyword_rank=hit.keyword_rank,
+                vector_rank=hit.vector_rank,
+                rerank_score=hit.rerank_score,
+                snippet=hit.content[:240],
+            )
+            for hit in result.hits
+        ],
+        timings_ms=result.timings_ms,
+    )
+
+
 @router.post("/knowledge-packs/bootstrap", response_model=KnowledgePackBootstrapResponse, status_code=201)
 def bootstrap_knowledge_pack(
     body: KnowledgePackBootstrapRequest,
@@ -948,6 +1069,7 @@ def bootstrap_knowledge_pack(
     created_documents = 0
     chunk_count = 0
     all_text_parts: list[str] = []
+    docs: list[RagDocument] = []
     pack_id = f"kp_{uuid4().hex}"
     for section in sections:
         section_title = str(section.get("title") or "knowledge")
@@ -957,35 +1079,36 @@ def bootstrap_knowledge_pack(
         chunk_count += len(chunks)
         for idx, chunk in enumerate(chunks):
             fingerprint = hashlib.sha1(chunk.encode("utf-8")).hexdigest()
-            db.add(
-                RagDocument(
-                    id=f"rag_doc_{uuid4().hex}",
-                    tenant_id=body.tenant_id,
-                    project_id=body.project_id,
-                    trace_id=f"tr_bootstrap_doc_{uuid4().hex[:12]}",
-                    correlation_id=f"cr_bootstrap_doc_{uuid4().hex[:12]}",
-                    idempotency_key=f"idem_bootstrap_doc_{pack_id}_{section_title}_{idx}_{fingerprint[:8]}",
-                    collection_id=collection.id,
-                    kb_version_id=kb_version.id,
-                    novel_id=None,
-                    scope=scope,
-                    source_type=section_source_type,
-                    source_id=pack_id,
-                    language_code=body.language_code,
-                    title=section_title,
-                    content_text=chunk,
-                    metadata_json={
-                        "pack_id": pack_id,
-                        "role_id": role_id,
-                        "template_key": body.template_key or "",
-                        "section_title": section_title,
-                        "chunk_index": idx,
-                        "fingerprint": fingerprint,
-                    },
-                )
+            doc = RagDocument(
+                id=f"rag_doc_{uuid4().hex}",
+                tenant_id=body.tenant_id,
+                project_id=body.project_id,
+                trace_id=f"tr_bootstrap_doc_{uuid4().hex[:12]}",
+                correlation_id=f"cr_bootstrap_doc_{uuid4().hex[:12]}",
+                idempotency_key=f"idem_bootstrap_doc_{pack_id}_{section_title}_{idx}_{fingerprint[:8]}",
+                collection_id=collection.id,
+                kb_version_id=kb_version.id,
+                novel_id=None,
+                scope=scope,
+                source_type=section_source_type,
+                source_id=pack_id,
+                language_code=body.language_code,
+                title=section_title,
+                content_text=chunk,
+                metadata_json={
+                    "pack_id": pack_id,
+                    "role_id": role_id,
+                    "template_key": body.template_key or "",
+                    "section_title": section_title,
+                    "chunk_index": idx,
+                    "fingerprint": fingerprint,
+                },
             )
+            db.add(doc)
+            docs.append(doc)
             created_documents += 1
             all_text_parts.append(chunk)
+    _asset_knowledge.documents_changed(db, docs)
 
     extracted_terms = _extract_terms("\n".join(all_text_parts))
     updated_at = datetime.now(timezone.utc).isoformat()
@@ -1131,39 +1254,41 @@ def create_import_job(
 
     created_documents = 0
     deduplicated_documents = 0
+    docs: list[RagDocument] = []
     for idx, chunk in enumerate(chunks):
         fingerprint = hashlib.sha1(chunk.encode("utf-8")).hexdigest()
         if fingerprint in existing_fingerprints:
             deduplicated_documents += 1
             continue
         existing_fingerprints.add(fingerprint)
-        db.add(
-            RagDocument(
-                id=f"rag_doc_{uuid4().hex}",
-                tenant_id=body.tenant_id,
-                project_id=body.project_id,
-                trace_id=f"tr_rag_import_{uuid4().hex[:12]}",
-                correlation_id=f"cr_rag_import_{uuid4().hex[:12]}",
-                idempotency_key=f"idem_rag_import_{import_job_id}_{idx}_{fingerprint[:8]}",
-                collection_id=body.collection_id,
-                kb_version_id=kb_version_id,
-                novel_id=collection.novel_id,
-                scope=scope,
-                source_type=source_type,
-                source_id=f"{source_name}:{idx}",
-                language_code=body.language_code,
-                title=source_name,
-                content_text=chunk,
-                metadata_json={
-                    "import_job_id": import_job_id,
-                    "source_format": body.source_format.strip().lower(),
-                    "chunk_index": idx,
-                    "fingerprint": fingerprint,
-                    "role_ids": body.role_ids,
-                },
-            )
+        doc = RagDocument(
+            id=f"rag_doc_{uuid4().hex}",
+            tenant_id=body.tenant_id,
+            project_id=body.project_id,
+            trace_id=f"tr_rag_import_{uuid4().hex[:12]}",
+            correlation_id=f"cr_rag_import_{uuid4().hex[:12]}",
+            idempotency_key=f"idem_rag_import_{import_job_id}_{idx}_{fingerprint[:8]}",
+            collection_id=body.collection_id,
+            kb_version_id=kb_version_id,
+            novel_id=collection.novel_id,
+            scope=scope,
+            source_type=source_type,
+            source_id=f"{source_name}:{idx}",
+            language_code=body.language_code,
+            title=source_name,
+            content_text=chunk,
+            metadata_json={
+                "import_job_id": import_job_id,
+                "source_format": body.source_format.strip().lower(),
+                "chunk_index": idx,
+                "fingerprint": fingerprint,
+                "role_ids": body.role_ids,
+            },
         )
+        db.add(doc)
+        docs.append(doc)
         created_documents += 1
+    _asset_knowledge.documents_changed(db, docs)
 
     extracted_terms = _extract_terms(normalized_text)
     updated_at = datetime.now(timezone.utc).isoformat()
@@ -1283,10 +1408,31 @@ def delete_collection(
     if row is None:
         raise HTTPException(status_code=404, detail="REQ-VALIDATION-001: collection not found")
     row.deleted_at = datetime.now(timezone.utc)
+    _asset_knowledge.collection_changed(db, collection_id)
     db.commit()
     return {"status": "deleted", "id": collection_id}
 
 
+@router.delete("/documents/{doc_id}")
+def delete_document(
+    doc_id: str,
+    tenant_id: str = Query(...),
+    project_id: str = Query(...),
+    db: Session = Depends(get_db),
+) -> dict[str, str]:
+    row = db.get(RagDocument, doc_id)
+    if (
+        row is None
+        or row.deleted_at is not None
+        or row.tenant_id != tenant_id
+        or row.project_id != project_id
+    ):
+        raise HTTPException(status_code=404, detail="REQ-VALIDATION-001: document not found")
+    _asset_knowledge.RagIngestor(db).delete(doc_id)
+    db.commit()
+    return {"status": "deleted", "id": doc_id}
+
+
 @router.delete("/persona-packs/{persona_pack_id}")
 def delete_persona_pack(
     persona_pack_id: str,
@@ -1305,6 +1451,13 @@ def delete_persona_pack(
     if row is None:
         raise HTTPException(status_code=404, detail="REQ-VALIDATION-001: persona pack not found")
     row.deleted_at = datetime.now(timezone.utc)
+    bound_collections = db.execute(
+        select(KBPack.collection_id)
+        .join(PersonaKBMap, PersonaKBMap.kb_pack_id == KBPack.id)
+        .where(PersonaKBMap.persona_pack_id == persona_pack_id)
+    ).scalars().all()
+    for bound_collection_id in bound_collections:
+        _asset_knowledge.collection_changed(db, bound_collection_id)
     db.commit()
     return {"status": "deleted", "id": persona_pack_id}
 
@@ -1685,6 +1838,7 @@ def init_novel_rag(
 
     documents_created = 0
     chunks_total = 0
+    docs: list[RagDocument] = []
     now = datetime.now(timezone.utc)
 
     for ch in chapters:
@@ -1728,10 +1882,12 @@ def init_novel_rag(
                 metadata_json={"chapter_no": ch.chapter_no, "chunk_index": idx},
             )
             db.add(doc)
+            docs.append(doc)
             chunks_total += 1
 
         documents_created += 1
 
+    _asset_knowledge.documents_changed(db, docs)
     db.commit()
 
     notify_telegram_event(
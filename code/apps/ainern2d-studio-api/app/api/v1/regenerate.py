@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session
 from ainern2d_shared.ainer_db_models.content_models import Shot
 from ainern2d_shared.ainer_db_models.enum_models import JobStatus, JobType, RenderStage, RunStatus
 from ainern2d_shared.ainer_db_models.pipeline_models import Job, RenderRun
+from ainern2d_shared.queue.lanes import JOB_PRIORITY, LANE_BULK, LANE_INTERACTIVE
 from ainern2d_shared.queue.topics import SYSTEM_TOPICS
 from ainern2d_shared.schemas.events import EventEnvelope
 
@@ -46,6 +47,9 @@ def regenerate_run(
         stmt = select(Shot).filter_by(chapter_id=run.chapter_id)
     shots = db.execute(stmt).scalars().all()
 
+    # A single-shot redo is someone waiting on the result; a whole chapter
+    # goes to the bulk lane so it cannot hold up interactive renders.
+    priority = JOB_PRIORITY[LANE_BULK if len(shots) > 1 else LANE_INTERACTIVE]
     jobs_created = 0
     now = datetime.now(timezone.utc)
     for shot in shots:
@@ -59,6 +63,7 @@ def regenerate_run(
             job_type=JobType.render_video,
             stage=RenderStage.execute,
             status=JobStatus.queued,
+            priority=priority,
             payload_json={"regenerate": True, "shot_id": shot.id},
             idempotency_key=f"regen_{run_id}_{shot.id}_{uuid4().hex[:8]}",
         )
@@ -119,6 +124,7 @@ def regenerate_shot(
         job_type=JobType.render_video,
         stage=RenderStage.execute,
         status=JobStatus.queued,
+        priority=JOB_PRIORITY[LANE_INTERACTIVE],
         payload_json={"regenerate": True, "shot_id": shot_id},
         idempotency_key=f"regen_{run.id}_{shot_id}_{uuid4().hex[:8]}",
     )
@@ -12,11 +12,13 @@ from sqlalchemy.orm import Session
 from ainern2d_shared.ainer_db_models.content_models import Artifact, Chapter, Dialogue, Shot, TimelineSegment
 from ainern2d_shared.ainer_db_models.enum_models import JobStatus, JobType, RenderStage, RunStatus
 from ainern2d_shared.ainer_db_models.pipeline_models import Job, RenderRun, TrackRun, TrackUnit, TrackUnitAttempt
+from ainern2d_shared.config.setting import settings
 from ainern2d_shared.queue.topics import SYSTEM_TOPICS
 from ainern2d_shared.schemas.events import EventEnvelope
 from app.modules.model_router.provider_registry import ProviderRegistry
 
 from app.api.deps import get_db, publish
+from app.services.job_progress import streams_progress
 
 router = APIRouter(prefix="/api/v1", tags=["run-tracks"])
 
@@ -50,6 +52,12 @@ _TRACK_TO_JOB_TYPE: dict[str, JobType] = {
 
 _DEFAULT_TRACKS = ["video", "tts", "sfx", "bgm"]
 
+# Dialogue tracks run as one chapter-level batch job when more than one unit is queued.
+_TTS_TRACKS = {"tts", "dialogue", "narration"}
+_TTS_BATCH_WORKER = "worker-audio-tts-batch"
+# Track worker types the batch worker can stand in for; other workers run per unit.
+_TTS_BATCHABLE_WORKERS = {None, "worker-audio", "worker-audio-tts", _TTS_BATCH_WORKER}
+
 
 class InitTracksRequest(BaseModel):
     track_types: list[str] = Field(default_factory=lambda: list(_DEFAULT_TRACKS))
@@ -898,6 +906,9 @@ def _enqueue_unit_job(
     patch: dict[str, Any] | None = None,
 ) -> Job:
     job_type = _TRACK_TO_JOB_TYPE.get(track_run.track_type, JobType.render_video)
+    payload = {**payload, "job_type": job_type.value}
+    if streams_progress(payload.get("worker_type") or track_run.worker_type):
+        payload.setdefault("stream", True)
     job = Job(
         id=f"job_{uuid4().hex}",
         tenant_id=run.tenant_id,
@@ -912,10 +923,7 @@ def _enqueue_unit_job(
         job_type=job_type,
         stage=RenderStage.execute,
         status=JobStatus.queued,
-        payload_json={
-            **payload,
-            "job_type": job_type.value,
-        },
+        payload_json=payload,
     )
     db.add(job)
 
@@ -954,6 +962,93 @@ def _enqueue_unit_job(
     return job
 
 
+def _enqueue_tts_batch_job(
+    db: Session,
+    run: RenderRun,
+    track_run: TrackRun,
+    unit_payloads: list[tuple[TrackUnit, dict[str, Any]]],
+    *,
+    trigger_type: str = "run_all",
+) -> Job:
+    """One ``synth_audio`` job for many dialogue units (worker-audio-tts-batch).
+
+    Each line carries the unit's full job payload (input snapshot,
+    ``artifact_path_hint``, ``lineage_tags``, …), exactly as a per-unit job
+    would. Every unit still gets its own attempt row pointing at the shared
+    job; the orchestrator fans the per-line results back out by
+    ``track_unit_id``.
+    """
+    lines = [
+        {
+            **payload,
+            "line_id": _normalize_token(unit.unit_ref_id, unit.id),
+            "track_unit_id": unit.id,
+            "dialogue_id": unit.dialogue_id,
+            "shot_id": payload.get("shot_id") or unit.shot_id,
+        }
+        for unit, payload in unit_payloads
+    ]
+    job = Job(
+        id=f"job_{uuid4().hex}",
+        tenant_id=run.tenant_id,
+        project_id=run.project_id,
+        trace_id=run.trace_id,
+        correlation_id=run.correlation_id,
+        idempotency_key=f"idem_tts_batch_{track_run.id}_{uuid4().hex[:8]}",
+        run_id=run.id,
+        chapter_id=run.chapter_id,
+        job_type=JobType.synth_audio,
+        stage=RenderStage.execute,
+        status=JobStatus.queued,
+        payload_json={
+            "run_id": run.id,
+            "chapter_id": run.chapter_id,
+            "track_type": track_run.track_type,
+            "track_run_id": track_run.id,
+            "worker_type": _TTS_BATCH_WORKER,
+            "model_profile_id": track_run.model_profile_id,
+            "lines": lines,
+            "job_type": JobType.synth_audio.value,
+        },
+    )
+    db.add(job)
+
+    for unit, _payload in unit_payloads:
+        db.add(
+            TrackUnitAttempt(
+                id=f"tua_{uuid4().hex}",
+                tenant_id=run.tenant_id,
+                project_id=run.project_id,
+                trace_id=run.trace_id,
+                correlation_id=run.correlation_id,
+                idempotency_key=f"idem_tua_{unit.id}_{job.id}",
+                run_id=run.id,
+                track_run_id=track_run.id,
+                track_unit_id=unit.id,
+                attempt_no=_next_attempt_no(db, unit.id),
+                trigger_type=trigger_type,
+                job_id=job.id,
+                status="queued",
+            )
+        )
+
+    event = EventEnvelope(
+        event_type="job.created",
+        producer="studio-api",
+        occurred_at=_utcnow(),
+        tenant_id=run.tenant_id,
+        project_id=run.project_id,
+        idempotency_key=job.idempotency_key,
+        run_id=run.id,
+        job_id=job.id,
+        trace_id=run.trace_id or "",
+        correlation_id=run.correlation_id or "",
+        payload=job.payload_json,
+    )
+    publish(SYSTEM_TOPICS.JOB_DISPATCH, event.model_dump(mode="json"))
+    return job
+
+
 @router.post("/runs/{run_id}/tracks/init", response_model=InitTracksResponse)
 def init_run_tracks(
     run_id: str,
@@ -1172,6 +1267,7 @@ def run_track(
 
     jobs_created = 0
     blocked_due_dependency = 0
+    ready: list[tuple[TrackUnit, dict[str, Any]]] = []
     for unit in units:
         payload, blocked_reason = _build_job_payload_for_unit(db, run, tr, unit)
         if blocked_reason:
@@ -1181,12 +1277,25 @@ def run_track(
             unit.last_error_message = blocked_reason
             blocked_due_dependency += 1
             continue
-        _enqueue_unit_job(db, run, tr, unit, payload, trigger_type=trigger_type)
+        ready.append((unit, payload))
+
+    if (
+        norm_track in _TTS_TRACKS
+        and settings.tts_batch_enabled
+        and tr.worker_type in _TTS_BATCHABLE_WORKERS
+        and len(ready) > 1
+    ):
+        _enqueue_tts_batch_job(db, run, tr, ready, trigger_type=trigger_type)
+        jobs_created = 1
+    else:
+        for unit, payload in ready:
+            _enqueue_unit_job(db, run, tr, unit, payload, trigger_type=trigger_type)
+        jobs_created = len(ready)
+    for unit, _payload in ready:
         unit.status = "queued"
         unit.blocked_reason = None
         unit.last_error_code = None
         unit.last_error_message = None
-        jobs_created += 1
 
     if jobs_created > 0:
         tr.status = "running"
@@ -10,22 +10,27 @@ Endpoints:
   POST /api/v1/chapters/{chapter_id}/format-detect
   GET  /api/v1/chapters/{chapter_id}/script
   POST /api/v1/chapters/{chapter_id}/script/generate      ← 缓存优先
+  POST /api/v1/chapters/{chapter_id}/script/generate/stream  ← 同上，SSE 流式返回生成进度
   POST /api/v1/chapters/{chapter_id}/script/regenerate    ← 强制重生成
   GET  /api/v1/chapters/{chapter_id}/world-model
   POST /api/v1/chapters/{chapter_id}/world-model/generate    ← 缓存优先
+  POST /api/v1/chapters/{chapter_id}/world-model/generate/stream  ← 同上，SSE 流式返回抽取进度
   POST /api/v1/chapters/{chapter_id}/world-model/regenerate  ← 强制重生成
   GET  /api/v1/skill-runs (list)
   GET  /api/v1/skill-runs/{run_id}
 """
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
 import re
 from datetime import datetime, timezone
+from typing import AsyncIterator, Callable
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.orm import Session
@@ -34,8 +39,9 @@ from ainern2d_shared.ainer_db_models.content_models import Chapter, SkillRun, Sk
 from ainern2d_shared.ainer_db_models.governance_models import CreativePolicyStack
 from ainern2d_shared.ainer_db_models.provider_models import ModelProvider
 
-from app.api.deps import get_db
+from app.api.deps import get_db, get_db_session
 from app.api.v1.translation import _call_provider_with_messages, _load_provider_settings
+from app.services.job_progress import sse_event
 
 router = APIRouter(prefix="/api/v1", tags=["script-workflow"])
 
@@ -241,8 +247,12 @@ def _parse_json_with_retry(
     max_tokens: int,
     retry_suffix: str,
     validate_fn=None,
+    on_delta: Callable[[str], None] | None = None,
 ) -> tuple[dict, str]:
-    """Call LLM, parse JSON; retry once on failure. Returns (parsed, raw_response)."""
+    """Call LLM, parse JSON; retry once on failure. Returns (parsed, raw_response).
+
+    *on_delta* streams the first attempt only; a repair retry is not streamed.
+    """
     last_error = ""
     raw = ""
     current_messages = list(messages)
@@ -253,6 +263,7 @@ def _parse_json_with_retry(
             provider_settings=provider_settings,
             messages=current_messages,
             max_tokens=max_tokens,
+            on_delta=on_delta if attempt == 0 else None,
         )
         cleaned = re.sub(r"^```(?:json)?\s*", "", raw.strip(), flags=re.MULTILINE)
         cleaned = re.sub(r"\s*```$", "", cleaned.strip(), flags=re.MULTILINE)
@@ -362,41 +373,34 @@ def get_script(chapter_id: str, db: Session = Depends(get_db)) -> ScriptResponse
 
 # ── Script: Generate (cache-first) ────────────────────────────────────────────
 
-@router.post("/chapters/{chapter_id}/script/generate", response_model=ScriptResponse)
-def generate_script(
-    chapter_id: str,
-    body: ScriptGenerateRequest,
-    db: Session = Depends(get_db),
-) -> ScriptResponse:
-    chapter = _get_chapter_or_404(db, chapter_id)
+def _script_input_hash(chapter: Chapter, body: ScriptGenerateRequest) -> str:
     text = chapter.cleaned_text or chapter.raw_text or ""
-
-    input_hash = _compute_input_hash(
+    return _compute_input_hash(
         text,
         {"granularity": body.granularity, "style_hint": body.style_hint, "provider": body.model_provider_id},
     )
 
-    # Cache lookup (unless force=True)
-    if not body.force:
-        cached_run = _find_cached_run(db, skill_id="novel_to_script", input_hash=input_hash, chapter_id=chapter_id)
-        if cached_run and cached_run.output_json:
-            out = cached_run.output_json
-            return ScriptResponse(
-                chapter_id=chapter_id,
-                scenes=out.get("scenes", []),
-                summary=out.get("summary", ""),
-                warnings=out.get("warnings", []),
-                version=chapter.script_version or 0,
-                run_id=cached_run.id,
-                cached=True,
-                script_updated_at=chapter.script_updated_at.isoformat() if chapter.script_updated_at else None,
-            )
 
-    # Also return DB value if exists and no force
-    if not body.force and chapter.script_json:
+def _cached_script(db: Session, chapter: Chapter, input_hash: str) -> ScriptResponse | None:
+    cached_run = _find_cached_run(db, skill_id="novel_to_script", input_hash=input_hash, chapter_id=chapter.id)
+    if cached_run and cached_run.output_json:
+        out = cached_run.output_json
+        return ScriptResponse(
+            chapter_id=chapter.id,
+            scenes=out.get("scenes", []),
+            summary=out.get("summary", ""),
+            warnings=out.get("warnings", []),
+            version=chapter.script_version or 0,
+            run_id=cached_run.id,
+            cached=True,
+            script_updated_at=chapter.script_updated_at.isoformat() if chapter.script_updated_at else None,
+        )
+
+    # Also return DB value if exists
+    if chapter.script_json:
         data = chapter.script_json
         return ScriptResponse(
-            chapter_id=chapter_id,
+            chapter_id=chapter.id,
             scenes=data.get("scenes", []),
             summary=data.get("summary", ""),
             warnings=data.get("warnings", []),
@@ -405,10 +409,138 @@ def generate_script(
             cached=True,
             script_updated_at=chapter.script_updated_at.isoformat() if chapter.script_updated_at else None,
         )
+    return None
+
+
+@router.post("/chapters/{chapter_id}/script/generate", response_model=ScriptResponse)
+def generate_script(
+    chapter_id: str,
+    body: ScriptGenerateRequest,
+    db: Session = Depends(get_db),
+) -> ScriptResponse:
+    chapter = _get_chapter_or_404(db, chapter_id)
+    input_hash = _script_input_hash(chapter, body)
+
+    # Cache lookup (unless force=True)
+    if not body.force:
+        cached = _cached_script(db, chapter, input_hash)
+        if cached is not None:
+            return cached
 
     return _do_script_generation(db, chapter, body, input_hash, is_regenerate=False)
 
 
+# ── Script: Generate (SSE stream) ─────────────────────────────────────────────
+
+_STREAM_FLUSH_SEC = 0.4
+_STREAM_KEEPALIVE_SEC = 15.0
+
+
+@router.post("/chapters/{chapter_id}/script/generate/stream")
+def generate_script_stream(
+    chapter_id: str,
+    body: ScriptGenerateRequest,
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    """Same cache-first generation as ``/script/generate``, as server-sent events.
+
+    Emits ``delta`` events (coalesced LLM tokens, roughly every 0.4s) while
+    the model writes, then a single ``completed`` event carrying the
+    ScriptResponse, or ``failed`` with the error. A cache hit is answered
+    with ``completed`` straight away.
+    """
+    chapter = _get_chapter_or_404(db, chapter_id)
+    input_hash = _script_input_hash(chapter, body)
+    cached = None if body.force else _cached_script(db, chapter, input_hash)
+    if cached is None:
+        # Fail fast with a proper status code before the stream opens.
+        _get_provider_or_404(db, body.model_provider_id)
+    return StreamingResponse(
+        _script_generation_events(chapter_id, body, input_hash, cached),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _script_generation_events(
+    chapter_id: str,
+    body: ScriptGenerateRequest,
+    input_hash: str,
+    cached: ScriptResponse | None,
+) -> AsyncIterator[str]:
+    def _generate(db: Session, on_delta: Callable[[str], None]) -> ScriptResponse:
+        chapter = _get_chapter_or_404(db, chapter_id)
+        return _do_script_generation(db, chapter, body, input_hash, is_regenerate=False, on_delta=on_delta)
+
+    return _generation_events(_generate, cached, "script generation failed")
+
+
+async def _generation_events(
+    generate: Callable[[Session, Callable[[str], None]], BaseModel],
+    cached: BaseModel | None,
+    failure: str,
+) -> AsyncIterator[str]:
+    """SSE frames for a streamed LLM generation: ``delta`` … then ``completed`` or ``failed``.
+
+    *generate* is blocking (provider HTTP + DB), so it runs in the default
+    executor with its own session (the request session is closed once the
+    response starts streaming) and hands deltas back to the event loop.
+    The stream itself only awaits, so a slow client holds no thread.
+    """
+    if cached is not None:
+        yield sse_event("completed", cached.model_dump(mode="json"))
+        return
+
+    loop = asyncio.get_running_loop()
+    deltas: asyncio.Queue[str | None] = asyncio.Queue()
+
+    def _on_delta(delta: str) -> None:
+        loop.call_soon_threadsafe(deltas.put_nowait, delta)
+
+    def _run() -> BaseModel:
+        worker_db = get_db_session()
+        try:
+            return generate(worker_db, _on_delta)
+        finally:
+            worker_db.close()
+            loop.call_soon_threadsafe(deltas.put_nowait, None)
+
+    task = asyncio.ensure_future(asyncio.to_thread(_run))
+    pending: list[str] = []
+    seq = 0
+    text_length = 0
+    last_sent = loop.time()
+    done = False
+    while not done:
+        try:
+            item = await asyncio.wait_for(deltas.get(), _STREAM_FLUSH_SEC)
+        except asyncio.TimeoutError:
+            item = ""
+        if item is None:
+            done = True
+        elif item:
+            pending.append(item)
+            text_length += len(item)
+        now = loop.time()
+        if pending and (done or seq == 0 or now - last_sent >= _STREAM_FLUSH_SEC):
+            seq += 1
+            yield sse_event("delta", {"seq": seq, "delta": "".join(pending), "text_length": text_length}, seq)
+            pending.clear()
+            last_sent = now
+        elif not done and now - last_sent >= _STREAM_KEEPALIVE_SEC:
+            yield ": keep-alive\n\n"
+            last_sent = now
+
+    try:
+        result = await task
+    except HTTPException as exc:
+        yield sse_event("failed", {"detail": str(exc.detail)})
+    except Exception as exc:
+        yield sse_event("failed", {"detail": str(exc) or failure})
+    else:
+        yield sse_event("completed", result.model_dump(mode="json"))
+
+
 # ── Script: Regenerate (force) ────────────────────────────────────────────────
 
 @router.post("/chapters/{chapter_id}/script/regenerate", response_model=ScriptResponse)
@@ -432,6 +564,7 @@ def _do_script_generation(
     body: ScriptGenerateRequest,
     input_hash: str,
     is_regenerate: bool,
+    on_delta: Callable[[str], None] | None = None,
 ) -> ScriptResponse:
     provider = _get_provider_or_404(db, body.model_provider_id)
     settings = _load_provider_settings(
@@ -469,6 +602,7 @@ def _do_script_generation(
         parsed, raw = _parse_json_with_retry(
             provider=provider, provider_settings=settings, messages=messages,
             max_tokens=4000, retry_suffix="请修复 JSON 格式后重新输出。",
+            on_delta=on_delta,
         )
     except HTTPException as exc:
         _fail_run(db, run, str(exc.detail))
@@ -546,6 +680,47 @@ def get_latest_world_run(
 
 # ── World Model: Generate (cache-first) ───────────────────────────────────────
 
+def _world_model_input_hash(chapter: Chapter, body: WorldModelGenerateRequest) -> str:
+    script_data = chapter.script_json or {}
+    scenes = script_data.get("scenes", [])
+    cache_text = json.dumps(scenes[:20], ensure_ascii=False) if scenes else (chapter.cleaned_text or chapter.raw_text or "")
+    return _compute_input_hash(cache_text, {"level": body.level, "provider": body.model_provider_id})
+
+
+def _cached_world_model(db: Session, chapter: Chapter, input_hash: str) -> WorldModelResponse | None:
+    cached_run = _find_cached_run(db, skill_id="world_model_extract", input_hash=input_hash, chapter_id=chapter.id)
+    if cached_run and cached_run.output_json:
+        out = cached_run.output_json
+        return WorldModelResponse(
+            chapter_id=chapter.id,
+            characters=out.get("characters", []),
+            locations=out.get("locations", []),
+            props=out.get("props", []),
+            beats=out.get("beats", []),
+            style_hints=out.get("style_hints", []),
+            version=chapter.world_model_version or 0,
+            run_id=cached_run.id,
+            cached=True,
+            world_model_updated_at=chapter.world_model_updated_at.isoformat() if chapter.world_model_updated_at else None,
+        )
+
+    if chapter.world_model_json:
+        data = chapter.world_model_json
+        return WorldModelResponse(
+            chapter_id=chapter.id,
+            characters=data.get("characters", []),
+            locations=data.get("locations", []),
+            props=data.get("props", []),
+            beats=data.get("beats", []),
+            style_hints=data.get("style_hints", []),
+            version=chapter.world_model_version or 0,
+            run_id=chapter.world_model_run_id,
+            cached=True,
+            world_model_updated_at=chapter.world_model_updated_at.isoformat() if chapter.world_model_updated_at else None,
+        )
+    return None
+
+
 @router.post("/chapters/{chapter_id}/world-model/generate", response_model=WorldModelResponse)
 def generate_world_model(
     chapter_id: str,
@@ -553,47 +728,48 @@ def generate_world_model(
     db: Session = Depends(get_db),
 ) -> WorldModelResponse:
     chapter = _get_chapter_or_404(db, chapter_id)
-
-    script_data = chapter.script_json or {}
-    scenes = script_data.get("scenes", [])
-    cache_text = json.dumps(scenes[:20], ensure_ascii=False) if scenes else (chapter.cleaned_text or chapter.raw_text or "")
-    input_hash = _compute_input_hash(cache_text, {"level": body.level, "provider": body.model_provider_id})
+    input_hash = _world_model_input_hash(chapter, body)
 
     if not body.force:
-        cached_run = _find_cached_run(db, skill_id="world_model_extract", input_hash=input_hash, chapter_id=chapter_id)
-        if cached_run and cached_run.output_json:
-            out = cached_run.output_json
-            return WorldModelResponse(
-                chapter_id=chapter_id,
-                characters=out.get("characters", []),
-                locations=out.get("locations", []),
-                props=out.get("props", []),
-                beats=out.get("beats", []),
-                style_hints=out.get("style_hints", []),
-                version=chapter.world_model_version or 0,
-                run_id=cached_run.id,
-                cached=True,
-                world_model_updated_at=chapter.world_model_updated_at.isoformat() if chapter.world_model_updated_at else None,
-            )
-
-        if chapter.world_model_json:
-            data = chapter.world_model_json
-            return WorldModelResponse(
-                chapter_id=chapter_id,
-                characters=data.get("characters", []),
-                locations=data.get("locations", []),
-                props=data.get("props", []),
-                beats=data.get("beats", []),
-                style_hints=data.get("style_hints", []),
-                version=chapter.world_model_version or 0,
-                run_id=chapter.world_model_run_id,
-                cached=True,
-                world_model_updated_at=chapter.world_model_updated_at.isoformat() if chapter.world_model_updated_at else None,
-            )
+        cached = _cached_world_model(db, chapter, input_hash)
+        if cached is not None:
+            return cached
 
     return _do_world_model_extraction(db, chapter, body, input_hash, is_regenerate=False)
 
 
+# ── World Model: Generate (SSE stream) ────────────────────────────────────────
+
+@router.post("/chapters/{chapter_id}/world-model/generate/stream")
+def generate_world_model_stream(
+    chapter_id: str,
+    body: WorldModelGenerateRequest,
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    """Same cache-first extraction as ``/world-model/generate``, as server-sent events.
+
+    The frames match ``/script/generate/stream``: ``delta`` while the model
+    writes, then ``completed`` with the WorldModelResponse, or ``failed``.
+    """
+    chapter = _get_chapter_or_404(db, chapter_id)
+    input_hash = _world_model_input_hash(chapter, body)
+    cached = None if body.force else _cached_world_model(db, chapter, input_hash)
+    if cached is None:
+        _get_provider_or_404(db, body.model_provider_id)
+
+    def _generate(worker_db: Session, on_delta: Callable[[str], None]) -> WorldModelResponse:
+        worker_chapter = _get_chapter_or_404(worker_db, chapter_id)
+        return _do_world_model_extraction(
+            worker_db, worker_chapter, body, input_hash, is_regenerate=False, on_delta=on_delta,
+        )
+
+    return StreamingResponse(
+        _generation_events(_generate, cached, "world model extraction failed"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ── World Model: Regenerate (force) ───────────────────────────────────────────
 
 @router.post("/chapters/{chapter_id}/world-model/regenerate", response_model=WorldModelResponse)
@@ -603,10 +779,7 @@ def regenerate_world_model(
     db: Session = Depends(get_db),
 ) -> WorldModelResponse:
     chapter = _get_chapter_or_404(db, chapter_id)
-    script_data = chapter.script_json or {}
-    scenes = script_data.get("scenes", [])
-    cache_text = json.dumps(scenes[:20], ensure_ascii=False) if scenes else (chapter.cleaned_text or chapter.raw_text or "")
-    input_hash = _compute_input_hash(cache_text, {"level": body.level, "provider": body.model_provider_id})
+    input_hash = _world_model_input_hash(chapter, body)
     return _do_world_model_extraction(db, chapter, body, input_hash, is_regenerate=True)
 
 
@@ -623,6 +796,7 @@ def _do_world_model_extraction(
     body: WorldModelGenerateRequest,
     input_hash: str,
     is_regenerate: bool,
+    on_delta: Callable[[str], None] | None = None,
 ) -> WorldModelResponse:
     provider = _get_provider_or_404(db, body.model_provider_id)
     settings = _load_provider_settings(
@@ -667,6 +841,7 @@ def _do_world_model_extraction(
             provider=provider, provider_settings=settings, messages=messages,
             max_tokens=4000, retry_suffix="请为每个实体补充 evidence 原文引用。",
             validate_fn=_validate_world_model,
+            on_delta=on_delta,
         )
     except HTTPException as exc:
         _fail_run(db, run, str(exc.detail))
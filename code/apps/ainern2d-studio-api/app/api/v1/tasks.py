@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timezone
-from time import perf_counter
+from time import monotonic, perf_counter
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
@@ -14,14 +16,15 @@ from ainern2d_shared.ainer_db_models.governance_models import CreativePolicyStac
 from ainern2d_shared.ainer_db_models.provider_models import ModelProfile, ModelProvider
 from ainern2d_shared.ainer_db_models.rag_models import KbVersion
 from ainern2d_shared.ainer_db_models.governance_models import PersonaPackVersion
-from ainern2d_shared.ainer_db_models.enum_models import RenderStage, RunStatus
+from ainern2d_shared.ainer_db_models.enum_models import JobStatus, RenderStage, RunStatus
 from ainern2d_shared.ainer_db_models.pipeline_models import RenderRun, RunCheckpoint, WorkflowEvent
-from ainern2d_shared.db.repositories.pipeline import RenderRunRepository, WorkflowEventRepository
+from ainern2d_shared.db.repositories.pipeline import JobRepository, RenderRunRepository, WorkflowEventRepository
 from ainern2d_shared.queue.topics import SYSTEM_TOPICS
 from ainern2d_shared.schemas.events import EventEnvelope
 from ainern2d_shared.schemas.task import RunDetailResponse, TaskCreateRequest, TaskResponse
 
-from app.api.deps import get_db, publish
+from app.api.deps import get_db, get_db_session, publish
+from app.services.job_progress import get_job_progress_hub, sse_event
 from app.services.telegram_notify import notify_telegram_event
 
 router = APIRouter(prefix="/api/v1", tags=["tasks"])
@@ -370,6 +373,84 @@ def get_run_detail(run_id: str, db: Session = Depends(get_db)) -> RunDetailRespo
 	)
 
 
+_TERMINAL_JOB_EVENTS = {JobStatus.success: "succeeded", JobStatus.failed: "failed", JobStatus.canceled: "canceled"}
+
+
+def _job_state(job_id: str) -> tuple[JobStatus, dict] | None:
+	"""The job's persisted status and, once terminal, the payload of its final frame."""
+	db = get_db_session()
+	try:
+		job = JobRepository(db).get(job_id)
+		if job is None:
+			return None
+		if job.status == JobStatus.success:
+			return job.status, {"output": job.result_json or {}}
+		if job.status in _TERMINAL_JOB_EVENTS:
+			return job.status, {"error_code": job.error_code, "error_message": job.error_message}
+		return job.status, {}
+	finally:
+		db.close()
+
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_job_progress(
+	job_id: str,
+	last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
+	keepalive_sec: float = Query(default=15.0, ge=1.0, le=60.0),
+	max_sec: float = Query(default=1800.0, ge=1.0, le=7200.0),
+) -> StreamingResponse:
+	"""Server-sent ``progress`` events of a running job, then one terminal event.
+
+	Each frame id is the hub sequence number, so a reconnecting EventSource
+	resumes from ``Last-Event-ID`` without replaying what it already showed.
+	The frames come from an async generator, so an open stream parks on the
+	event loop instead of holding a threadpool thread.
+
+	The job's stored status is read on subscribe and at every keep-alive: a
+	job that is already finished, or whose terminal event this replica
+	missed, ends the stream with a frame built from the DB row. A stream
+	still open after ``max_sec`` ends with a ``timeout`` frame.
+	"""
+	try:
+		after_seq = int(last_event_id) if last_event_id else 0
+	except ValueError:
+		after_seq = 0
+	state = await asyncio.to_thread(_job_state, job_id)
+	if state is None:
+		raise HTTPException(status_code=404, detail="job not found")
+	hub = get_job_progress_hub()
+
+	async def _frames():
+		seq, status = after_seq, state
+		deadline = monotonic() + max_sec
+		while True:
+			terminal = status[0] in _TERMINAL_JOB_EVENTS
+			events, finished = await hub.wait_async(
+				job_id, after_seq=seq, timeout=0 if terminal else keepalive_sec,
+			)
+			for seq, event_type, payload in events:
+				name = "progress" if event_type == "job.progress" else event_type.removeprefix("job.")
+				yield sse_event(name, payload, seq)
+			if finished:
+				return
+			if terminal:
+				yield sse_event(_TERMINAL_JOB_EVENTS[status[0]], status[1])
+				return
+			if events:
+				continue
+			if monotonic() >= deadline:
+				yield sse_event("timeout", {"job_id": job_id, "status": status[0].value})
+				return
+			yield ": keep-alive\n\n"
+			status = await asyncio.to_thread(_job_state, job_id) or (JobStatus.canceled, {})
+
+	return StreamingResponse(
+		_frames(),
+		media_type="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+	)
+
+
 @router.get("/runs/{run_id}/snapshot", response_model=RunSnapshotResponse)
 def get_run_snapshot(run_id: str, db: Session = Depends(get_db)) -> RunSnapshotResponse:
 	run = RenderRunRepository(db).get(run_id)
@@ -6,7 +6,7 @@ import re
 import requests
 from datetime import datetime, timezone
 from itertools import islice
-from typing import Any
+from typing import Any, Callable
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -42,6 +42,8 @@ from ainern2d_shared.ainer_db_models.translation_models import (
 from app.api.v1.tasks import TaskSubmitAccepted, TaskSubmitRequest, create_task
 
 from app.api.deps import get_db
+from app.services.llm_batcher import LLMCallCoalescer, Validator
+from ainern2d_shared.config.setting import settings as app_settings
 
 router = APIRouter(prefix="/api/v1", tags=["translation"])
 
@@ -475,8 +477,13 @@ def _call_provider_with_messages(
     provider_settings: dict,
     messages: list[dict],
     max_tokens: int = 2000,
+    on_delta: Callable[[str], None] | None = None,
 ) -> str:
-    """Call an OpenAI-compatible chat completions endpoint with explicit messages."""
+    """Call an OpenAI-compatible chat completions endpoint with explicit messages.
+
+    With *on_delta* the request is streamed and each content delta is passed
+    to it as it arrives; the assembled text is still returned.
+    """
     endpoint = (provider.endpoint or "").strip().rstrip("/")
     token = str(provider_settings.get("access_token") or "").strip()
     model_catalog = list(provider_settings.get("model_catalog") or [])
@@ -490,29 +497,140 @@ def _call_provider_with_messages(
         "temperature": 0.3,
         "max_tokens": max_tokens,
     }
+    if on_delta is not None:
+        payload["stream"] = True
     response = requests.post(
         f"{endpoint}/chat/completions",
         json=payload,
         headers={
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
-            "Accept": "application/json",
+            "Accept": "text/event-stream" if on_delta is not None else "application/json",
         },
         timeout=90.0,
+        stream=on_delta is not None,
     )
     if response.status_code < 200 or response.status_code >= 300:
+        response.close()
         raise ValueError(f"provider_http_status_{response.status_code}")
 
-    parsed = response.json() if response.text else {}
-    choices = parsed.get("choices") or []
-    if not choices:
-        raise ValueError("provider_response_missing_choices")
-    content = str((choices[0].get("message") or {}).get("content") or "").strip()
+    if on_delta is not None:
+        content = _read_chat_stream(response, on_delta).strip()
+    else:
+        parsed = response.json() if response.text else {}
+        choices = parsed.get("choices") or []
+        if not choices:
+            raise ValueError("provider_response_missing_choices")
+        content = str((choices[0].get("message") or {}).get("content") or "").strip()
     if not content:
         raise ValueError("provider_response_empty_content")
     return content
 
 
+def _read_chat_stream(response: requests.Response, on_delta: Callable[[str], None]) -> str:
+    """Collect ``chat.completion.chunk`` SSE deltas until ``data: [DONE]``."""
+    parts: list[str] = []
+    with response:
+        # Decode per line: requests assumes ISO-8859-1 for text/* without a charset.
+        for raw_line in response.iter_lines():
+            line = raw_line.decode("utf-8", errors="replace")
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                chunk = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+            choices = chunk.get("choices") or []
+            delta = str((choices[0].get("delta") or {}).get("content") or "") if choices else ""
+            if delta:
+                parts.append(delta)
+                on_delta(delta)
+    return "".join(parts)
+
+
+_llm_coalescer = LLMCallCoalescer(
+    _call_provider_with_messages,
+    window_ms=app_settings.studio_llm_batch_window_ms,
+    max_items=app_settings.studio_llm_batch_max_items,
+    max_tokens=app_settings.studio_llm_batch_max_tokens,
+)
+
+
+def _call_provider_batched(
+    *,
+    provider: ModelProvider,
+    provider_settings: dict,
+    messages: list[dict],
+    max_tokens: int = 2000,
+    validate: Validator | None = None,
+) -> str:
+    """:func:`_call_provider_with_messages` behind the micro-batching coalescer.
+
+    Concurrent ``[system, user]`` calls sharing a provider, model and system
+    prompt may be answered by one batched request; *validate* should raise
+    when an answer is unusable so that item is re-asked on its own.
+    """
+    return _llm_coalescer.call(
+        provider=provider,
+        provider_settings=provider_settings,
+        messages=messages,
+        max_tokens=max_tokens,
+        validate=validate,
+    )
+
+
+def _call_provider_batched_many(
+    *,
+    provider: ModelProvider,
+    provider_settings: dict,
+    messages_list: list[list[dict]],
+    max_tokens: int = 2000,
+    validate: Validator | None = None,
+) -> list[str]:
+    """Answers for several independent ``[system, user]`` requests of one caller.
+
+    They are packed into batched requests at once, without waiting for the
+    coalescer window.
+    """
+    return _llm_coalescer.call_many(
+        provider=provider,
+        provider_settings=provider_settings,
+        messages_list=messages_list,
+        max_tokens=max_tokens,
+        validate=validate,
+    )
+
+
+def _reply_token_budget(source_chars: int, items: int, floor: int = 256, ceiling: int = 3000) -> int:
+    """``max_tokens`` for a JSON reply restating *source_chars* characters over *items* entries.
+
+    A translated CJK character costs about 1.5 tokens; each entry adds
+    roughly 24 tokens of JSON keys. Sizing to the input keeps small
+    requests within the coalescer's budget instead of reserving the
+    ceiling for each one.
+    """
+    return max(floor, min(ceiling, int(source_chars * 1.5) + 24 * items))
+
+
+def _parse_translation_results(raw_response: str) -> list[dict]:
+    """JSON array of ``{"id", "translated_text"}`` from a translation reply."""
+    json_text = raw_response
+    md_match = re.search(r"```(?:json)?\s*([\s\S]+?)```", raw_response)
+    if md_match:
+        json_text = md_match.group(1).strip()
+    else:
+        arr_match = re.search(r"(\[[\s\S]+\])", raw_response)
+        if arr_match:
+            json_text = arr_match.group(1)
+    results = json.loads(json_text)
+    if not isinstance(results, list):
+        raise ValueError("translation reply is not a JSON array")
+    return results
+
+
 def _segment_text(text: str, chapter_id: str) -> list[dict[str, Any]]:
     """
     Split chapter raw text into typed blocks.
@@ -1976,7 +2094,9 @@ def translate_blocks(
     project.status = TranslationProjectStatus.in_progress
     db.commit()
 
-    for batch in _chunks(pending_blocks, body.batch_size):
+    batches = list(_chunks(pending_blocks, body.batch_size))
+    messages_list: list[list[dict]] = []
+    for batch in batches:
         system_msg = (
             f"你是专业文学翻译，从 {project.source_language_code} 翻译为 {project.target_language_code}。\n"
             "必须严格保留并原样输出占位符（例如 {{CHAR:xxx}} / {{LOCATION:xxx}}），禁止翻译或改写占位符。\n"
@@ -1996,40 +2116,39 @@ def translate_blocks(
             ],
             ensure_ascii=False,
         )
-        messages = [
+        messages_list.append([
             {"role": "system", "content": system_msg},
             {"role": "user", "content": user_content},
-        ]
+        ])
 
-        try:
-            raw_response = _call_provider_with_messages(
-                provider=provider,
-                provider_settings=settings,
-                messages=messages,
-                max_tokens=3000,
-            )
-            raw_fragments.append(raw_response)
-        except (requests.RequestException, ValueError) as exc:
-            run.status = SkillRunStatus.failed
-            run.error_message = str(exc)[:512]
-            run.updated_at = _utcnow()
-            db.commit()
-            raise HTTPException(
-                status_code=502,
-                detail=f"LLM call failed: {exc}",
-            )
-
-        json_text = raw_response
-        md_match = re.search(r"```(?:json)?\s*([\s\S]+?)```", raw_response)
-        if md_match:
-            json_text = md_match.group(1).strip()
-        else:
-            arr_match = re.search(r"(\[[\s\S]+\])", raw_response)
-            if arr_match:
-                json_text = arr_match.group(1)
+    # Chunks share the system prompt, so they go out together in as few
+    # batched requests as the coalescer's budget allows.
+    longest = max(
+        (sum(len(placeholder_text_by_id.get(sb.id, sb.source_text) or "") for sb in batch) for batch in batches),
+        default=0,
+    )
+    try:
+        raw_responses = _call_provider_batched_many(
+            provider=provider,
+            provider_settings=settings,
+            messages_list=messages_list,
+            max_tokens=_reply_token_budget(longest, body.batch_size),
+            validate=_parse_translation_results,
+        )
+        raw_fragments.extend(raw_responses)
+    except (requests.RequestException, ValueError) as exc:
+        run.status = SkillRunStatus.failed
+        run.error_message = str(exc)[:512]
+        run.updated_at = _utcnow()
+        db.commit()
+        raise HTTPException(
+            status_code=502,
+            detail=f"LLM call failed: {exc}",
+        )
 
+    for batch, raw_response in zip(batches, raw_responses):
         try:
-            results: list[dict] = json.loads(json_text)
+            results = _parse_translation_results(raw_response)
         except (json.JSONDecodeError, ValueError):
             results = [{"id": sb.id, "translated_text": ""} for sb in batch]
 
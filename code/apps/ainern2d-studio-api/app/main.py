@@ -244,6 +244,7 @@ def startup_consumers() -> None:
 		SYSTEM_TOPICS.COMPOSE_STATUS,
 		SYSTEM_TOPICS.SKILL_EVENTS,
 		SYSTEM_TOPICS.ALERT_EVENTS,
+		SYSTEM_TOPICS.JOB_PROGRESS_EXCHANGE,
 	):
 		thread = threading.Thread(target=consume_orchestrator_topic, args=(topic,), daemon=True)
 		thread.start()
@@ -1,6 +1,25 @@
 from .bybrid_search import HybridSearcher
-from .embedding import EmbeddingGenerator
+from .cache_sync import collection_changed, documents_changed
+from .embedding import EmbeddingGenerator, EmbeddingService, get_embedding_cache
 from .ingest import RagIngestor
+from .pipeline import RetrievalHit, RetrievalPipeline, RetrievalPipelineResult, parallel_session_factory
 from .retrieval import AssetRetriever
+from .vector_backend import NumpyVectorBackend, PgVectorBackend, select_backend
 
-__all__ = ["RagIngestor", "EmbeddingGenerator", "HybridSearcher", "AssetRetriever"]
+__all__ = [
+    "RagIngestor",
+    "collection_changed",
+    "documents_changed",
+    "EmbeddingGenerator",
+    "EmbeddingService",
+    "get_embedding_cache",
+    "HybridSearcher",
+    "AssetRetriever",
+    "RetrievalPipeline",
+    "RetrievalPipelineResult",
+    "RetrievalHit",
+    "parallel_session_factory",
+    "NumpyVectorBackend",
+    "PgVectorBackend",
+    "select_backend",
+]
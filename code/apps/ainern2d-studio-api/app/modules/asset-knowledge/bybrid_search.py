@@ -1,17 +1,42 @@
 from __future__ import annotations
 
 import math
-from typing import Sequence
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from ainern2d_shared.ainer_db_models.rag_models import RagDocument, RagEmbedding
+from ainern2d_shared.ainer_db_models.rag_models import RagDocument
+from ainern2d_shared.utils.bm25 import BM25Index, normalize_scores
+from ainern2d_shared.utils.rank_fusion import ranked, reciprocal_rank_fusion
+
+from .embedding import EmbeddingService, default_embedding_service
+from .keyword_index import get_keyword_cache
+from .vector_backend import VectorSearchBackend, select_backend
 
 
 class HybridSearcher:
-    def __init__(self, db: Session) -> None:
+    def __init__(
+        self,
+        db: Session,
+        vector_backend: VectorSearchBackend | None = None,
+        embedding_service: EmbeddingService | None = None,
+    ) -> None:
         self.db = db
+        self._vector_backend = vector_backend
+        self._embedding_service = embedding_service
+
+    @property
+    def embedding_service(self) -> EmbeddingService:
+        """Embeds queries with the same provider the documents were embedded with."""
+        if self._embedding_service is None:
+            self._embedding_service = default_embedding_service()
+        return self._embedding_service
+
+    @property
+    def vector_backend(self) -> VectorSearchBackend:
+        if self._vector_backend is None:
+            self._vector_backend = select_backend(self.db)
+        return self._vector_backend
 
     def search(
         self,
@@ -29,62 +54,94 @@ class HybridSearcher:
         collection_id: str,
         top_k: int = 20,
     ) -> list[dict]:
-        pattern = f"%{query}%"
-        stmt = (
-            select(RagDocument)
-            .filter_by(collection_id=collection_id, deleted_at=None)
-            .where(RagDocument.content_text.ilike(pattern))
-            .limit(top_k)
+        """BM25 over the collection's cached inverted index.
+
+        Scores are scaled into ``[0, 1]`` by the best hit.
+        """
+        hits = self.keyword_candidates(query, collection_id, top_k=top_k)
+        if not hits:
+            return []
+
+        scores = normalize_scores(hits)
+        content = dict(
+            self.db.execute(
+                select(RagDocument.id, RagDocument.content_text)
+                .where(RagDocument.id.in_(list(scores)))
+            ).all()
         )
-        docs: Sequence[RagDocument] = self.db.execute(stmt).scalars().all()
-        results = []
-        for doc in docs:
-            text_lower = doc.content_text.lower()
-            freq = text_lower.count(query.lower())
-            score = min(1.0, freq / 10.0)
-            results.append(
-                {"doc_id": doc.id, "score": score, "source": "keyword", "content": doc.content_text}
-            )
-        return results
+        return [
+            {"doc_id": doc_id, "score": scores[doc_id], "source": "keyword", "content": content.get(doc_id, "")}
+            for doc_id, _ in hits
+        ]
 
-    def vector_search(
+    def keyword_candidates(
         self,
         query: str,
         collection_id: str,
         top_k: int = 20,
-    ) -> list[dict]:
-        """Stub vector search using cosine similarity.
+        db: Session | None = None,
+    ) -> list[tuple[str, float]]:
+        """``(doc_id, bm25)`` best first, without touching document rows.
 
-        TODO: Replace with proper ANN index query (pgvector <=> operator).
-        Currently loads embeddings and computes cosine distance in Python.
+        ``db`` loads the collection's index on a cold cache and periodically
+        checks that the cached one still matches the table.
         """
-        doc_stmt = (
-            select(RagDocument.id)
-            .filter_by(collection_id=collection_id, deleted_at=None)
+        session = db or self.db
+        index = get_keyword_cache().get(
+            collection_id,
+            lambda: self._load_keyword_index(collection_id, session),
+            version=lambda: self._keyword_version(collection_id, session),
         )
-        doc_ids = [r for r in self.db.execute(doc_stmt).scalars().all()]
-        if not doc_ids:
-            return []
-
-        emb_stmt = (
-            select(RagEmbedding)
-            .where(RagEmbedding.doc_id.in_(doc_ids))
-            .where(RagEmbedding.is_primary.is_(True))
+        return index.search(query, top_k=top_k)
+
+    def _keyword_version(self, collection_id: str, db: Session | None = None) -> tuple:
+        """Changes whenever a document of the collection is added, edited or
+        (soft-)deleted, by this replica or any other."""
+        stmt = select(
+            func.count(RagDocument.id),
+            func.count(RagDocument.deleted_at),
+            func.max(RagDocument.updated_at),
+        ).where(RagDocument.collection_id == collection_id)
+        return tuple((db or self.db).execute(stmt).one())
+
+    def _load_keyword_index(self, collection_id: str, db: Session | None = None) -> BM25Index:
+        stmt = (
+            select(RagDocument.id, RagDocument.content_text)
+            .filter_by(collection_id=collection_id, deleted_at=None)
+            .execution_options(yield_per=1000)
         )
-        embeddings: Sequence[RagEmbedding] = self.db.execute(emb_stmt).scalars().all()
+        index = BM25Index()
+        index.add_many((db or self.db).execute(stmt))
+        return index
 
-        # Stub query vector: hash-based deterministic pseudo-vector
-        query_vec = self._pseudo_query_vector(query, dim=1536)
+    def vector_search(
+        self,
+        query: str,
+        collection_id: str,
+        top_k: int = 20,
+    ) -> list[dict]:
+        """Cosine top-k through the configured vector backend.
 
-        scored = []
-        for emb in embeddings:
-            sim = self._cosine_similarity(query_vec, list(emb.embedding))
-            scored.append(
-                {"doc_id": emb.doc_id, "score": sim, "source": "vector", "content": ""}
-            )
+        pgvector pushes the search into Postgres (HNSW / IVFFlat index);
+        elsewhere the exact in-process NumPy matrix cache is used.
+        """
+        return [
+            {"doc_id": doc_id, "score": score, "source": "vector", "content": ""}
+            for doc_id, score in self.vector_candidates(query, collection_id, top_k=top_k)
+        ]
 
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        return scored[:top_k]
+    def vector_candidates(
+        self,
+        query: str,
+        collection_id: str,
+        top_k: int = 20,
+        db: Session | None = None,
+    ) -> list[tuple[str, float]]:
+        query_vec = self.embedding_service.embed(query)
+        if query_vec is None:  # blank query
+            return []
+        backend = self.vector_backend if db is None else self.vector_backend.bind(db)
+        return backend.top_k(collection_id, query_vec, top_k)
 
     def merge_results(
         self,
@@ -92,39 +149,24 @@ class HybridSearcher:
         vec_results: list[dict],
         top_k: int = 10,
     ) -> list[dict]:
-        merged: dict[str, dict] = {}
-        for r in kw_results:
-            doc_id = r["doc_id"]
-            merged[doc_id] = {
-                "doc_id": doc_id,
-                "score": r["score"] * 0.4,
-                "content": r.get("content", ""),
-            }
-        for r in vec_results:
-            doc_id = r["doc_id"]
-            if doc_id in merged:
-                merged[doc_id]["score"] += r["score"] * 0.6
-            else:
-                merged[doc_id] = {
-                    "doc_id": doc_id,
-                    "score": r["score"] * 0.6,
-                    "content": r.get("content", ""),
-                }
-
-        ranked = sorted(merged.values(), key=lambda x: x["score"], reverse=True)
-        return ranked[:top_k]
+        """Reciprocal-rank fusion of the keyword and vector result lists.
 
-    @staticmethod
-    def _pseudo_query_vector(query: str, dim: int) -> list[float]:
-        """Deterministic pseudo-vector from query string for stub purposes."""
-        import hashlib
-
-        h = hashlib.sha256(query.encode()).digest()
-        vec = []
-        for i in range(dim):
-            byte_val = h[i % len(h)]
-            vec.append((byte_val / 255.0) * 2 - 1)
-        return vec
+        Ranks rather than raw scores are fused, since BM25 and cosine
+        scores are not on comparable scales.
+        """
+        content: dict[str, str] = {}
+        for r in [*kw_results, *vec_results]:
+            if r.get("content") and r["doc_id"] not in content:
+                content[r["doc_id"]] = r["content"]
+
+        fused = reciprocal_rank_fusion({
+            "keyword": [r["doc_id"] for r in kw_results],
+            "vector": [r["doc_id"] for r in vec_results],
+        })
+        return [
+            {"doc_id": doc_id, "score": score, "content": content.get(doc_id, "")}
+            for doc_id, score in ranked(fused)[:top_k]
+        ]
 
     @staticmethod
     def _cosine_similarity(a: list[float], b: list[float]) -> float:
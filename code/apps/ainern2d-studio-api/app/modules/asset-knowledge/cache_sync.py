@@ -0,0 +1,99 @@
+"""Apply RAG writes to the per-process search caches after commit.
+
+Write paths report what they changed on their session; the changes reach
+the cached BM25 indexes and embedding matrices only once that session
+commits and are dropped when it rolls back. Invalidating after the commit
+(not before it) means a concurrent load cannot re-cache the old rows, and
+a cache never holds a document the database does not. Other replicas pick
+the writes up through the version check in
+:class:`~.vector_index.CollectionCache`.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
+
+from ainern2d_shared.ainer_db_models.rag_models import RagDocument
+
+from .keyword_index import get_keyword_cache, index_document, remove_document
+from .vector_index import invalidate_collection
+
+_PENDING = "asset_knowledge.cache_changes"
+
+# (collection_id, doc_id, content_text, or None when the document was removed)
+_Change = tuple[str, str, "str | None"]
+
+
+@dataclass
+class _Pending:
+    documents: list[_Change] = field(default_factory=list)
+    # collection_id -> whether its BM25 index is dropped as well as its matrix
+    collections: dict[str, bool] = field(default_factory=dict)
+
+    def clear(self) -> None:
+        self.documents.clear()
+        self.collections.clear()
+
+
+def collection_changed(db: Session, collection_id: str | None, *, keywords: bool = True) -> None:
+    """Drop a collection's cached embedding matrix (and BM25 index unless
+    ``keywords`` is False) once ``db`` commits.
+
+    For embedding writes and for deletes or updates that are not expressed
+    as individual documents, e.g. a whole collection or KB pack.
+    """
+    if collection_id:
+        pending = _pending(db)
+        pending.collections[collection_id] = pending.collections.get(collection_id, False) or keywords
+
+
+def documents_changed(db: Session, docs: Iterable[RagDocument]) -> None:
+    """Queue added or soft-deleted documents for the caches of their collections."""
+    pending = _pending(db)
+    for doc in docs:
+        if not doc.collection_id:
+            continue
+        if doc.deleted_at is not None:
+            pending.documents.append((doc.collection_id, doc.id, None))
+            collection_changed(db, doc.collection_id, keywords=False)
+        else:
+            pending.documents.append((doc.collection_id, doc.id, doc.content_text or ""))
+
+
+def _pending(db: Session) -> _Pending:
+    pending = db.info.get(_PENDING)
+    if pending is None:
+        pending = db.info[_PENDING] = _Pending()
+        event.listen(db, "after_commit", _apply)
+        event.listen(db, "after_transaction_end", _discard)
+    return pending
+
+
+def _apply(db: Session) -> None:
+    pending: _Pending | None = db.info.get(_PENDING)
+    if pending is None:
+        return
+    documents, collections = list(pending.documents), dict(pending.collections)
+    pending.clear()
+    for collection_id, keywords in collections.items():
+        invalidate_collection(collection_id)
+        if keywords:
+            get_keyword_cache().invalidate(collection_id)
+    for collection_id, doc_id, text in documents:
+        if collections.get(collection_id):
+            continue  # reloaded from the table on next use
+        if text is None:
+            remove_document(collection_id, doc_id)
+        else:
+            index_document(collection_id, doc_id, text)
+
+
+def _discard(db: Session, transaction: SessionTransaction) -> None:
+    # Runs after _apply on commit; on rollback or close the queue is dropped.
+    if transaction.parent is None:
+        pending = db.info.get(_PENDING)
+        if pending is not None:
+            pending.clear()
@@ -1,15 +1,29 @@
 from __future__ import annotations
 
-import asyncio
 import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Mapping, Protocol, Sequence
 from uuid import uuid4
 
+import numpy as np
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
-from ainern2d_shared.ainer_db_models.rag_models import RagDocument, RagEmbedding
+from ainern2d_shared.ainer_db_models.rag_models import RagDocument, RagEmbedding, RagEmbeddingCache
+from ainern2d_shared.config.setting import settings
 
-_EMBEDDING_DIM = 1536
+from .cache_sync import collection_changed
+from .vector_backend import EMBEDDING_DIM
+
+_EMBEDDING_DIM = EMBEDDING_DIM
 _OPENAI_EMBED_MODEL = "text-embedding-3-small"
+_STORE_LOOKUP_CHUNK = 500
 
 
 def _hash_vector(text: str, dim: int = _EMBEDDING_DIM) -> list[float]:
@@ -18,28 +32,359 @@ def _hash_vector(text: str, dim: int = _EMBEDDING_DIM) -> list[float]:
     return [(h[i % len(h)] / 255.0) * 2 - 1 for i in range(dim)]
 
 
-async def _embed_openai(text: str, api_key: str, base_url: str | None = None) -> list[float]:
-    """Call OpenAI embeddings API; returns a list[float] of length _EMBEDDING_DIM."""
-    try:
-        from openai import AsyncOpenAI
-    except ImportError:
-        raise RuntimeError("openai SDK not installed")
-    kwargs: dict = {"api_key": api_key}
-    if base_url:
-        kwargs["base_url"] = base_url
-    client = AsyncOpenAI(**kwargs)
-    response = await client.embeddings.create(
-        model=_OPENAI_EMBED_MODEL,
-        input=text,
-    )
-    return response.data[0].embedding
+def embedding_cache_key(model: str, text: str) -> str:
+    """sha256 over model and text; identical chunks share one embedding."""
+    return hashlib.sha256(f"{model}\x00{text}".encode()).hexdigest()
+
+
+# ── Providers ─────────────────────────────────────────────────────────────────
+
+class EmbeddingProvider(Protocol):
+    model: str
+    dim: int
+
+    def embed_batch(self, texts: Sequence[str]) -> list[list[float]]:
+        """One provider call for the whole batch, results in input order."""
+        ...
+
+
+class HashEmbeddingProvider:
+    """Deterministic pseudo-vectors; ``fn`` overrides the default hash scheme.
+
+    The default scheme is cheaper to recompute than to cache, so it reports
+    ``cacheable = False``; a custom ``fn`` may stand in for a real model
+    and stays cacheable.
+    """
+
+    def __init__(
+        self,
+        dim: int = _EMBEDDING_DIM,
+        fn: Callable[[str], list[float]] | None = None,
+        model: str | None = None,
+    ) -> None:
+        self.dim = dim
+        self.model = model or f"sha256-pseudo-{dim}"
+        self._fn = fn or (lambda text: _hash_vector(text, dim))
+        self.cacheable = fn is not None
+
+    def embed_batch(self, texts: Sequence[str]) -> list[list[float]]:
+        return [self._fn(text) for text in texts]
+
+
+class OpenAIEmbeddingProvider:
+    """OpenAI-compatible embeddings over one reused (thread-safe) client."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str | None = None,
+        model: str = _OPENAI_EMBED_MODEL,
+        dim: int = _EMBEDDING_DIM,
+    ) -> None:
+        self.model = model
+        self.dim = dim
+        self._api_key = api_key
+        self._base_url = base_url
+        self._client: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        with self._lock:
+            if self._client is None:
+                try:
+                    from openai import OpenAI
+                except ImportError:
+                    raise RuntimeError("openai SDK not installed")
+                kwargs: dict = {"api_key": self._api_key}
+                if self._base_url:
+                    kwargs["base_url"] = self._base_url
+                self._client = OpenAI(**kwargs)
+            return self._client
+
+    def embed_batch(self, texts: Sequence[str]) -> list[list[float]]:
+        response = self.client.embeddings.create(model=self.model, input=list(texts))
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+@lru_cache(maxsize=16)
+def get_openai_provider(
+    api_key: str,
+    base_url: str | None = None,
+    model: str = _OPENAI_EMBED_MODEL,
+) -> OpenAIEmbeddingProvider:
+    """Process-wide provider per credentials, so its HTTP pool is reused."""
+    return OpenAIEmbeddingProvider(api_key, base_url=base_url, model=model)
+
+
+def default_embedding_service(api_key: str | None = None, base_url: str | None = None) -> "EmbeddingService":
+    """The provider documents are embedded with: OpenAI-compatible when a key
+    is configured (hash vectors as fallback), otherwise hash vectors.
+
+    Queries must go through the same service, or their vectors do not live
+    in the same space as the stored document embeddings.
+    """
+    if api_key is None:
+        api_key, base_url = settings.openai_api_key, base_url or settings.openai_base_url
+    hash_provider = HashEmbeddingProvider(_EMBEDDING_DIM)
+    if api_key:
+        return EmbeddingService(get_openai_provider(api_key, base_url), fallback=hash_provider)
+    return EmbeddingService(hash_provider)
+
+
+# ── Caches ────────────────────────────────────────────────────────────────────
+
+class EmbeddingStore(Protocol):
+    def get_many(self, keys: Sequence[str]) -> dict[str, list[float]]:
+        ...
+
+    def put_many(self, entries: Mapping[str, list[float]], *, model: str, dim: int) -> None:
+        ...
+
+
+class MemoryEmbeddingCache:
+    """Thread-safe LRU of ``cache key -> vector``.
+
+    Vectors are held as float32 arrays (about 6 KB at 1536 dims, against
+    roughly 50 KB as a list of Python floats) and handed out as lists.
+    """
+
+    def __init__(self, max_entries: int | None = None) -> None:
+        self._max = max(max_entries or settings.rag_embed_memory_cache_entries, 1)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, keys: Sequence[str]) -> dict[str, list[float]]:
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+        return {key: vector.tolist() for key, vector in found.items()}
+
+    def put_many(self, entries: Mapping[str, Sequence[float]], *, model: str = "", dim: int = 0) -> None:
+        packed = {key: np.asarray(vector, dtype=np.float32) for key, vector in entries.items()}
+        with self._lock:
+            for key, vector in packed.items():
+                self._entries[key] = vector
+                self._entries.move_to_end(key)
+            while len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class DbEmbeddingStore:
+    """Persistent tier on ``rag_embedding_cache``, scoped per tenant/project.
+
+    Rows are flushed with the caller's transaction.
+    """
+
+    def __init__(self, db: Session, tenant_id: str, project_id: str) -> None:
+        self.db = db
+        self.tenant_id = tenant_id
+        self.project_id = project_id
+
+    def get_many(self, keys: Sequence[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        keys = list(keys)
+        for start in range(0, len(keys), _STORE_LOOKUP_CHUNK):
+            rows = self.db.execute(
+                select(RagEmbeddingCache.content_hash, RagEmbeddingCache.embedding)
+                .where(RagEmbeddingCache.tenant_id == self.tenant_id)
+                .where(RagEmbeddingCache.project_id == self.project_id)
+                .where(RagEmbeddingCache.content_hash.in_(keys[start:start + _STORE_LOOKUP_CHUNK]))
+                .where(RagEmbeddingCache.deleted_at.is_(None))
+            ).all()
+            found.update({content_hash: list(vector) for content_hash, vector in rows})
+        return found
+
+    def put_many(self, entries: Mapping[str, list[float]], *, model: str, dim: int) -> None:
+        if not entries:
+            return
+        rows = [
+            {
+                "id": f"embc_{uuid4().hex}",
+                "tenant_id": self.tenant_id,
+                "project_id": self.project_id,
+                "content_hash": key,
+                "model_name": model,
+                "embedding_dim": dim,
+                "embedding": list(vector),
+            }
+            for key, vector in entries.items()
+        ]
+        if self.db.get_bind().dialect.name == "postgresql":
+            # Concurrent re-syncs of the same text must not fail the transaction.
+            self.db.execute(
+                pg_insert(RagEmbeddingCache)
+                .values(rows)
+                .on_conflict_do_nothing(constraint="uq_rag_embedding_cache_scope_hash")
+            )
+        else:
+            self.db.add_all(RagEmbeddingCache(**row) for row in rows)
+        self.db.flush()
+
+
+_MEMORY_CACHE = MemoryEmbeddingCache()
+
+
+def get_embedding_cache() -> MemoryEmbeddingCache:
+    return _MEMORY_CACHE
+
+
+# ── Service ───────────────────────────────────────────────────────────────────
+
+@dataclass
+class EmbeddingStats:
+    requested: int = 0
+    cache_hits: int = 0
+    embedded: int = 0
+    fallback: int = 0
+    batches: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "requested": self.requested,
+            "cache_hits": self.cache_hits,
+            "embedded": self.embedded,
+            "fallback": self.fallback,
+            "batches": self.batches,
+        }
+
+
+class EmbeddingService:
+    """Batched, cached embedding of many texts.
+
+    Lookup order is the in-process LRU, then the optional persistent
+    ``store``; only misses reach the provider, de-duplicated and split into
+    ``batch_size`` batches that run ``max_concurrency`` at a time. When a
+    batch fails and a ``fallback`` provider is set, its vectors are used but
+    never cached, so a later call retries the real provider. A provider
+    with ``cacheable = False`` (the default hash scheme) skips the memory
+    cache altogether.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        *,
+        cache: MemoryEmbeddingCache | None = None,
+        fallback: EmbeddingProvider | None = None,
+        batch_size: int | None = None,
+        max_concurrency: int | None = None,
+    ) -> None:
+        self.provider = provider
+        self.cache: MemoryEmbeddingCache | None = None
+        if getattr(provider, "cacheable", True):
+            self.cache = cache if cache is not None else get_embedding_cache()
+        self.fallback = fallback
+        self.batch_size = max(batch_size or settings.rag_embed_batch_size, 1)
+        self.max_concurrency = max(max_concurrency or settings.rag_embed_concurrency, 1)
+
+    @property
+    def model(self) -> str:
+        return self.provider.model
+
+    @property
+    def dim(self) -> int:
+        return self.provider.dim
 
+    def embed(self, text: str, store: EmbeddingStore | None = None) -> list[float] | None:
+        return self.embed_texts([text], store=store)[0]
+
+    def embed_texts(
+        self,
+        texts: Sequence[str],
+        store: EmbeddingStore | None = None,
+        stats: EmbeddingStats | None = None,
+    ) -> list[list[float] | None]:
+        """Vectors in input order; blank texts map to ``None``."""
+        stats = stats if stats is not None else EmbeddingStats()
+        keys = [embedding_cache_key(self.model, text) if text and text.strip() else None for text in texts]
+        pending: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key is not None:
+                pending.setdefault(key, text)
+        stats.requested += len(pending)
+
+        vectors = self.cache.get_many(list(pending)) if self.cache is not None else {}
+        if store is not None and len(vectors) < len(pending):
+            stored = store.get_many([key for key in pending if key not in vectors])
+            if self.cache is not None:
+                self.cache.put_many(stored)
+            vectors.update(stored)
+        stats.cache_hits += len(vectors)
+
+        missing = [(key, text) for key, text in pending.items() if key not in vectors]
+        if missing:
+            fresh = self._embed_missing(missing, stats)
+            if self.cache is not None:
+                self.cache.put_many(fresh)
+            if store is not None:
+                store.put_many(fresh, model=self.model, dim=self.dim)
+            vectors.update(fresh)
+            leftover = [(key, text) for key, text in missing if key not in vectors]
+            if leftover and self.fallback is not None:
+                fallback = self.fallback.embed_batch([text for _, text in leftover])
+                vectors.update({key: vector for (key, _), vector in zip(leftover, fallback)})
+
+        return [vectors.get(key) if key is not None else None for key in keys]
+
+    def _embed_missing(
+        self,
+        missing: list[tuple[str, str]],
+        stats: EmbeddingStats,
+    ) -> dict[str, list[float]]:
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        stats.batches += len(batches)
+
+        def _run(batch: list[tuple[str, str]]) -> dict[str, list[float]]:
+            try:
+                result = self.provider.embed_batch([text for _, text in batch])
+            except Exception as exc:
+                if self.fallback is None:
+                    raise
+                logger.warning(f"[embedding] {self.model} batch of {len(batch)} failed, using fallback: {exc}")
+                return {}
+            return {key: list(vector) for (key, _), vector in zip(batch, result)}
+
+        fresh: dict[str, list[float]] = {}
+        if len(batches) == 1 or self.max_concurrency == 1:
+            for batch in batches:
+                fresh.update(_run(batch))
+        else:
+            workers = min(self.max_concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-embed") as pool:
+                for result in pool.map(_run, batches):
+                    fresh.update(result)
+        stats.embedded += len(fresh)
+        stats.fallback += len(missing) - len(fresh)
+        return fresh
+
+
+# ── Documents ─────────────────────────────────────────────────────────────────
 
 class EmbeddingGenerator:
-    def __init__(self, db: Session, api_key: str = "", base_url: str | None = None) -> None:
+    def __init__(
+        self,
+        db: Session,
+        api_key: str = "",
+        base_url: str | None = None,
+        service: EmbeddingService | None = None,
+    ) -> None:
         self.db = db
         self._api_key = api_key
         self._base_url = base_url
+        self.service = service or default_embedding_service(api_key, base_url)
+        self.last_stats = EmbeddingStats()
 
     def embed(
         self,
@@ -49,38 +394,49 @@ class EmbeddingGenerator:
         doc = self.db.get(RagDocument, doc_id)
         if doc is None:
             raise LookupError(f"RagDocument id={doc_id} not found")
+        return self.embed_documents([doc], model_profile_id)[0]
 
-        if self._api_key:
-            # Run async embed in a new event loop if needed
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    import concurrent.futures
-                    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
-                        future = pool.submit(
-                            asyncio.run,
-                            _embed_openai(doc.content_text or "", self._api_key, self._base_url),
-                        )
-                        vector = future.result()
-                else:
-                    vector = loop.run_until_complete(
-                        _embed_openai(doc.content_text or "", self._api_key, self._base_url)
-                    )
-            except Exception:
-                vector = _hash_vector(doc.content_text or "")
-        else:
-            vector = _hash_vector(doc.content_text or "")
-
-        emb = RagEmbedding(
-            id=f"emb_{uuid4().hex}",
-            tenant_id=doc.tenant_id,
-            project_id=doc.project_id,
-            doc_id=doc_id,
-            embedding_model_profile_id=model_profile_id,
-            embedding_dim=_EMBEDDING_DIM,
-            embedding=vector,
-            is_primary=True,
-        )
-        self.db.add(emb)
+    def embed_documents(
+        self,
+        docs: Iterable[RagDocument],
+        model_profile_id: str | None = None,
+    ) -> list[RagEmbedding]:
+        """Embed many documents; unchanged texts are served from the cache."""
+        docs = list(docs)
+        self.last_stats = EmbeddingStats()
+        scopes: dict[tuple[str, str], list[RagDocument]] = {}
+        for doc in docs:
+            scopes.setdefault((doc.tenant_id, doc.project_id), []).append(doc)
+
+        vectors: dict[int, list[float] | None] = {}
+        for (tenant_id, project_id), scoped in scopes.items():
+            # Pseudo-vectors are cheaper to recompute than to look up.
+            store = (
+                DbEmbeddingStore(self.db, tenant_id, project_id)
+                if not isinstance(self.service.provider, HashEmbeddingProvider)
+                else None
+            )
+            result = self.service.embed_texts(
+                [doc.content_text or "" for doc in scoped], store=store, stats=self.last_stats,
+            )
+            vectors.update({id(doc): vector for doc, vector in zip(scoped, result)})
+
+        embeddings: list[RagEmbedding] = []
+        for doc in docs:
+            vector = vectors.get(id(doc)) or _hash_vector(doc.content_text or "")
+            emb = RagEmbedding(
+                id=f"emb_{uuid4().hex}",
+                tenant_id=doc.tenant_id,
+                project_id=doc.project_id,
+                doc_id=doc.id,
+                embedding_model_profile_id=model_profile_id,
+                embedding_dim=_EMBEDDING_DIM,
+                embedding=vector,
+                is_primary=True,
+            )
+            self.db.add(emb)
+            embeddings.append(emb)
         self.db.flush()
-        return emb
+        for collection_id in {doc.collection_id for doc in docs}:
+            collection_changed(self.db, collection_id, keywords=False)
+        return embeddings
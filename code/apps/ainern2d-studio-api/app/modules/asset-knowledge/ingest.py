@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 from uuid import uuid4
 
 from sqlalchemy.orm import Session
@@ -8,6 +9,8 @@ from ainern2d_shared.ainer_db_models.content_models import Chapter
 from ainern2d_shared.ainer_db_models.enum_models import RagScope, RagSourceType
 from ainern2d_shared.ainer_db_models.rag_models import RagDocument
 
+from .cache_sync import documents_changed
+
 
 class RagIngestor:
     def __init__(self, db: Session) -> None:
@@ -35,6 +38,16 @@ class RagIngestor:
         )
         self.db.add(doc)
         self.db.flush()
+        documents_changed(self.db, [doc])
+        return doc
+
+    def delete(self, doc_id: str) -> RagDocument:
+        doc = self.db.get(RagDocument, doc_id)
+        if doc is None:
+            raise LookupError(f"RagDocument id={doc_id} not found")
+        doc.deleted_at = datetime.now(timezone.utc)
+        self.db.flush()
+        documents_changed(self.db, [doc])
         return doc
 
     def ingest_chapter(self, collection_id: str, chapter_id: str) -> RagDocument:
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from ainern2d_shared.utils.bm25 import BM25Index
+
+from .vector_index import CollectionCache
+
+_KEYWORD_CACHE: CollectionCache[BM25Index] = CollectionCache()
+
+
+def get_keyword_cache() -> CollectionCache[BM25Index]:
+    return _KEYWORD_CACHE
+
+
+def index_document(collection_id: str | None, doc_id: str, text: str) -> None:
+    """Apply an ingest to the collection's BM25 index if it is loaded.
+
+    When it is not loaded, any in-flight load is discarded instead so it
+    cannot cache a snapshot that misses this document.
+    """
+    if not collection_id:
+        return
+    index = _KEYWORD_CACHE.peek(collection_id)
+    if index is None:
+        _KEYWORD_CACHE.invalidate(collection_id)
+    else:
+        index.add(doc_id, text)
+
+
+def remove_document(collection_id: str | None, doc_id: str) -> None:
+    if not collection_id:
+        return
+    index = _KEYWORD_CACHE.peek(collection_id)
+    if index is None:
+        _KEYWORD_CACHE.invalidate(collection_id)
+    else:
+        index.remove(doc_id)
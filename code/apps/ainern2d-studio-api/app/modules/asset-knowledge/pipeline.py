@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Collection, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from ainern2d_shared.ainer_db_models.rag_models import RagDocument
+from ainern2d_shared.utils.rank_fusion import (
+    FUSION_RRF,
+    FUSION_WEIGHTED,
+    RRF_K,
+    StageTimer,
+    min_max_normalize,
+    ranked,
+    reciprocal_rank_fusion,
+    weighted_score_fusion,
+)
+
+from .bybrid_search import HybridSearcher
+from .embedding import EmbeddingService
+from .vector_backend import VectorSearchBackend
+
+# Stage names reported in ``RetrievalPipelineResult.timings_ms``.
+STAGE_KEYWORD = "keyword"
+STAGE_VECTOR = "vector"
+STAGE_FUSION = "fusion"
+STAGE_HYDRATE = "hydrate"
+STAGE_RERANK = "rerank"
+
+
+@dataclass
+class RetrievalHit:
+    doc_id: str
+    score: float
+    keyword_score: float = 0.0
+    vector_score: float = 0.0
+    keyword_rank: int | None = None
+    vector_rank: int | None = None
+    rerank_score: float | None = None
+    collection_id: str | None = None
+    kb_version_id: str | None = None
+    title: str | None = None
+    source_type: str | None = None
+    source_id: str | None = None
+    content: str = ""
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class RetrievalPipelineResult:
+    query: str
+    hits: list[RetrievalHit]
+    timings_ms: dict[str, float]
+    candidates: int = 0
+    fusion: str = FUSION_RRF
+
+
+# (query, hits) -> one relevance score per hit, e.g. a cross-encoder.
+Reranker = Callable[[str, Sequence[RetrievalHit]], Sequence[float]]
+
+
+def parallel_session_factory(db: Session) -> Callable[[], Session]:
+    """Sessions on ``db``'s engine for the concurrent retrieval stages.
+
+    They only see committed rows, which is what the shared caches hold.
+    """
+    return sessionmaker(bind=db.get_bind(), autoflush=False)
+
+
+class RetrievalPipeline:
+    """Keyword + vector retrieval with fusion, one hydrate query and rerank.
+
+    1. keyword (BM25) and vector candidates per collection — concurrently
+       when ``session_factory`` is given, each stage on its own session
+    2. fusion: reciprocal-rank (default) or alpha-weighted min-max scores
+    3. hydrate the fused candidates with a single ``RagDocument`` query
+    4. optional ``reranker`` over the hydrated hits
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        *,
+        session_factory: Callable[[], Session] | None = None,
+        vector_backend: VectorSearchBackend | None = None,
+        embedding_service: EmbeddingService | None = None,
+        reranker: Reranker | None = None,
+        fusion: str = FUSION_RRF,
+        alpha: float = 0.6,
+        rrf_k: int = RRF_K,
+    ) -> None:
+        self.db = db
+        self._session_factory = session_factory
+        self._searcher = HybridSearcher(db, vector_backend=vector_backend, embedding_service=embedding_service)
+        self._reranker = reranker
+        self.fusion = fusion
+        self.alpha = alpha
+        self.rrf_k = rrf_k
+
+    def run(
+        self,
+        query: str,
+        collection_ids: Sequence[str],
+        *,
+        top_k: int = 10,
+        candidate_k: int | None = None,
+        fusion: str | None = None,
+        alpha: float | None = None,
+        rerank: bool = True,
+        kb_version_ids: Collection[str] | None = None,
+    ) -> RetrievalPipelineResult:
+        return self.run_many(
+            [query], collection_ids, top_k=top_k, candidate_k=candidate_k, fusion=fusion,
+            alpha=alpha, rerank=rerank, kb_version_ids=kb_version_ids,
+        )[0]
+
+    def run_many(
+        self,
+        queries: Sequence[str],
+        collection_ids: Sequence[str],
+        *,
+        top_k: int = 10,
+        candidate_k: int | None = None,
+        fusion: str | None = None,
+        alpha: float | None = None,
+        rerank: bool = True,
+        kb_version_ids: Collection[str] | None = None,
+        max_concurrency: int = 4,
+    ) -> list[RetrievalPipelineResult]:
+        """:meth:`run` for several queries over the same collections.
+
+        With a ``session_factory`` the queries' candidate stages run
+        concurrently (``max_concurrency`` at a time); the queries are
+        embedded in one provider batch and hydrated with a single query.
+        """
+        fusion = fusion or self.fusion
+        alpha = self.alpha if alpha is None else alpha
+        candidate_k = candidate_k or max(top_k * 3, 20)
+        collections = [c for c in dict.fromkeys(collection_ids) if c]
+        timers = [StageTimer() for _ in queries]
+
+        if len(queries) > 1 and collections:
+            # Warms the embedding cache, so each vector stage is a lookup.
+            self._searcher.embedding_service.embed_texts(list(queries))
+
+        def _fused(i: int) -> tuple[list, list, dict[str, float], list[tuple[str, float]]]:
+            keyword, vector = self._candidates(queries[i], collections, candidate_k, timers[i])
+            with timers[i].stage(STAGE_FUSION):
+                fused = self._fuse(keyword, vector, fusion, alpha)
+            return keyword, vector, fused, ranked(fused)[:candidate_k]
+
+        if self._session_factory is None or len(queries) == 1:
+            stages = [_fused(i) for i in range(len(queries))]
+        else:
+            workers = max(1, min(max_concurrency, len(queries)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-queries") as pool:
+                stages = list(pool.map(_fused, range(len(queries))))
+
+        hydrate = StageTimer()
+        with hydrate.stage(STAGE_HYDRATE):
+            docs = self._hydrate(
+                list(dict.fromkeys(doc_id for *_, order in stages for doc_id, _ in order)), kb_version_ids,
+            )
+
+        results: list[RetrievalPipelineResult] = []
+        for query, timer, (keyword, vector, fused, order) in zip(queries, timers, stages):
+            timer.add(STAGE_HYDRATE, hydrate.timings_ms[STAGE_HYDRATE])
+            hits = self._hits(order, keyword, vector, docs)
+            if rerank and self._reranker is not None and hits:
+                with timer.stage(STAGE_RERANK):
+                    window = hits[: max(top_k * 2, top_k)]
+                    for hit, score in zip(window, self._reranker(query, window)):
+                        hit.rerank_score = float(score)
+                    window.sort(key=lambda h: h.rerank_score or 0.0, reverse=True)
+                    hits[: len(window)] = window
+            results.append(RetrievalPipelineResult(
+                query=query,
+                hits=hits[:top_k],
+                timings_ms=timer.report(),
+                candidates=len(fused),
+                fusion=fusion,
+            ))
+        return results
+
+    def _fuse(
+        self,
+        keyword: list[tuple[str, float]],
+        vector: list[tuple[str, float]],
+        fusion: str,
+        alpha: float,
+    ) -> dict[str, float]:
+        if fusion == FUSION_WEIGHTED:
+            return weighted_score_fusion(
+                {STAGE_KEYWORD: dict(keyword), STAGE_VECTOR: dict(vector)},
+                {STAGE_KEYWORD: 1.0 - alpha, STAGE_VECTOR: alpha},
+            )
+        return reciprocal_rank_fusion(
+            {
+                STAGE_KEYWORD: [doc_id for doc_id, _ in keyword],
+                STAGE_VECTOR: [doc_id for doc_id, _ in vector],
+            },
+            k=self.rrf_k,
+        )
+
+    @staticmethod
+    def _hits(
+        order: list[tuple[str, float]],
+        keyword: list[tuple[str, float]],
+        vector: list[tuple[str, float]],
+        docs: dict[str, RagDocument],
+    ) -> list[RetrievalHit]:
+        kw_norm = min_max_normalize(dict(keyword))
+        vec_norm = min_max_normalize(dict(vector))
+        kw_rank = {doc_id: i for i, (doc_id, _) in enumerate(keyword, start=1)}
+        vec_rank = {doc_id: i for i, (doc_id, _) in enumerate(vector, start=1)}
+        hits: list[RetrievalHit] = []
+        for doc_id, score in order:
+            doc = docs.get(doc_id)
+            if doc is None:
+                continue
+            hits.append(RetrievalHit(
+                doc_id=doc_id,
+                score=score,
+                keyword_score=kw_norm.get(doc_id, 0.0),
+                vector_score=vec_norm.get(doc_id, 0.0),
+                keyword_rank=kw_rank.get(doc_id),
+                vector_rank=vec_rank.get(doc_id),
+                collection_id=doc.collection_id,
+                kb_version_id=doc.kb_version_id,
+                title=doc.title,
+                source_type=getattr(doc.source_type, "value", doc.source_type),
+                source_id=doc.source_id,
+                content=doc.content_text or "",
+                metadata=dict(doc.metadata_json or {}),
+            ))
+        return hits
+
+    # ------------------------------------------------------------------
+
+    def _candidates(
+        self,
+        query: str,
+        collections: Sequence[str],
+        k: int,
+        timer: StageTimer,
+    ) -> tuple[list[tuple[str, float]], list[tuple[str, float]]]:
+        def _keyword(db: Session | None) -> list[tuple[str, float]]:
+            with timer.stage(STAGE_KEYWORD):
+                merged: list[tuple[str, float]] = []
+                for collection_id in collections:
+                    merged.extend(self._searcher.keyword_candidates(query, collection_id, k, db=db))
+                return sorted(merged, key=lambda item: item[1], reverse=True)[:k]
+
+        def _vector(db: Session | None) -> list[tuple[str, float]]:
+            with timer.stage(STAGE_VECTOR):
+                merged: list[tuple[str, float]] = []
+                for collection_id in collections:
+                    merged.extend(self._searcher.vector_candidates(query, collection_id, k, db=db))
+                return sorted(merged, key=lambda item: item[1], reverse=True)[:k]
+
+        if not collections:
+            return [], []
+        if self._session_factory is None:
+            return _keyword(None), _vector(None)
+
+        def _on_own_session(stage: Callable[[Session | None], list[tuple[str, float]]]):
+            db = self._session_factory()
+            try:
+                return stage(db)
+            finally:
+                db.close()
+
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="rag-retrieval") as pool:
+            keyword = pool.submit(_on_own_session, _keyword)
+            vector = pool.submit(_on_own_session, _vector)
+            return keyword.result(), vector.result()
+
+    def _hydrate(
+        self,
+        doc_ids: Sequence[str],
+        kb_version_ids: Collection[str] | None,
+    ) -> dict[str, RagDocument]:
+        if not doc_ids:
+            return {}
+        stmt = (
+            select(RagDocument)
+            .where(RagDocument.id.in_(list(doc_ids)))
+            .where(RagDocument.deleted_at.is_(None))
+        )
+        if kb_version_ids:
+            stmt = stmt.where(RagDocument.kb_version_id.in_(list(kb_version_ids)))
+        return {doc.id: doc for doc in self.db.execute(stmt).scalars().all()}
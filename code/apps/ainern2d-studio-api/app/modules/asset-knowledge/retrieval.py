@@ -1,14 +1,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Callable
 
 from sqlalchemy.orm import Session
 
-from ainern2d_shared.ainer_db_models.rag_models import RagDocument
 from ainern2d_shared.schemas.entity import EntityPack
 
-from .bybrid_search import HybridSearcher
+from .pipeline import Reranker, RetrievalPipeline, parallel_session_factory
 
 
 @dataclass
@@ -20,9 +19,16 @@ class AssetCandidate:
 
 
 class AssetRetriever:
-    def __init__(self, db: Session) -> None:
+    def __init__(
+        self,
+        db: Session,
+        reranker: Reranker | None = None,
+        session_factory: Callable[[], Session] | None = None,
+    ) -> None:
         self.db = db
-        self._searcher = HybridSearcher(db)
+        self._pipeline = RetrievalPipeline(
+            db, session_factory=session_factory or parallel_session_factory(db), reranker=reranker,
+        )
 
     def retrieve(
         self,
@@ -37,23 +43,13 @@ class AssetRetriever:
             names = " ".join(e.display_name for e in entity_pack.entities)
             augmented = f"{query} {names}"
 
-        raw = self._searcher.search(augmented, collection_id, top_k=top_k)
-
-        candidates: list[AssetCandidate] = []
-        for item in raw:
-            doc = self.db.get(RagDocument, item["doc_id"])
-            content = item.get("content", "")
-            if not content and doc:
-                content = doc.content_text
-            metadata = (doc.metadata_json or {}) if doc else {}
-            candidates.append(
-                AssetCandidate(
-                    doc_id=item["doc_id"],
-                    score=item["score"],
-                    content=content,
-                    metadata=metadata,
-                )
+        result = self._pipeline.run(augmented, [collection_id], top_k=top_k)
+        return [
+            AssetCandidate(
+                doc_id=hit.doc_id,
+                score=hit.rerank_score if hit.rerank_score is not None else hit.score,
+                content=hit.content,
+                metadata=hit.metadata,
             )
-
-        candidates.sort(key=lambda c: c.score, reverse=True)
-        return candidates[:top_k]
+            for hit in result.hits
+        ]
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from typing import Protocol, Sequence
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from ainern2d_shared.ainer_db_models.rag_models import RagDocument, RagEmbedding, Vector
+from ainern2d_shared.config.setting import settings
+
+from .vector_index import EmbeddingMatrix, get_matrix_cache
+
+EMBEDDING_DIM = 1536
+
+BACKEND_AUTO = "auto"
+BACKEND_PGVECTOR = "pgvector"
+BACKEND_NUMPY = "numpy"
+
+
+class VectorSearchBackend(Protocol):
+    name: str
+
+    def top_k(
+        self, collection_id: str, query_vec: Sequence[float], k: int
+    ) -> list[tuple[str, float]]:
+        """Return up to ``k`` ``(doc_id, cosine)`` pairs, best first."""
+        ...
+
+    def bind(self, db: Session) -> "VectorSearchBackend":
+        """Same backend configuration on another session (e.g. a worker thread's)."""
+        ...
+
+
+def _primary_embeddings(collection_id: str):
+    return (
+        select(RagEmbedding.doc_id, RagEmbedding.embedding)
+        .join(RagDocument, RagDocument.id == RagEmbedding.doc_id)
+        .where(RagDocument.collection_id == collection_id)
+        .where(RagDocument.deleted_at.is_(None))
+        .where(RagEmbedding.is_primary.is_(True))
+    )
+
+
+class NumpyVectorBackend:
+    """Exact cosine top-k over the in-process cached embedding matrix."""
+
+    name = BACKEND_NUMPY
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def top_k(
+        self, collection_id: str, query_vec: Sequence[float], k: int
+    ) -> list[tuple[str, float]]:
+        matrix = get_matrix_cache().get(
+            collection_id,
+            lambda: self.load(collection_id),
+            version=lambda: self.version(collection_id),
+        )
+        return matrix.top_k(query_vec, k)
+
+    def bind(self, db: Session) -> "NumpyVectorBackend":
+        return NumpyVectorBackend(db)
+
+    def load(self, collection_id: str) -> EmbeddingMatrix:
+        stmt = _primary_embeddings(collection_id).order_by(RagEmbedding.doc_id)
+        return EmbeddingMatrix.build(self.db.execute(stmt).all(), dim=EMBEDDING_DIM)
+
+    def version(self, collection_id: str) -> tuple:
+        """Changes with any document or embedding write in the collection,
+        so matrices cached by every replica notice writes made elsewhere."""
+        docs = select(
+            func.count(RagDocument.id),
+            func.count(RagDocument.deleted_at),
+            func.max(RagDocument.updated_at),
+        ).where(RagDocument.collection_id == collection_id)
+        embeddings = (
+            select(func.count(RagEmbedding.id), func.max(RagEmbedding.updated_at))
+            .join(RagDocument, RagDocument.id == RagEmbedding.doc_id)
+            .where(RagDocument.collection_id == collection_id)
+        )
+        return (*self.db.execute(docs).one(), *self.db.execute(embeddings).one())
+
+
+class PgVectorBackend:
+    """Approximate cosine top-k pushed into Postgres via the ``<=>`` operator.
+
+    Served by the partial HNSW / IVFFlat index from migration
+    ``c1d9e7a4b2f6``; ``ef_search`` / ``probes`` trade recall for latency
+    per transaction. The collection filter is applied to the index
+    candidates, so keep ``ef_search`` well above ``k`` for small collections.
+    """
+
+    name = BACKEND_PGVECTOR
+
+    def __init__(
+        self,
+        db: Session,
+        *,
+        ef_search: int | None = None,
+        probes: int | None = None,
+    ) -> None:
+        self.db = db
+        self.ef_search = ef_search if ef_search is not None else settings.rag_ann_ef_search
+        self.probes = probes if probes is not None else settings.rag_ann_probes
+
+    def bind(self, db: Session) -> "PgVectorBackend":
+        return PgVectorBackend(db, ef_search=self.ef_search, probes=self.probes)
+
+    def top_k(
+        self, collection_id: str, query_vec: Sequence[float], k: int
+    ) -> list[tuple[str, float]]:
+        if k <= 0:
+            return []
+        # SET LOCAL only lasts for the current transaction and takes no binds.
+        if self.ef_search > 0:
+            self.db.execute(text(f"SET LOCAL hnsw.ef_search = {int(self.ef_search)}"))
+        if self.probes > 0:
+            self.db.execute(text(f"SET LOCAL ivfflat.probes = {int(self.probes)}"))
+
+        distance = RagEmbedding.embedding.cosine_distance(list(query_vec))
+        stmt = (
+            select(RagEmbedding.doc_id, distance.label("distance"))
+            .join(RagDocument, RagDocument.id == RagEmbedding.doc_id)
+            .where(RagDocument.collection_id == collection_id)
+            .where(RagDocument.deleted_at.is_(None))
+            # "= true" (not "IS true") so the planner can match the partial index.
+            .where(RagEmbedding.is_primary == True)  # noqa: E712
+            .order_by(distance)
+            .limit(k)
+        )
+        return [(doc_id, 1.0 - float(dist)) for doc_id, dist in self.db.execute(stmt).all()]
+
+
+def pgvector_available(db: Session) -> bool:
+    """True when the embedding column is a pgvector ``Vector`` on Postgres."""
+    if Vector is None or not isinstance(RagEmbedding.__table__.c.embedding.type, Vector):
+        return False
+    try:
+        return db.get_bind().dialect.name == "postgresql"
+    except Exception:
+        return False
+
+
+def select_backend(db: Session, preferred: str | None = None) -> VectorSearchBackend:
+    choice = (preferred or settings.rag_vector_backend or BACKEND_AUTO).lower()
+    if choice == BACKEND_NUMPY:
+        return NumpyVectorBackend(db)
+    if choice == BACKEND_PGVECTOR:
+        if not pgvector_available(db):
+            raise RuntimeError("RAG-VECTOR-001: pgvector backend requested but not available")
+        return PgVectorBackend(db)
+    return PgVectorBackend(db) if pgvector_available(db) else NumpyVectorBackend(db)
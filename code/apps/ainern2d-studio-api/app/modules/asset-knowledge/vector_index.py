@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, Iterable, Sequence, TypeVar
+
+import numpy as np
+
+from ainern2d_shared.config.setting import settings
+
+_MAX_COLLECTIONS = 64
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class EmbeddingMatrix:
+    """Primary embeddings of one collection, ready for a single mat-vec query.
+
+    ``vectors`` is a C-contiguous float32 ``(n, dim)`` array whose rows are
+    L2-normalised, so ``vectors @ q`` with a normalised ``q`` is the cosine
+    similarity. ``doc_ids[i]`` is the document behind row ``i``.
+    """
+
+    doc_ids: np.ndarray
+    vectors: np.ndarray
+
+    @property
+    def dim(self) -> int:
+        return int(self.vectors.shape[1])
+
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
+
+    @classmethod
+    def build(cls, rows: Iterable[tuple[str, Sequence[float]]], dim: int) -> "EmbeddingMatrix":
+        doc_ids: list[str] = []
+        vectors: list[Sequence[float]] = []
+        for doc_id, vector in rows:
+            if vector is None or len(vector) != dim:
+                continue
+            doc_ids.append(doc_id)
+            vectors.append(vector)
+
+        matrix = np.ascontiguousarray(
+            np.asarray(vectors, dtype=np.float32).reshape(len(vectors), dim)
+        )
+        _normalize_rows(matrix)
+        return cls(doc_ids=np.asarray(doc_ids, dtype=object), vectors=matrix)
+
+    def top_k(self, query: Sequence[float], k: int) -> list[tuple[str, float]]:
+        """Return up to ``k`` ``(doc_id, cosine)`` pairs, best first."""
+        n = len(self)
+        if n == 0 or k <= 0 or len(query) != self.dim:
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        if norm == 0.0:
+            return []
+        scores = self.vectors @ (q / norm)
+
+        if k < n:
+            idx = np.argpartition(scores, n - k)[n - k:]
+        else:
+            idx = np.arange(n)
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        return [(self.doc_ids[i], float(scores[i])) for i in idx]
+
+
+def _normalize_rows(matrix: np.ndarray) -> None:
+    if not matrix.size:
+        return
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    # Zero vectors stay zero and score 0.0, as the old pure-Python path did.
+    norms[norms == 0.0] = 1.0
+    matrix /= norms
+
+
+class CollectionCache(Generic[T]):
+    """Process-wide LRU of per-collection search structures.
+
+    Loads happen outside the lock; a load that raced with
+    :meth:`invalidate` is returned to its caller but not stored.
+
+    Local writes invalidate or patch entries once they commit. Writes made
+    by other replicas are caught by ``version``: a cheap DB token rechecked
+    at most every ``revalidate_s`` seconds; an entry whose token changed is
+    reloaded.
+    """
+
+    def __init__(self, max_collections: int = _MAX_COLLECTIONS, revalidate_s: float | None = None) -> None:
+        self._max = max(max_collections, 1)
+        self._revalidate_s = revalidate_s
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, T] = OrderedDict()
+        # collection_id -> (version token, monotonic time it was last checked)
+        self._versions: dict[str, tuple[Hashable, float]] = {}
+        self._generation: dict[str, int] = {}
+
+    def get(
+        self,
+        collection_id: str,
+        loader: Callable[[], T],
+        version: Callable[[], Hashable] | None = None,
+    ) -> T:
+        with self._lock:
+            entry = self._entries.get(collection_id)
+            checked = self._versions.get(collection_id)
+        token: Hashable = None
+        if entry is not None and version is not None and checked is not None:
+            if time.monotonic() - checked[1] >= self._revalidate():
+                token = version()
+                if token != checked[0]:
+                    self.invalidate(collection_id)
+                    entry = None
+                else:
+                    with self._lock:
+                        self._versions[collection_id] = (token, time.monotonic())
+        if entry is not None:
+            with self._lock:
+                if collection_id in self._entries:
+                    self._entries.move_to_end(collection_id)
+            return entry
+
+        with self._lock:
+            generation = self._generation.get(collection_id, 0)
+        # Read the token before loading: a write landing mid-load changes
+        # it again and is picked up by the next check.
+        if version is not None and token is None:
+            token = version()
+        entry = loader()
+
+        with self._lock:
+            if self._generation.get(collection_id, 0) == generation:
+                self._entries[collection_id] = entry
+                self._entries.move_to_end(collection_id)
+                if version is not None:
+                    self._versions[collection_id] = (token, time.monotonic())
+                while len(self._entries) > self._max:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._versions.pop(evicted, None)
+        return entry
+
+    def _revalidate(self) -> float:
+        if self._revalidate_s is not None:
+            return self._revalidate_s
+        return settings.rag_index_revalidate_s
+
+    def peek(self, collection_id: str) -> T | None:
+        """Cached entry without loading or touching LRU order."""
+        with self._lock:
+            return self._entries.get(collection_id)
+
+    def invalidate(self, collection_id: str | None = None) -> None:
+        """Drop one collection, or everything when ``collection_id`` is None."""
+        with self._lock:
+            if collection_id is None:
+                for key in list(self._entries):
+                    self._generation[key] = self._generation.get(key, 0) + 1
+                self._entries.clear()
+                self._versions.clear()
+                return
+            self._generation[collection_id] = self._generation.get(collection_id, 0) + 1
+            self._entries.pop(collection_id, None)
+            self._versions.pop(collection_id, None)
+
+    def __contains__(self, collection_id: str) -> bool:
+        with self._lock:
+            return collection_id in self._entries
+
+
+_MATRIX_CACHE: CollectionCache[EmbeddingMatrix] = CollectionCache()
+
+
+def get_matrix_cache() -> CollectionCache[EmbeddingMatrix]:
+    return _MATRIX_CACHE
+
+
+def invalidate_collection(collection_id: str | None) -> None:
+    if collection_id:
+        _MATRIX_CACHE.invalidate(collection_id)
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Sequence
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from uuid import uuid4
 
-from sqlalchemy import select
+from sqlalchemy import insert, select, update
 from sqlalchemy.orm import Session
 
 from ainern2d_shared.ainer_db_models.enum_models import (
@@ -16,6 +17,7 @@ from ainern2d_shared.ainer_db_models.pipeline_models import (
     JobDependency,
     RenderRun,
 )
+from ainern2d_shared.db.dag_progress import TERMINAL_JOB_STATUSES, add_dag_jobs, track_dag_progress
 from ainern2d_shared.telemetry.logging import get_logger
 
 logger = get_logger("orchestrator.dag_engine")
@@ -49,6 +51,12 @@ _JOB_STAGE: Dict[JobType, RenderStage] = {
     JobType.compose_final:            RenderStage.compose,
 }
 
+# Job types fanned out once per shot when a shot plan lists ``shots``.
+_SHOT_FANOUT_TEMPLATE = frozenset({
+    JobType.render_video.value,
+    JobType.render_lipsync.value,
+})
+
 # Full pipeline sequence (each inner list = parallel batch; outer list = ordered stages).
 _DEFAULT_SEQUENCE: List[List[JobType]] = [
     # Stage 1: story ingestion
@@ -83,11 +91,61 @@ _DEFAULT_SEQUENCE: List[List[JobType]] = [
 ]
 
 
+class DagReadiness:
+    """In-degree counters and rollups of one run's DAG, computed from its rows.
+
+    Each job carries the number of upstream jobs that have not yet
+    succeeded.  :meth:`DagEngine.rebuild` uses it to reseed the persisted
+    counters (``Job.pending_upstream`` and the ``RenderRun.dag_jobs*``
+    rollups) that :mod:`ainern2d_shared.db.dag_progress` keeps current.
+    """
+
+    def __init__(
+        self,
+        statuses: Dict[str, JobStatus],
+        edges: Iterable[Tuple[str, str]],
+    ):
+        self.status: Dict[str, JobStatus] = dict(statuses)
+        self.pending_upstream: Dict[str, int] = {jid: 0 for jid in self.status}
+        for job_id, upstream_id in edges:
+            # Edges pointing outside the run are ignored, as in resolve_next.
+            if job_id not in self.status or upstream_id not in self.status:
+                continue
+            if self.status[upstream_id] != JobStatus.success:
+                self.pending_upstream[job_id] += 1
+
+        self.terminal_count = sum(
+            1 for st in self.status.values() if st in TERMINAL_JOB_STATUSES
+        )
+        self.success_count = sum(
+            1 for st in self.status.values() if st == JobStatus.success
+        )
+        self.ready: Set[str] = {
+            jid for jid, st in self.status.items()
+            if st == JobStatus.queued and self.pending_upstream[jid] == 0
+        }
+
+    def is_complete(self) -> bool:
+        return bool(self.status) and self.terminal_count == len(self.status)
+
+    def all_succeeded(self) -> bool:
+        return bool(self.status) and self.success_count == len(self.status)
+
+
 class DagEngine:
-    """Builds and resolves a Job dependency DAG for a RenderRun."""
+    """Builds and resolves a Job dependency DAG for a RenderRun.
+
+    Readiness lives on the rows: ``build_dag`` seeds each job's
+    ``pending_upstream`` and the run's rollups, and the engine's session
+    keeps them current through :func:`track_dag_progress`, so a status
+    change only touches the downstream edges of the job that changed and
+    any replica reads readiness without rescanning the run.  Runs built
+    before the counters existed are seeded by :meth:`rebuild` on first use.
+    """
 
     def __init__(self, db: Session):
         self.db = db
+        track_dag_progress(db)
 
     # ------------------------------------------------------------------
     # Build DAG
@@ -103,113 +161,136 @@ class DagEngine:
         ``shot_plan`` may contain an optional ``"steps"`` key that overrides
         the default sequence.  Each entry is a dict with ``"job_type"`` and
         optional ``"depends_on"`` (list of job-type names).
+
+        When ``shot_plan["shots"]`` is given (shot ids or ``{"shot_id",
+        "payload"}`` dicts), every step flagged ``"per_shot": True`` or whose
+        job type is listed in ``shot_plan["shot_template"]`` (default:
+        video + lipsync render) is fanned out once per shot.  Per-shot steps
+        depend on the same shot's upstream jobs; run-level steps that depend
+        on a per-shot job type fan in over all shots.
+
+        Ids are precomputed and all rows go out as two executemany inserts
+        followed by a single flush, so build time stays flat as the chapter
+        grows.
         """
         run: Optional[RenderRun] = self.db.get(RenderRun, run_id)
         if run is None:
             raise LookupError(f"RenderRun id={run_id} not found")
 
-        steps = shot_plan.get("steps") or self._default_steps()
-        created_jobs: Dict[str, Job] = {}
-        previous_ids: List[str] = []
-
-        for step in steps:
-            jt = JobType(step["job_type"])
-            job_id = f"job_{uuid4().hex[:12]}"
-            job = Job(
-                id=job_id,
-                tenant_id=run.tenant_id,
-                project_id=run.project_id,
-                run_id=run_id,
-                chapter_id=run.chapter_id,
-                shot_id=shot_plan.get("shot_id"),
-                job_type=jt,
-                stage=_JOB_STAGE.get(jt, RenderStage.execute),
-                status=JobStatus.queued,
-                priority=step.get("priority", 0),
-                payload_json=step.get("payload", {}),
-                idempotency_key=f"{run_id}_{jt.value}_{uuid4().hex[:8]}",
+        job_rows, edges = self._plan_jobs(run_id, shot_plan)
+        scope = {"tenant_id": run.tenant_id, "project_id": run.project_id}
+        upstream_counts = Counter(job_id for job_id, _ in edges)
+        for row in job_rows:
+            row.update(
+                scope, run_id=run_id, chapter_id=run.chapter_id,
+                pending_upstream=upstream_counts[row["id"]],
             )
-            self.db.add(job)
-            self.db.flush()
-            created_jobs[jt.value] = job
-
-            # Resolve explicit deps or fall back to previous layer.
-            dep_names: List[str] = step.get("depends_on") or []
-            dep_ids = [created_jobs[d].id for d in dep_names if d in created_jobs]
-            if not dep_ids and previous_ids:
-                dep_ids = list(previous_ids)
-
-            for dep_id in dep_ids:
-                dep = JobDependency(
-                    id=f"jdep_{uuid4().hex[:12]}",
-                    tenant_id=run.tenant_id,
-                    project_id=run.project_id,
-                    job_id=job_id,
-                    depends_on_job_id=dep_id,
-                )
-                self.db.add(dep)
-
-            previous_ids = [job_id]
+        dep_rows = [
+            {
+                "id": f"jdep_{uuid4().hex[:12]}",
+                **scope,
+                "job_id": job_id,
+                "depends_on_job_id": dep_id,
+            }
+            for job_id, dep_id in edges
+        ]
 
+        jobs: List[Job] = []
+        if job_rows:
+            jobs = list(self.db.scalars(insert(Job).returning(Job), job_rows).all())
+        if dep_rows:
+            self.db.execute(insert(JobDependency), dep_rows)
+        add_dag_jobs(self.db, run_id, len(jobs))
         self.db.flush()
-        logger.info("dag_built | run_id={} jobs={}", run_id, len(created_jobs))
-        return list(created_jobs.values())
+
+        logger.info(
+            "dag_built | run_id={} jobs={} edges={}", run_id, len(jobs), len(edges),
+        )
+        return jobs
 
     # ------------------------------------------------------------------
     # Resolve next executable jobs
     # ------------------------------------------------------------------
 
     def resolve_next(self, run_id: str) -> List[Job]:
-        """Return queued jobs whose dependencies are all succeeded."""
-        all_jobs: Sequence[Job] = (
-            self.db.execute(
-                select(Job).filter_by(run_id=run_id)
-            ).scalars().all()
-        )
-        job_map = {j.id: j for j in all_jobs}
-
-        deps: Sequence[JobDependency] = (
-            self.db.execute(
-                select(JobDependency).where(
-                    JobDependency.job_id.in_([j.id for j in all_jobs])
-                )
-            ).scalars().all()
-        )
-        dep_map: Dict[str, List[str]] = {}
-        for d in deps:
-            dep_map.setdefault(d.job_id, []).append(d.depends_on_job_id)
-
-        ready: List[Job] = []
-        for job in all_jobs:
-            if job.status != JobStatus.queued:
-                continue
-            upstream_ids = dep_map.get(job.id, [])
-            if all(
-                job_map[uid].status == JobStatus.success
-                for uid in upstream_ids
-                if uid in job_map
-            ):
-                ready.append(job)
+        """Return queued jobs whose dependencies are all succeeded.
 
+        One indexed query for the run's queued jobs with no pending
+        upstream; the rest of the run is not loaded.
+        """
+        self._rollups(run_id)  # seeds runs built before the counters existed
+        ready = self._ready_jobs(run_id)
         logger.info("resolve_next | run_id={} ready={}", run_id, len(ready))
         return ready
 
+    def resolve_next_full(self, run_id: str) -> List[Job]:
+        """Slow path: rescan every job/dependency row and rebuild the counters."""
+        self.rebuild(run_id)
+        ready = self._ready_jobs(run_id)
+        logger.info("resolve_next_full | run_id={} ready={}", run_id, len(ready))
+        return ready
+
+    def rebuild(self, run_id: str) -> DagReadiness:
+        """Reload every job and dependency of the run and reseed its counters.
+
+        Every job of the run becomes part of its DAG.
+        """
+        rows = self.db.execute(
+            select(Job.id, Job.status).filter_by(run_id=run_id)
+        ).all()
+        statuses = {row[0]: row[1] for row in rows}
+        edges = self.db.execute(
+            select(JobDependency.job_id, JobDependency.depends_on_job_id).where(
+                JobDependency.job_id.in_(list(statuses))
+            )
+        ).all() if statuses else []
+        state = DagReadiness(statuses, [(e[0], e[1]) for e in edges])
+        if statuses:
+            self.db.execute(
+                update(Job).execution_options(synchronize_session=False),
+                [{"id": jid, "pending_upstream": n} for jid, n in state.pending_upstream.items()],
+            )
+        self.db.execute(
+            update(RenderRun)
+            .where(RenderRun.id == run_id)
+            .values(
+                dag_jobs=len(statuses),
+                dag_jobs_terminal=state.terminal_count,
+                dag_jobs_succeeded=state.success_count,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        logger.info(
+            "readiness_rebuilt | run_id={} jobs={} edges={}",
+            run_id, len(statuses), len(edges),
+        )
+        return state
+
     # ------------------------------------------------------------------
     # Completion check
     # ------------------------------------------------------------------
 
     def is_complete(self, run_id: str) -> bool:
-        """True when every job in the run has a terminal status."""
+        """True when every job in the run's DAG has a terminal status."""
+        total, terminal, _ = self._rollups(run_id)
+        return total > 0 and terminal == total
+
+    def all_succeeded(self, run_id: str) -> bool:
+        """True when every job in the run's DAG has succeeded."""
+        total, _, succeeded = self._rollups(run_id)
+        return total > 0 and succeeded == total
+
+    def is_complete_full(self, run_id: str) -> bool:
+        """Slow path: scan every job row of the run."""
         jobs: Sequence[Job] = (
             self.db.execute(select(Job).filter_by(run_id=run_id)).scalars().all()
         )
         if not jobs:
             return False
-        terminal = {JobStatus.success, JobStatus.failed, JobStatus.canceled}
-        return all(j.status in terminal for j in jobs)
+        return all(j.status in TERMINAL_JOB_STATUSES for j in jobs)
 
-    def all_succeeded(self, run_id: str) -> bool:
-        """True when every job in the run has succeeded."""
+    def all_succeeded_full(self, run_id: str) -> bool:
+        """Slow path: scan every job row of the run."""
         jobs: Sequence[Job] = (
             self.db.execute(select(Job).filter_by(run_id=run_id)).scalars().all()
         )
@@ -221,6 +302,108 @@ class DagEngine:
     # Internal helpers
     # ------------------------------------------------------------------
 
+    @staticmethod
+    def _plan_jobs(
+        run_id: str,
+        shot_plan: Dict[str, Any],
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+        """Expand a shot plan into Job row dicts and ``(job_id, upstream_id)`` edges."""
+        steps = shot_plan.get("steps") or DagEngine._default_steps()
+        shots = [
+            s if isinstance(s, dict) else {"shot_id": s}
+            for s in shot_plan.get("shots") or []
+        ]
+        template = set(shot_plan.get("shot_template") or _SHOT_FANOUT_TEMPLATE)
+
+        rows: List[Dict[str, Any]] = []
+        edges: List[Tuple[str, str]] = []
+        # job-type name -> {shot_id (None for run-level): job_id}
+        created: Dict[str, Dict[Optional[str], str]] = {}
+        previous: Dict[Optional[str], str] = {}
+
+        for step in steps:
+            jt = JobType(step["job_type"])
+            fan_out = bool(shots) and (step.get("per_shot") or jt.value in template)
+            instances: List[Tuple[Optional[str], Dict[str, Any]]] = (
+                [(s["shot_id"], s.get("payload") or {}) for s in shots]
+                if fan_out
+                else [(shot_plan.get("shot_id"), {})]
+            )
+            dep_names: List[str] = step.get("depends_on") or []
+            this_step: Dict[Optional[str], str] = {}
+
+            for shot_id, shot_payload in instances:
+                job_id = f"job_{uuid4().hex[:12]}"
+                key = shot_id if fan_out else None
+                rows.append({
+                    "id": job_id,
+                    "shot_id": shot_id,
+                    "job_type": jt,
+                    "stage": _JOB_STAGE.get(jt, RenderStage.execute),
+                    "status": JobStatus.queued,
+                    "priority": step.get("priority", 0),
+                    "payload_json": {**step.get("payload", {}), **shot_payload},
+                    "idempotency_key": (
+                        f"{run_id}_{jt.value}_{shot_id}_{uuid4().hex[:8]}"
+                        if fan_out else f"{run_id}_{jt.value}_{uuid4().hex[:8]}"
+                    ),
+                })
+                this_step[key] = job_id
+
+                # Resolve explicit deps or fall back to previous layer.
+                dep_ids: List[str] = []
+                for name in dep_names:
+                    dep_ids.extend(DagEngine._match_upstream(created.get(name, {}), key))
+                if not dep_ids and previous:
+                    dep_ids = DagEngine._match_upstream(previous, key)
+                edges.extend((job_id, dep_id) for dep_id in dep_ids)
+
+            for key, job_id in this_step.items():
+                created.setdefault(jt.value, {})[key] = job_id
+            previous = this_step
+
+        return rows, edges
+
+    @staticmethod
+    def _match_upstream(
+        upstream: Dict[Optional[str], str],
+        key: Optional[str],
+    ) -> List[str]:
+        """Pick the upstream job ids a job with shot ``key`` should wait on.
+
+        Per-shot jobs wait on the same shot's job (or the run-level one);
+        run-level jobs fan in over every instance.
+        """
+        if key is not None:
+            if key in upstream:
+                return [upstream[key]]
+            return [upstream[None]] if None in upstream else []
+        return list(upstream.values())
+
+    def _rollups(self, run_id: str) -> Tuple[int, int, int]:
+        """``(dag_jobs, terminal, succeeded)`` of the run, seeding it when untracked."""
+        row = self.db.execute(
+            select(RenderRun.dag_jobs, RenderRun.dag_jobs_terminal, RenderRun.dag_jobs_succeeded)
+            .where(RenderRun.id == run_id)
+        ).first()
+        if row is None:
+            return 0, 0, 0
+        if row[0] == 0:
+            state = self.rebuild(run_id)
+            return len(state.status), state.terminal_count, state.success_count
+        return row[0], row[1], row[2]
+
+    def _ready_jobs(self, run_id: str) -> List[Job]:
+        return list(self.db.execute(
+            select(Job)
+            .where(
+                Job.run_id == run_id,
+                Job.status == JobStatus.queued,
+                Job.pending_upstream == 0,
+            )
+            .order_by(Job.id)
+        ).scalars().all())
+
     @staticmethod
     def _default_steps() -> List[Dict[str, Any]]:
         """Build steps list with explicit depends_on for each parallel batch."""
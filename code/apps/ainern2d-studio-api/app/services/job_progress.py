@@ -0,0 +1,207 @@
+"""Fan-out of ``job.progress`` events to SSE subscribers.
+
+JOB_STATUS has competing consumers, so the replica that receives an event
+relays it to ``SYSTEM_TOPICS.JOB_PROGRESS_EXCHANGE``; every replica
+subscribes to that exchange with its own exclusive queue and feeds its
+in-process :class:`JobProgressHub`, wherever the client's stream is open.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from ainern2d_shared.config.setting import settings
+from ainern2d_shared.queue.rabbitmq import get_publisher
+from ainern2d_shared.queue.topics import SYSTEM_TOPICS
+from ainern2d_shared.telemetry.logging import get_logger
+
+_logger = get_logger("studio-api")
+
+
+def sse_event(event: str, data: Any, event_id: int | str | None = None) -> str:
+    """Format one server-sent event frame."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False, default=str)
+    lines.extend(f"data: {line}" for line in payload.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+
+def streams_progress(worker_type: str | None) -> bool:
+    """Whether jobs for *worker_type* should ask the worker for token streaming.
+
+    Every ``worker-llm*`` provider honours ``"stream": true`` by publishing
+    coalesced ``job.progress`` deltas, which ``GET /jobs/{id}/stream`` relays.
+    """
+    return bool(worker_type) and str(worker_type).startswith("worker-llm")
+
+
+@dataclass
+class _JobStream:
+    events: deque = field(default_factory=lambda: deque(maxlen=512))
+    next_seq: int = 1
+    finished: bool = False
+    touched: float = field(default_factory=time.monotonic)
+
+
+class JobProgressHub:
+    """Keeps the recent progress events of each job and wakes waiting streams.
+
+    The JOB_STATUS consumer calls :meth:`publish` for ``job.progress`` and
+    :meth:`finish` for the terminal ``job.succeeded`` / ``job.failed``.
+    Subscribers poll :meth:`wait` (or :meth:`wait_async` from an event loop)
+    with the last sequence number they saw, so a reconnecting client
+    (``Last-Event-ID``) resumes without gaps while the events are still
+    buffered. Idle jobs are dropped after ``ttl_sec``.
+    """
+
+    def __init__(self, max_jobs: int = 2048, ttl_sec: float = 900.0) -> None:
+        self._jobs: OrderedDict[str, _JobStream] = OrderedDict()
+        self._cond = threading.Condition()
+        self._waiters: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._max_jobs = max_jobs
+        self._ttl = ttl_sec
+
+    def publish(self, job_id: str, event_type: str, payload: dict) -> None:
+        self._append(job_id, event_type, payload, finished=False)
+
+    def finish(self, job_id: str, event_type: str, payload: dict) -> None:
+        self._append(job_id, event_type, payload, finished=True)
+
+    def wait(self, job_id: str, after_seq: int = 0, timeout: float = 15.0) -> tuple[list[tuple[int, str, dict]], bool]:
+        """Events newer than *after_seq* (blocking up to *timeout*) and whether the job finished."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                ready = self._pending(job_id, after_seq)
+                if ready is not None:
+                    return ready
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return [], False
+                self._cond.wait(remaining)
+
+    async def wait_async(
+        self, job_id: str, after_seq: int = 0, timeout: float = 15.0,
+    ) -> tuple[list[tuple[int, str, dict]], bool]:
+        """:meth:`wait` for SSE handlers running on the event loop.
+
+        The caller parks on an :class:`asyncio.Event` that :meth:`publish`
+        sets through ``call_soon_threadsafe``, so an open stream holds no
+        threadpool thread between events.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = (loop, asyncio.Event())
+        deadline = loop.time() + timeout
+        with self._cond:
+            self._waiters.setdefault(job_id, set()).add(waiter)
+        try:
+            while True:
+                waiter[1].clear()
+                with self._cond:
+                    ready = self._pending(job_id, after_seq)
+                if ready is not None:
+                    return ready
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return [], False
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._cond:
+                waiters = self._waiters.get(job_id)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[job_id]
+
+    def _pending(self, job_id: str, after_seq: int) -> tuple[list[tuple[int, str, dict]], bool] | None:
+        stream = self._jobs.get(job_id)
+        if stream is None:
+            return None
+        events = [e for e in stream.events if e[0] > after_seq]
+        if events or stream.finished:
+            return events, stream.finished
+        return None
+
+    def _append(self, job_id: str, event_type: str, payload: dict, finished: bool) -> None:
+        with self._cond:
+            stream = self._stream(job_id)
+            stream.events.append((stream.next_seq, event_type, payload))
+            stream.next_seq += 1
+            stream.finished = stream.finished or finished
+            self._cond.notify_all()
+            waiters = list(self._waiters.get(job_id, ()))
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # the subscriber's loop is already closed
+                pass
+
+    def _stream(self, job_id: str) -> _JobStream:
+        stream = self._jobs.get(job_id)
+        now = time.monotonic()
+        if stream is None:
+            stream = self._jobs[job_id] = _JobStream()
+        stream.touched = now
+        self._jobs.move_to_end(job_id)
+        while self._jobs and (
+            len(self._jobs) > self._max_jobs
+            or now - next(iter(self._jobs.values())).touched > self._ttl
+        ):
+            self._jobs.popitem(last=False)
+        return stream
+
+
+_hub = JobProgressHub()
+
+
+def get_job_progress_hub() -> JobProgressHub:
+    return _hub
+
+
+_broadcast = threading.Event()
+
+
+def enable_broadcast() -> None:
+    """Relay job events through the exchange; called once this replica subscribes to it."""
+    _broadcast.set()
+
+
+def relay_job_event(job_id: str, event_type: str, payload: dict) -> None:
+    """Hand a ``job.progress`` or terminal job event to the streams of every replica.
+
+    Without the broadcast subscription (consumers disabled) or when the
+    publish fails, only this process's hub gets it.
+    """
+    message = {"job_id": job_id, "event_type": event_type, "payload": payload}
+    if _broadcast.is_set():
+        try:
+            get_publisher(settings.rabbitmq_url).publish(
+                event_type, message, exchange=SYSTEM_TOPICS.JOB_PROGRESS_EXCHANGE,
+            )
+            return
+        except Exception as exc:
+            _logger.warning("job event relay failed job={} reason={}", job_id, str(exc))
+    deliver_job_event(message)
+
+
+def deliver_job_event(message: dict) -> None:
+    """Broadcast consumer: feed one relayed job event to this replica's hub."""
+    job_id, event_type = message.get("job_id"), message.get("event_type")
+    if not job_id or not event_type:
+        return
+    if event_type == "job.progress":
+        _hub.publish(job_id, event_type, message.get("payload") or {})
+    else:
+        _hub.finish(job_id, event_type, message.get("payload") or {})
@@ -0,0 +1,308 @@
+"""Micro-batching of small chat-completion calls that share a system prompt.
+
+Studio endpoints issue many short, independent LLM calls (one entity name,
+one culture pack, one translation chunk). Calls that arrive within a short
+window for the same provider, model and system prompt are packed into a
+single request whose user message lists every item with an id; the reply
+is a JSON object keyed by those ids and is fanned back out to the callers.
+
+A caller that finds no other call in flight for its key sends at once;
+the batching window only opens while the key is busy, so an idle studio
+pays no added latency. A caller holding several independent requests
+(the chunks of one translation run) hands them over together with
+:meth:`LLMCallCoalescer.call_many`, which packs them without waiting.
+
+Each item's answer goes through the caller's validator. Items missing from
+the batched reply, failing validation, or caught in a failed batch request
+are retried individually by their own caller thread, so a bad batch costs
+one extra round trip rather than wrong results.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from ainern2d_shared.telemetry.logging import get_logger
+
+logger = get_logger(__name__)
+
+Validator = Callable[[str], Any]
+ChatCall = Callable[..., str]
+
+_BATCH_INSTRUCTION = (
+    "\n\n【批量模式】用户消息是一个 JSON 数组，每个元素 {\"id\": ..., \"request\": ...} 是一个相互独立的请求。"
+    "请按上面的要求分别处理每个 request，就像它是单独发送的一样。"
+    "只输出一个 JSON 对象，键为 id，值为该请求的完整回复（字符串），"
+    "例如 {\"r0\": \"...\", \"r1\": \"...\"}，不要 Markdown 代码块。"
+)
+
+
+@dataclass
+class _Item:
+    user_content: str
+    max_tokens: int
+    validate: Validator | None
+    future: Future = field(default_factory=Future)
+
+
+@dataclass
+class _Bucket:
+    provider: Any
+    provider_settings: dict
+    system_prompt: str
+    items: list[_Item] = field(default_factory=list)
+    tokens: int = 0
+    sealed: threading.Event = field(default_factory=threading.Event)
+
+
+def _batch_key(provider: Any, provider_settings: dict, system_prompt: str) -> tuple:
+    model_catalog = list(provider_settings.get("model_catalog") or [])
+    return (
+        getattr(provider, "id", None),
+        (getattr(provider, "endpoint", None) or "").rstrip("/"),
+        str(provider_settings.get("access_token") or ""),
+        model_catalog[0] if model_catalog else "",
+        system_prompt,
+    )
+
+
+def parse_batch_reply(raw: str) -> dict[str, str]:
+    """``{"r0": "...", ...}`` from a batched reply; non-string values are re-serialised."""
+    cleaned = re.sub(r"^```(?:json)?\s*", "", raw.strip(), flags=re.MULTILINE)
+    cleaned = re.sub(r"\s*```$", "", cleaned.strip(), flags=re.MULTILINE)
+    m = re.search(r"\{[\s\S]*\}", cleaned)
+    if not m:
+        raise ValueError("No JSON object in batched LLM output")
+    parsed = json.loads(m.group())
+    if not isinstance(parsed, dict):
+        raise ValueError("batched LLM output is not a JSON object")
+    return {
+        str(k): v if isinstance(v, str) else json.dumps(v, ensure_ascii=False)
+        for k, v in parsed.items()
+        if v is not None
+    }
+
+
+class LLMCallCoalescer:
+    """Thread-safe leader/follower batcher in front of a chat-completion call.
+
+    A caller with no other call in flight for its key goes straight to
+    *call*. Otherwise the first caller for a key becomes the leader: it
+    waits up to ``window_ms`` (or until the bucket holds ``max_items`` /
+    ``max_tokens`` worth of requests), sends the batch and resolves every
+    follower. Only ``[system, user]`` message pairs are batched; anything
+    else, a lone item, or an item whose ``max_tokens`` alone exceeds the
+    budget goes straight to *call*.
+    """
+
+    def __init__(
+        self,
+        call: ChatCall,
+        window_ms: int = 25,
+        max_items: int = 8,
+        max_tokens: int = 4096,
+    ) -> None:
+        self._call = call
+        self._window = window_ms / 1000.0
+        self._max_items = max_items
+        self._max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._buckets: dict[tuple, _Bucket] = {}
+        self._inflight: dict[tuple, int] = {}
+        self.stats = {"batches": 0, "batched_items": 0, "fallbacks": 0, "direct": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self._window > 0 and self._max_items > 1
+
+    def call(
+        self,
+        *,
+        provider: Any,
+        provider_settings: dict,
+        messages: list[dict],
+        max_tokens: int = 2000,
+        validate: Validator | None = None,
+    ) -> str:
+        """Same contract as the wrapped call; *validate* raises on an unusable answer."""
+
+        def direct() -> str:
+            return self._call(
+                provider=provider, provider_settings=provider_settings,
+                messages=messages, max_tokens=max_tokens,
+            )
+
+        if not self._batchable(messages, max_tokens):
+            self._count("direct")
+            return direct()
+
+        system_prompt = str(messages[0].get("content") or "")
+        key = _batch_key(provider, provider_settings, system_prompt)
+        item = _Item(str(messages[1].get("content") or ""), max_tokens, validate)
+        with self._lock:
+            busy = self._inflight.get(key, 0) > 0 or key in self._buckets
+            self._inflight[key] = self._inflight.get(key, 0) + 1
+        try:
+            if not busy:
+                self._count("direct")
+                return direct()
+            return self._join(key, item, provider, provider_settings, system_prompt, direct)
+        finally:
+            with self._lock:
+                self._inflight[key] -= 1
+                if not self._inflight[key]:
+                    del self._inflight[key]
+
+    def call_many(
+        self,
+        *,
+        provider: Any,
+        provider_settings: dict,
+        messages_list: list[list[dict]],
+        max_tokens: int = 2000,
+        validate: Validator | None = None,
+    ) -> list[str]:
+        """Answers for several independent requests of one caller, in order.
+
+        The requests are packed into as few batches as ``max_items`` and
+        ``max_tokens`` allow and sent without waiting for other callers;
+        requests that cannot be batched, or whose batched answer is
+        unusable, are sent on their own.
+        """
+        answers: list[str | None] = [None] * len(messages_list)
+        groups: dict[tuple, list[_Bucket]] = {}
+        placed: list[tuple[int, _Item]] = []
+        for index, messages in enumerate(messages_list):
+            if not self._batchable(messages, max_tokens):
+                continue
+            system_prompt = str(messages[0].get("content") or "")
+            open_buckets = groups.setdefault(_batch_key(provider, provider_settings, system_prompt), [])
+            if (
+                not open_buckets
+                or len(open_buckets[-1].items) >= self._max_items
+                or open_buckets[-1].tokens + max_tokens > self._max_tokens
+            ):
+                open_buckets.append(_Bucket(provider, provider_settings, system_prompt))
+            item = _Item(str(messages[1].get("content") or ""), max_tokens, validate)
+            open_buckets[-1].items.append(item)
+            open_buckets[-1].tokens += max_tokens
+            placed.append((index, item))
+
+        batches = [bucket for buckets in groups.values() for bucket in buckets]
+        if len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(batches), self._max_items)) as pool:
+                list(pool.map(self._run, batches))
+        elif batches:
+            self._run(batches[0])
+        for index, item in placed:
+            answers[index] = item.future.result()
+
+        results: list[str] = []
+        for messages, answer in zip(messages_list, answers):
+            if answer is None:
+                answer = self._call(
+                    provider=provider, provider_settings=provider_settings,
+                    messages=messages, max_tokens=max_tokens,
+                )
+            results.append(answer)
+        return results
+
+    def _batchable(self, messages: list[dict], max_tokens: int) -> bool:
+        return (
+            self.enabled
+            and max_tokens <= self._max_tokens
+            and len(messages) == 2
+            and messages[0].get("role") == "system"
+            and messages[1].get("role") == "user"
+        )
+
+    def _join(
+        self,
+        key: tuple,
+        item: _Item,
+        provider: Any,
+        provider_settings: dict,
+        system_prompt: str,
+        direct: Callable[[], str],
+    ) -> str:
+        max_tokens = item.max_tokens
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None and bucket.tokens + max_tokens > self._max_tokens:
+                self._seal(key, bucket)
+                bucket = None
+            leader = bucket is None
+            if leader:
+                bucket = self._buckets[key] = _Bucket(provider, provider_settings, system_prompt)
+            bucket.items.append(item)
+            bucket.tokens += max_tokens
+            if len(bucket.items) >= self._max_items:
+                self._seal(key, bucket)
+
+        if leader:
+            bucket.sealed.wait(self._window)
+            with self._lock:
+                if self._buckets.get(key) is bucket:
+                    del self._buckets[key]
+            self._run(bucket)
+
+        answer = item.future.result()
+        if answer is None:
+            return direct()
+        return answer
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def _seal(self, key: tuple, bucket: _Bucket) -> None:
+        if self._buckets.get(key) is bucket:
+            del self._buckets[key]
+        bucket.sealed.set()
+
+    def _run(self, bucket: _Bucket) -> None:
+        items = bucket.items
+        if len(items) == 1:
+            self._count("direct")
+            items[0].future.set_result(None)
+            return
+
+        ids = [f"r{i}" for i in range(len(items))]
+        user_content = json.dumps(
+            [{"id": item_id, "request": item.user_content} for item_id, item in zip(ids, items)],
+            ensure_ascii=False,
+        )
+        try:
+            raw = self._call(
+                provider=bucket.provider,
+                provider_settings=bucket.provider_settings,
+                messages=[
+                    {"role": "system", "content": bucket.system_prompt + _BATCH_INSTRUCTION},
+                    {"role": "user", "content": user_content},
+                ],
+                max_tokens=bucket.tokens,
+            )
+            answers = parse_batch_reply(raw)
+        except Exception as exc:
+            logger.warning("batched LLM call failed items=%d err=%s; retrying individually", len(items), exc)
+            answers = {}
+
+        self._count("batches")
+        for item_id, item in zip(ids, items):
+            answer = answers.get(item_id)
+            if answer is not None and item.validate is not None:
+                try:
+                    item.validate(answer)
+                except Exception as exc:
+                    logger.info("batched LLM item %s failed validation: %s", item_id, exc)
+                    answer = None
+            if answer is None:
+                self._count("fallbacks")
+            else:
+                self._count("batched_items")
+            item.future.set_result(answer)
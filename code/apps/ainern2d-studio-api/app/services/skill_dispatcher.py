@@ -25,6 +25,7 @@ from sqlalchemy.orm import Session
 
 from ainern2d_shared.ainer_db_models.enum_models import JobStatus, JobType
 from ainern2d_shared.ainer_db_models.pipeline_models import Job
+from ainern2d_shared.db.dag_progress import track_dag_progress
 from ainern2d_shared.services.base_skill import SkillContext
 
 from .skill_registry import SkillRegistry
@@ -69,6 +70,7 @@ class SkillDispatcher:
 
     def __init__(self, db: Session) -> None:
         self.db = db
+        track_dag_progress(db)
         self._registry = SkillRegistry(db)
 
     # ── Main entry ────────────────────────────────────────────────────────────
@@ -17,6 +17,7 @@ State machine:
 from __future__ import annotations
 
 import hashlib
+import importlib
 from typing import Any
 
 from loguru import logger
@@ -67,6 +68,8 @@ _ENTITY_TO_ASSET_TYPES: dict[str, list[str]] = {
 
 _QUALITY_TIER_RANK: dict[str, int] = {"preview": 1, "standard": 2, "high": 3}
 
+_COLLECTION_TOP_K = 5
+
 _USE_AS_MAP: dict[str, str] = {
     "character": "character_reference",
     "scene": "scene_anchor",
@@ -282,6 +285,9 @@ class AssetMatcherService(BaseSkillService[Skill08Input, Skill08Output]):
         self._record_state(ctx, MatchState.PRIORITIZING.value, MatchState.RETRIEVING_CANDIDATES.value)
 
         # ── [M3] Candidate Retrieval ─────────────────────────────────────────
+        collection_assets = self._retrieve_collection_assets(
+            sorted_entities, input_dto.asset_collection_ids,
+        )
         entity_candidates: list[tuple[dict[str, Any], list[CandidateAsset]]] = []
         for ent in sorted_entities:
             variant_info = variant_map.get(ent.get("entity_uid", ""), {})
@@ -298,6 +304,7 @@ class AssetMatcherService(BaseSkillService[Skill08Input, Skill08Output]):
                 ff=ff,
                 project_asset_pack=input_dto.project_asset_pack,
                 asset_library_index=input_dto.asset_library_index,
+                collection_assets=collection_assets.get(str(ent.get("entity_uid", "")), []),
             )
             entity_candidates.append((ent, candidates))
 
@@ -630,6 +637,7 @@ class AssetMatcherService(BaseSkillService[Skill08Input, Skill08Output]):
         ff: FeatureFlags,
         project_asset_pack: dict[str, Any],
         asset_library_index: dict[str, Any],
+        collection_assets: list[dict[str, Any]] | None = None,
     ) -> list[CandidateAsset]:
         """Generate candidates through the 6-level fallback cascade with hard filters."""
         uid = str(entity.get("entity_uid", ""))
@@ -716,6 +724,18 @@ class AssetMatcherService(BaseSkillService[Skill08Input, Skill08Output]):
                 )
                 _append_if_valid(cand, pack_id)
 
+        # Level 2: asset collections (hybrid keyword + vector retrieval); real
+        # assets found by similarity outrank the synthetic fallbacks below
+        if len(all_cands) < 2 and collection_assets:
+            for asset in collection_assets:
+                cand = self._asset_dict_to_candidate(
+                    asset,
+                    FallbackLevel.ERA_SIMILAR.value,
+                    primary_type,
+                    source="asset_collection",
+                )
+                _append_if_valid(cand, pack_id)
+
         # Level 2: variant_same_pack_parent (synthetic fallback)
         if len(all_cands) < 2 and specific:
             parent = ".".join(specific.split(".")[:-1]) if "." in specific else specific
@@ -767,6 +787,55 @@ class AssetMatcherService(BaseSkillService[Skill08Input, Skill08Output]):
 
         return all_cands
 
+    def _retrieve_collection_assets(
+        self,
+        entities: list[dict[str, Any]],
+        collection_ids: list[str],
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Retrieve asset documents per entity through the shared RAG pipeline.
+
+        Hits are kept only when their ``metadata_json`` carries an asset id.
+        All entities are retrieved in one batch: their candidate stages run
+        concurrently on their own sessions and share one hydrate query.
+        """
+        if not collection_ids or self.db is None:
+            return {}
+        # Package directory has a hyphen, so it cannot be imported with a from-import.
+        asset_knowledge = importlib.import_module("app.modules.asset-knowledge")
+        pipeline = asset_knowledge.RetrievalPipeline(
+            self.db, session_factory=asset_knowledge.parallel_session_factory(self.db),
+        )
+
+        queries: dict[str, str] = {}
+        for ent in entities:
+            uid = str(ent.get("entity_uid", ""))
+            terms = [
+                ent.get("display_name") or ent.get("name"),
+                ent.get("canonical_entity_specific"),
+                ent.get("canonical_entity_root"),
+                *(ent.get("visual_tags", []) or ent.get("tags", []) or []),
+            ]
+            query = " ".join(str(t) for t in terms if t)
+            if not uid or not query:
+                continue
+            queries[uid] = query
+        if not queries:
+            return {}
+        try:
+            results = pipeline.run_many(list(queries.values()), collection_ids, top_k=_COLLECTION_TOP_K)
+        except Exception as exc:
+            logger.warning(f"[{self.skill_id}] asset collection retrieval failed: {exc}")
+            return {}
+
+        found: dict[str, list[dict[str, Any]]] = {}
+        for uid, result in zip(queries, results):
+            logger.debug(f"[{self.skill_id}] asset retrieval {uid} timings={result.timings_ms}")
+            found[uid] = [
+                hit.metadata for hit in result.hits
+                if hit.metadata.get("asset_id") or hit.metadata.get("id")
+            ]
+        return found
+
     # ── Candidate generators ──────────────────────────────────────────────────
 
     @staticmethod
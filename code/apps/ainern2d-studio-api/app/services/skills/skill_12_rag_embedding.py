@@ -9,6 +9,7 @@ Pipeline stages: chunk → enrich → embed → index → validate → report
 from __future__ import annotations
 
 import hashlib
+import importlib
 import math
 import re
 import uuid
@@ -45,6 +46,14 @@ from ainern2d_shared.schemas.skills.skill_12 import (
     VectorStoreConfig,
 )
 from ainern2d_shared.services.base_skill import BaseSkillService, SkillContext
+from ainern2d_shared.utils.bm25 import BM25Index, normalize_scores, tokenize
+from ainern2d_shared.utils.rank_fusion import (
+    FUSION_RRF,
+    StageTimer,
+    ranked,
+    reciprocal_rank_fusion,
+    weighted_score_fusion,
+)
 from ainern2d_shared.utils.time import utcnow
 
 # ── Constants ─────────────────────────────────────────────────────
@@ -96,6 +105,7 @@ class RagPipelineService(BaseSkillService[Skill12Input, Skill12Output]):
         super().__init__(db)
         self._vectors: dict[str, list[float]] = {}
         self._chunks: dict[str, Chunk] = {}
+        self._keyword_index = BM25Index()
         self._index_version: int = 0
 
     # ── public entry (overrides base) ─────────────────────────────
@@ -197,6 +207,7 @@ class RagPipelineService(BaseSkillService[Skill12Input, Skill12Output]):
                     "kb_version_id": inp.kb_version_id,
                     "embedded_chunks": embed_stats["embedded"],
                     "failed_chunks": embed_stats["failed"],
+                    "cached_chunks": embed_stats["cache_hits"],
                     "embedding_model": emb_cfg.model_name,
                     "embedding_dim": dim,
                 },
@@ -526,34 +537,39 @@ class RagPipelineService(BaseSkillService[Skill12Input, Skill12Output]):
         cfg: EmbeddingModelConfig,
         dim: int,
     ) -> dict[str, Any]:
+        # Package directory has a hyphen, so it cannot be imported with a from-import.
+        embedding = importlib.import_module("app.modules.asset-knowledge.embedding")
+        provider = embedding.HashEmbeddingProvider(
+            dim,
+            fn=lambda text: self._generate_embedding(text, dim),
+            model=f"skill12-pseudo/{cfg.model_name}/{dim}",
+        )
+        service = embedding.EmbeddingService(provider, batch_size=cfg.batch_size)
+        stats = embedding.EmbeddingStats()
+        vectors = service.embed_texts([chunk.chunk_text for chunk in chunks], stats=stats)
+
         embedded = 0
         failed = 0
-        batch_count = math.ceil(len(chunks) / max(cfg.batch_size, 1))
-
-        for batch_idx in range(batch_count):
-            start = batch_idx * cfg.batch_size
-            end = min(start + cfg.batch_size, len(chunks))
-            batch = chunks[start:end]
-
-            for chunk in batch:
-                vec = self._generate_embedding(chunk.chunk_text, dim)
-                if vec is not None:
-                    self._vectors[chunk.chunk_id] = vec
-                    self._chunks[chunk.chunk_id] = chunk
-                    embedded += 1
-                else:
-                    failed += 1
+        for chunk, vec in zip(chunks, vectors):
+            if vec is not None:
+                self._vectors[chunk.chunk_id] = vec
+                self._chunks[chunk.chunk_id] = chunk
+                self._keyword_index.add(chunk.chunk_id, chunk.chunk_text)
+                embedded += 1
+            else:
+                failed += 1
 
-            logger.debug(
-                f"[{self.skill_id}] embed batch {batch_idx + 1}/{batch_count} "
-                f"({len(batch)} chunks)"
-            )
+        logger.debug(
+            f"[{self.skill_id}] embedded {embedded}/{len(chunks)} chunks | "
+            f"batches={stats.batches} cache_hits={stats.cache_hits}"
+        )
 
         return {
             "embedded": embedded,
             "failed": failed,
             "total": len(chunks),
-            "batches": batch_count,
+            "batches": stats.batches,
+            "cache_hits": stats.cache_hits,
             "dim": dim,
         }
 
@@ -615,6 +631,7 @@ class RagPipelineService(BaseSkillService[Skill12Input, Skill12Output]):
         for rid in removed:
             self._vectors.pop(rid, None)
             self._chunks.pop(rid, None)
+            self._keyword_index.remove(rid)
 
         logger.info(
             f"[{self.skill_id}] incremental index | +{len(added)} -{len(removed)} "
@@ -780,52 +797,66 @@ class RagPipelineService(BaseSkillService[Skill12Input, Skill12Output]):
     # query → embed → search → rerank → filter → return
 
     def retrieve(self, query: RetrievalQuery) -> RetrievalResponse:
-        """Full retrieval pipeline with hybrid search support."""
-        t0 = utcnow()
+        """Full retrieval pipeline with hybrid search support.
+
+        Fusion is alpha-weighted over per-source min-max scores, or
+        reciprocal-rank when ``query.fusion == "rrf"``; per-stage timings are
+        reported in ``stage_timings_ms``.
+        """
+        timer = StageTimer()
 
         # Step 1: Embed query
         dim = len(next(iter(self._vectors.values()), []))
         if dim == 0:
             return RetrievalResponse(query_text=query.query_text)
-        q_vec = self._generate_embedding(query.query_text, dim)
+        with timer.stage("embed"):
+            q_vec = self._generate_embedding(query.query_text, dim)
         if q_vec is None:
             return RetrievalResponse(query_text=query.query_text)
 
         # Step 2: Filter-first (role / tags / locale / strength)
-        candidates = self._filter_candidates(query)
+        with timer.stage("filter"):
+            candidates = self._filter_candidates(query)
 
         # Step 3: Semantic similarity (pgvector cosine/L2 simulation)
-        scored: list[tuple[str, float]] = []
-        for cid in candidates:
-            vec = self._vectors.get(cid)
-            if vec is None:
-                continue
-            sem_score = self._cosine_similarity(q_vec, vec)
-            scored.append((cid, sem_score))
+        with timer.stage("vector"):
+            semantic_scores: dict[str, float] = {}
+            for cid in candidates:
+                vec = self._vectors.get(cid)
+                if vec is None:
+                    continue
+                semantic_scores[cid] = self._cosine_similarity(q_vec, vec)
 
-        # Step 4: BM25 keyword score (simplified TF simulation)
-        keyword_scores: dict[str, float] = {}
-        query_terms = set(query.query_text.lower().split())
-        for cid in candidates:
-            chunk = self._chunks.get(cid)
-            if not chunk:
-                continue
-            chunk_terms = set(chunk.chunk_text.lower().split())
-            overlap = len(query_terms & chunk_terms)
-            keyword_scores[cid] = overlap / max(len(query_terms), 1)
+        # Step 4: BM25 keyword score over the candidate set
+        with timer.stage("keyword"):
+            keyword_hits = self._keyword_index.search(
+                query.query_text, top_k=None, candidates=set(semantic_scores),
+            )
+            keyword_scores = normalize_scores(keyword_hits)
 
         # Step 5: Hybrid fusion
-        alpha = query.hybrid_alpha
-        fused: list[tuple[str, float, float, float]] = []
-        for cid, sem in scored:
-            kw = keyword_scores.get(cid, 0.0)
-            combined = alpha * sem + (1.0 - alpha) * kw
-            fused.append((cid, combined, sem, kw))
-        fused.sort(key=lambda x: x[1], reverse=True)
+        with timer.stage("fusion"):
+            if query.fusion == FUSION_RRF:
+                combined = reciprocal_rank_fusion({
+                    "vector": [cid for cid, _ in ranked(semantic_scores)],
+                    "keyword": [cid for cid, _ in keyword_hits],
+                })
+            else:
+                alpha = query.hybrid_alpha
+                combined = weighted_score_fusion(
+                    {"vector": semantic_scores, "keyword": keyword_scores},
+                    {"vector": alpha, "keyword": 1.0 - alpha},
+                )
+            fused: list[tuple[str, float, float, float]] = [
+                (cid, combined.get(cid, 0.0), sem, keyword_scores.get(cid, 0.0))
+                for cid, sem in semantic_scores.items()
+            ]
+            fused.sort(key=lambda x: x[1], reverse=True)
 
         # Step 6: Reranking (simulate cross-encoder boost)
         if query.enable_reranking:
-            fused = self._rerank(fused, query.query_text)
+            with timer.stage("rerank"):
+                fused = self._rerank(fused, query.query_text)
 
         # Step 7: Top-k
         top = fused[: query.top_k]
@@ -854,14 +885,15 @@ class RagPipelineService(BaseSkillService[Skill12Input, Skill12Output]):
         if hard and soft:
             conflict_candidates = soft[:2]
 
-        elapsed_ms = round((utcnow() - t0).total_seconds() * 1000, 2)
+        timings = timer.report()
 
         return RetrievalResponse(
             query_text=query.query_text,
             results=results,
             total_candidates=len(candidates),
             filtered_count=len(candidates) - len(results),
-            latency_ms=elapsed_ms,
+            latency_ms=round(timings["total"], 2),
+            stage_timings_ms=timings,
             conflict_candidates=conflict_candidates,
         )
 
@@ -889,13 +921,13 @@ class RagPipelineService(BaseSkillService[Skill12Input, Skill12Output]):
         query_text: str,
     ) -> list[tuple[str, float, float, float]]:
         """Simulate cross-encoder reranking with query-overlap boost."""
-        q_terms = set(query_text.lower().split())
+        q_terms = set(tokenize(query_text))
         reranked: list[tuple[str, float, float, float]] = []
         for cid, score, sem, kw in fused:
             chunk = self._chunks.get(cid)
             boost = 0.0
             if chunk:
-                c_terms = set(chunk.chunk_text.lower().split())
+                c_terms = set(tokenize(chunk.chunk_text))
                 overlap = len(q_terms & c_terms) / max(len(q_terms), 1)
                 boost = overlap * 0.1
             new_score = score + boost
@@ -65,6 +65,7 @@ from ainern2d_shared.schemas.skills.skill_16 import (
     Skill16Output,
 )
 from ainern2d_shared.services.base_skill import BaseSkillService, SkillContext
+from ainern2d_shared.services.media_probe import MediaProbe, get_media_probe_service
 from ainern2d_shared.utils.time import utcnow
 
 # ── Default dimension weights (equal by default) ───────────────
@@ -94,6 +95,13 @@ _DIM_FIX_TYPE: dict[str, str] = {
     "technical_quality": "re-render-shot",
 }
 
+# ── Technical probe tolerances ─────────────────────────────────
+_MEDIA_ARTIFACT_TYPES = {"video", "audio", "composed", ""}
+_DURATION_TOLERANCE_MS = 100
+_DURATION_TOLERANCE_RATIO = 0.1
+_LOUDNESS_RANGE_LUFS = (-24.0, -10.0)
+_MAX_TRUE_PEAK_DB = -1.0
+
 # ── Depth-based check counts ───────────────────────────────────
 _DEPTH_CHECK_COUNT: dict[str, int] = {
     "quick": 2,
@@ -138,9 +146,13 @@ class CriticEvaluationService(BaseSkillService[Skill16Input, Skill16Output]):
         depth = ff.evaluation_depth if ff.evaluation_depth in _DEPTH_CHECK_COUNT else "standard"
         threshold = self._resolve_threshold_100(ff, warnings)
 
+        probes: dict[str, MediaProbe] = {}
+        if ff.enable_media_probe and depth != "quick":
+            probes = self._probe_artifacts(input_dto, depth, warnings)
+
         # ── EVALUATING_SHOTS ───────────────────────────────────
         self._record_state(ctx, SM_LOADING_ARTIFACTS, SM_EVALUATING_SHOTS)
-        shot_evals = self._evaluate_shots(shot_plan, input_dto, depth, weights, threshold)
+        shot_evals = self._evaluate_shots(shot_plan, input_dto, depth, weights, threshold, probes)
 
         # ── EVALUATING_SCENES ──────────────────────────────────
         self._record_state(ctx, SM_EVALUATING_SHOTS, SM_EVALUATING_SCENES)
@@ -231,6 +243,47 @@ class CriticEvaluationService(BaseSkillService[Skill16Input, Skill16Output]):
             idempotency_key=ctx.idempotency_key,
         )
 
+    # ── [Phase 0] Artifact probing ─────────────────────────────
+
+    @staticmethod
+    def _probe_artifacts(
+        input_dto: Skill16Input, depth: str, warnings: list[str],
+    ) -> dict[str, MediaProbe]:
+        """Probe media artifacts in one batch (header only).
+
+        At ``standard`` depth only the composed output is probed when there
+        is one; ``deep`` also probes every shot artifact and decodes the
+        composed output for its loudness. Probe failures only add a
+        warning; the technical checks that need a probe are then skipped.
+        """
+        composed = input_dto.composed_artifact_uri
+        uris: list[str] = []
+        if depth == "deep" or not composed:
+            uris = list(dict.fromkeys(
+                ref.artifact_uri for ref in input_dto.artifact_refs
+                if ref.artifact_uri and ref.artifact_type in _MEDIA_ARTIFACT_TYPES
+            ))
+        if composed and composed not in uris:
+            uris.append(composed)
+        if not uris:
+            return {}
+
+        service = get_media_probe_service()
+        results = service.probe_many_sync(uris)
+        if composed and depth == "deep":
+            results[uris.index(composed)] = service.probe_many_sync([composed], analyze_audio=True)[0]
+
+        probes: dict[str, MediaProbe] = {}
+        failed: list[str] = []
+        for uri, result in zip(uris, results):
+            if isinstance(result, MediaProbe):
+                probes[uri] = result
+            else:
+                failed.append(f"{uri}: {result}")
+        if failed:
+            warnings.append(f"Media probe failed for {len(failed)} artifact(s); first: {failed[0]}")
+        return probes
+
     # ── [Phase 1] Shot-level evaluation ────────────────────────
 
     def _evaluate_shots(
@@ -240,6 +293,7 @@ class CriticEvaluationService(BaseSkillService[Skill16Input, Skill16Output]):
         depth: str,
         weights: dict[str, float],
         threshold_100: float,
+        probes: dict[str, MediaProbe] | None = None,
     ) -> list[ShotEvaluation]:
         if not shot_plan:
             # Synthesize a single virtual shot from composed artifact
@@ -251,7 +305,7 @@ class CriticEvaluationService(BaseSkillService[Skill16Input, Skill16Output]):
 
         shot_evals: list[ShotEvaluation] = []
         for shot in shot_plan:
-            dim_scores = self._evaluate_shot_dimensions(shot, input_dto, depth)
+            dim_scores = self._evaluate_shot_dimensions(shot, input_dto, depth, probes)
             composite = self._weighted_composite(dim_scores, weights)
             issues = self._issues_from_dim_scores(dim_scores, shot.shot_id, shot.scene_id)
             passed = composite >= threshold_100 and not any(
@@ -272,6 +326,7 @@ class CriticEvaluationService(BaseSkillService[Skill16Input, Skill16Output]):
         shot: ShotPlanEntry,
         input_dto: Skill16Input,
         depth: str,
+        probes: dict[str, MediaProbe] | None = None,
     ) -> list[DimensionScore]:
         """Run all 8 critic dimensions for a single shot."""
         ff = input_dto.feature_flags
@@ -284,8 +339,11 @@ class CriticEvaluationService(BaseSkillService[Skill16Input, Skill16Output]):
             if dim == "visual_quality" and not ff.enable_visual_critic:
                 continue
 
-            evaluator = _DIMENSION_EVALUATORS.get(dim, _evaluate_generic)
-            ds = evaluator(shot, input_dto, num_checks, dim)
+            if dim == "technical_quality":
+                ds = _evaluate_technical_quality(shot, input_dto, num_checks, dim, probes=probes)
+            else:
+                evaluator = _DIMENSION_EVALUATORS.get(dim, _evaluate_generic)
+                ds = evaluator(shot, input_dto, num_checks, dim)
             results.append(ds)
 
         return results
@@ -1032,6 +1090,7 @@ def _evaluate_pacing_timing(
 
 def _evaluate_technical_quality(
     shot: ShotPlanEntry, input_dto: Skill16Input, num_checks: int, dim: str,
+    probes: dict[str, MediaProbe] | None = None,
 ) -> DimensionScore:
     evidence: list[EvidenceItem] = []
     scores: list[float] = []
@@ -1056,6 +1115,9 @@ def _evaluate_technical_quality(
         ))
         scores.append(82.0)
 
+    if probes:
+        _probe_checks(shot, input_dto, num_checks, probes, evidence, scores)
+
     avg = round(sum(scores) / len(scores), 2) if scores else 0.0
     return DimensionScore(
         dimension=dim, score=avg, max_score=100.0,
@@ -1063,6 +1125,62 @@ def _evaluate_technical_quality(
     )
 
 
+def _probe_checks(
+    shot: ShotPlanEntry,
+    input_dto: Skill16Input,
+    num_checks: int,
+    probes: dict[str, MediaProbe],
+    evidence: list[EvidenceItem],
+    scores: list[float],
+) -> None:
+    """Technical checks on measured media: streams, duration, loudness."""
+    shot_refs = [
+        ref for ref in input_dto.artifact_refs
+        if ref.shot_id == shot.shot_id and ref.artifact_uri in probes
+    ]
+    for ref in shot_refs:
+        probe = probes[ref.artifact_uri]
+        want_video = ref.artifact_type != "audio"
+        ok = probe.has_video if want_video else probe.has_audio
+        evidence.append(EvidenceItem(
+            check_name="media_streams",
+            passed=ok,
+            confidence=1.0,
+            detail=(
+                f"{probe.format_name}: {len(probe.streams)} stream(s), "
+                f"{'video' if want_video else 'audio'} {'present' if ok else 'missing'}"
+            ),
+            ref_shot_id=shot.shot_id,
+        ))
+        scores.append(90.0 if ok else 20.0)
+
+        if num_checks >= 4 and shot.duration_ms > 0 and probe.duration_ms > 0:
+            drift = abs(probe.duration_ms - shot.duration_ms)
+            tolerance = max(_DURATION_TOLERANCE_MS, shot.duration_ms * _DURATION_TOLERANCE_RATIO)
+            evidence.append(EvidenceItem(
+                check_name="media_duration",
+                passed=drift <= tolerance,
+                confidence=0.9,
+                detail=f"Measured {probe.duration_ms:.0f}ms vs planned {shot.duration_ms}ms",
+                ref_shot_id=shot.shot_id,
+            ))
+            scores.append(85.0 if drift <= tolerance else 55.0)
+
+    composed = probes.get(input_dto.composed_artifact_uri)
+    if num_checks >= 6 and composed is not None and composed.integrated_lufs is not None:
+        lo, hi = _LOUDNESS_RANGE_LUFS
+        peak = composed.true_peak_db
+        ok = lo <= composed.integrated_lufs <= hi and (peak is None or peak <= _MAX_TRUE_PEAK_DB)
+        evidence.append(EvidenceItem(
+            check_name="media_loudness",
+            passed=ok,
+            confidence=0.85,
+            detail=f"Integrated {composed.integrated_lufs:.1f} LUFS, true peak {peak} dBFS",
+            ref_shot_id=shot.shot_id,
+        ))
+        scores.append(85.0 if ok else 60.0)
+
+
 def _evaluate_generic(
     shot: ShotPlanEntry, input_dto: Skill16Input, num_checks: int, dim: str,
 ) -> DimensionScore:
@@ -353,6 +353,56 @@ class TestSkill08:
         assert match.selected_asset.asset_id == "idx_specific_001"
         assert match.fallback_level == "variant_same_pack_parent"
 
+    def test_asset_collection_hits_fill_the_cascade(self, mock_db, ctx):
+        import importlib
+        from unittest.mock import MagicMock, patch
+
+        from ainern2d_shared.schemas.skills.skill_08 import Skill08Input
+        asset_knowledge = importlib.import_module("app.modules.asset-knowledge")
+        hit = asset_knowledge.RetrievalHit(
+            doc_id="doc_inn",
+            score=0.03,
+            metadata={
+                "asset_id": "rag_inn_001",
+                "asset_type": "scene_pack",
+                "culture_pack": "cn_wuxia",
+                "style_tags": ["realistic"],
+                "backend_compatibility": ["comfyui"],
+                "quality_tier": "high",
+            },
+        )
+        pipeline = MagicMock()
+        pipeline.run_many.return_value = [asset_knowledge.RetrievalPipelineResult(
+            query="inn", hits=[hit, asset_knowledge.RetrievalHit(doc_id="doc_note", score=0.01)],
+            timings_ms={"total": 1.0},
+        )]
+        svc = self._make_service(mock_db)
+        inp = Skill08Input(
+            canonical_entities=[
+                {
+                    "entity_uid": "ent_rag_1",
+                    "entity_type": "scene_place",
+                    "criticality": "important",
+                    "canonical_entity_specific": "place.social_lodging_venue.inn",
+                }
+            ],
+            entity_variant_mapping=[{"entity_uid": "ent_rag_1"}],
+            selected_culture_pack={"id": "cn_wuxia"},
+            style_mode="realistic",
+            backend_capability=["comfyui"],
+            asset_collection_ids=["col_assets"],
+        )
+        with patch.object(asset_knowledge, "RetrievalPipeline", return_value=pipeline) as factory:
+            out = svc.execute(inp, ctx)
+
+        assert factory.call_args.kwargs["session_factory"] is not None
+        (query,), collections = pipeline.run_many.call_args.args
+        assert "place.social_lodging_venue.inn" in query and collections == ["col_assets"]
+        selected = out.entity_asset_matches[0].selected_asset
+        assert selected is not None
+        assert selected.asset_id == "rag_inn_001"
+        assert selected.source == "asset_collection"
+
     def test_empty_entities_raises(self, mock_db, ctx):
         from ainern2d_shared.schemas.skills.skill_08 import Skill08Input
         svc = self._make_service(mock_db)
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import sys
 import os
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -564,3 +564,77 @@ class TestSkill12:
         avg_ms = round(sum(latencies) / len(latencies), 2)
         assert p95_ms <= 250.0
         assert avg_ms <= 120.0
+
+    def test_retrieval_keyword_score_handles_chinese(self, mock_db, ctx):
+        from ainern2d_shared.schemas.skills.skill_12 import (
+            KnowledgeItem,
+            RetrievalQuery,
+            Skill12Input,
+        )
+
+        svc = self._make_service(mock_db)
+        svc.execute(
+            Skill12Input(
+                kb_id="kb_zh",
+                kb_version_id="v_zh",
+                knowledge_items=[
+                    KnowledgeItem(item_id="daiyu", content="林黛玉初进荣国府，贾母搂入怀中大哭。" * 12),
+                    KnowledgeItem(item_id="xifeng", content="王熙凤协理宁国府，整顿家务，威重令行。" * 12),
+                ],
+            ),
+            ctx,
+        )
+        resp = svc.retrieve(RetrievalQuery(query_text="林黛玉进荣国府", top_k=2, hybrid_alpha=0.0))
+        assert resp.results[0].keyword_score == 1.0
+        assert "林黛玉" in resp.results[0].chunk_text
+        assert resp.results[-1].keyword_score < 1.0
+
+    def test_retrieval_rrf_fusion_reports_stage_timings(self, mock_db, ctx):
+        from ainern2d_shared.schemas.skills.skill_12 import (
+            KnowledgeItem,
+            RetrievalQuery,
+            Skill12Input,
+        )
+
+        svc = self._make_service(mock_db)
+        svc.execute(
+            Skill12Input(
+                kb_id="kb_rrf",
+                kb_version_id="v_rrf",
+                knowledge_items=[
+                    KnowledgeItem(item_id="duel", content="the sword duel at dawn on the bridge. " * 12),
+                    KnowledgeItem(item_id="feast", content="a quiet feast in the lantern-lit hall. " * 12),
+                ],
+            ),
+            ctx,
+        )
+        resp = svc.retrieve(RetrievalQuery(query_text="sword duel", top_k=2, fusion="rrf"))
+        assert "sword duel" in resp.results[0].chunk_text
+        assert resp.results[0].score > resp.results[-1].score
+        assert {"embed", "vector", "keyword", "fusion", "total"} <= set(resp.stage_timings_ms)
+        assert resp.latency_ms == round(resp.stage_timings_ms["total"], 2)
+
+    def test_resync_reuses_cached_chunk_embeddings(self, mock_db, ctx):
+        from ainern2d_shared.schemas.skills.skill_12 import KnowledgeItem, Skill12Input
+
+        items = [
+            KnowledgeItem(item_id="gate", content="the city gate closes at the third drum. " * 12),
+            KnowledgeItem(item_id="inn", content="the inn keeper never forgets a face. " * 12),
+        ]
+        self._make_service(mock_db).execute(Skill12Input(kb_id="kb_sync", kb_version_id="v1", knowledge_items=items), ctx)
+
+        svc = self._make_service(mock_db)
+        with patch.object(svc, "_generate_embedding", wraps=svc._generate_embedding) as gen:
+            out = svc.execute(
+                Skill12Input(
+                    kb_id="kb_sync",
+                    kb_version_id="v2",
+                    knowledge_items=[
+                        *items,
+                        KnowledgeItem(item_id="well", content="an old well hides the ledger. " * 12),
+                    ],
+                ),
+                ctx,
+            )
+        assert out.status == "index_ready"
+        assert gen.call_count == 1
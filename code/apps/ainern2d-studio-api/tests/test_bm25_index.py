@@ -0,0 +1,47 @@
+"""Unit tests for ainern2d_shared.utils.bm25."""
+from __future__ import annotations
+
+from ainern2d_shared.utils.bm25 import BM25Index, normalize_scores, tokenize
+
+
+def test_tokenize_splits_cjk_into_bigrams_and_keeps_latin_words():
+    assert tokenize("林黛玉进贾府") == ["林黛", "黛玉", "玉进", "进贾", "贾府"]
+    assert tokenize("Sword-Master, ２nd duel!") == ["sword", "master", "2nd", "duel"]
+    assert tokenize("剑 与 sword") == ["剑", "与", "sword"]
+
+
+def test_chinese_query_ranks_matching_chapter_first():
+    index = BM25Index()
+    index.add("c1", "林黛玉初进荣国府，贾母见了外孙女，搂入怀中大哭。")
+    index.add("c2", "贾宝玉神游太虚境，警幻仙曲演红楼梦。")
+    index.add("c3", "王熙凤协理宁国府，整顿家务。")
+
+    hits = index.search("林黛玉进荣国府", top_k=3)
+    assert hits[0][0] == "c1"
+    assert "c2" not in {doc_id for doc_id, _ in hits}
+
+
+def test_rare_terms_outweigh_common_ones():
+    index = BM25Index()
+    for i in range(20):
+        index.add(f"common{i}", "the duel at dawn")
+    index.add("rare", "the duel of the jade sword")
+    assert index.search("jade duel", top_k=1)[0][0] == "rare"
+
+
+def test_incremental_updates_and_candidate_filter():
+    index = BM25Index()
+    index.add("a", "jade sword")
+    index.add("b", "jade hairpin")
+    assert {d for d, _ in index.search("jade", top_k=None)} == {"a", "b"}
+    assert [d for d, _ in index.search("jade", top_k=None, candidates={"b"})] == ["b"]
+
+    index.add("a", "iron sword")  # re-index replaces old postings
+    index.remove("b")
+    assert index.search("jade") == []
+    assert len(index) == 1 and index.avg_doc_len == 2
+
+
+def test_normalize_scores_scales_by_best_hit():
+    assert normalize_scores([("a", 4.0), ("b", 1.0)]) == {"a": 1.0, "b": 0.25}
+    assert normalize_scores([]) == {}
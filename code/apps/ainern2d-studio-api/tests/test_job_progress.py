@@ -0,0 +1,246 @@
+"""Unit tests for job.progress fan-out, the SSE generators and the streamed chat-completion reader."""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from ainern2d_shared.ainer_db_models.enum_models import JobStatus
+from ainern2d_shared.queue.topics import SYSTEM_TOPICS
+from ainern2d_shared.schemas.events import EventEnvelope
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.api.v1 import orchestrator, script_workflow, tasks
+from app.services import job_progress
+from app.api.v1.translation import _read_chat_stream
+from app.services.job_progress import JobProgressHub, sse_event, streams_progress
+
+
+def _envelope(event_type: str, job_id: str, payload: dict) -> dict:
+    return EventEnvelope(
+        event_type=event_type,
+        producer="worker-llm",
+        occurred_at=datetime.now(timezone.utc),
+        tenant_id="t",
+        project_id="p",
+        idempotency_key=f"idem_{event_type}_{job_id}",
+        job_id=job_id,
+        trace_id="tr",
+        correlation_id="cr",
+        payload=payload,
+    ).model_dump(mode="json")
+
+
+def test_sse_event_frames_multiline_json():
+    frame = sse_event("progress", {"delta": "a\nb"}, 3)
+    assert frame.startswith("id: 3\nevent: progress\ndata: ")
+    assert frame.endswith("\n\n")
+    assert json.loads(frame.split("data: ", 1)[1]) == {"delta": "a\nb"}
+    assert sse_event("x", "l1\nl2") == "event: x\ndata: l1\ndata: l2\n\n"
+
+
+def test_hub_resumes_after_seq_and_reports_finish():
+    hub = JobProgressHub()
+    hub.publish("j1", "job.progress", {"delta": "he"})
+    hub.publish("j1", "job.progress", {"delta": "llo"})
+    events, finished = hub.wait("j1", after_seq=1, timeout=0)
+    assert [(seq, payload["delta"]) for seq, _, payload in events] == [(2, "llo")]
+    assert not finished
+
+    hub.finish("j1", "job.succeeded", {"output": "hello"})
+    events, finished = hub.wait("j1", after_seq=2, timeout=0)
+    assert finished and events[0][1] == "job.succeeded"
+
+
+def test_hub_wait_wakes_on_publish_and_times_out():
+    hub = JobProgressHub()
+    assert hub.wait("missing", timeout=0.01) == ([], False)
+
+    threading.Timer(0.05, hub.publish, args=("j2", "job.progress", {"delta": "x"})).start()
+    events, _ = hub.wait("j2", timeout=2)
+    assert events and events[0][2] == {"delta": "x"}
+
+
+def test_hub_wait_async_wakes_on_publish_from_another_thread():
+    hub = JobProgressHub()
+
+    async def _scenario():
+        assert await hub.wait_async("missing", timeout=0.01) == ([], False)
+        threading.Timer(0.05, hub.finish, args=("j3", "job.succeeded", {"output": "ok"})).start()
+        started = time.monotonic()
+        events, finished = await hub.wait_async("j3", timeout=5)
+        return events, finished, time.monotonic() - started
+
+    events, finished, waited = asyncio.run(_scenario())
+    assert finished and events[0][1] == "job.succeeded"
+    assert waited < 1.0
+    assert not hub._waiters
+
+
+def test_only_llm_workers_stream_progress():
+    assert streams_progress("worker-llm") and streams_progress("worker-llm-deepseek")
+    assert not streams_progress("worker-audio-tts") and not streams_progress(None)
+
+
+def test_hub_evicts_oldest_jobs():
+    hub = JobProgressHub(max_jobs=2)
+    for job_id in ("a", "b", "c"):
+        hub.publish(job_id, "job.progress", {})
+    assert hub.wait("a", timeout=0) == ([], False)
+    assert hub.wait("c", timeout=0)[0]
+
+
+def test_progress_events_bypass_the_database(monkeypatch):
+    hub = JobProgressHub()
+    monkeypatch.setattr(job_progress, "_hub", hub)
+
+    def _no_db():
+        raise AssertionError("job.progress must not open a DB session")
+
+    monkeypatch.setattr(orchestrator, "get_db_session", _no_db)
+    orchestrator.handle_job_status(_envelope("job.progress", "job_1", {"seq": 1, "delta": "tok"}))
+    events, finished = hub.wait("job_1", timeout=0)
+    assert events[0][2]["delta"] == "tok" and not finished
+
+
+class _FakeStreamResponse:
+    def __init__(self, lines: list[str]):
+        self._lines = lines
+        self.closed = False
+
+    def iter_lines(self):
+        return iter(line.encode("utf-8") for line in self._lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+
+def test_read_chat_stream_collects_deltas_until_done():
+    def chunk(text: str) -> str:
+        return "data: " + json.dumps({"choices": [{"delta": {"content": text}}]}, ensure_ascii=False)
+
+    response = _FakeStreamResponse([
+        ": keep-alive",
+        chunk("场景"),
+        "",
+        chunk("一"),
+        'data: {"choices": []}',
+        "data: [DONE]",
+        chunk("ignored"),
+    ])
+    seen: list[str] = []
+    assert _read_chat_stream(response, seen.append) == "场景一"
+    assert seen == ["场景", "一"] and response.closed
+
+
+class _Answer(BaseModel):
+    text: str
+
+
+def _collect(generate) -> list[str]:
+    async def _scenario():
+        return [frame async for frame in script_workflow._generation_events(generate, None, "failed")]
+
+    return asyncio.run(_scenario())
+
+
+def test_generation_events_stream_deltas_then_completed(monkeypatch):
+    closed: list[bool] = []
+    monkeypatch.setattr(script_workflow, "get_db_session", lambda: SimpleNamespace(close=lambda: closed.append(True)))
+
+    def _generate(_db, on_delta):
+        for part in ("场", "景", "一"):
+            on_delta(part)
+        return _Answer(text="场景一")
+
+    frames = _collect(_generate)
+    deltas = "".join(
+        json.loads(f.split("data: ", 1)[1])["delta"] for f in frames if f.startswith("id: ")
+    )
+    assert deltas == "场景一" and closed == [True]
+    assert frames[-1] == sse_event("completed", {"text": "场景一"})
+
+
+def test_generation_events_report_failures(monkeypatch):
+    monkeypatch.setattr(script_workflow, "get_db_session", lambda: SimpleNamespace(close=lambda: None))
+
+    def _generate(_db, _on_delta):
+        raise HTTPException(status_code=500, detail="LLM JSON parse failed")
+
+    assert _collect(_generate) == [sse_event("failed", {"detail": "LLM JSON parse failed"})]
+
+
+def test_job_events_are_relayed_to_every_replica(monkeypatch):
+    published: list[tuple[str, dict, str]] = []
+
+    class _Publisher:
+        def publish(self, topic, message, *, exchange=""):
+            published.append((topic, message, exchange))
+
+    hub = JobProgressHub()
+    monkeypatch.setattr(job_progress, "_hub", hub)
+    monkeypatch.setattr(job_progress, "get_publisher", lambda url: _Publisher())
+    monkeypatch.setattr(job_progress, "_broadcast", threading.Event())
+    job_progress.enable_broadcast()
+
+    orchestrator.handle_job_status(_envelope("job.progress", "job_r", {"seq": 1, "delta": "tok"}))
+    assert hub.wait("job_r", timeout=0) == ([], False)  # delivered by the subscription only
+    (topic, message, exchange), = published
+    assert exchange == SYSTEM_TOPICS.JOB_PROGRESS_EXCHANGE and topic == "job.progress"
+
+    job_progress.deliver_job_event(message)
+    job_progress.deliver_job_event({**message, "event_type": "job.succeeded", "payload": {"output": "tok"}})
+    events, finished = hub.wait("job_r", timeout=0)
+    assert [e[1] for e in events] == ["job.progress", "job.succeeded"] and finished
+
+
+def _stream_frames(job_id: str, **params) -> list[str]:
+    async def _scenario():
+        response = await tasks.stream_job_progress(job_id, None, **params)
+        return [frame async for frame in response.body_iterator]
+
+    return asyncio.run(_scenario())
+
+
+def test_stream_of_a_finished_or_unknown_job_closes(monkeypatch):
+    states = {"done": (JobStatus.failed, {"error_code": "E1", "error_message": "boom"})}
+    monkeypatch.setattr(tasks, "_job_state", states.get)
+    monkeypatch.setattr(tasks, "get_job_progress_hub", lambda: JobProgressHub())
+
+    assert _stream_frames("done", keepalive_sec=1, max_sec=60) == [
+        sse_event("failed", {"error_code": "E1", "error_message": "boom"}),
+    ]
+    with pytest.raises(HTTPException) as exc:
+        _stream_frames("missing", keepalive_sec=1, max_sec=60)
+    assert exc.value.status_code == 404
+
+
+def test_stream_closes_when_the_db_shows_a_missed_terminal_event(monkeypatch):
+    hub = JobProgressHub()
+    hub.publish("job_m", "job.progress", {"delta": "a"})
+    reads = iter([(JobStatus.running, {}), (JobStatus.success, {"output": {"text": "a"}})])
+    monkeypatch.setattr(tasks, "_job_state", lambda job_id: next(reads))
+    monkeypatch.setattr(tasks, "get_job_progress_hub", lambda: hub)
+
+    frames = _stream_frames("job_m", keepalive_sec=0.01, max_sec=60)
+    assert frames == [
+        sse_event("progress", {"delta": "a"}, 1),
+        ": keep-alive\n\n",
+        sse_event("succeeded", {"output": {"text": "a"}}),
+    ]
+
+
+def test_stream_of_a_stuck_job_times_out(monkeypatch):
+    monkeypatch.setattr(tasks, "_job_state", lambda job_id: (JobStatus.running, {}))
+    monkeypatch.setattr(tasks, "get_job_progress_hub", lambda: JobProgressHub())
+
+    frames = _stream_frames("job_s", keepalive_sec=0.01, max_sec=0.01)
+    assert frames[-1] == sse_event("timeout", {"job_id": "job_s", "status": "running"})
@@ -0,0 +1,143 @@
+"""Unit tests for the studio LLM micro-batching coalescer."""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from app.services.llm_batcher import LLMCallCoalescer, parse_batch_reply
+
+PROVIDER = SimpleNamespace(id="prov_1", endpoint="http://llm.local/v1")
+SETTINGS = {"access_token": "tok", "model_catalog": ["m1"]}
+SYSTEM = {"role": "system", "content": "translate names"}
+
+
+class _FakeLLM:
+    """Answers single calls with ``{"echo": <request>}`` and batches per item."""
+
+    def __init__(self, drop: set[str] | None = None, broken: bool = False, delay_s: float = 0.0):
+        self.calls: list[list[dict]] = []
+        self.drop = drop or set()
+        self.broken = broken
+        self.delay_s = delay_s
+        self._lock = threading.Lock()
+
+    def __call__(self, *, provider, provider_settings, messages, max_tokens):
+        with self._lock:
+            self.calls.append(messages)
+        time.sleep(self.delay_s)
+        user = messages[-1]["content"]
+        if "批量模式" not in messages[0]["content"]:
+            return json.dumps({"echo": user})
+        if self.broken:
+            return "not json"
+        items = json.loads(user)
+        return json.dumps(
+            {it["id"]: {"echo": it["request"]} for it in items if it["request"] not in self.drop},
+            ensure_ascii=False,
+        )
+
+
+def _require_echo(raw: str) -> dict:
+    parsed = json.loads(raw)
+    if "echo" not in parsed:
+        raise ValueError("missing echo")
+    return parsed
+
+
+def _ask(coalescer: LLMCallCoalescer, name: str, max_tokens: int = 256) -> str:
+    return coalescer.call(
+        provider=PROVIDER,
+        provider_settings=SETTINGS,
+        messages=[SYSTEM, {"role": "user", "content": name}],
+        max_tokens=max_tokens,
+        validate=_require_echo,
+    )
+
+
+def _fan_out(coalescer: LLMCallCoalescer, names: list[str], max_tokens: int = 256) -> dict[str, str]:
+    """Run *names* concurrently while a ``busy`` call keeps the key in flight."""
+    results: dict[str, str] = {}
+
+    def _one(name: str) -> None:
+        results[name] = _ask(coalescer, name, max_tokens)
+
+    busy = threading.Thread(target=_ask, args=(coalescer, "busy"))
+    busy.start()
+    time.sleep(0.05)
+    threads = [threading.Thread(target=_one, args=(n,)) for n in names]
+    for t in threads:
+        t.start()
+    for t in threads + [busy]:
+        t.join(5)
+    return results
+
+
+def test_idle_call_is_sent_without_waiting():
+    llm = _FakeLLM()
+    coalescer = LLMCallCoalescer(llm, window_ms=500, max_items=4)
+    started = time.monotonic()
+    assert json.loads(_ask(coalescer, "a")) == {"echo": "a"}
+    assert time.monotonic() - started < 0.25
+    assert coalescer.stats["direct"] == 1 and not coalescer._inflight
+
+
+def test_concurrent_calls_share_one_request():
+    llm = _FakeLLM(delay_s=0.3)
+    coalescer = LLMCallCoalescer(llm, window_ms=200, max_items=4)
+    results = _fan_out(coalescer, ["a", "b", "c", "d"])
+    assert len(llm.calls) == 2  # the busy call, then one batch
+    assert {n: json.loads(r)["echo"] for n, r in results.items()} == {n: n for n in "abcd"}
+    assert coalescer.stats["batched_items"] == 4
+
+
+def test_missing_items_and_broken_batches_fall_back_to_single_calls():
+    llm = _FakeLLM(drop={"b"}, delay_s=0.2)
+    coalescer = LLMCallCoalescer(llm, window_ms=200, max_items=3)
+    results = _fan_out(coalescer, ["a", "b", "c"])
+    assert json.loads(results["b"]) == {"echo": "b"}
+    assert len(llm.calls) == 3 and coalescer.stats["fallbacks"] == 1
+
+    broken = _FakeLLM(broken=True, delay_s=0.2)
+    coalescer = LLMCallCoalescer(broken, window_ms=200, max_items=2)
+    results = _fan_out(coalescer, ["x", "y"])
+    assert {json.loads(r)["echo"] for r in results.values()} == {"x", "y"}
+    assert len(broken.calls) == 4
+
+
+def test_token_budget_and_message_shape_bypass_batching():
+    llm = _FakeLLM(delay_s=0.2)
+    coalescer = LLMCallCoalescer(llm, window_ms=50, max_items=8, max_tokens=1000)
+    _fan_out(coalescer, ["a", "b"], max_tokens=600)  # two items would exceed the budget
+    assert all("批量模式" not in call[0]["content"] for call in llm.calls)
+
+    coalescer.call(
+        provider=PROVIDER,
+        provider_settings=SETTINGS,
+        messages=[SYSTEM, {"role": "user", "content": "q"}, {"role": "assistant", "content": "r"}],
+    )
+    assert coalescer.stats["direct"] == 4  # busy, a, b and the multi-turn call
+
+
+def test_parse_batch_reply_accepts_fenced_and_structured_values():
+    raw = '```json\n{"r0": "plain", "r1": {"k": "v"}, "r2": null}\n```'
+    assert parse_batch_reply(raw) == {"r0": "plain", "r1": '{"k": "v"}'}
+
+
+def test_call_many_packs_one_callers_requests_without_waiting():
+    llm = _FakeLLM(drop={"c"})
+    coalescer = LLMCallCoalescer(llm, window_ms=500, max_items=8, max_tokens=1000)
+    started = time.monotonic()
+    answers = coalescer.call_many(
+        provider=PROVIDER,
+        provider_settings=SETTINGS,
+        messages_list=[[SYSTEM, {"role": "user", "content": n}] for n in "abcde"],
+        max_tokens=300,  # three fit the budget: two batches
+        validate=_require_echo,
+    )
+    assert time.monotonic() - started < 0.25
+    assert [json.loads(a)["echo"] for a in answers] == list("abcde")
+    batched = [call for call in llm.calls if "批量模式" in call[0]["content"]]
+    assert sorted(len(json.loads(call[1]["content"])) for call in batched) == [2, 3]
+    assert len(llm.calls) == 3 and coalescer.stats["fallbacks"] == 1
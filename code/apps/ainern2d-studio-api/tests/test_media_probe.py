@@ -0,0 +1,155 @@
+"""Unit tests for the shared media probe service (parsing + cache)."""
+from __future__ import annotations
+
+import asyncio
+import os
+
+import pytest
+
+from ainern2d_shared.services import media_probe
+from ainern2d_shared.services.media_probe import (
+    MediaProbe,
+    MediaProbeError,
+    MediaProbeService,
+    parse_ffmpeg_analysis,
+    parse_ffprobe_json,
+)
+
+_FFMPEG_STDERR = """\
+Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'clip.mp4':
+  Metadata:
+    major_brand     : isom
+  Duration: 00:00:05.04, start: 0.000000, bitrate: 1331 kb/s
+  Stream #0:0[0x1](und): Video: h264 (High) (avc1 / 0x31637661), yuv420p(progressive), 1280x720 [SAR 1:1 DAR 16:9], 1196 kb/s, 24 fps, 24 tbr, 12288 tbn (default)
+  Stream #0:1[0x2](und): Audio: aac (LC) (mp4a / 0x6134706D), 48000 Hz, stereo, fltp, 128 kb/s (default)
+Stream mapping:
+  Stream #0:1 -> #0:0 (aac (native) -> pcm_s16le (native))
+Output #0, null, to 'pipe:':
+  Stream #0:0(und): Audio: pcm_s16le, 48000 Hz, stereo, s16, 1536 kb/s (default)
+[silencedetect @ 0x55] silence_start: 1.2
+[silencedetect @ 0x55] silence_end: 1.75 | silence_duration: 0.55
+[Parsed_ebur128_1 @ 0x56] Summary:
+
+  Integrated loudness:
+    I:         -18.3 LUFS
+    Threshold: -28.6 LUFS
+
+  Loudness range:
+    LRA:         4.1 LU
+
+  True peak:
+    Peak:       -1.4 dBFS
+"""
+
+
+def test_parse_ffmpeg_analysis_reads_header_and_stats():
+    probe = parse_ffmpeg_analysis("clip.mp4", _FFMPEG_STDERR)
+    assert probe.format_name == "mov,mp4,m4a,3gp,3g2,mj2"
+    assert probe.duration_ms == pytest.approx(5040.0)
+    assert probe.bit_rate == 1331000
+    assert [s["codec_type"] for s in probe.streams] == ["video", "audio"]
+    assert probe.video["width"] == 1280 and probe.video["pix_fmt"] == "yuv420p"
+    assert probe.audio["sample_rate"] == "48000" and probe.audio["channels"] == 2
+    assert probe.analyzed
+    assert probe.silence_regions == ((1200.0, 1750.0),)
+    assert (probe.integrated_lufs, probe.loudness_range, probe.true_peak_db) == (-18.3, 4.1, -1.4)
+
+    with pytest.raises(MediaProbeError):
+        parse_ffmpeg_analysis("x", "x: No such file or directory")
+
+
+def test_parse_ffprobe_json_falls_back_to_stream_duration():
+    probe = parse_ffprobe_json("a.wav", {
+        "format": {"format_name": "wav", "bit_rate": "384000"},
+        "streams": [{"codec_type": "audio", "codec_name": "pcm_s16le", "duration": "2.5"}],
+    })
+    assert probe.duration_ms == 2500.0 and probe.has_audio and not probe.has_video
+
+
+class _CountingService(MediaProbeService):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.runs: list[str] = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def _run(self, binary, uri, analyze_audio, silence_noise_db, silence_min_s):
+        self.runs.append(uri)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return MediaProbe(uri=uri, duration_ms=float(os.path.getsize(uri)), analyzed=analyze_audio)
+        finally:
+            self.in_flight -= 1
+
+
+def test_probe_cache_keys_on_content_and_shares_inflight(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_probe.shutil, "which", lambda name: f"/usr/bin/{name}")
+    files = []
+    for i in range(6):
+        path = tmp_path / f"f{i}.wav"
+        path.write_bytes(b"x" * (i + 1))
+        files.append(str(path))
+    service = _CountingService(max_concurrency=2)
+
+    async def _scenario():
+        first = await service.probe_many(files + files[:2])
+        assert [p.duration_ms for p in first] == [1, 2, 3, 4, 5, 6, 1, 2]
+        assert len(service.runs) == 6 and service.peak <= 2
+
+        await service.probe_many(files)
+        assert len(service.runs) == 6
+
+        # A decode pass answers later header-only requests.
+        await service.probe(files[0], analyze_audio=True)
+        assert (await service.probe(files[0])).duration_ms == 1
+
+        with open(files[1], "ab") as fh:
+            fh.write(b"more")
+        assert (await service.probe(files[1])).duration_ms == 6
+
+        missing = await service.probe_many([str(tmp_path / "nope.wav")])
+        assert isinstance(missing[0], MediaProbeError)
+
+    asyncio.run(_scenario())
+    assert service.runs.count(files[1]) == 2
+    assert service.probe_many_sync(files[:1])[0].duration_ms == 1
+
+
+class _FakeProc:
+    returncode = 0
+
+    async def communicate(self):
+        return b'{"format": {"format_name": "mp4", "duration": "1.5"}}', b""
+
+
+def test_s3_objects_are_probed_in_place(tmp_path, monkeypatch):
+    from ainern2d_shared.storage.client import StorageClient
+    from ainern2d_shared.storage.local import LocalStorageBackend
+
+    client = StorageClient(LocalStorageBackend(str(tmp_path)), "bucket")
+    src = tmp_path / "clip.mp4"
+    src.write_bytes(b"x" * 64)
+    asyncio.run(client.upload_file(str(src), "shots/clip.mp4"))
+
+    async def _no_download(*_args, **_kwargs):
+        raise AssertionError("the probe must not download the object")
+
+    commands: list[tuple] = []
+
+    async def _exec(*cmd, **_kwargs):
+        commands.append(cmd)
+        return _FakeProc()
+
+    monkeypatch.setattr(client, "download_to_temp", _no_download)
+    monkeypatch.setattr(media_probe.asyncio, "create_subprocess_exec", _exec)
+    service = MediaProbeService()
+    monkeypatch.setattr(service, "_storage", lambda: client)
+
+    probe = asyncio.run(service._run("/usr/bin/ffprobe", "s3://bucket/shots/clip.mp4", False, -40.0, 0.3))
+    assert probe.duration_ms == 1500.0 and probe.uri == "s3://bucket/shots/clip.mp4"
+    assert commands[0][-1] == str(tmp_path / "bucket" / "shots" / "clip.mp4")
+
+    with pytest.raises(MediaProbeError):
+        asyncio.run(service._run("/usr/bin/ffprobe", "s3://bucket/missing.mp4", False, -40.0, 0.3))
@@ -302,15 +302,13 @@ class TestContinuityChecker:
 # (directory name has a hyphen so we use importlib to load it)
 # ===========================================================================
 
+def _import_asset_knowledge_module(name):
+    import importlib
+    return importlib.import_module(f"app.modules.asset-knowledge.{name}")
+
+
 def _import_embedding_module():
-    import importlib.util
-    spec = importlib.util.spec_from_file_location(
-        "asset_knowledge_embedding",
-        os.path.join(os.path.dirname(__file__), "../app/modules/asset-knowledge/embedding.py"),
-    )
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
-    return mod
+    return _import_asset_knowledge_module("embedding")
 
 
 class TestEmbeddingGenerator:
@@ -350,6 +348,414 @@ class TestEmbeddingGenerator:
             gen.embed("nonexistent_doc")
 
 
+class TestEmbeddingService:
+    class _Provider:
+        model = "fake-embed"
+        dim = 3
+
+        def __init__(self, fail=False):
+            import threading
+            self.calls = []
+            self.fail = fail
+            self._lock = threading.Lock()
+            self.active = 0
+            self.peak = 0
+
+        def embed_batch(self, texts):
+            import time
+            with self._lock:
+                self.calls.append(list(texts))
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(0.01)
+            with self._lock:
+                self.active -= 1
+            if self.fail:
+                raise RuntimeError("provider down")
+            return [[float(len(t)), 0.0, 1.0] for t in texts]
+
+    def _service(self, provider, **kwargs):
+        mod = _import_embedding_module()
+        return mod, mod.EmbeddingService(provider, cache=mod.MemoryEmbeddingCache(), **kwargs)
+
+    def test_batches_dedupes_and_bounds_concurrency(self):
+        provider = self._Provider()
+        _, service = self._service(provider, batch_size=2, max_concurrency=2)
+        texts = ["a", "bb", "a", "ccc", "dddd", "eeeee", "  "]
+
+        vectors = service.embed_texts(texts)
+        assert vectors[0] == vectors[2] == [1.0, 0.0, 1.0]
+        assert vectors[-1] is None
+        assert sorted(len(c) for c in provider.calls) == [1, 2, 2]
+        assert provider.peak <= 2
+
+    def test_unchanged_texts_are_served_from_cache_and_store(self):
+        provider = self._Provider()
+        mod, service = self._service(provider, batch_size=8)
+        store = MagicMock()
+        store.get_many.return_value = {mod.embedding_cache_key("fake-embed", "stored"): [9.0, 9.0, 9.0]}
+
+        stats = mod.EmbeddingStats()
+        service.embed_texts(["one", "stored"], store=store, stats=stats)
+        assert provider.calls == [["one"]]
+        assert stats.cache_hits == 1 and stats.embedded == 1
+        assert list(store.put_many.call_args.args[0]) == [mod.embedding_cache_key("fake-embed", "one")]
+
+        stats = mod.EmbeddingStats()
+        service.embed_texts(["one", "stored", "two"], stats=stats)
+        assert provider.calls == [["one"], ["two"]]
+        assert stats.cache_hits == 2
+
+    def test_fallback_vectors_are_not_cached(self):
+        mod = _import_embedding_module()
+        provider = self._Provider(fail=True)
+        _, service = self._service(provider, fallback=mod.HashEmbeddingProvider())
+        vectors = service.embed_texts(["x"])
+        assert len(vectors[0]) == 1536
+        assert len(service.cache) == 0
+
+    def test_memory_cache_keeps_float32_vectors_and_evicts_lru(self):
+        import numpy as np
+
+        mod = _import_embedding_module()
+        cache = mod.MemoryEmbeddingCache(max_entries=2)
+        cache.put_many({"a": [0.5, 1.0], "b": [2.0, 3.0]})
+        assert cache.get_many(["a"]) == {"a": [0.5, 1.0]}
+        cache.put_many({"c": [4.0, 5.0]})
+        assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+        assert all(v.dtype == np.float32 for v in cache._entries.values())
+
+    def test_hash_provider_bypasses_the_memory_cache(self):
+        mod = _import_embedding_module()
+        cache = mod.MemoryEmbeddingCache()
+        service = mod.EmbeddingService(mod.HashEmbeddingProvider(dim=8), cache=cache)
+        assert service.embed_texts(["x"])[0] == mod._hash_vector("x", 8)
+        assert service.cache is None and len(cache) == 0
+
+    def test_generator_embeds_documents_with_one_provider_batch(self):
+        mod = _import_embedding_module()
+        provider = self._Provider()
+        provider.dim = 1536
+        service = mod.EmbeddingService(provider, cache=mod.MemoryEmbeddingCache(), batch_size=16)
+        db = _mock_db()
+        db.get_bind.return_value.dialect.name = "sqlite"
+        db.execute.return_value.all.return_value = []
+        docs = [
+            MagicMock(id=f"doc_{i}", tenant_id="t1", project_id="p1", collection_id="col", content_text=f"text {i}")
+            for i in range(5)
+        ]
+
+        gen = mod.EmbeddingGenerator(db, service=service)
+        embeddings = gen.embed_documents(docs)
+        assert [e.doc_id for e in embeddings] == [d.id for d in docs]
+        assert len(provider.calls) == 1
+        assert gen.last_stats.embedded == 5
+
+
+class TestEmbeddingMatrixCache:
+    def _vector_index(self):
+        return _import_asset_knowledge_module("vector_index")
+
+    def test_rows_are_normalized_float32_and_skip_wrong_dim(self):
+        import numpy as np
+
+        m = self._vector_index().EmbeddingMatrix.build(
+            [("a", [3, 4, 0, 0]), ("b", [1, 2]), ("c", [0, 0, 0, 0])], dim=4
+        )
+        assert list(m.doc_ids) == ["a", "c"]
+        assert m.vectors.dtype == np.float32 and m.vectors.flags["C_CONTIGUOUS"]
+        assert np.allclose(np.linalg.norm(m.vectors[0]), 1.0)
+        assert not m.vectors[1].any()
+
+    def test_top_k_matches_pure_python_cosine(self):
+        import random
+
+        search = _import_asset_knowledge_module("bybrid_search")
+        rng = random.Random(7)
+        rows = [(f"d{i}", [rng.uniform(-1, 1) for _ in range(16)]) for i in range(200)]
+        query = [rng.uniform(-1, 1) for _ in range(16)]
+
+        m = self._vector_index().EmbeddingMatrix.build(rows, dim=16)
+        got = m.top_k(query, 5)
+
+        cosine = search.HybridSearcher._cosine_similarity
+        expected = sorted(rows, key=lambda r: cosine(query, r[1]), reverse=True)[:5]
+        assert [doc_id for doc_id, _ in got] == [doc_id for doc_id, _ in expected]
+        assert got[0][1] == pytest.approx(cosine(query, expected[0][1]), abs=1e-5)
+
+    def test_vector_search_loads_collection_once_until_invalidated(self):
+        search = _import_asset_knowledge_module("bybrid_search")
+        embedding = _import_embedding_module()
+        vector_index = self._vector_index()
+        db = _mock_db()
+        db.execute.return_value.all.return_value = [
+            ("doc_a", embedding._hash_vector("dragon")),
+            ("doc_b", embedding._hash_vector("castle")),
+        ]
+        searcher = search.HybridSearcher(db)
+        vector_index.invalidate_collection("col_cache")
+
+        first = searcher.vector_search("dragon", "col_cache", top_k=1)
+        loads = db.execute.call_count  # version token + matrix
+        searcher.vector_search("castle", "col_cache", top_k=1)
+        assert first[0]["doc_id"] == "doc_a"
+        assert db.execute.call_count == loads
+
+        vector_index.invalidate_collection("col_cache")
+        searcher.vector_search("dragon", "col_cache", top_k=1)
+        assert db.execute.call_count == 2 * loads
+
+    def test_embed_and_delete_invalidate_the_collection_after_commit(self, tmp_path):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import Session
+
+        from ainern2d_shared.ainer_db_models.rag_models import RagDocument, RagEmbedding
+
+        embedding = _import_embedding_module()
+        ingest = _import_asset_knowledge_module("ingest")
+        backend = _import_asset_knowledge_module("vector_backend")
+        cache = self._vector_index().get_matrix_cache()
+        cache.invalidate("col_inv")
+        engine = create_engine(f"sqlite:///{tmp_path / 'rag.db'}")
+        RagDocument.__table__.create(engine)
+        RagEmbedding.__table__.create(engine)
+
+        def search(session):
+            return backend.NumpyVectorBackend(session).top_k("col_inv", [1.0] * 1536, 5)
+
+        with Session(engine) as db, Session(engine) as reader:
+            doc = ingest.RagIngestor(db).ingest("col_inv", "chapter", "text")
+            db.commit()
+            assert search(reader) == []
+
+            embedding.EmbeddingGenerator(db, api_key="").embed(doc.id)
+            assert "col_inv" in cache  # nothing is dropped before the commit
+            db.commit()
+            assert "col_inv" not in cache
+            assert [doc_id for doc_id, _ in search(reader)] == [doc.id]
+            reader.commit()
+
+            ingest.RagIngestor(db).delete(doc.id)
+            # a concurrent load still sees the committed row and caches it ...
+            assert [doc_id for doc_id, _ in search(reader)] == [doc.id]
+            db.commit()
+            # ... and the commit drops it again
+            assert "col_inv" not in cache
+            assert search(reader) == []
+
+
+class TestKeywordSearch:
+    @pytest.fixture()
+    def db(self, tmp_path, monkeypatch):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import Session
+
+        from ainern2d_shared.ainer_db_models.rag_models import RagDocument
+        from ainern2d_shared.config.setting import settings
+
+        monkeypatch.setattr(settings, "rag_index_revalidate_s", 0.0)
+        engine = create_engine(f"sqlite:///{tmp_path / 'rag.db'}")
+        RagDocument.__table__.create(engine)
+        _import_asset_knowledge_module("keyword_index").get_keyword_cache().invalidate()
+        with Session(engine) as session:
+            yield session
+
+    def _ids(self, db, query):
+        search = _import_asset_knowledge_module("bybrid_search")
+        return [doc_id for doc_id, _ in search.HybridSearcher(db).keyword_candidates(query, "col_kw")]
+
+    def test_keyword_search_uses_bm25_index(self, db):
+        search = _import_asset_knowledge_module("bybrid_search")
+        ingest = _import_asset_knowledge_module("ingest")
+        first = ingest.RagIngestor(db).ingest("col_kw", "chapter", "林黛玉初进荣国府")
+        ingest.RagIngestor(db).ingest("col_kw", "chapter", "王熙凤协理宁国府")
+        db.commit()
+
+        results = search.HybridSearcher(db).keyword_search("林黛玉", "col_kw", top_k=5)
+        assert [r["doc_id"] for r in results] == [first.id]
+        assert results[0]["score"] == 1.0 and results[0]["content"] == "林黛玉初进荣国府"
+
+    def test_ingest_reaches_the_index_on_commit_and_never_on_rollback(self, db):
+        ingest = _import_asset_knowledge_module("ingest")
+        keyword_index = _import_asset_knowledge_module("keyword_index")
+        assert self._ids(db, "葬花") == []
+
+        dropped = ingest.RagIngestor(db).ingest("col_kw", "chapter", "林黛玉葬花")
+        db.rollback()
+        assert dropped.id not in keyword_index.get_keyword_cache().peek("col_kw")
+
+        kept = ingest.RagIngestor(db).ingest("col_kw", "chapter", "林黛玉葬花")
+        assert kept.id not in keyword_index.get_keyword_cache().peek("col_kw")
+        db.commit()
+        assert kept.id in keyword_index.get_keyword_cache().peek("col_kw")
+        assert self._ids(db, "葬花") == [kept.id]
+
+    def test_writes_from_other_replicas_are_picked_up_by_the_version_check(self, db):
+        from sqlalchemy.orm import Session
+
+        from ainern2d_shared.ainer_db_models.enum_models import RagScope, RagSourceType
+        from ainern2d_shared.ainer_db_models.rag_models import RagDocument
+
+        assert self._ids(db, "葬花") == []
+        db.commit()
+
+        # another replica's write: committed, but never reported to this process
+        with Session(db.get_bind()) as other:
+            other.add(RagDocument(
+                id="doc_remote", tenant_id="t1", project_id="p1", collection_id="col_kw",
+                scope=RagScope.novel, source_type=RagSourceType.chapter, content_text="林黛玉葬花",
+            ))
+            other.commit()
+
+        assert self._ids(db, "葬花") == ["doc_remote"]
+
+
+class TestVectorBackend:
+    def _db(self, dialect):
+        db = _mock_db()
+        db.get_bind.return_value.dialect.name = dialect
+        return db
+
+    def test_auto_selects_numpy_off_postgres(self):
+        vb = _import_asset_knowledge_module("vector_backend")
+        assert isinstance(vb.select_backend(self._db("sqlite"), "auto"), vb.NumpyVectorBackend)
+        with pytest.raises(RuntimeError):
+            vb.select_backend(self._db("sqlite"), "pgvector")
+
+    def test_auto_selects_pgvector_on_postgres_vector_column(self):
+        vb = _import_asset_knowledge_module("vector_backend")
+        if vb.Vector is None:
+            pytest.skip("pgvector not installed")
+        assert isinstance(vb.select_backend(self._db("postgresql"), "auto"), vb.PgVectorBackend)
+
+    def test_pgvector_query_orders_by_cosine_operator(self):
+        from sqlalchemy.dialects import postgresql
+
+        vb = _import_asset_knowledge_module("vector_backend")
+        if vb.Vector is None:
+            pytest.skip("pgvector not installed")
+        db = self._db("postgresql")
+        db.execute.return_value.all.return_value = [("doc_a", 0.25)]
+        hits = vb.PgVectorBackend(db, ef_search=80, probes=0).top_k("col", [0.1] * 1536, 5)
+
+        assert hits == [("doc_a", 0.75)]
+        set_stmt, query_stmt = (c.args[0] for c in db.execute.call_args_list)
+        assert str(set_stmt) == "SET LOCAL hnsw.ef_search = 80"
+        sql = str(query_stmt.compile(dialect=postgresql.dialect()))
+        assert "ORDER BY rag_embeddings.embedding <=>" in sql
+        assert "is_primary = true" in sql
+
+    def test_searcher_uses_injected_backend(self):
+        search = _import_asset_knowledge_module("bybrid_search")
+        backend = MagicMock()
+        backend.top_k.return_value = [("doc_x", 0.9)]
+        searcher = search.HybridSearcher(_mock_db(), vector_backend=backend)
+
+        results = searcher.vector_search("q", "col", top_k=3)
+        assert results == [{"doc_id": "doc_x", "score": 0.9, "source": "vector", "content": ""}]
+        assert backend.top_k.call_args.args[0] == "col" and backend.top_k.call_args.args[2] == 3
+
+    def test_query_is_embedded_with_the_document_embedding_service(self):
+        search = _import_asset_knowledge_module("bybrid_search")
+        embedding = _import_embedding_module()
+        provider = embedding.HashEmbeddingProvider(dim=3, fn=lambda text: [float(len(text)), 1.0, 0.0], model="m")
+        backend = MagicMock()
+        backend.top_k.return_value = []
+        searcher = search.HybridSearcher(
+            _mock_db(), vector_backend=backend,
+            embedding_service=embedding.EmbeddingService(provider, cache=embedding.MemoryEmbeddingCache()),
+        )
+
+        searcher.vector_search("dragon", "col", top_k=3)
+        assert backend.top_k.call_args.args[1] == [6.0, 1.0, 0.0]
+        assert searcher.vector_search("  ", "col") == [] and backend.top_k.call_count == 1
+
+
+class TestRetrievalPipeline:
+    def _doc(self, doc_id, content):
+        return MagicMock(
+            id=doc_id, collection_id="col", kb_version_id=None, title=None,
+            source_type="chapter", source_id=None, content_text=content,
+            metadata_json={"asset_id": f"asset_{doc_id}"},
+        )
+
+    def _pipeline(self, db, **kwargs):
+        pipeline_mod = _import_asset_knowledge_module("pipeline")
+        backend = MagicMock()
+        backend.bind.return_value = backend
+        backend.top_k.return_value = [("doc_b", 0.9), ("doc_c", 0.5)]
+        pipeline = pipeline_mod.RetrievalPipeline(db, vector_backend=backend, **kwargs)
+        pipeline._searcher.keyword_candidates = MagicMock(return_value=[("doc_a", 7.0), ("doc_b", 3.0)])
+        pipeline._searcher.vector_candidates = MagicMock(return_value=[("doc_b", 0.9), ("doc_c", 0.5)])
+        return pipeline
+
+    def test_rrf_hits_are_hydrated_with_one_query_and_timed_per_stage(self):
+        db = _mock_db()
+        db.execute.return_value.scalars.return_value.all.return_value = [
+            self._doc("doc_a", "A"), self._doc("doc_b", "B"), self._doc("doc_c", "C"),
+        ]
+        result = self._pipeline(db).run("query", ["col", "col"], top_k=2)
+
+        assert [hit.doc_id for hit in result.hits] == ["doc_b", "doc_a"]
+        assert result.hits[0].keyword_rank == 2 and result.hits[0].vector_rank == 1
+        assert result.hits[0].metadata == {"asset_id": "asset_doc_b"}
+        assert db.execute.call_count == 1
+        assert db.get.call_count == 0
+        assert {"keyword", "vector", "fusion", "hydrate", "total"} <= set(result.timings_ms)
+
+    def test_reranker_reorders_the_hydrated_window(self):
+        db = _mock_db()
+        db.execute.return_value.scalars.return_value.all.return_value = [
+            self._doc("doc_a", "A"), self._doc("doc_b", "B"), self._doc("doc_c", "C"),
+        ]
+        reranker = MagicMock(side_effect=lambda q, hits: [1.0 if h.doc_id == "doc_c" else 0.0 for h in hits])
+        result = self._pipeline(db, reranker=reranker).run("query", ["col"], top_k=3)
+
+        assert result.hits[0].doc_id == "doc_c"
+        assert "rerank" in result.timings_ms
+        assert result.hits[0].rerank_score == 1.0
+
+    def test_concurrent_stages_use_their_own_sessions(self):
+        db = _mock_db()
+        db.execute.return_value.scalars.return_value.all.return_value = [self._doc("doc_b", "B")]
+        sessions = []
+
+        def _factory():
+            session = _mock_db()
+            sessions.append(session)
+            return session
+
+        pipeline = self._pipeline(db, session_factory=_factory, fusion="weighted")
+        result = pipeline.run("query", ["col"], top_k=5)
+
+        assert [hit.doc_id for hit in result.hits] == ["doc_b"]
+        assert result.fusion == "weighted"
+        assert len(sessions) == 2 and all(s.close.called for s in sessions)
+        kw_db = pipeline._searcher.keyword_candidates.call_args.kwargs["db"]
+        vec_db = pipeline._searcher.vector_candidates.call_args.kwargs["db"]
+        assert {id(kw_db), id(vec_db)} == {id(s) for s in sessions}
+
+    def test_run_many_gathers_queries_and_hydrates_once(self):
+        db = _mock_db()
+        db.execute.return_value.scalars.return_value.all.return_value = [
+            self._doc("doc_a", "A"), self._doc("doc_b", "B"), self._doc("doc_c", "C"),
+        ]
+        sessions = []
+
+        def _factory():
+            sessions.append(_mock_db())
+            return sessions[-1]
+
+        pipeline = self._pipeline(db, session_factory=_factory)
+        pipeline._searcher._embedding_service = MagicMock()
+        results = pipeline.run_many(["q1", "q2", "q3"], ["col"], top_k=2)
+
+        assert [r.query for r in results] == ["q1", "q2", "q3"]
+        assert all([hit.doc_id for hit in r.hits] == ["doc_b", "doc_a"] for r in results)
+        assert db.execute.call_count == 1 and len(sessions) == 6
+        pipeline._searcher._embedding_service.embed_texts.assert_called_once_with(["q1", "q2", "q3"])
+
+
 # ===========================================================================
 # orchestrator / dag_engine.py – default sequence wiring
 # ===========================================================================
@@ -375,3 +781,232 @@ class TestDagEngineSequence:
         idx_persona_index = step_names.index(JobType.manage_persona_dataset_index.value)
         idx_prompt = step_names.index(JobType.plan_prompt.value)
         assert idx_persona_index < idx_prompt
+
+    def test_plan_jobs_fans_out_render_steps_per_shot(self):
+        from app.modules.orchestrator.dag_engine import DagEngine
+        from ainern2d_shared.ainer_db_models.enum_models import JobType
+
+        shots = [f"shot_{i}" for i in range(200)]
+        rows, edges = DagEngine._plan_jobs("run_x", {"shots": shots})
+        by_id = {r["id"]: r for r in rows}
+        videos = [r for r in rows if r["job_type"] == JobType.render_video]
+        assert len(videos) == 200
+        assert {r["shot_id"] for r in videos} == set(shots)
+
+        # Each lipsync job waits on the run-level DSL job only.
+        compile_id = next(r["id"] for r in rows if r["job_type"] == JobType.compile_dsl)
+        lipsync_ids = {r["id"] for r in rows if r["job_type"] == JobType.render_lipsync}
+        assert {dep for job, dep in edges if job in lipsync_ids} == {compile_id}
+
+        # evaluate_quality fans in over every per-shot render job.
+        eval_id = next(r["id"] for r in rows if r["job_type"] == JobType.evaluate_quality)
+        upstream = [by_id[dep] for job, dep in edges if job == eval_id]
+        assert len(upstream) == 400
+
+    def test_plan_jobs_per_shot_deps_stay_within_shot(self):
+        from app.modules.orchestrator.dag_engine import DagEngine
+
+        plan = {
+            "shots": [{"shot_id": "s1", "payload": {"k": 1}}, "s2"],
+            "steps": [
+                {"job_type": "compile_dsl"},
+                {"job_type": "render_video", "per_shot": True},
+                {"job_type": "render_lipsync", "per_shot": True, "depends_on": ["render_video"]},
+                {"job_type": "compose_final"},
+            ],
+        }
+        rows, edges = DagEngine._plan_jobs("run_y", plan)
+        by_id = {r["id"]: r for r in rows}
+        for job, dep in edges:
+            if by_id[job]["job_type"].value == "render_lipsync":
+                assert by_id[dep]["shot_id"] == by_id[job]["shot_id"]
+        assert by_id[next(r["id"] for r in rows if r["shot_id"] == "s1")]["payload_json"] == {"k": 1}
+        compose_id = next(r["id"] for r in rows if r["job_type"].value == "compose_final")
+        assert len([d for j, d in edges if j == compose_id]) == 2
+
+
+class TestDagReadiness:
+    def _state(self):
+        from app.modules.orchestrator.dag_engine import DagReadiness
+        from ainern2d_shared.ainer_db_models.enum_models import JobStatus
+
+        # a -> (b, c) -> d
+        statuses = {jid: JobStatus.queued for jid in ("a", "b", "c", "d")}
+        edges = [("b", "a"), ("c", "a"), ("d", "b"), ("d", "c")]
+        return DagReadiness(statuses, edges)
+
+    def test_initial_ready_set_is_roots(self):
+        state = self._state()
+        assert state.ready == {"a"}
+        assert not state.is_complete()
+
+    def test_rollups_are_computed_from_the_statuses(self):
+        from app.modules.orchestrator.dag_engine import DagReadiness
+        from ainern2d_shared.ainer_db_models.enum_models import JobStatus
+
+        statuses = {"a": JobStatus.success, "b": JobStatus.success, "c": JobStatus.failed, "d": JobStatus.queued}
+        state = DagReadiness(statuses, [("b", "a"), ("c", "a"), ("d", "b"), ("d", "c")])
+        assert state.ready == set()
+        assert state.pending_upstream == {"a": 0, "b": 0, "c": 0, "d": 1}
+        assert (state.terminal_count, state.success_count) == (3, 2)
+        assert not state.is_complete()
+
+
+class TestDagProgress:
+    """Readiness counters kept on the rows by the engine's session."""
+
+    _STEPS = {"steps": [
+        {"job_type": "ingest_story"},
+        {"job_type": "route_language", "depends_on": ["ingest_story"]},
+        {"job_type": "extract_entities", "depends_on": ["ingest_story"]},
+        {"job_type": "compose_final", "depends_on": ["route_language", "extract_entities"]},
+    ]}
+
+    def _sql(self, tmp_path):
+        from sqlalchemy import create_engine
+
+        from ainern2d_shared.ainer_db_models.pipeline_models import Job, JobDependency, RenderRun
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'dag.db'}")
+        for model in (RenderRun, Job, JobDependency):
+            model.__table__.create(engine)
+        return engine
+
+    def _build(self, db, run_id="run_dag"):
+        """Build the diamond DAG on a fresh run; returns the engine and jobs by type name."""
+        from app.modules.orchestrator.dag_engine import DagEngine
+        from ainern2d_shared.ainer_db_models.pipeline_models import RenderRun
+
+        engine = DagEngine(db)
+        db.add(RenderRun(id=run_id, tenant_id="t", project_id="p", chapter_id="ch"))
+        db.flush()
+        jobs = {job.job_type.value: job for job in engine.build_dag(run_id, self._STEPS)}
+        db.commit()
+        return engine, jobs
+
+    @staticmethod
+    def _rollups(db, run_id="run_dag"):
+        from sqlalchemy import select
+
+        from ainern2d_shared.ainer_db_models.pipeline_models import RenderRun
+
+        return tuple(db.execute(
+            select(RenderRun.dag_jobs, RenderRun.dag_jobs_terminal, RenderRun.dag_jobs_succeeded)
+            .where(RenderRun.id == run_id)
+        ).one())
+
+    @staticmethod
+    def _ready(engine, run_id="run_dag"):
+        return {job.job_type.value for job in engine.resolve_next(run_id)}
+
+    def test_success_releases_downstream_and_moves_the_rollups(self, tmp_path):
+        from sqlalchemy.orm import Session
+
+        from ainern2d_shared.ainer_db_models.enum_models import JobStatus
+
+        with Session(self._sql(tmp_path)) as db:
+            engine, jobs = self._build(db)
+            assert self._rollups(db) == (4, 0, 0)
+            assert self._ready(engine) == {"ingest_story"}
+
+            jobs["ingest_story"].status = JobStatus.enqueued
+            db.commit()
+            assert self._ready(engine) == set()
+
+            jobs["ingest_story"].status = JobStatus.success
+            db.commit()
+            assert self._ready(engine) == {"route_language", "extract_entities"}
+
+            jobs["route_language"].status = JobStatus.success
+            jobs["extract_entities"].status = JobStatus.failed
+            db.commit()
+            assert self._ready(engine) == set()
+            assert self._rollups(db) == (4, 3, 2)
+            assert not engine.is_complete("run_dag")
+
+            jobs["extract_entities"].status = JobStatus.success
+            jobs["compose_final"].status = JobStatus.success
+            db.commit()
+            assert engine.is_complete("run_dag") and engine.all_succeeded("run_dag")
+
+    def test_leaving_success_rearms_downstream(self, tmp_path):
+        from sqlalchemy.orm import Session
+
+        from ainern2d_shared.ainer_db_models.enum_models import JobStatus
+
+        with Session(self._sql(tmp_path)) as db:
+            engine, jobs = self._build(db)
+            jobs["ingest_story"].status = JobStatus.success
+            db.commit()
+            jobs["ingest_story"].status = JobStatus.retrying
+            db.commit()
+            assert self._ready(engine) == set()
+            assert self._rollups(db) == (4, 0, 0)
+
+    def test_rollback_leaves_the_counters_untouched(self, tmp_path):
+        from sqlalchemy.orm import Session
+
+        from ainern2d_shared.ainer_db_models.enum_models import JobStatus
+
+        with Session(self._sql(tmp_path)) as db:
+            engine, jobs = self._build(db)
+            jobs["ingest_story"].status = JobStatus.success
+            db.flush()
+            assert self._rollups(db) == (4, 1, 1)
+            db.rollback()
+            assert self._rollups(db) == (4, 0, 0)
+            assert self._ready(engine) == {"ingest_story"}
+
+    def test_a_status_another_writer_committed_is_not_counted_twice(self, tmp_path):
+        from sqlalchemy.orm import Session
+
+        from ainern2d_shared.ainer_db_models.enum_models import JobStatus
+        from ainern2d_shared.ainer_db_models.pipeline_models import Job
+        from ainern2d_shared.db.dag_progress import track_dag_progress
+
+        sql = self._sql(tmp_path)
+        with Session(sql) as db, Session(sql) as hub:
+            engine, jobs = self._build(db)
+            # The worker-hub callback records the success first ...
+            track_dag_progress(hub)
+            hub.get(Job, jobs["ingest_story"].id).status = JobStatus.success
+            hub.commit()
+            # ... and the orchestrator, holding the stale row, writes it again.
+            jobs["ingest_story"].status = JobStatus.success
+            db.commit()
+            assert self._rollups(db) == (4, 1, 1)
+            assert self._ready(engine) == {"route_language", "extract_entities"}
+
+    def test_runs_without_counters_are_seeded_on_first_use(self, tmp_path):
+        from sqlalchemy import update
+        from sqlalchemy.orm import Session
+
+        from ainern2d_shared.ainer_db_models.enum_models import JobStatus
+        from ainern2d_shared.ainer_db_models.pipeline_models import Job, RenderRun
+
+        with Session(self._sql(tmp_path)) as db:
+            engine, jobs = self._build(db)
+            # A run written before the counters existed.
+            db.execute(update(RenderRun).values(dag_jobs=0, dag_jobs_terminal=0, dag_jobs_succeeded=0))
+            db.execute(update(Job).values(pending_upstream=None))
+            db.execute(update(Job).where(Job.id == jobs["ingest_story"].id).values(status=JobStatus.success))
+            db.commit()
+            db.expire_all()
+
+            assert self._ready(engine) == {"route_language", "extract_entities"}
+            assert self._rollups(db) == (4, 1, 1)
+
+    def test_only_the_engines_session_is_tracked(self, tmp_path):
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+
+        from app.modules.orchestrator.dag_engine import DagEngine
+        from ainern2d_shared.db import dag_progress
+
+        sql = self._sql(tmp_path)
+        with Session(sql) as db, Session(sql) as other:
+            DagEngine(db)
+            DagEngine(db)
+            assert event.contains(db, "after_flush", dag_progress._apply_transitions)
+            assert not event.contains(other, "after_flush", dag_progress._apply_transitions)
+            assert not event.contains(Session, "after_flush", dag_progress._apply_transitions)
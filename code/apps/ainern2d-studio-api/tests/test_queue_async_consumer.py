@@ -0,0 +1,135 @@
+"""Unit tests for ainern2d_shared.queue.aio_consumer.AsyncQueueConsumer."""
+from __future__ import annotations
+
+import asyncio
+import json
+
+from ainern2d_shared.queue.aio_consumer import AsyncQueueConsumer
+
+
+class _FakeMessage:
+    def __init__(self, payload: dict, redelivered: bool = False):
+        self.body = json.dumps(payload).encode("utf-8")
+        self.redelivered = redelivered
+        self.acked = False
+        self.nacked: bool | None = None
+
+    async def ack(self):
+        self.acked = True
+
+    async def nack(self, requeue: bool = True):
+        self.nacked = requeue
+
+
+class _FakeQueue:
+    def __init__(self, messages):
+        self.messages = messages
+        self.cancelled = False
+
+    async def consume(self, callback):
+        async def _deliver():
+            for msg in self.messages:
+                await callback(msg)
+        self._feeder = asyncio.create_task(_deliver())
+        return "ctag"
+
+    async def cancel(self, tag):
+        self.cancelled = True
+
+
+class _FakeChannel:
+    def __init__(self, queue):
+        self.queue = queue
+        self.prefetch = None
+
+    async def set_qos(self, prefetch_count: int):
+        self.prefetch = prefetch_count
+
+    async def declare_queue(self, name, durable):
+        return self.queue
+
+
+class _FakeConnection:
+    def __init__(self, channel):
+        self._channel = channel
+        self.closed = False
+
+    async def channel(self):
+        return self._channel
+
+    async def close(self):
+        self.closed = True
+
+
+def _consumer(messages, max_in_flight):
+    queue = _FakeQueue(messages)
+    channel = _FakeChannel(queue)
+    conn = _FakeConnection(channel)
+
+    async def _connect(_url):
+        return conn
+
+    consumer = AsyncQueueConsumer("amqp://x", max_in_flight=max_in_flight, connect=_connect)
+    return consumer, channel, conn
+
+
+def test_runs_handlers_concurrently_up_to_limit_and_acks_after_handler():
+    messages = [_FakeMessage({"i": i}) for i in range(6)]
+    consumer, channel, conn = _consumer(messages, max_in_flight=3)
+    peak = 0
+    running = 0
+    seen: list[int] = []
+
+    async def handler(payload):
+        nonlocal peak, running
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        seen.append(payload["i"])
+        if len(seen) == len(messages):
+            consumer.request_stop()
+
+    asyncio.run(consumer.run("job.dispatch", handler))
+
+    assert channel.prefetch == 3
+    assert peak == 3
+    assert sorted(seen) == list(range(6))
+    assert all(m.acked for m in messages)
+    assert conn.closed and channel.queue.cancelled
+
+
+def test_failed_handler_is_requeued_once():
+    first = _FakeMessage({"i": 0})
+    second = _FakeMessage({"i": 1}, redelivered=True)
+    consumer, _channel, _conn = _consumer([first, second], max_in_flight=2)
+    calls = 0
+
+    async def handler(payload):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            asyncio.get_running_loop().call_soon(consumer.request_stop)
+        raise RuntimeError("boom")
+
+    asyncio.run(consumer.run("job.dispatch", handler))
+
+    assert first.nacked is True
+    assert second.nacked is False
+    assert not first.acked and not second.acked
+
+
+def test_stop_drains_in_flight_jobs():
+    messages = [_FakeMessage({"i": i}) for i in range(2)]
+    consumer, _channel, _conn = _consumer(messages, max_in_flight=2)
+    started = 0
+
+    async def handler(payload):
+        nonlocal started
+        started += 1
+        if started == 2:
+            consumer.request_stop()
+        await asyncio.sleep(0.02)
+
+    asyncio.run(consumer.run("job.dispatch", handler))
+    assert all(m.acked for m in messages)
@@ -0,0 +1,232 @@
+"""Unit tests for the pooled RabbitMQ publisher in ainern2d_shared.queue.rabbitmq."""
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from pika import spec
+from pika.exceptions import StreamLostError
+
+from ainern2d_shared.queue.rabbitmq import PublishError, PublisherPool
+
+
+class _FakeChannel:
+    def __init__(self, conn: "_FakeConnection"):
+        self.conn = conn
+        self.is_open = True
+        self.declared: list[str] = []
+        self.published: list[tuple[str, bytes]] = []
+        self.commits = 0
+        self.confirm = False
+        self.tx = False
+
+    def confirm_delivery(self):
+        self.confirm = True
+
+    def tx_select(self):
+        self.tx = True
+
+    def tx_commit(self):
+        self.commits += 1
+
+    def queue_declare(self, queue: str, durable: bool):
+        self.declared.append(queue)
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        if self.conn.fail_next:
+            self.conn.fail_next = False
+            self.conn.is_open = False
+            raise StreamLostError("connection reset")
+        self.published.append((routing_key, body))
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.is_open = True
+        self.fail_next = False
+        self.channels: list[_FakeChannel] = []
+
+    def channel(self):
+        ch = _FakeChannel(self)
+        self.channels.append(ch)
+        return ch
+
+    def close(self):
+        self.is_open = False
+
+
+class _Factory:
+    def __init__(self):
+        self.connections: list[_FakeConnection] = []
+
+    def __call__(self):
+        conn = _FakeConnection()
+        self.connections.append(conn)
+        return conn
+
+
+def test_connection_reused_and_declare_memoized():
+    factory = _Factory()
+    pool = PublisherPool("amqp://x", connection_factory=factory)
+    for i in range(5):
+        pool.publish("job.status", {"i": i})
+
+    assert len(factory.connections) == 1
+    ch = factory.connections[0].channels[0]
+    assert ch.confirm is True
+    assert ch.declared == ["job.status"]
+    assert len(ch.published) == 5
+
+
+def test_each_thread_gets_its_own_lane():
+    factory = _Factory()
+    pool = PublisherPool("amqp://x", connection_factory=factory)
+    pool.publish("a", "main")
+    t = threading.Thread(target=pool.publish, args=("a", "worker"))
+    t.start()
+    t.join()
+    assert len(factory.connections) == 2
+
+
+def test_batched_publishes_use_confirms_and_flush_when_full():
+    factory = _Factory()
+    pool = PublisherPool("amqp://x", flush_window_ms=60_000, max_batch=3, connection_factory=factory)
+    for i in range(4):
+        pool.publish("skill.events", {"i": i})
+    ch = factory.connections[0].channels[0]
+    assert ch.confirm is True and ch.tx is False
+    assert len(ch.published) == 3 and ch.commits == 0
+
+    pool.flush()
+    assert len(ch.published) == 4
+    pool.close()
+
+
+def test_idle_buffer_is_flushed_without_another_publish():
+    factory = _Factory()
+    pool = PublisherPool("amqp://x", flush_window_ms=20, max_batch=100, connection_factory=factory)
+    pool.publish("skill.events", {"i": 0})
+    pool.publish("skill.events", {"i": 1})
+
+    deadline = time.monotonic() + 2
+    published = []
+    while time.monotonic() < deadline and len(published) < 2:
+        time.sleep(0.01)
+        published = [m for conn in factory.connections for ch in conn.channels for m in ch.published]
+    assert [body for _key, body in published] == [b'{"i": 0}', b'{"i": 1}']
+    # sent by the flusher over its own lane, not the publishing thread's
+    assert factory.connections[0].channels[0].published == []
+    pool.close()
+
+
+def test_reconnects_after_connection_loss():
+    factory = _Factory()
+    pool = PublisherPool("amqp://x", connection_factory=factory)
+    pool.publish("job.status", "first")
+    factory.connections[0].fail_next = True
+    pool.publish("job.status", "second")
+
+    assert len(factory.connections) == 2
+    assert factory.connections[1].channels[0].published == [("job.status", b"second")]
+
+
+def test_gives_up_after_max_retries():
+    class _AlwaysFailing(_Factory):
+        def __call__(self):
+            conn = super().__call__()
+            conn.fail_next = True
+            return conn
+
+    pool = PublisherPool("amqp://x", max_retries=1, connection_factory=_AlwaysFailing())
+    with pytest.raises(StreamLostError):
+        pool.publish("job.status", "x")
+
+
+class _PipelinedChannel(_FakeChannel):
+    """Exposes pika's underlying channel; the broker nacks the bodies in ``nack``."""
+
+    def __init__(self, conn: "_PipelinedConnection"):
+        super().__init__(conn)
+        self.on_confirm = None
+        self.pending: list[tuple[int, bytes]] = []
+        self._tag = 0
+        self._impl = SimpleNamespace(confirm_delivery=self._confirm_delivery)
+
+    def _confirm_delivery(self, ack_nack_callback):
+        self.on_confirm = ack_nack_callback
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        super().basic_publish(exchange, routing_key, body, properties)
+        self._tag += 1
+        self.pending.append((self._tag, body))
+
+    def settle(self):
+        pending, self.pending = self.pending, []
+        for tag, body in pending:
+            if body in self.conn.nack:
+                self.conn.nack.discard(body)
+                method = spec.Basic.Nack(delivery_tag=tag)
+            else:
+                method = spec.Basic.Ack(delivery_tag=tag)
+            self.on_confirm(SimpleNamespace(method=method))
+
+
+class _PipelinedConnection(_FakeConnection):
+    def __init__(self, nack: set[bytes]):
+        super().__init__()
+        self.nack = nack
+        self.waits = 0
+
+    def channel(self):
+        ch = _PipelinedChannel(self)
+        self.channels.append(ch)
+        return ch
+
+    def process_data_events(self, time_limit=None):
+        self.waits += 1
+        for ch in self.channels:
+            ch.settle()
+
+
+def test_batch_confirms_are_awaited_once_and_only_nacked_messages_are_resent():
+    conn = _PipelinedConnection(nack={b'{"i": 1}'})
+    pool = PublisherPool("amqp://x", flush_window_ms=60_000, max_batch=3, connection_factory=lambda: conn)
+    for i in range(3):
+        pool.publish("skill.events", {"i": i})
+
+    ch = conn.channels[0]
+    assert ch.confirm is False  # BlockingChannel's per-message confirms stay off
+    assert [body for _key, body in ch.published] == [b'{"i": 0}', b'{"i": 1}', b'{"i": 2}', b'{"i": 1}']
+    assert conn.waits == 2
+    pool.close()
+
+
+def test_undelivered_buffer_is_kept_and_its_failure_raised_to_the_publisher():
+    class _Toggle(_Factory):
+        failing = False
+
+        def __call__(self):
+            conn = super().__call__()
+            conn.fail_next = self.failing
+            return conn
+
+    factory = _Toggle()
+    pool = PublisherPool("amqp://x", flush_window_ms=60_000, max_retries=1, connection_factory=factory)
+    pool.publish("skill.events", {"i": 0})
+    pool.publish("skill.events", {"i": 1})
+
+    factory.failing = True
+    flusher = threading.Thread(target=pool._flush_idle, args=(0.0,))
+    flusher.start()
+    flusher.join()
+
+    with pytest.raises(PublishError):
+        pool.publish("skill.events", {"i": 2})
+
+    factory.failing = False
+    pool.flush()
+    published = [m for conn in factory.connections for ch in conn.channels for m in ch.published]
+    assert [body for _key, body in published] == [b'{"i": 0}', b'{"i": 1}']
+    pool.close()
@@ -0,0 +1,58 @@
+"""Unit tests for ainern2d_shared.utils.rank_fusion."""
+from __future__ import annotations
+
+import pytest
+
+from ainern2d_shared.utils.rank_fusion import (
+    StageTimer,
+    min_max_normalize,
+    ranked,
+    reciprocal_rank_fusion,
+    weighted_score_fusion,
+)
+
+
+def test_rrf_rewards_documents_ranked_by_both_sources():
+    fused = reciprocal_rank_fusion(
+        {"keyword": ["a", "b", "c"], "vector": ["b", "d", "a"]},
+        k=60,
+    )
+    assert ranked(fused)[0][0] == "b"
+    assert fused["a"] == pytest.approx(1 / 61 + 1 / 63)
+    assert fused["d"] == pytest.approx(1 / 62)
+
+
+def test_rrf_weights_can_mute_a_source():
+    fused = reciprocal_rank_fusion(
+        {"keyword": ["a"], "vector": ["b"]},
+        weights={"keyword": 1.0, "vector": 0.0},
+    )
+    assert fused == {"a": pytest.approx(1 / 61)}
+
+
+def test_min_max_normalize_handles_flat_and_empty_scores():
+    assert min_max_normalize({}) == {}
+    assert min_max_normalize({"a": 3.0, "b": 3.0}) == {"a": 1.0, "b": 1.0}
+    assert min_max_normalize({"a": 2.0, "b": 4.0, "c": 3.0}) == {"a": 0.0, "b": 1.0, "c": 0.5}
+
+
+def test_weighted_fusion_puts_bm25_and_cosine_on_one_scale():
+    fused = weighted_score_fusion(
+        {"keyword": {"a": 12.0, "b": 4.0}, "vector": {"b": 0.9, "c": 0.1}},
+        {"keyword": 0.4, "vector": 0.6},
+    )
+    assert fused["a"] == pytest.approx(0.4)
+    assert fused["b"] == pytest.approx(0.6)
+    assert fused["c"] == pytest.approx(0.0)
+
+
+def test_stage_timer_accumulates_and_reports_total():
+    timer = StageTimer()
+    with timer.stage("keyword"):
+        pass
+    timer.add("vector", 1.5)
+    timer.add("vector", 1.0)
+    report = timer.report()
+    assert set(report) == {"keyword", "vector", "total"}
+    assert report["vector"] == 2.5
+    assert report["total"] >= report["keyword"]
@@ -0,0 +1,165 @@
+"""Unit tests for the buffered SKILL state-event writer."""
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from ainern2d_shared.ainer_db_models.pipeline_models import WorkflowEvent
+
+from ainern2d_shared.services.base_skill import BaseSkillService, SkillContext
+from ainern2d_shared.utils.time import utcnow
+from ainern2d_shared.services.skill_events import (
+    SkillEventBuffer,
+    add_skill_event_observer,
+    remove_skill_event_observer,
+)
+
+
+class _StepSkill(BaseSkillService[dict, dict]):
+    skill_id = "skill_test"
+    skill_name = "StepSkill"
+
+    def execute(self, input_dto: dict, ctx: SkillContext) -> dict:
+        for a, b in (("INIT", "PRECHECKING"), ("PRECHECKING", "MATCHING"), ("MATCHING", "READY")):
+            self._record_state(ctx, a, b)
+            assert _event_types(self.db) == []  # nothing written mid-skill
+        if input_dto.get("fail"):
+            raise ValueError("boom")
+        return {"ok": True}
+
+
+@pytest.fixture()
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'events.db'}")
+    WorkflowEvent.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _event_types(db: Session) -> list[str]:
+    # A fresh session only sees committed rows.
+    with Session(db.get_bind()) as reader:
+        return list(reader.scalars(select(WorkflowEvent.event_type).order_by(WorkflowEvent.occurred_at)))
+
+
+@pytest.fixture()
+def ctx():
+    return SkillContext(
+        tenant_id="t1", project_id="p1", run_id="run1",
+        trace_id="tr1", correlation_id="co1", idempotency_key="idem1",
+    )
+
+
+@pytest.fixture()
+def observed():
+    events: list[dict] = []
+    add_skill_event_observer(events.append)
+    yield events
+    remove_skill_event_observer(events.append)
+
+
+def _inserted_rows(db: MagicMock) -> list[dict]:
+    rows: list[dict] = []
+    for call in db.execute.call_args_list:
+        rows.extend(call.args[1])
+    return rows
+
+
+def test_run_commits_state_events_once_in_its_own_session(db, ctx, observed):
+    assert _StepSkill(db).run({}, ctx) == {"ok": True}
+
+    assert not db.in_transaction()  # the caller's session is untouched
+    types = _event_types(db)
+    assert types == [
+        "skill_test.state.in_progress",
+        "skill_test.state.prechecking",
+        "skill_test.state.matching",
+        "skill_test.state.ready",
+        "skill_test.state.completed",
+    ]
+    assert [e["event_type"] for e in observed] == types
+    assert observed[0]["run_id"] == "run1"
+
+
+def test_failed_run_events_survive_the_callers_rollback(db, ctx):
+    db.execute(select(WorkflowEvent.id))  # the caller has an open transaction
+    with pytest.raises(ValueError):
+        _StepSkill(db).run({"fail": True}, ctx)
+    db.rollback()
+
+    assert _event_types(db)[-2:] == ["skill_test.state.ready", "skill_test.state.failed"]
+    with Session(db.get_bind()) as reader:
+        failed = reader.scalars(
+            select(WorkflowEvent).filter_by(event_type="skill_test.state.failed")
+        ).one()
+        assert failed.payload_json["error"] == "boom"
+
+
+class _WritingSkill(BaseSkillService[dict, dict]):
+    skill_id = "skill_writer"
+    skill_name = "WritingSkill"
+
+    def execute(self, input_dto: dict, ctx: SkillContext) -> dict:
+        # business rows, like skill_21's continuity profiles: added, only flushed
+        self.db.add(WorkflowEvent(
+            id="BIZ1", tenant_id=ctx.tenant_id, project_id=ctx.project_id, idempotency_key="biz1",
+            event_type="business.row", producer="skill_writer",
+            occurred_at=utcnow(), payload_json={},
+        ))
+        self.db.flush()
+        return {"ok": True}
+
+
+def test_run_commits_the_skills_business_rows(db, ctx):
+    _WritingSkill(db).run({}, ctx)
+    db.close()  # like get_db(): the caller never commits
+
+    assert "business.row" in _event_types(db)
+
+
+def test_falls_back_to_a_savepoint_when_its_own_session_fails():
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "sqlite"
+    broken = MagicMock()
+    broken.return_value.__enter__.return_value.begin.side_effect = RuntimeError("fk violation")
+    buffer = SkillEventBuffer(db, session_factory=broken)
+    buffer.add({
+        "id": "e1", "idempotency_key": "k", "event_type": "x", "producer": "p",
+        "occurred_at": MagicMock(isoformat=lambda: ""), "payload_json": {},
+    })
+    assert buffer.flush() == 1
+    assert db.begin_nested.call_count == 1 and len(_inserted_rows(db)) == 1
+
+
+def test_buffer_flushes_on_size_and_skips_duplicate_keys():
+    db = MagicMock()
+    events_db = MagicMock()
+    factory = MagicMock()
+    factory.return_value.__enter__.return_value = events_db
+    buffer = SkillEventBuffer(db, max_events=2, max_age_s=60, session_factory=factory)
+    for i, key in enumerate(["a", "a", "b", "c"]):
+        buffer.add({
+            "id": f"e{i}", "idempotency_key": key, "event_type": "x", "producer": "p",
+            "occurred_at": MagicMock(isoformat=lambda: ""), "payload_json": {},
+        })
+    assert events_db.execute.call_count == 1 and len(buffer) == 1
+    assert [r["idempotency_key"] for r in _inserted_rows(events_db)] == ["a", "b"]
+    db.execute.assert_not_called()
+
+    events_db.begin.side_effect = RuntimeError("connection lost")
+    db.begin_nested.side_effect = RuntimeError("savepoint failed")
+    assert buffer.flush() == 0 and len(buffer) == 0
+    assert buffer.written == 2
+
+
+def test_observer_store_keeps_only_recent_runs():
+    from app.api.deps import _ObserverStore
+
+    store = _ObserverStore(max_runs=2)
+    for run_id in ("r1", "r2", "r1", "r3"):
+        store.append({"run_id": run_id, "event_type": "x"})
+    assert list(store.events) == ["r1", "r3"]
+    assert len(store.events["r1"]) == 2
@@ -0,0 +1,128 @@
+"""Unit tests for the streaming storage client in ainern2d_shared.storage."""
+from __future__ import annotations
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from ainern2d_shared.storage.client import (
+    ChecksumMismatchError,
+    StorageClient,
+    file_sha256,
+    get_storage_client,
+)
+from ainern2d_shared.storage.local import LocalStorageBackend
+from ainern2d_shared.storage.s3 import S3Client
+
+
+class _TracingBackend(LocalStorageBackend):
+    """Records part sizes and the peak number of parts in flight."""
+
+    def __init__(self, root: str):
+        super().__init__(root)
+        self.parts: list[int] = []
+        self.in_flight = 0
+        self.peak = 0
+
+    def upload_part(self, bucket, key, upload_id, number, data):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            self.parts.append(len(data))
+            return super().upload_part(bucket, key, upload_id, number, data)
+        finally:
+            self.in_flight -= 1
+
+
+def _payload(tmp_path, size: int) -> str:
+    path = tmp_path / "src.bin"
+    path.write_bytes(os.urandom(size))
+    return str(path)
+
+
+def test_multipart_round_trip_is_bounded_and_verified(tmp_path):
+    backend = _TracingBackend(str(tmp_path / "store"))
+    client = StorageClient(backend, "bucket", part_size=1000, max_concurrency=3)
+    src = _payload(tmp_path, 10_500)
+
+    stored = asyncio.run(client.upload_file(src, "video/a.mp4"))
+    assert stored.uri == "s3://bucket/video/a.mp4"
+    assert stored.sha256 == file_sha256(src)
+    assert len(backend.parts) == 11 and max(backend.parts) == 1000
+    assert backend.peak <= 3
+    assert not os.listdir(tmp_path / "store" / ".uploads")
+
+    dest = str(tmp_path / "out.mp4")
+    asyncio.run(client.download_file(stored.uri, dest))
+    assert file_sha256(dest) == stored.sha256
+
+
+def test_ranged_download_and_small_objects(tmp_path):
+    client = StorageClient(LocalStorageBackend(str(tmp_path / "store")), "bucket", part_size=64)
+    src = _payload(tmp_path, 300)
+    asyncio.run(client.upload_file(src, "clip.bin"))
+
+    dest = str(tmp_path / "range.bin")
+    asyncio.run(client.download_file("clip.bin", dest, byte_range=(50, 209)))
+    with open(src, "rb") as fh:
+        fh.seek(50)
+        assert open(dest, "rb").read() == fh.read(160)
+
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    asyncio.run(client.upload_file(str(empty), "empty.bin"))
+    asyncio.run(client.download_file("empty.bin", str(tmp_path / "empty.out")))
+    assert os.path.getsize(tmp_path / "empty.out") == 0
+
+
+def test_checksum_mismatch_removes_the_download(tmp_path):
+    root = tmp_path / "store"
+    client = StorageClient(LocalStorageBackend(str(root)), "bucket", part_size=128)
+    asyncio.run(client.upload_file(_payload(tmp_path, 500), "x.bin"))
+    (root / "bucket" / "x.bin").write_bytes(b"corrupted" * 10)
+
+    dest = tmp_path / "x.out"
+    with pytest.raises(ChecksumMismatchError):
+        asyncio.run(client.download_file("s3://bucket/x.bin", str(dest)))
+    assert not dest.exists()
+
+
+def test_failed_part_aborts_the_upload(tmp_path):
+    class _Flaky(LocalStorageBackend):
+        def upload_part(self, bucket, key, upload_id, number, data):
+            if number == 3:
+                raise ConnectionError("reset")
+            return super().upload_part(bucket, key, upload_id, number, data)
+
+    root = tmp_path / "store"
+    client = StorageClient(_Flaky(str(root)), "bucket", part_size=100)
+    with pytest.raises(ConnectionError):
+        asyncio.run(client.upload_file(_payload(tmp_path, 1000), "f.bin"))
+    assert not os.listdir(root / ".uploads")
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(client.stat("f.bin"))
+
+
+def test_settings_share_one_backend(tmp_path):
+    cfg = SimpleNamespace(
+        storage_backend="local",
+        storage_local_root=str(tmp_path / "store"),
+        storage_part_size_mb=1,
+        storage_max_concurrency=2,
+        s3_bucket="artifacts",
+    )
+    a, b = S3Client(cfg), get_storage_client(cfg)
+    assert a.backend is b.backend
+    assert (a.bucket, a.part_size, a.max_concurrency) == ("artifacts", 1024 * 1024, 2)
+
+    src = _payload(tmp_path, 10)
+    asyncio.run(a.upload_file(src, "k.bin"))
+    local = asyncio.run(b.download_to_temp("s3://artifacts/k.bin"))
+    try:
+        assert open(local, "rb").read() == open(src, "rb").read()
+        assert local.endswith(".bin")
+    finally:
+        os.unlink(local)
+    assert asyncio.run(b.download_to_temp(f"file://{src}")) == src
@@ -0,0 +1,134 @@
+"""Unit tests for the chapter-level TTS batch job: enqueue payload and event fan-out."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from ainern2d_shared.ainer_db_models.enum_models import JobStatus, JobType, RenderStage
+from ainern2d_shared.ainer_db_models.pipeline_models import Job, TrackRun, TrackUnit
+from ainern2d_shared.schemas.events import EventEnvelope
+
+from app.api.v1 import orchestrator, run_tracks
+
+
+def _run():
+    return SimpleNamespace(
+        id="run1", tenant_id="t", project_id="p", trace_id="tr", correlation_id="co", chapter_id="ch1",
+    )
+
+
+def _unit(i: int) -> TrackUnit:
+    return TrackUnit(
+        id=f"tu{i}", track_run_id="trk1", unit_ref_id=f"line_{i}", dialogue_id=f"dlg{i}",
+        shot_id=f"shot{i}", planned_start_ms=i * 1000, planned_end_ms=(i + 1) * 1000,
+    )
+
+
+def test_batch_lines_carry_the_full_unit_payload(monkeypatch):
+    published: list[dict] = []
+    monkeypatch.setattr(run_tracks, "publish", lambda _topic, body: published.append(body))
+    monkeypatch.setattr(run_tracks, "_next_attempt_no", lambda _db, _unit_id: 1)
+    track_run = TrackRun(id="trk1", track_type="tts", worker_type="worker-audio-tts", model_profile_id="mp1")
+    payloads = [
+        (_unit(i), {
+            "text": f"line {i}", "voice_id": "female_zh", "worker_type": "worker-audio-tts",
+            "style": "calm", "artifact_path_hint": f"ch1/tts/line_{i}",
+            "lineage_tags": {"track_unit_id": f"tu{i}", "chapter_id": "ch1"},
+        })
+        for i in range(2)
+    ]
+    db = MagicMock()
+
+    job = run_tracks._enqueue_tts_batch_job(db, _run(), track_run, payloads)
+
+    assert job.payload_json["worker_type"] == run_tracks._TTS_BATCH_WORKER
+    lines = job.payload_json["lines"]
+    assert [line["track_unit_id"] for line in lines] == ["tu0", "tu1"]
+    assert lines[1]["style"] == "calm" and lines[1]["voice_id"] == "female_zh"
+    assert lines[1]["artifact_path_hint"] == "ch1/tts/line_1"
+    assert lines[1]["lineage_tags"] == {"track_unit_id": "tu1", "chapter_id": "ch1"}
+    assert db.add.call_count == 3  # the job plus one attempt per unit
+    assert published[0]["payload"]["lines"] == lines
+
+
+def test_llm_unit_jobs_ask_for_token_streaming(monkeypatch):
+    published: list[dict] = []
+    monkeypatch.setattr(run_tracks, "publish", lambda _topic, body: published.append(body))
+    monkeypatch.setattr(run_tracks, "_next_attempt_no", lambda _db, _unit_id: 1)
+    subtitle = TrackRun(id="trk1", track_type="subtitle", worker_type="worker-llm")
+    tts = TrackRun(id="trk1", track_type="tts", worker_type="worker-audio-tts")
+
+    job = run_tracks._enqueue_unit_job(MagicMock(), _run(), subtitle, _unit(0), {"worker_type": "worker-llm"})
+    assert job.payload_json["stream"] is True and published[0]["payload"]["stream"] is True
+
+    job = run_tracks._enqueue_unit_job(MagicMock(), _run(), tts, _unit(1), {"worker_type": "worker-audio-tts"})
+    assert "stream" not in job.payload_json
+
+
+def test_only_default_tts_workers_are_batched():
+    assert "worker-audio-tts" in run_tracks._TTS_BATCHABLE_WORKERS
+    assert "worker-audio-tts-elevenlabs" not in run_tracks._TTS_BATCHABLE_WORKERS
+
+
+def _batch_job() -> Job:
+    return Job(
+        id="job_b", tenant_id="t", project_id="p", run_id="run1", job_type=JobType.synth_audio,
+        stage=RenderStage.execute, status=JobStatus.claimed,
+        payload_json={"lines": [{"track_unit_id": f"tu{i}", "text": f"line {i}"} for i in range(3)]},
+    )
+
+
+def _event(event_type: str, payload: dict) -> EventEnvelope:
+    return EventEnvelope(
+        event_type=event_type, producer="worker-audio-tts-batch", occurred_at=datetime.now(timezone.utc),
+        tenant_id="t", project_id="p", idempotency_key=f"idem_{event_type}", run_id="run1", job_id="job_b",
+        trace_id="tr", correlation_id="co", payload={"job_id": "job_b", **payload},
+    )
+
+
+def _db_with(job: Job, units: list[TrackUnit]) -> MagicMock:
+    track_run = TrackRun(id="trk1", track_type="tts")
+    rows = {(Job, job.id): job, (TrackRun, "trk1"): track_run, **{(TrackUnit, u.id): u for u in units}}
+    db = MagicMock()
+    db.get.side_effect = lambda model, key: rows.get((model, key))
+    return db
+
+
+def test_batch_event_fans_line_results_out_to_units(monkeypatch):
+    applied: list[tuple[str, str]] = []
+    monkeypatch.setattr(
+        orchestrator, "_apply_track_unit_success",
+        lambda db, run, tr, unit, job, result, now: applied.append(("ok", unit.id, result)) or True,
+    )
+    monkeypatch.setattr(
+        orchestrator, "_apply_track_unit_failure",
+        lambda db, run, tr, unit, job, code, message, now: applied.append(("failed", unit.id, message)),
+    )
+    monkeypatch.setattr(orchestrator, "_refresh_track_rollups", lambda db, run: None)
+    job = _batch_job()
+    db = _db_with(job, [_unit(0), _unit(1), _unit(2)])
+    event = _event("job.succeeded", {"output": {"lines": [
+        {"track_unit_id": "tu0", "status": "succeeded", "audio_uri": "s3://b/0.wav", "actual_duration_ms": 900},
+        {"track_unit_id": "tu1", "status": "failed", "error_message": "empty text"},
+    ]}})
+
+    assert orchestrator._handle_track_unit_job_event(db, event, SimpleNamespace(id="run1")) is True
+
+    assert job.status == JobStatus.success
+    ok = applied[0]
+    assert ok[:2] == ("ok", "tu0")
+    assert ok[2]["artifact_uri"] == "s3://b/0.wav" and ok[2]["output"]["duration_ms"] == 900
+    assert applied[1] == ("failed", "tu1", "empty text")
+    assert applied[2] == ("failed", "tu2", "batch line failed")  # missing from the result
+
+
+def test_batch_claim_marks_every_unit_running(monkeypatch):
+    monkeypatch.setattr(orchestrator, "_find_attempt_for_job", lambda db, job_id, unit_id=None: None)
+    job = _batch_job()
+    units = [_unit(0), _unit(1), _unit(2)]
+    run = SimpleNamespace(id="run1", status=None, stage=None)
+
+    assert orchestrator._handle_track_unit_job_event(_db_with(job, units), _event("job.claimed", {}), run) is True
+    assert job.status == JobStatus.claimed
+    assert [u.status for u in units] == ["running"] * 3
@@ -5,7 +5,7 @@ from datetime import datetime, timezone
 from fastapi import APIRouter
 
 from ainern2d_shared.config.setting import settings
-from ainern2d_shared.queue.rabbitmq import RabbitMQPublisher
+from ainern2d_shared.queue.rabbitmq import get_publisher
 from ainern2d_shared.queue.topics import SYSTEM_TOPICS
 from ainern2d_shared.schemas.events import EventEnvelope
 from ainern2d_shared.schemas.worker import WorkerResult
@@ -67,9 +67,7 @@ def worker_result_callback(result: WorkerResult) -> dict[str, object]:
 		"result_event": event.model_dump(mode="json"),
 	}
 	try:
-		publisher = RabbitMQPublisher(settings.rabbitmq_url)
-		publisher.publish(SYSTEM_TOPICS.JOB_STATUS, event.model_dump(mode="json"))
-		publisher.close()
+		get_publisher(settings.rabbitmq_url).publish(SYSTEM_TOPICS.JOB_STATUS, event.model_dump(mode="json"))
 	except Exception as exc:
 		_logger.warning("publish callback job.status failed reason={}", str(exc))
 	return {"status": "accepted", "event_type": event_type}
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import Field
+
+from ainern2d_shared.config.setting import settings
+from ainern2d_shared.schemas.base import BaseSchema
+
+from app.dispatcher.node_registry import NodeRegistry, RedisNodeRegistry
+from app.dispatcher.routing_table import RoutingTable
+
+router = APIRouter(prefix="/internal/nodes", tags=["worker-hub"])
+
+_routing = RoutingTable()
+
+
+class NodeRegisterRequest(BaseSchema):
+    node_id: str
+    worker_type: str
+    capacity: int = Field(default=1, ge=1)
+    gpu_tier: str | None = None
+
+
+class NodeHeartbeatRequest(BaseSchema):
+    current_load: int | None = Field(default=None, ge=0)
+
+
+class NodeResponse(BaseSchema):
+    node_id: str
+    worker_type: str
+    ttl_sec: int
+
+
+def get_node_registry(request: Request) -> NodeRegistry | RedisNodeRegistry:
+    return request.app.state.node_registry
+
+
+@router.post("/register", response_model=NodeResponse, status_code=201)
+def register_node(
+    body: NodeRegisterRequest,
+    registry: NodeRegistry | RedisNodeRegistry = Depends(get_node_registry),
+) -> NodeResponse:
+    """Announce a node's capacity; it is claimable until its heartbeat lapses.
+
+    Capacity is booked under the worker family the hub resolves job types
+    to, so a ``worker-audio-tts`` node serves ``synth_audio`` jobs.
+    """
+    family = _routing.family(body.worker_type)
+    if family is None:
+        raise HTTPException(status_code=422, detail=f"unknown worker_type {body.worker_type!r}")
+    registry.register(body.node_id, family, body.capacity, gpu_tier=body.gpu_tier)
+    return NodeResponse(node_id=body.node_id, worker_type=family, ttl_sec=settings.worker_hub_node_ttl_sec)
+
+
+@router.post("/{node_id}/heartbeat", status_code=204)
+def heartbeat_node(
+    node_id: str,
+    body: NodeHeartbeatRequest | None = None,
+    registry: NodeRegistry | RedisNodeRegistry = Depends(get_node_registry),
+) -> None:
+    """Keep a node alive; 404 tells the node to register again."""
+    if not registry.heartbeat(node_id, body.current_load if body else None):
+        raise HTTPException(status_code=404, detail=f"node {node_id} is not registered")
+
+
+@router.delete("/{node_id}", status_code=204)
+def deregister_node(
+    node_id: str,
+    registry: NodeRegistry | RedisNodeRegistry = Depends(get_node_registry),
+) -> None:
+    registry.deregister(node_id)
@@ -2,63 +2,135 @@
 
 from __future__ import annotations
 
+import asyncio
+from typing import NamedTuple
+
+from ainern2d_shared.ainer_db_models.enum_models import JobStatus, JobType, RenderStage
 from ainern2d_shared.ainer_db_models.pipeline_models import Job
 from ainern2d_shared.config.setting import settings
-from ainern2d_shared.db.session import SessionLocal
 from ainern2d_shared.db.repositories.pipeline import JobRepository
-from ainern2d_shared.queue.rabbitmq import RabbitMQConsumer, RabbitMQPublisher
+from ainern2d_shared.queue.aio_consumer import AsyncQueueConsumer
+from ainern2d_shared.queue.lanes import lane_for
+from ainern2d_shared.queue.rabbitmq import get_publisher
 from ainern2d_shared.queue.topics import SYSTEM_TOPICS
 from ainern2d_shared.schemas.events import EventEnvelope
 from ainern2d_shared.telemetry.logging import get_logger
 
 from app.dispatcher.hub import DispatchHub
+from app.dispatcher.lanes import LaneScheduler
+from app.dispatcher.routing_table import infer_job_type
 
 logger = get_logger(__name__)
 
 _DLQ_TOPIC = "job.dispatch.dlq"
 
 
+class _JobRoute(NamedTuple):
+    """What the lanes need to schedule a job, read before it starts waiting."""
+
+    tenant_id: str
+    priority: int | None
+    job_type: JobType
+    payload: dict
+
+
 class DispatchConsumer:
-    """Consumes JOB_DISPATCH events and delegates to DispatchHub."""
+    """Consumes JOB_DISPATCH events and delegates to DispatchHub.
+
+    Jobs are not dispatched in arrival order: each one waits in the priority
+    lane picked from ``Job.priority`` (see :class:`LaneScheduler`). The
+    broker message stays unacked until its job has been dispatched, so the
+    prefetch window (``WORKER_HUB_DISPATCH_PREFETCH``) bounds how many jobs
+    the lanes can reorder.
+
+    No DB session is held while a job waits: the routing fields are read
+    in a worker thread with a short-lived session, and the lane runner
+    opens its own session through :meth:`DispatchHub.dispatch`.
 
-    def __init__(self, hub: DispatchHub) -> None:
+    Producers publish ``job.created`` without inserting the job, so a job
+    the DB does not know yet is created from the event (``queued``); for a
+    known job the event's payload is merged over the stored one.
+    """
+
+    def __init__(
+        self,
+        hub: DispatchHub,
+        max_in_flight: int | None = None,
+        lanes: LaneScheduler | None = None,
+    ) -> None:
         self._hub = hub
+        self._lanes = lanes or LaneScheduler.from_settings()
+        self._consumer = AsyncQueueConsumer(
+            settings.rabbitmq_url,
+            max_in_flight=max_in_flight or settings.worker_hub_dispatch_prefetch,
+        )
 
     def start(self) -> None:
         """Block and consume from ``SYSTEM_TOPICS.JOB_DISPATCH``."""
-        consumer = RabbitMQConsumer(settings.rabbitmq_url)
         logger.info("dispatch consumer starting on %s", SYSTEM_TOPICS.JOB_DISPATCH)
-        consumer.consume(SYSTEM_TOPICS.JOB_DISPATCH, self._handle)
+        self._consumer.consume(SYSTEM_TOPICS.JOB_DISPATCH, self._handle)
+
+    def stop(self) -> None:
+        self._consumer.request_stop()
 
-    def _handle(self, payload: dict) -> None:
+    async def _handle(self, payload: dict) -> None:
         try:
             envelope = EventEnvelope.model_validate(payload)
+            if envelope.event_type != "job.created":
+                return
             job_id = envelope.job_id
             if not job_id:
                 logger.warning("dispatch event missing job_id – skipped")
                 return
 
-            db = SessionLocal()
-            try:
-                job_repo = JobRepository(db)
-                job = job_repo.get(job_id)
-                if job is None:
-                    logger.error("job %s not found in DB", job_id)
-                    return
+            route = await asyncio.to_thread(self._load_route, envelope)
 
-                import asyncio
-                asyncio.get_event_loop().run_until_complete(self._hub.dispatch(job))
-            finally:
-                db.close()
+            await self._lanes.submit(
+                job_id,
+                route.tenant_id,
+                lane_for(route.priority, route.payload),
+                (self._hub.routing_table.resolve(route.job_type), route.payload.get("gpu_tier") or None),
+                lambda: self._hub.dispatch(job_id),
+            )
 
         except Exception:
             logger.exception("dispatch consumer error – sending to DLQ")
-            self._publish_dlq(payload)
+            await asyncio.to_thread(self._publish_dlq, payload)
+
+    def _load_route(self, envelope: EventEnvelope) -> _JobRoute:
+        db = self._hub.session_factory()
+        try:
+            repo = JobRepository(db)
+            job = repo.get(envelope.job_id)
+            if job is None:
+                job = Job(
+                    id=envelope.job_id,
+                    tenant_id=envelope.tenant_id,
+                    project_id=envelope.project_id,
+                    trace_id=envelope.trace_id,
+                    correlation_id=envelope.correlation_id,
+                    idempotency_key=envelope.idempotency_key,
+                    run_id=envelope.run_id,
+                    job_type=infer_job_type(envelope.payload or {}),
+                    stage=RenderStage.execute,
+                    status=JobStatus.queued,
+                    priority=int((envelope.payload or {}).get("priority") or 0),
+                    payload_json=dict(envelope.payload or {}),
+                )
+                repo.create(job)
+            elif envelope.payload:
+                job.payload_json = {**(job.payload_json or {}), **envelope.payload}
+            route = _JobRoute(job.tenant_id, job.priority, job.job_type, dict(job.payload_json or {}))
+            db.commit()
+            return route
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
 
     def _publish_dlq(self, payload: dict) -> None:
         try:
-            publisher = RabbitMQPublisher(settings.rabbitmq_url)
-            publisher.publish(_DLQ_TOPIC, payload)
-            publisher.close()
+            get_publisher(settings.rabbitmq_url).publish(_DLQ_TOPIC, payload)
         except Exception:
             logger.exception("failed to publish to DLQ")
\ No newline at end of file
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import asyncio
+
 from ainern2d_shared.config.setting import settings
-from ainern2d_shared.queue.rabbitmq import RabbitMQConsumer, RabbitMQPublisher
+from ainern2d_shared.queue.aio_consumer import AsyncQueueConsumer
+from ainern2d_shared.queue.rabbitmq import get_publisher
 from ainern2d_shared.queue.topics import SYSTEM_TOPICS
 from ainern2d_shared.schemas.worker import WorkerResult
 from ainern2d_shared.telemetry.logging import get_logger
@@ -16,32 +19,38 @@ _RETRY_TOPIC = "worker.callback.retry"
 
 
 class ResultConsumer:
-    """Consumes WORKER_CALLBACK events and delegates to DispatchHub."""
+    """Consumes WORKER_CALLBACK events and delegates to DispatchHub.
+
+    The hub runs each callback's DB work and status publish in a worker
+    thread, so the consumer's event loop never blocks on them.
+    """
 
-    def __init__(self, hub: DispatchHub) -> None:
+    def __init__(self, hub: DispatchHub, max_in_flight: int | None = None) -> None:
         self._hub = hub
+        self._consumer = AsyncQueueConsumer(
+            settings.rabbitmq_url,
+            max_in_flight=max_in_flight or settings.worker_max_in_flight,
+        )
 
     def start(self) -> None:
         """Block and consume from ``SYSTEM_TOPICS.WORKER_CALLBACK``."""
-        consumer = RabbitMQConsumer(settings.rabbitmq_url)
         logger.info("result consumer starting on %s", SYSTEM_TOPICS.WORKER_DETAIL)
-        consumer.consume(SYSTEM_TOPICS.WORKER_DETAIL, self._handle)
+        self._consumer.consume(SYSTEM_TOPICS.WORKER_DETAIL, self._handle)
 
-    def _handle(self, payload: dict) -> None:
+    def stop(self) -> None:
+        self._consumer.request_stop()
+
+    async def _handle(self, payload: dict) -> None:
         try:
             result = WorkerResult.model_validate(payload)
-
-            import asyncio
-            asyncio.run(self._hub.handle_callback(result))
+            await self._hub.handle_callback(result)
 
         except Exception:
             logger.exception("result consumer error – republishing for retry")
-            self._republish(payload)
+            await asyncio.to_thread(self._republish, payload)
 
     def _republish(self, payload: dict) -> None:
         try:
-            publisher = RabbitMQPublisher(settings.rabbitmq_url)
-            publisher.publish(_RETRY_TOPIC, payload)
-            publisher.close()
+            get_publisher(settings.rabbitmq_url).publish(_RETRY_TOPIC, payload)
         except Exception:
             logger.exception("failed to republish to retry topic")
@@ -1,5 +1,14 @@
-from .hub import DispatchHub
-from .node_registry import NodeRegistry
+from .hub import DispatchHub, NoCapacityError
+from .lanes import LaneScheduler
+from .node_registry import NodeRegistry, RedisNodeRegistry, create_node_registry
 from .routing_table import RoutingTable
 
-__all__ = ["DispatchHub", "NodeRegistry", "RoutingTable"]
+__all__ = [
+    "DispatchHub",
+    "LaneScheduler",
+    "NoCapacityError",
+    "NodeRegistry",
+    "RedisNodeRegistry",
+    "RoutingTable",
+    "create_node_registry",
+]
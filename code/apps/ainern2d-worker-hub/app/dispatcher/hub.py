@@ -2,65 +2,157 @@
 
 from __future__ import annotations
 
+import asyncio
 import uuid
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from typing import Callable, Iterator
 
 from sqlalchemy.orm import Session
 
 from ainern2d_shared.ainer_db_models.enum_models import JobStatus
 from ainern2d_shared.ainer_db_models.pipeline_models import Job
+from ainern2d_shared.db.dag_progress import track_dag_progress
 from ainern2d_shared.db.repositories.pipeline import JobRepository
-from ainern2d_shared.queue.rabbitmq import RabbitMQPublisher
-from ainern2d_shared.queue.topics import SYSTEM_TOPICS
+from ainern2d_shared.db.session import SessionLocal
+from ainern2d_shared.queue.rabbitmq import get_publisher
+from ainern2d_shared.queue.topics import (
+    DISPATCH_ROUTING_LEGACY,
+    SYSTEM_TOPICS,
+    dispatch_queue,
+    dispatch_routing_key,
+)
 from ainern2d_shared.schemas.events import EventEnvelope
 from ainern2d_shared.schemas.worker import WorkerResult
 from ainern2d_shared.config.setting import settings
 from ainern2d_shared.telemetry.logging import get_logger
 
-from .node_registry import NodeRegistry
+from .node_registry import NodeRegistry, RedisNodeRegistry
 from .routing_table import RoutingTable
 
 logger = get_logger(__name__)
 
 
+class NoCapacityError(ValueError):
+    """No live node of the job's worker type (and GPU tier) has a free slot."""
+
+
 class DispatchHub:
-    """Orchestrates job dispatch and worker callback handling."""
+    """Orchestrates job dispatch and worker callback handling.
+
+    Every dispatch and callback runs in a worker thread with its own
+    short-lived session from ``session_factory``: the DB calls, the
+    registry claim and the blocking publish never stall the consumers'
+    event loop, and no pooled connection is held while a job waits in a
+    dispatch lane.
+    """
 
     def __init__(
         self,
-        db: Session,
-        node_registry: NodeRegistry,
+        session_factory: Callable[[], Session] | None,
+        node_registry: NodeRegistry | RedisNodeRegistry,
         routing_table: RoutingTable,
     ) -> None:
-        self.db = db
+        self.session_factory = session_factory or SessionLocal
         self.node_registry = node_registry
         self.routing_table = routing_table
-        self._publisher = RabbitMQPublisher(settings.rabbitmq_url)
-        self._job_repo = JobRepository(db)
+        self._publisher = get_publisher(settings.rabbitmq_url)
+        self._routed = settings.dispatch_routing != DISPATCH_ROUTING_LEGACY
+
+    @contextmanager
+    def _session(self) -> Iterator[Session]:
+        db = self.session_factory()
+        try:
+            yield db
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
 
     # ------------------------------------------------------------------
     # Dispatch
     # ------------------------------------------------------------------
-    async def dispatch(self, job: Job) -> str:
+    async def dispatch(self, job_id: str) -> str:
         """Resolve a worker, claim the job, publish the dispatch event.
 
-        Returns the *node_id* that was assigned.  If no node is available the
-        job is set back to ``queued`` and a ``ValueError`` is raised.
-        """
-        worker_type = self.routing_table.resolve(job.job_type)
-        available = self.node_registry.get_available(worker_type)
-
-        if not available:
-            self._job_repo.update_status(job.id, JobStatus.queued)
-            logger.warning("no available node for %s – job %s re-queued", worker_type, job.id)
-            raise ValueError(f"no available node for worker_type={worker_type}")
+        In routed mode the job is also forwarded to
+        ``SYSTEM_TOPICS.DISPATCH_EXCHANGE`` under the routing key of its
+        concrete worker type (:meth:`RoutingTable.target_worker_type`) and the
+        chosen node's GPU tier, so exactly one worker queue receives it.
 
-        # Pick the node with the lowest current load
-        node = min(available, key=lambda n: n["current_load"])
-        node_id: str = node["node_id"]
+        The node is the one with the highest free capacity ratio (restricted
+        to ``payload_json["gpu_tier"]`` when the job asks for one); claiming
+        it reserves a slot atomically in the registry, and the slot is
+        released again when the job's callback arrives.
 
-        self._job_repo.update_status(job.id, JobStatus.claimed)
+        Returns the *node_id* that was assigned.  If no node is available the
+        job is set back to ``queued`` and :class:`NoCapacityError` (a
+        ``ValueError``) is raised.
+        """
+        return await asyncio.to_thread(self._dispatch, job_id)
+
+    def _dispatch(self, job_id: str) -> str:
+        with self._session() as db:
+            job = JobRepository(db).get(job_id)
+            if job is None:
+                raise LookupError(f"job {job_id} not found")
+            worker_type = self.routing_table.resolve(job.job_type)
+            payload = job.payload_json or {}
+            if self._routed and self.routing_table.target_worker_type(job.job_type, payload.get("worker_type")) is None:
+                raise ValueError(f"job type {job.job_type!r} has no worker on the dispatch exchange")
+            gpu_tier = payload.get("gpu_tier") or None
+            node = self.node_registry.claim(worker_type, gpu_tier)
+
+            if node is None:
+                job.status = JobStatus.queued
+                db.commit()
+                logger.warning("no available node for %s – job %s re-queued", worker_type, job.id)
+                raise NoCapacityError(f"no available node for worker_type={worker_type}")
+
+            node_id: str = node["node_id"]
+            try:
+                # The claim is committed before anything is published, so a
+                # worker never picks up a job the DB does not show as claimed.
+                self._claim_job(job, node_id)
+                db.commit()
+                messages = [self._claimed_message(job, worker_type, node_id)]
+                if self._routed:
+                    messages.extend(self._routed_messages(job, node))
+            except Exception:
+                self.node_registry.release(node_id)
+                raise
+
+        try:
+            for topic, body, exchange, queue in messages:
+                self._publisher.publish(topic, body, exchange=exchange, queue=queue)
+        except Exception:
+            self.node_registry.release(node_id)
+            self._unclaim(job_id, node_id)
+            raise
+        logger.info("dispatched job %s to node %s", job_id, node_id)
+        return node_id
 
+    @staticmethod
+    def _claim_job(job: Job, node_id: str) -> None:
+        job.locked_by = node_id
+        job.locked_at = datetime.now(timezone.utc)
+        job.status = JobStatus.claimed
+
+    def _unclaim(self, job_id: str, node_id: str) -> None:
+        """Put a job whose dispatch could not be published back to ``queued``."""
+        try:
+            with self._session() as db:
+                job = JobRepository(db).get(job_id)
+                if job is not None and job.locked_by == node_id:
+                    job.locked_by = None
+                    job.status = JobStatus.queued
+        except Exception:
+            logger.exception("could not re-queue job %s after a failed publish", job_id)
+
+    @staticmethod
+    def _claimed_message(job: Job, worker_type: str, node_id: str) -> tuple[str, dict, str, str | None]:
         envelope = EventEnvelope(
             event_id=str(uuid.uuid4()),
             event_type="job.claimed",
@@ -75,46 +167,89 @@ class DispatchHub:
             correlation_id=(getattr(job, "correlation_id", "") or f"cr_{job.id}"),
             payload={"node_id": node_id, "worker_type": worker_type},
         )
-        self._publisher.publish(SYSTEM_TOPICS.JOB_STATUS, envelope.model_dump(mode="json"))
-        logger.info("dispatched job %s to node %s", job.id, node_id)
-        return node_id
+        return SYSTEM_TOPICS.JOB_STATUS, envelope.model_dump(mode="json"), "", None
+
+    def _routed_messages(self, job: Job, node: dict) -> list[tuple[str, dict, str, str | None]]:
+        payload = dict(job.payload_json or {})
+        worker_type = self.routing_table.target_worker_type(job.job_type, payload.get("worker_type"))
+        if worker_type is None:
+            logger.debug("job %s (%s) is not routed through the dispatch exchange", job.id, job.job_type)
+            return []
+        gpu_tier = node.get("gpu_tier")
+        payload.update(worker_type=worker_type, node_id=node["node_id"])
+        envelope = EventEnvelope(
+            event_id=str(uuid.uuid4()),
+            event_type="job.created",
+            producer="worker-hub",
+            occurred_at=datetime.now(timezone.utc),
+            tenant_id=job.tenant_id or "t_unknown",
+            project_id=job.project_id or "p_unknown",
+            idempotency_key=job.idempotency_key or f"idem_{job.id}",
+            run_id=str(job.run_id) if job.run_id else None,
+            job_id=str(job.id),
+            trace_id=(getattr(job, "trace_id", "") or f"tr_{job.id}"),
+            correlation_id=(getattr(job, "correlation_id", "") or f"cr_{job.id}"),
+            payload=payload,
+        )
+        # Only ever the concrete worker's own queue, which its JobLoop also
+        # declares; declaring it here keeps jobs published before the worker
+        # first starts.
+        return [(
+            dispatch_routing_key(worker_type, gpu_tier),
+            envelope.model_dump(mode="json"),
+            SYSTEM_TOPICS.DISPATCH_EXCHANGE,
+            dispatch_queue(worker_type, gpu_tier),
+        )]
 
     # ------------------------------------------------------------------
     # Callback handling
     # ------------------------------------------------------------------
     async def handle_callback(self, result: WorkerResult) -> None:
         """Process a worker result – update DB status and publish event."""
-        job = self._job_repo.get(result.job_id)
-        if job is None:
-            logger.warning("callback ignored: job %s not found", result.job_id)
-            return
-
-        status = str(result.status or "").strip().lower()
-        if status in {"success", "ok"}:
-            status = "succeeded"
-        elif status in {"error"}:
-            status = "failed"
-
-        if status == "succeeded":
-            self._job_repo.update_status(result.job_id, JobStatus.success)
-            event_type = "job.succeeded"
+        await asyncio.to_thread(self._handle_callback, result)
+
+    def _handle_callback(self, result: WorkerResult) -> None:
+        with self._session() as db:
+            # The terminal status moves the run's DAG counters (see dag_progress).
+            track_dag_progress(db)
+            job = JobRepository(db).get(result.job_id)
+            if job is None:
+                # Legacy routing: the worker took the job straight off
+                # JOB_DISPATCH, so the hub never stored it.
+                self._publish_result(None, result)
+                return
+            self._apply_callback(db, job, result)
+
+    def _apply_callback(self, db: Session, job: Job, result: WorkerResult) -> None:
+        if job.locked_by:
+            # Clear the lock so a redelivered callback cannot release twice.
+            self.node_registry.release(job.locked_by)
+            job.locked_by = None
+
+        if self._publish_result(job, result) == "job.succeeded":
+            job.status = JobStatus.success
         else:
-            self._job_repo.update_status(result.job_id, JobStatus.failed)
-            event_type = "job.failed"
+            job.status = JobStatus.failed
+        db.flush()
+        logger.info("handled callback for job %s: %s", result.job_id, job.status)
 
+    def _publish_result(self, job: Job | None, result: WorkerResult) -> str:
+        """Publish the job's terminal status event and return its type."""
+        status = str(result.status or "").strip().lower()
+        event_type = "job.succeeded" if status in {"succeeded", "success", "ok"} else "job.failed"
         envelope = EventEnvelope(
             event_id=str(uuid.uuid4()),
             event_type=event_type,
             producer="worker-hub",
             occurred_at=datetime.now(timezone.utc),
-            tenant_id=job.tenant_id or "t_unknown",
-            project_id=job.project_id or "p_unknown",
-            idempotency_key=job.idempotency_key or f"idem_{job.id}:{event_type}",
-            trace_id=(getattr(job, "trace_id", "") or f"tr_{job.id}"),
-            correlation_id=(getattr(job, "correlation_id", "") or f"cr_{job.id}"),
+            tenant_id=(job.tenant_id if job else None) or "t_unknown",
+            project_id=(job.project_id if job else None) or "p_unknown",
+            idempotency_key=(job.idempotency_key if job else None) or f"idem_{result.job_id}:{event_type}",
+            trace_id=(getattr(job, "trace_id", "") or f"tr_{result.job_id}"),
+            correlation_id=(getattr(job, "correlation_id", "") or f"cr_{result.job_id}"),
             job_id=result.job_id,
             run_id=result.run_id,
             payload=result.model_dump(mode="json"),
         )
         self._publisher.publish(SYSTEM_TOPICS.JOB_STATUS, envelope.model_dump(mode="json"))
-        logger.info("handled callback for job %s: %s", result.job_id, event_type)
+        return event_type
@@ -0,0 +1,240 @@
+"""Priority lanes for dispatch – fair across tenants, with work stealing.
+
+Jobs wait in one of three lanes (interactive, normal, bulk; see
+``ainern2d_shared.queue.lanes``). Inside a lane every tenant has its own
+FIFO and tenants are served by start-time fair queuing, so one tenant's
+bulk re-render cannot crowd out another tenant's jobs in the same lane.
+
+Each lane has its own pool of dispatch workers. A worker serves its own
+lane first and, when that lane is empty, steals from the lanes below it –
+never from above – so interactive work always has dedicated workers while
+bulk work still drains when nothing more urgent is waiting.
+
+A job whose worker type has no free node (:class:`NoCapacityError`) goes
+back to the head of its tenant queue and that capacity class is paused for
+``retry_sec``, letting jobs for other worker types pass it. After
+``max_wait_sec`` without capacity the job fails with that error instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from ainern2d_shared.config.setting import settings
+from ainern2d_shared.queue.lanes import LANE_BULK, LANE_INTERACTIVE, LANE_NORMAL, LANES
+from ainern2d_shared.queue.topics import SYSTEM_TOPICS
+from ainern2d_shared.telemetry.logging import get_logger
+from ainern2d_shared.telemetry.metrics_writer import MetricsWriter
+
+from .hub import NoCapacityError
+
+logger = get_logger(__name__)
+
+_DEFAULT_WORKERS = {LANE_INTERACTIVE: 4, LANE_NORMAL: 2, LANE_BULK: 1}
+
+
+def parse_weights(spec: str) -> dict[str, float]:
+    """``"a:2,b:1"`` → ``{"a": 2.0, "b": 1.0}``; malformed entries are ignored."""
+    weights: dict[str, float] = {}
+    for part in (spec or "").split(","):
+        name, _, value = part.partition(":")
+        try:
+            if name.strip() and float(value) > 0:
+                weights[name.strip()] = float(value)
+        except ValueError:
+            logger.warning("ignoring malformed weight %r", part)
+    return weights
+
+
+@dataclass
+class LaneItem:
+    job_id: str
+    tenant_id: str
+    lane: str
+    capacity_key: tuple[str, str | None]  # (worker_type, gpu_tier)
+    run: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    start_tag: float = 0.0
+
+
+class _Lane:
+    """Per-tenant FIFOs served in start-tag order (SFQ)."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.tenants: dict[str, deque[LaneItem]] = {}
+        self.finish: dict[str, float] = {}
+        self.vtime = 0.0
+        self.depth = 0
+
+    def push(self, item: LaneItem, weight: float) -> None:
+        item.start_tag = max(self.vtime, self.finish.get(item.tenant_id, 0.0))
+        self.finish[item.tenant_id] = item.start_tag + 1.0 / weight
+        self.tenants.setdefault(item.tenant_id, deque()).append(item)
+        self.depth += 1
+
+    def push_front(self, item: LaneItem) -> None:
+        self.tenants.setdefault(item.tenant_id, deque()).appendleft(item)
+        self.depth += 1
+
+    def pop(self, blocked: Callable[[tuple], bool]) -> LaneItem | None:
+        best: LaneItem | None = None
+        for queue in self.tenants.values():
+            head = queue[0]
+            if blocked(head.capacity_key):
+                continue
+            if best is None or head.start_tag < best.start_tag:
+                best = head
+        if best is None:
+            return None
+        queue = self.tenants[best.tenant_id]
+        queue.popleft()
+        if not queue:
+            del self.tenants[best.tenant_id]
+            if self.finish.get(best.tenant_id, 0.0) <= self.vtime:
+                self.finish.pop(best.tenant_id, None)
+        self.vtime = max(self.vtime, best.start_tag)
+        self.depth -= 1
+        return best
+
+
+class LaneScheduler:
+    """Orders dispatch work by lane, tenant share and node capacity.
+
+    :meth:`submit` returns a future resolved with the result of the item's
+    ``run`` coroutine (or its exception), so a queue consumer can hold the
+    broker ack until the job has really been dispatched. Workers start on
+    the running loop with the first submission.
+    """
+
+    def __init__(
+        self,
+        workers: dict[str, int] | None = None,
+        tenant_weights: dict[str, float] | None = None,
+        retry_sec: float = 0.5,
+        max_wait_sec: float = 300.0,
+        metrics: MetricsWriter | None = None,
+    ) -> None:
+        self._workers = {lane: max(0, int((workers or _DEFAULT_WORKERS).get(lane, 0))) for lane in LANES}
+        if not any(self._workers.values()):
+            raise ValueError("at least one lane needs a dispatch worker")
+        self._weights = tenant_weights or {}
+        self._retry = retry_sec
+        self._max_wait = max_wait_sec
+        self._metrics = metrics or MetricsWriter()
+        self._lanes = {lane: _Lane(lane) for lane in LANES}
+        self._blocked: dict[tuple, float] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+        self.stolen = {lane: 0 for lane in LANES}
+
+    @classmethod
+    def from_settings(cls) -> "LaneScheduler":
+        workers = {lane: int(n) for lane, n in parse_weights(settings.worker_hub_lane_workers).items()}
+        return cls(
+            workers={**{lane: 0 for lane in LANES}, **workers} if workers else None,
+            tenant_weights=parse_weights(settings.worker_hub_tenant_weights),
+            retry_sec=settings.worker_hub_dispatch_retry_ms / 1000.0,
+        )
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    def submit(
+        self,
+        job_id: str,
+        tenant_id: str,
+        lane: str,
+        capacity_key: tuple[str, str | None],
+        run: Callable[[], Awaitable[Any]],
+    ) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        self._ensure_started(loop)
+        if lane not in self._lanes:
+            lane = LANE_NORMAL
+        item = LaneItem(job_id, tenant_id or "t_unknown", lane, capacity_key, run, loop.create_future())
+        target = self._lanes[lane]
+        target.push(item, self._weights.get(item.tenant_id, 1.0))
+        self._record_depth(target)
+        self._wakeup.set()
+        return item.future
+
+    def depths(self) -> dict[str, int]:
+        return {lane: q.depth for lane, q in self._lanes.items()}
+
+    async def aclose(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._wakeup = None
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+    def _ensure_started(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        for lane, count in self._workers.items():
+            for n in range(count):
+                self._tasks.append(loop.create_task(self._worker(lane), name=f"dispatch-{lane}-{n}"))
+
+    async def _worker(self, lane: str) -> None:
+        order = LANES[LANES.index(lane):]
+        while True:
+            self._wakeup.clear()
+            item = self._next(order)
+            if item is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._retry)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if item.lane != lane:
+                self.stolen[item.lane] += 1
+                logger.debug("%s worker stole job %s from %s lane", lane, item.job_id, item.lane)
+            await self._execute(item)
+
+    def _next(self, order: tuple[str, ...]) -> LaneItem | None:
+        now = time.monotonic()
+        blocked = lambda key: self._blocked.get(key, 0.0) > now  # noqa: E731
+        for lane in order:
+            item = self._lanes[lane].pop(blocked)
+            if item is not None:
+                self._record_depth(self._lanes[lane])
+                return item
+        return None
+
+    async def _execute(self, item: LaneItem) -> None:
+        if item.future.cancelled():
+            return
+        try:
+            result = await item.run()
+        except NoCapacityError as exc:
+            if time.monotonic() - item.enqueued_at > self._max_wait:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+                return
+            self._blocked[item.capacity_key] = time.monotonic() + self._retry
+            lane = self._lanes[item.lane]
+            lane.push_front(item)
+            self._record_depth(lane)
+            return
+        except Exception as exc:
+            if not item.future.done():
+                item.future.set_exception(exc)
+            return
+        self._blocked.pop(item.capacity_key, None)
+        wait_ms = (time.monotonic() - item.enqueued_at) * 1000.0
+        self._metrics.record_latency(f"dispatch_wait.{item.lane}", wait_ms)
+        if not item.future.done():
+            item.future.set_result(result)
+
+    def _record_depth(self, lane: _Lane) -> None:
+        self._metrics.record_queue_depth(f"{SYSTEM_TOPICS.JOB_DISPATCH}.lane.{lane.name}", lane.depth)
@@ -1,24 +1,62 @@
-"""In-memory worker node registry (thread-safe)."""
+"""Worker node registry – in-process (thread-safe) or shared through Redis.
+
+Both implementations expose the same interface. Nodes are indexed per
+worker type (and per ``worker_type`` + ``gpu_tier``) by their free capacity
+ratio ``(capacity - current_load) / capacity``; :meth:`claim` atomically
+takes one slot on the node with the most headroom, so concurrent
+dispatchers – threads in one hub or several hub replicas sharing Redis –
+never book a node past its capacity. A node whose heartbeat is older than
+the TTL drops out and has to register again.
+"""
 
 from __future__ import annotations
 
+import heapq
+import itertools
 import threading
 import time
 from typing import Any
 
+from ainern2d_shared.config.setting import settings
 from ainern2d_shared.telemetry.logging import get_logger
 
 logger = get_logger(__name__)
 
 _HEARTBEAT_TIMEOUT_S = 60  # nodes silent longer than this are considered dead
 
+REGISTRY_MEMORY = "memory"
+REGISTRY_REDIS = "redis"
+
+
+def _free_ratio(capacity: int, current_load: int) -> float:
+    if capacity <= 0:
+        return 0.0
+    return max(0.0, (capacity - current_load) / capacity)
+
+
+def _index_keys(worker_type: str, gpu_tier: str | None) -> list[tuple[str, str | None]]:
+    keys = [(worker_type, None)]
+    if gpu_tier:
+        keys.append((worker_type, gpu_tier.lower()))
+    return keys
+
 
 class NodeRegistry:
-    """Tracks registered worker nodes and their availability."""
+    """In-process registry; also the test double for :class:`RedisNodeRegistry`.
+
+    Each index is a lazy max-heap of ``(-free_ratio, version, node_id)``:
+    every change pushes a fresh entry and bumps the node's version, and
+    stale or expired entries are discarded when they surface, so
+    :meth:`claim` is O(log n) amortised.
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, ttl_sec: float = _HEARTBEAT_TIMEOUT_S) -> None:
         self._lock = threading.Lock()
+        self._ttl = ttl_sec
         self._nodes: dict[str, dict[str, Any]] = {}
+        self._versions: dict[str, int] = {}
+        self._heaps: dict[tuple[str, str | None], list[tuple[float, int, str]]] = {}
+        self._counter = itertools.count()
 
     # ------------------------------------------------------------------
     # Registration
@@ -39,40 +77,306 @@ class NodeRegistry:
                 "gpu_tier": gpu_tier,
                 "last_seen": time.time(),
             }
+            self._reindex(node_id)
         logger.info("registered node %s (type=%s)", node_id, worker_type)
 
     def deregister(self, node_id: str) -> None:
         with self._lock:
             self._nodes.pop(node_id, None)
+            self._versions.pop(node_id, None)
         logger.info("deregistered node %s", node_id)
 
     # ------------------------------------------------------------------
     # Heartbeat / load
     # ------------------------------------------------------------------
-    def heartbeat(self, node_id: str) -> None:
-        """Update the last_seen timestamp for a node."""
+    def heartbeat(self, node_id: str, current_load: int | None = None) -> bool:
+        """Update the last_seen timestamp (and optionally the reported load).
+
+        Returns ``False`` when the node is unknown or expired; it has to
+        register again.
+        """
         with self._lock:
-            node = self._nodes.get(node_id)
-            if node is not None:
-                node["last_seen"] = time.time()
+            node = self._live(node_id, time.time())
+            if node is None:
+                return False
+            node["last_seen"] = time.time()
+            if current_load is not None:
+                node["current_load"] = max(0, current_load)
+                self._reindex(node_id)
+            return True
 
     def update_load(self, node_id: str, current_load: int) -> None:
         with self._lock:
             node = self._nodes.get(node_id)
             if node is not None:
-                node["current_load"] = current_load
+                node["current_load"] = max(0, current_load)
+                self._reindex(node_id)
+
+    # ------------------------------------------------------------------
+    # Claim / release
+    # ------------------------------------------------------------------
+    def claim(self, worker_type: str, gpu_tier: str | None = None) -> dict | None:
+        """Reserve one slot on the live node with the highest free ratio."""
+        key = (worker_type, gpu_tier.lower() if gpu_tier else None)
+        now = time.time()
+        with self._lock:
+            heap = self._heaps.get(key)
+            while heap:
+                neg_ratio, version, node_id = heap[0]
+                if self._versions.get(node_id) != version or self._live(node_id, now) is None:
+                    heapq.heappop(heap)
+                    continue
+                if neg_ratio >= 0:
+                    return None  # the best live node is full
+                node = self._nodes[node_id]
+                node["current_load"] += 1
+                self._reindex(node_id)
+                return dict(node)
+        return None
+
+    def release(self, node_id: str) -> None:
+        """Return a slot taken by :meth:`claim`."""
+        with self._lock:
+            node = self._nodes.get(node_id)
+            if node is not None and node["current_load"] > 0:
+                node["current_load"] -= 1
+                self._reindex(node_id)
 
     # ------------------------------------------------------------------
     # Query
     # ------------------------------------------------------------------
-    def get_available(self, worker_type: str) -> list[dict]:
-        """Return nodes with spare capacity whose heartbeat is recent."""
+    def get_available(self, worker_type: str, gpu_tier: str | None = None) -> list[dict]:
+        """Nodes with spare capacity and a recent heartbeat, most headroom first."""
         now = time.time()
+        tier = gpu_tier.lower() if gpu_tier else None
         with self._lock:
-            return [
+            nodes = [
                 dict(n)
                 for n in self._nodes.values()
                 if n["worker_type"] == worker_type
                 and n["capacity"] > n["current_load"]
-                and (now - n["last_seen"]) <= _HEARTBEAT_TIMEOUT_S
-            ]
\ No newline at end of file
+                and (now - n["last_seen"]) <= self._ttl
+                and (tier is None or (n["gpu_tier"] or "").lower() == tier)
+            ]
+        nodes.sort(key=lambda n: _free_ratio(n["capacity"], n["current_load"]), reverse=True)
+        return nodes
+
+    # ------------------------------------------------------------------
+    # Internals (caller holds the lock)
+    # ------------------------------------------------------------------
+    def _live(self, node_id: str, now: float) -> dict | None:
+        node = self._nodes.get(node_id)
+        if node is not None and now - node["last_seen"] > self._ttl:
+            logger.info("node %s expired (no heartbeat for %.0fs)", node_id, now - node["last_seen"])
+            self._nodes.pop(node_id, None)
+            self._versions.pop(node_id, None)
+            return None
+        return node
+
+    def _reindex(self, node_id: str) -> None:
+        node = self._nodes[node_id]
+        version = next(self._counter)
+        self._versions[node_id] = version
+        entry = (-_free_ratio(node["capacity"], node["current_load"]), version, node_id)
+        for key in _index_keys(node["worker_type"], node["gpu_tier"]):
+            heap = self._heaps.setdefault(key, [])
+            heapq.heappush(heap, entry)
+            if len(heap) > 4 * len(self._nodes) + 16:
+                heap[:] = [e for e in heap if self._versions.get(e[2]) == e[1]]
+                heapq.heapify(heap)
+
+
+# KEYS[1] = index sorted set to claim from; ARGV[1] = key prefix.
+_CLAIM_LUA = """
+local zkey = KEYS[1]
+local prefix = ARGV[1]
+while true do
+  local top = redis.call('ZREVRANGE', zkey, 0, 0, 'WITHSCORES')
+  if #top == 0 or tonumber(top[2]) <= 0 then
+    return nil
+  end
+  local node_id = top[1]
+  local hkey = prefix .. ':node:' .. node_id
+  if redis.call('EXISTS', hkey) == 0 then
+    redis.call('ZREM', zkey, node_id)
+  else
+    local capacity = tonumber(redis.call('HGET', hkey, 'capacity'))
+    local load = redis.call('HINCRBY', hkey, 'current_load', 1)
+    local score = math.max(0, (capacity - load) / capacity)
+    local worker_type = redis.call('HGET', hkey, 'worker_type')
+    local tier = redis.call('HGET', hkey, 'gpu_tier')
+    redis.call('ZADD', prefix .. ':free:' .. worker_type, score, node_id)
+    if tier and tier ~= '' then
+      redis.call('ZADD', prefix .. ':free:' .. worker_type .. ':' .. tier, score, node_id)
+    end
+    return node_id
+  end
+end
+"""
+
+# KEYS[1] = node hash; ARGV[1] = prefix, ARGV[2] = load delta or '', ARGV[3] = absolute load or ''.
+_SET_LOAD_LUA = """
+local hkey = KEYS[1]
+if redis.call('EXISTS', hkey) == 0 then
+  return nil
+end
+local load
+if ARGV[3] ~= '' then
+  load = math.max(0, tonumber(ARGV[3]))
+else
+  load = math.max(0, tonumber(redis.call('HGET', hkey, 'current_load')) + tonumber(ARGV[2]))
+end
+redis.call('HSET', hkey, 'current_load', load)
+local capacity = tonumber(redis.call('HGET', hkey, 'capacity'))
+local score = 0
+if capacity > 0 then
+  score = math.max(0, (capacity - load) / capacity)
+end
+local node_id = redis.call('HGET', hkey, 'node_id')
+local worker_type = redis.call('HGET', hkey, 'worker_type')
+local tier = redis.call('HGET', hkey, 'gpu_tier')
+redis.call('ZADD', ARGV[1] .. ':free:' .. worker_type, score, node_id)
+if tier and tier ~= '' then
+  redis.call('ZADD', ARGV[1] .. ':free:' .. worker_type .. ':' .. tier, score, node_id)
+end
+return load
+"""
+
+
+class RedisNodeRegistry:
+    """Registry shared by every hub replica through Redis.
+
+    Layout under ``prefix``:
+
+    * ``node:<id>`` – hash with the node fields, expiring after ``ttl_sec``
+      unless refreshed by :meth:`heartbeat`.
+    * ``free:<worker_type>`` / ``free:<worker_type>:<tier>`` – sorted sets
+      scored by free capacity ratio.
+
+    Claims and load changes run as Lua scripts, so the read-pick-increment
+    is atomic across replicas. Members whose hash expired are removed from
+    the sorted sets lazily, the first time a claim reaches them. The
+    scripts build keys from the prefix, so the prefix must map to a single
+    hash slot on Redis Cluster (e.g. ``{ainer:nodes}``).
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        prefix: str = "ainer:nodes",
+        ttl_sec: float = _HEARTBEAT_TIMEOUT_S,
+    ) -> None:
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+        self._redis = client
+        self._prefix = prefix
+        self._ttl = max(1, int(ttl_sec))
+        self._claim = client.register_script(_CLAIM_LUA)
+        self._set_load = client.register_script(_SET_LOAD_LUA)
+
+    def _node_key(self, node_id: str) -> str:
+        return f"{self._prefix}:node:{node_id}"
+
+    def _index_key(self, worker_type: str, gpu_tier: str | None = None) -> str:
+        key = f"{self._prefix}:free:{worker_type}"
+        return f"{key}:{gpu_tier.lower()}" if gpu_tier else key
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+    def register(
+        self,
+        node_id: str,
+        worker_type: str,
+        capacity: int,
+        gpu_tier: str | None = None,
+    ) -> None:
+        tier = gpu_tier.lower() if gpu_tier else ""
+        score = _free_ratio(capacity, 0)
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.hset(self._node_key(node_id), mapping={
+            "node_id": node_id,
+            "worker_type": worker_type,
+            "capacity": capacity,
+            "current_load": 0,
+            "gpu_tier": tier,
+            "last_seen": time.time(),
+        })
+        pipe.expire(self._node_key(node_id), self._ttl)
+        for wt, index_tier in _index_keys(worker_type, tier):
+            pipe.zadd(self._index_key(wt, index_tier), {node_id: score})
+        pipe.execute()
+        logger.info("registered node %s (type=%s)", node_id, worker_type)
+
+    def deregister(self, node_id: str) -> None:
+        node = self._redis.hgetall(self._node_key(node_id))
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.delete(self._node_key(node_id))
+        if node:
+            for wt, tier in _index_keys(node["worker_type"], node.get("gpu_tier")):
+                pipe.zrem(self._index_key(wt, tier), node_id)
+        pipe.execute()
+        logger.info("deregistered node %s", node_id)
+
+    # ------------------------------------------------------------------
+    # Heartbeat / load
+    # ------------------------------------------------------------------
+    def heartbeat(self, node_id: str, current_load: int | None = None) -> bool:
+        key = self._node_key(node_id)
+        if not self._redis.expire(key, self._ttl):
+            return False  # expired or never registered
+        self._redis.hset(key, "last_seen", time.time())
+        if current_load is not None:
+            self.update_load(node_id, current_load)
+        return True
+
+    def update_load(self, node_id: str, current_load: int) -> None:
+        self._set_load(keys=[self._node_key(node_id)], args=[self._prefix, "", current_load])
+
+    # ------------------------------------------------------------------
+    # Claim / release
+    # ------------------------------------------------------------------
+    def claim(self, worker_type: str, gpu_tier: str | None = None) -> dict | None:
+        node_id = self._claim(keys=[self._index_key(worker_type, gpu_tier)], args=[self._prefix])
+        if node_id is None:
+            return None
+        return self._decode(self._redis.hgetall(self._node_key(node_id)))
+
+    def release(self, node_id: str) -> None:
+        self._set_load(keys=[self._node_key(node_id)], args=[self._prefix, -1, ""])
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+    def get_available(self, worker_type: str, gpu_tier: str | None = None) -> list[dict]:
+        node_ids = self._redis.zrevrangebyscore(self._index_key(worker_type, gpu_tier), "+inf", "(0")
+        if not node_ids:
+            return []
+        pipe = self._redis.pipeline(transaction=False)
+        for node_id in node_ids:
+            pipe.hgetall(self._node_key(node_id))
+        return [self._decode(raw) for raw in pipe.execute() if raw]
+
+    @staticmethod
+    def _decode(raw: dict) -> dict:
+        return {
+            "node_id": raw["node_id"],
+            "worker_type": raw["worker_type"],
+            "capacity": int(raw["capacity"]),
+            "current_load": int(raw["current_load"]),
+            "gpu_tier": raw.get("gpu_tier") or None,
+            "last_seen": float(raw.get("last_seen") or 0.0),
+        }
+
+
+def create_node_registry(backend: str | None = None) -> NodeRegistry | RedisNodeRegistry:
+    """Registry selected by ``WORKER_HUB_NODE_REGISTRY`` (``memory`` | ``redis``)."""
+    choice = (backend or settings.worker_hub_node_registry or REGISTRY_MEMORY).lower()
+    ttl = settings.worker_hub_node_ttl_sec
+    if choice == REGISTRY_REDIS:
+        return RedisNodeRegistry(ttl_sec=ttl)
+    if choice != REGISTRY_MEMORY:
+        raise ValueError(f"unknown node registry backend {choice!r}")
+    return NodeRegistry(ttl_sec=ttl)
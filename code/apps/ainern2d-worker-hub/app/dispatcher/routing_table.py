@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from ainern2d_shared.ainer_db_models.enum_models import JobType
+from ainern2d_shared.queue.topics import dispatch_queue, dispatch_routing_key
 from ainern2d_shared.telemetry.logging import get_logger
 
 logger = get_logger(__name__)
@@ -22,17 +23,109 @@ _JOB_WORKER_MAP: dict[JobType, str] = {
     JobType.compose_final: "worker-composer",
 }
 
+# Concrete worker types that consume a family's jobs from the dispatch
+# exchange; the first one is the default.  worker-composer has none: compose
+# jobs reach the composer through SYSTEM_TOPICS.COMPOSE_DISPATCH.
+_FAMILY_WORKER_TYPES: dict[str, tuple[str, ...]] = {
+    "worker-llm": (
+        "worker-llm",
+        "worker-llm-openai",
+        "worker-llm-deepseek",
+        "worker-llm-qwen",
+        "worker-llm-huosan",
+    ),
+    "worker-audio": ("worker-audio-tts", "worker-audio-tts-batch", "worker-audio-bgm", "worker-audio-sfx"),
+    "worker-video": ("worker-video-i2v", "worker-video-v2v"),
+    "worker-lipsync": ("worker-lipsync",),
+}
+
+# Legacy worker_type values in job payloads → the one concrete worker type
+# that now serves them.
+_WORKER_ALIASES: dict[str, str] = {
+    "worker-audio": "worker-audio-tts",
+    "worker-video": "worker-video-i2v",
+}
+
+
+def infer_job_type(payload: dict) -> JobType:
+    """Job type of a dispatch payload.
+
+    Its ``job_type`` when valid; otherwise the first job type served by its
+    ``worker_type``'s family, so a payload naming only ``worker-llm`` is not
+    routed to video workers; ``render_video`` as the last resort.
+    """
+    raw = str(payload.get("job_type", "")).strip()
+    if raw:
+        try:
+            return JobType(raw)
+        except ValueError:
+            logger.warning("unknown job_type=%s; inferring from worker_type", raw)
+    family = RoutingTable().family(str(payload.get("worker_type") or ""))
+    for job_type, worker_type in _JOB_WORKER_MAP.items():
+        if worker_type == family:
+            return job_type
+    return JobType.render_video
+
 
 class RoutingTable:
     """Resolves a JobType to the worker_type string used for dispatch."""
 
     def resolve(self, job_type: JobType, gpu_tier: str | None = None) -> str:
-        """Return the worker-type string responsible for *job_type*.
+        """Return the worker family responsible for *job_type*.
 
-        Raises ``ValueError`` if the job type has no mapping.
+        The family is what nodes register capacity under.  Raises
+        ``ValueError`` if the job type has no mapping.
         """
         worker_type = _JOB_WORKER_MAP.get(job_type)
         if worker_type is None:
             raise ValueError(f"no worker mapping for job type {job_type!r}")
         logger.debug("resolved %s -> %s (gpu_tier=%s)", job_type, worker_type, gpu_tier)
-        return worker_type
\ No newline at end of file
+        return worker_type
+
+    def family(self, worker_type: str) -> str | None:
+        """Worker family a concrete (or legacy) worker type registers under.
+
+        ``None`` when no job type is served by *worker_type*.
+        """
+        worker_type = _WORKER_ALIASES.get(worker_type, worker_type)
+        for family, members in _FAMILY_WORKER_TYPES.items():
+            if worker_type in members:
+                return family
+        return worker_type if worker_type in _JOB_WORKER_MAP.values() else None
+
+    def target_worker_type(self, job_type: JobType, requested: str | None = None) -> str | None:
+        """Concrete worker type a job is routed to, or ``None`` if no worker
+        consumes the job type from the dispatch exchange.
+
+        ``requested`` (the payload's ``worker_type``) wins when it names a
+        worker type of the job's family, directly or through its alias;
+        anything else falls back to the family default.  Every job therefore
+        lands in exactly one queue, and only in a queue a worker reads.
+        """
+        candidates = _FAMILY_WORKER_TYPES.get(self.resolve(job_type))
+        if not candidates:
+            return None
+        requested = _WORKER_ALIASES.get(requested or "", requested)
+        if requested in candidates:
+            return requested
+        return candidates[0]
+
+    def routing_key(
+        self,
+        job_type: JobType,
+        gpu_tier: str | None = None,
+        requested: str | None = None,
+    ) -> str | None:
+        """Routing key on ``SYSTEM_TOPICS.DISPATCH_EXCHANGE`` for *job_type*."""
+        worker_type = self.target_worker_type(job_type, requested)
+        return dispatch_routing_key(worker_type, gpu_tier) if worker_type else None
+
+    def queue_name(
+        self,
+        job_type: JobType,
+        gpu_tier: str | None = None,
+        requested: str | None = None,
+    ) -> str | None:
+        """Durable per-worker-type / per-tier queue bound to :meth:`routing_key`."""
+        worker_type = self.target_worker_type(job_type, requested)
+        return dispatch_queue(worker_type, gpu_tier) if worker_type else None
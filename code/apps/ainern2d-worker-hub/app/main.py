@@ -2,30 +2,61 @@ from __future__ import annotations
 
 import os
 import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
 from fastapi import FastAPI
 
+from ainern2d_shared.config.setting import settings
+from ainern2d_shared.queue.topics import DISPATCH_ROUTING_LEGACY
+
 from app.api.v1.callbacks import router as callback_router
-from app.api.v1.dispatch import consume_dispatch_topic
 from app.api.v1.dispatch import router as dispatch_router
+from app.api.v1.nodes import router as nodes_router
 from app.api.v1.telemetry import router as telemetry_router
-
-app = FastAPI(title="ainern2d-worker-hub", version="0.1.0")
+from app.consumers import DispatchConsumer, ResultConsumer
+from app.dispatcher import DispatchHub, RoutingTable, create_node_registry
+
+
+def start_consumers(app: FastAPI) -> list[DispatchConsumer | ResultConsumer]:
+	"""Run the dispatch consumer (priority lanes → DispatchHub) and the result
+	consumer, each on its own thread and event loop.
+
+	With ``AINER_DISPATCH_ROUTING=legacy`` workers read JOB_DISPATCH
+	themselves, so the hub only consumes results and does not compete with
+	them for dispatch messages.
+	"""
+	hub = DispatchHub(None, app.state.node_registry, RoutingTable())
+	consumers: list[DispatchConsumer | ResultConsumer] = [ResultConsumer(hub)]
+	if settings.dispatch_routing != DISPATCH_ROUTING_LEGACY:
+		consumers.insert(0, DispatchConsumer(hub))
+	for consumer in consumers:
+		threading.Thread(target=consumer.start, name=type(consumer).__name__, daemon=True).start()
+	return consumers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+	# Workers register and heartbeat through /internal/nodes; dispatch
+	# claims slots from the same registry.
+	app.state.node_registry = create_node_registry()
+	consumers = []
+	if os.getenv("AINER_ENABLE_RMQ_CONSUMERS", "1") == "1":
+		consumers = start_consumers(app)
+	try:
+		yield
+	finally:
+		for consumer in consumers:
+			consumer.stop()
+
+
+app = FastAPI(title="ainern2d-worker-hub", version="0.1.0", lifespan=lifespan)
 app.include_router(dispatch_router)
 app.include_router(callback_router)
+app.include_router(nodes_router)
 app.include_router(telemetry_router)
 
 
-@app.on_event("startup")
-def startup_consumers() -> None:
-	if os.getenv("AINER_ENABLE_RMQ_CONSUMERS", "1") != "1":
-		return
-
-	thread = threading.Thread(target=consume_dispatch_topic, daemon=True)
-	thread.start()
-
-
 @app.get("/healthz")
 def healthz() -> dict[str, str]:
 	return {"status": "ok"}
-
@@ -1,6 +1,9 @@
 """worker-hub dispatch 单元测试"""
 from __future__ import annotations
 
+import os
+import threading
+
 import pytest
 from unittest.mock import MagicMock, patch
 
@@ -56,3 +59,547 @@ class TestNodeRegistry:
         nr.register("node-1", "worker-video", capacity=3)
         nr.deregister("node-1")
         assert nr.get_available("worker-video") == []
+
+    def test_claim_prefers_free_ratio_and_never_oversubscribes(self):
+        from app.dispatcher.node_registry import NodeRegistry
+        nr = NodeRegistry()
+        nr.register("big", "worker-video", capacity=8)
+        nr.register("small", "worker-video", capacity=2)
+        nr.update_load("big", 6)  # 25% free vs 100% free
+        assert nr.claim("worker-video")["node_id"] == "small"
+
+        claimed: list[str] = []
+        lock = threading.Lock()
+
+        def _worker():
+            for _ in range(5):
+                node = nr.claim("worker-video")
+                if node is not None:
+                    with lock:
+                        claimed.append(node["node_id"])
+
+        threads = [threading.Thread(target=_worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # 1 slot left on "small", 2 on "big" – and nothing beyond that.
+        assert sorted(claimed) == ["big", "big", "small"]
+        assert nr.claim("worker-video") is None
+
+        nr.release("big")
+        assert nr.claim("worker-video")["node_id"] == "big"
+
+    def test_claim_filters_gpu_tier_and_drops_expired_nodes(self):
+        from app.dispatcher.node_registry import NodeRegistry
+        nr = NodeRegistry(ttl_sec=60)
+        nr.register("a100", "worker-video", capacity=1, gpu_tier="A100")
+        nr.register("t4", "worker-video", capacity=4, gpu_tier="T4")
+        assert nr.claim("worker-video", "a100")["node_id"] == "a100"
+        assert nr.claim("worker-video", "A100") is None
+
+        with patch("app.dispatcher.node_registry.time.time", return_value=10**12):
+            assert nr.claim("worker-video") is None
+            nr.heartbeat("t4")  # too late: the node has to register again
+        assert nr.get_available("worker-video") == []
+
+
+@pytest.mark.skipif(not os.getenv("REDIS_URL"), reason="requires REDIS_URL")
+def test_redis_registry_claims_atomically_across_replicas():
+    import uuid
+
+    import redis
+
+    from app.dispatcher.node_registry import RedisNodeRegistry
+
+    client = redis.Redis.from_url(os.environ["REDIS_URL"], decode_responses=True)
+    prefix = f"test:nodes:{uuid.uuid4().hex[:8]}"
+    replicas = [RedisNodeRegistry(client, prefix=prefix, ttl_sec=30) for _ in range(2)]
+    try:
+        replicas[0].register("n1", "worker-llm", capacity=3, gpu_tier="T4")
+        claimed = [r.claim("worker-llm", "t4") for r in replicas * 3]
+        assert [c["node_id"] for c in claimed if c] == ["n1"] * 3
+        assert replicas[1].get_available("worker-llm") == []
+        replicas[1].release("n1")
+        assert replicas[0].get_available("worker-llm")[0]["current_load"] == 2
+    finally:
+        for key in client.scan_iter(f"{prefix}:*"):
+            client.delete(key)
+
+
+def _sessions(*jobs: Job):
+    """Session factory over an in-memory job table; records every session."""
+    table = {job.id: job for job in jobs}
+    opened: list[MagicMock] = []
+
+    def factory():
+        db = MagicMock()
+        db.get.side_effect = lambda _model, job_id: table.get(job_id)
+        db.add.side_effect = lambda obj: table.__setitem__(obj.id, obj)
+        opened.append(db)
+        return db
+
+    factory.table = table
+    factory.opened = opened
+    return factory
+
+
+class TestRoutedDispatch:
+    def _hub(self, broker, *jobs):
+        from ainern2d_shared.queue.rabbitmq import PublisherPool
+        from app.dispatcher.hub import DispatchHub
+        from app.dispatcher.node_registry import NodeRegistry
+        from app.dispatcher.routing_table import RoutingTable
+
+        registry = NodeRegistry()
+        registry.register("gpu-1", "worker-video", capacity=2, gpu_tier="A100")
+        registry.register("cpu-1", "worker-audio", capacity=2)
+        hub = DispatchHub(_sessions(*jobs), registry, RoutingTable())
+        hub._routed = True
+        hub._publisher = PublisherPool("amqp://local", connection_factory=broker.connection)
+        return hub
+
+    def test_routing_key_resolves_to_one_concrete_worker_type(self):
+        from app.dispatcher.routing_table import RoutingTable
+        rt = RoutingTable()
+        assert rt.routing_key(JobType.synth_audio) == "job.dispatch.worker-audio-tts.default"
+        assert rt.routing_key(JobType.synth_audio, requested="worker-audio") == (
+            "job.dispatch.worker-audio-tts.default"
+        )
+        assert rt.routing_key(JobType.synth_audio, requested="worker-audio-bgm") == (
+            "job.dispatch.worker-audio-bgm.default"
+        )
+        assert rt.routing_key(JobType.render_video, "A100", requested="worker-llm") == (
+            "job.dispatch.worker-video-i2v.a100"
+        )
+        # Unknown members of the family fall back instead of opening a queue nobody reads.
+        assert rt.target_worker_type(JobType.render_video, "worker-video-x") == "worker-video-i2v"
+        assert rt.routing_key(JobType.compose_final) is None
+
+    def test_jobs_only_reach_their_worker_queue(self):
+        import asyncio
+
+        from ainern2d_shared.queue.aio_consumer import AsyncQueueConsumer
+        from ainern2d_shared.queue.inprocess import InProcessBroker
+        from ainern2d_shared.queue.topics import SYSTEM_TOPICS, dispatch_queue, dispatch_routing_key
+
+        broker = InProcessBroker()
+        hub = self._hub(
+            broker,
+            _make_job(id="job_v1"),
+            _make_job(id="job_a1", job_type=JobType.synth_audio, payload_json={"worker_type": "worker-audio"}),
+            _make_job(id="job_v2"),
+        )
+        received: dict[str, list[str]] = {"video": [], "audio": []}
+        video_queue = dispatch_queue("worker-video-i2v", "A100")
+        audio_queue = dispatch_queue("worker-audio-tts")
+
+        async def scenario():
+            video = AsyncQueueConsumer("amqp://local", max_in_flight=2, connect=broker.connect)
+            audio = AsyncQueueConsumer("amqp://local", max_in_flight=2, connect=broker.connect)
+
+            async def on_video(msg):
+                received["video"].append(msg["job_id"])
+                if len(received["video"]) == 2:
+                    video.request_stop()
+
+            async def on_audio(msg):
+                received["audio"].append(msg["job_id"])
+                audio.request_stop()
+
+            tasks = [
+                asyncio.create_task(video.run(
+                    video_queue, on_video,
+                    exchange=SYSTEM_TOPICS.DISPATCH_EXCHANGE,
+                    routing_keys=[dispatch_routing_key("worker-video-i2v", "A100")],
+                )),
+                asyncio.create_task(audio.run(
+                    audio_queue, on_audio,
+                    exchange=SYSTEM_TOPICS.DISPATCH_EXCHANGE,
+                    routing_keys=[dispatch_routing_key("worker-audio-tts")],
+                )),
+            ]
+            await asyncio.sleep(0)
+            for job_id in ("job_v1", "job_a1", "job_v2"):
+                await hub.dispatch(job_id)
+            await asyncio.wait_for(asyncio.gather(*tasks), timeout=5)
+
+        asyncio.run(scenario())
+
+        assert received == {"video": ["job_v1", "job_v2"], "audio": ["job_a1"]}
+        # Exactly one delivery per job, and the only dispatch queues are the
+        # consumed ones, none of them holding anything back.
+        assert broker.deliveries == {video_queue: 2, audio_queue: 1}
+        assert broker.unroutable == 0
+        dispatch_depths = {q: broker.depth(q) for q in broker.queues if q.startswith("ainer.job.dispatch.")}
+        assert dispatch_depths == {video_queue: 0, audio_queue: 0}
+        assert broker.depth(SYSTEM_TOPICS.JOB_STATUS) == 3
+
+    def test_dispatch_claims_a_slot_and_callback_releases_it(self):
+        import asyncio
+
+        from ainern2d_shared.queue.inprocess import InProcessBroker
+        from ainern2d_shared.schemas.worker import WorkerResult
+
+        job = _make_job(id="job_slot")
+        hub = self._hub(InProcessBroker(), job)
+
+        assert asyncio.run(hub.dispatch("job_slot")) == "gpu-1"
+        assert job.locked_by == "gpu-1" and job.status == JobStatus.claimed
+        assert hub.node_registry.get_available("worker-video")[0]["current_load"] == 1
+
+        result = WorkerResult(job_id="job_slot", run_id="run_001", status="succeeded")
+        asyncio.run(hub.handle_callback(result))
+        asyncio.run(hub.handle_callback(result))  # redelivery must not release twice
+        assert hub.node_registry.get_available("worker-video")[0]["current_load"] == 0
+        assert job.status == JobStatus.success
+        # One short-lived session per operation, each committed and closed.
+        sessions = hub.session_factory.opened
+        assert len(sessions) == 3
+        assert all(db.commit.called and db.close.called for db in sessions)
+
+    def test_failed_publish_releases_the_slot_and_requeues_the_job(self):
+        import asyncio
+
+        from ainern2d_shared.queue.inprocess import InProcessBroker
+
+        job = _make_job(id="job_pub")
+        hub = self._hub(InProcessBroker(), job)
+        hub._publisher = MagicMock()
+        hub._publisher.publish.side_effect = ConnectionError("broker down")
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(hub.dispatch("job_pub"))
+        # The claim was committed first, then rolled back to queued.
+        assert hub.session_factory.opened[0].commit.called
+        assert job.status == JobStatus.queued and job.locked_by is None
+        assert hub.node_registry.get_available("worker-video")[0]["current_load"] == 0
+
+    def test_failed_commit_releases_the_slot_without_publishing(self):
+        import asyncio
+
+        from ainern2d_shared.queue.inprocess import InProcessBroker
+
+        job = _make_job(id="job_commit")
+        hub = self._hub(InProcessBroker(), job)
+        hub._publisher = MagicMock()
+        factory = hub.session_factory
+
+        def failing_factory():
+            db = factory()
+            db.commit.side_effect = RuntimeError("db down")
+            return db
+
+        hub.session_factory = failing_factory
+        with pytest.raises(RuntimeError):
+            asyncio.run(hub.dispatch("job_commit"))
+        assert not hub._publisher.publish.called
+        assert hub.node_registry.get_available("worker-video")[0]["current_load"] == 0
+
+    def test_consumer_releases_its_session_before_the_lane_wait(self):
+        import asyncio
+
+        from ainern2d_shared.queue.inprocess import InProcessBroker
+        from app.consumers.dispatch_consumer import DispatchConsumer
+
+        job = _make_job(id="job_lane", priority=5)
+        hub = self._hub(InProcessBroker(), job)
+        seen: dict = {}
+
+        class _Lanes:
+            async def submit(self, job_id, tenant_id, lane, capacity_key, run):
+                seen["closed_before_wait"] = all(db.close.called for db in hub.session_factory.opened)
+                seen["key"] = (job_id, tenant_id, capacity_key)
+                return await run()
+
+        consumer = DispatchConsumer(hub, max_in_flight=4, lanes=_Lanes())
+        asyncio.run(consumer._handle({
+            "event_type": "job.created", "producer": "test", "tenant_id": "t1", "project_id": "p1",
+            "idempotency_key": "idem", "trace_id": "tr", "correlation_id": "co", "job_id": "job_lane",
+            "occurred_at": "2026-01-01T00:00:00Z", "payload": {},
+        }))
+
+        assert seen == {"closed_before_wait": True, "key": ("job_lane", "t1", ("worker-video", None))}
+        assert job.locked_by == "gpu-1"
+        assert len(hub.session_factory.opened) == 2
+
+
+class TestHubService:
+    @staticmethod
+    def _started_consumers(monkeypatch, routing: str) -> list[str]:
+        import asyncio
+
+        import app.main as main
+
+        started: list[str] = []
+
+        class _Consumer:
+            def __init__(self, hub):
+                self.hub = hub
+                self.stopped = False
+
+            def start(self):
+                started.append(type(self).__name__)
+
+            def stop(self):
+                self.stopped = True
+
+        consumers = [type("DispatchConsumer", (_Consumer,), {}), type("ResultConsumer", (_Consumer,), {})]
+        monkeypatch.setenv("AINER_ENABLE_RMQ_CONSUMERS", "1")
+        monkeypatch.setattr(main.settings, "dispatch_routing", routing)
+        monkeypatch.setattr(main, "DispatchHub", lambda _sf, registry, _rt: registry)
+        monkeypatch.setattr(main, "DispatchConsumer", consumers[0])
+        monkeypatch.setattr(main, "ResultConsumer", consumers[1])
+
+        async def _run():
+            async with main.lifespan(main.app):
+                await asyncio.sleep(0.05)
+                return main.app.state.node_registry
+
+        registry = asyncio.run(_run())
+        assert registry is not None
+        return sorted(started)
+
+    def test_lifespan_starts_the_dispatch_consumer_only_for_routed_workers(self, monkeypatch):
+        assert self._started_consumers(monkeypatch, "routed") == [
+            "DispatchConsumer", "ResultConsumer",
+        ]
+        # Legacy workers read JOB_DISPATCH themselves; the hub must not compete.
+        assert self._started_consumers(monkeypatch, "legacy") == [
+            "ResultConsumer",
+        ]
+
+    def test_results_for_jobs_the_hub_never_stored_are_still_published(self):
+        import asyncio
+
+        from ainern2d_shared.queue.inprocess import InProcessBroker
+        from ainern2d_shared.queue.topics import SYSTEM_TOPICS
+        from ainern2d_shared.schemas.worker import WorkerResult
+
+        broker = InProcessBroker()
+        hub = TestRoutedDispatch()._hub(broker)
+        asyncio.run(hub.handle_callback(WorkerResult(job_id="job_legacy", run_id="r1", status="error")))
+        assert broker.depth(SYSTEM_TOPICS.JOB_STATUS) == 1
+
+    def test_jobs_without_a_routed_worker_are_rejected_before_claiming(self):
+        import asyncio
+
+        from ainern2d_shared.queue.inprocess import InProcessBroker
+
+        job = _make_job(id="job_cmp", job_type=JobType.compose_final, payload_json={})
+        hub = TestRoutedDispatch()._hub(InProcessBroker(), job)
+        with pytest.raises(ValueError, match="no worker"):
+            asyncio.run(hub.dispatch("job_cmp"))
+        assert job.locked_by is None
+
+    def test_dispatch_event_for_an_unknown_job_creates_and_routes_it(self):
+        import asyncio
+
+        from ainern2d_shared.queue.inprocess import InProcessBroker
+        from ainern2d_shared.queue.topics import dispatch_queue
+        from app.consumers.dispatch_consumer import DispatchConsumer
+        from app.dispatcher.lanes import LaneScheduler
+
+        broker = InProcessBroker()
+        hub = TestRoutedDispatch()._hub(broker)
+        event = {
+            "event_type": "job.created", "producer": "orchestrator", "tenant_id": "t1", "project_id": "p1",
+            "idempotency_key": "idem", "trace_id": "tr", "correlation_id": "co", "job_id": "job_new",
+            "run_id": "run_9", "occurred_at": "2026-01-01T00:00:00Z",
+            "payload": {"worker_type": "worker-audio-tts", "text": "hi"},
+        }
+
+        async def _main():
+            lanes = LaneScheduler(workers={"normal": 1}, metrics=MagicMock())
+            consumer = DispatchConsumer(hub, max_in_flight=4, lanes=lanes)
+            await consumer._handle({**event, "event_type": "job.progress"})  # not a dispatch
+            await consumer._handle(event)
+            await lanes.aclose()
+
+        asyncio.run(_main())
+        job = hub.session_factory.table["job_new"]
+        assert job.job_type == JobType.synth_audio and job.locked_by == "cpu-1"
+        assert broker.depth(dispatch_queue("worker-audio-tts")) == 1
+
+
+class TestNodeApi:
+    def _client(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        from app.api.v1.nodes import router
+        from app.dispatcher.node_registry import NodeRegistry
+
+        app = FastAPI()
+        app.state.node_registry = NodeRegistry()
+        app.include_router(router)
+        return TestClient(app), app.state.node_registry
+
+    def test_registered_nodes_are_claimable_under_their_family(self):
+        client, registry = self._client()
+        resp = client.post("/internal/nodes/register", json={
+            "node_id": "tts-1", "worker_type": "worker-audio-tts", "capacity": 2, "gpu_tier": "default",
+        })
+        assert resp.status_code == 201 and resp.json()["worker_type"] == "worker-audio"
+        assert registry.claim("worker-audio")["node_id"] == "tts-1"
+        assert client.post("/internal/nodes/tts-1/heartbeat").status_code == 204
+
+        assert client.delete("/internal/nodes/tts-1").status_code == 204
+        # An unknown node is told to register again.
+        assert client.post("/internal/nodes/tts-1/heartbeat").status_code == 404
+        assert client.post("/internal/nodes/register", json={
+            "node_id": "x", "worker_type": "worker-nope",
+        }).status_code == 422
+
+
+class TestLaneScheduler:
+    @staticmethod
+    def _metrics():
+        return MagicMock()
+
+    @staticmethod
+    def _run(scheduler, submissions, release=None):
+        """Submit ``(job_id, tenant, lane)`` while workers are held, then drain."""
+        import asyncio
+
+        async def _main():
+            order: list[str] = []
+            gate = asyncio.Event()
+
+            def job(job_id):
+                async def run():
+                    await gate.wait()
+                    order.append(job_id)
+                    return job_id
+                return run
+
+            # One blocker per worker pins them so everything else queues up.
+            blockers = [
+                scheduler.submit(f"hold_{i}", "t_hold", lane, ("worker-video", None), job(f"hold_{i}"))
+                for i, lane in enumerate(release or [])
+            ]
+            await asyncio.sleep(0)
+            futures = [
+                scheduler.submit(job_id, tenant, lane, ("worker-video", None), job(job_id))
+                for job_id, tenant, lane in submissions
+            ]
+            gate.set()
+            await asyncio.gather(*blockers, *futures)
+            await scheduler.aclose()
+            return [j for j in order if not j.startswith("hold_")]
+
+        return asyncio.run(_main())
+
+    def test_interactive_is_served_before_bulk(self):
+        from app.dispatcher.lanes import LaneScheduler
+
+        scheduler = LaneScheduler(workers={"interactive": 1}, metrics=self._metrics())
+        order = self._run(
+            scheduler,
+            [("b1", "t1", "bulk"), ("n1", "t1", "normal"), ("i1", "t1", "interactive"), ("b2", "t1", "bulk")],
+            release=["interactive"],
+        )
+        assert order == ["i1", "n1", "b1", "b2"]
+        assert scheduler.stolen == {"interactive": 0, "normal": 1, "bulk": 2}
+
+    def test_tenants_share_a_lane_by_weight(self):
+        from app.dispatcher.lanes import LaneScheduler
+
+        scheduler = LaneScheduler(workers={"bulk": 1}, tenant_weights={"t_big": 2}, metrics=self._metrics())
+        noisy = [(f"a{i}", "t_noisy", "bulk") for i in range(4)]
+        order = self._run(
+            scheduler,
+            noisy + [("q1", "t_quiet", "bulk"), ("q2", "t_quiet", "bulk")]
+            + [("g1", "t_big", "bulk"), ("g2", "t_big", "bulk")],
+            release=["bulk"],
+        )
+        # The quiet tenant is not stuck behind the noisy tenant's backlog and
+        # the double-weight tenant gets both jobs in before the noisy one's second.
+        assert order.index("q1") < order.index("a1")
+        assert order.index("g2") < order.index("a2")
+        assert order[-1] == "a3"
+
+    def test_no_capacity_requeues_until_a_slot_frees(self):
+        import asyncio
+
+        from app.dispatcher.hub import NoCapacityError
+        from app.dispatcher.lanes import LaneScheduler
+
+        metrics = self._metrics()
+
+        async def _main():
+            scheduler = LaneScheduler(workers={"normal": 1}, retry_sec=0.01, metrics=metrics)
+            attempts = {"video": 0, "audio": 0}
+
+            async def video():
+                attempts["video"] += 1
+                if attempts["video"] < 3:
+                    raise NoCapacityError("worker-video has no free slot")
+                return "gpu-1"
+
+            async def audio():
+                attempts["audio"] += 1
+                return "cpu-1"
+
+            futures = [
+                scheduler.submit("job_v", "t1", "normal", ("worker-video", None), video),
+                scheduler.submit("job_a", "t1", "normal", ("worker-audio", None), audio),
+            ]
+            results = await asyncio.gather(*futures)
+            depths = scheduler.depths()
+            await scheduler.aclose()
+            return results, attempts, depths
+
+        results, attempts, depths = asyncio.run(_main())
+        assert results == ["gpu-1", "cpu-1"]
+        assert attempts == {"video": 3, "audio": 1}
+        assert depths == {"interactive": 0, "normal": 0, "bulk": 0}
+        recorded = {c.args[0] for c in metrics.record_queue_depth.call_args_list}
+        assert recorded == {"job.dispatch.lane.normal"}
+        assert {c.args[0] for c in metrics.record_latency.call_args_list} == {"dispatch_wait.normal"}
+
+    def test_no_capacity_gives_up_after_max_wait(self):
+        import asyncio
+
+        from app.dispatcher.hub import NoCapacityError
+        from app.dispatcher.lanes import LaneScheduler
+
+        async def _main():
+            scheduler = LaneScheduler(
+                workers={"bulk": 1}, retry_sec=0.01, max_wait_sec=0.05, metrics=self._metrics(),
+            )
+
+            async def never():
+                raise NoCapacityError("no nodes")
+
+            future = scheduler.submit("job_x", "t1", "bulk", ("worker-video", None), never)
+            try:
+                with pytest.raises(NoCapacityError):
+                    await future
+            finally:
+                await scheduler.aclose()
+
+        asyncio.run(_main())
+
+    def test_hub_raises_no_capacity_when_no_node_is_free(self):
+        import asyncio
+
+        from ainern2d_shared.queue.inprocess import InProcessBroker
+        from app.dispatcher.hub import NoCapacityError
+
+        job = _make_job(id="job_full", status=JobStatus.enqueued)
+        hub = TestRoutedDispatch()._hub(InProcessBroker(), job)
+        hub.node_registry.update_load("gpu-1", 2)
+        with pytest.raises(NoCapacityError):
+            asyncio.run(hub.dispatch("job_full"))
+        assert job.status == JobStatus.queued
+        assert hub.session_factory.opened[0].commit.called
+
+
+def test_lane_for_uses_priority_and_payload_override():
+    from ainern2d_shared.queue.lanes import JOB_PRIORITY, lane_for
+
+    assert lane_for(JOB_PRIORITY["interactive"], {}) == "interactive"
+    assert lane_for(None, None) == "normal"
+    assert lane_for(-100, {}) == "bulk"
+    assert lane_for(100, {"lane": "bulk"}) == "bulk"
@@ -0,0 +1,35 @@
+"""add_dag_progress_counters
+
+Revision ID: a8c4e2f7d316
+Revises: e7b3d5a1c9f0
+Create Date: 2026-10-17 09:00:00.000000
+
+DAG readiness kept on the rows instead of rescanned per job event:
+- jobs.pending_upstream: upstream DAG jobs not yet succeeded (NULL = not a DAG job)
+- render_runs.dag_jobs / dag_jobs_terminal / dag_jobs_succeeded rollups
+
+Existing runs keep NULL / 0 and are seeded by DagEngine.rebuild on first use.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "a8c4e2f7d316"
+down_revision: Union[str, Sequence[str], None] = "e7b3d5a1c9f0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("jobs", sa.Column("pending_upstream", sa.Integer, nullable=True))
+    op.create_index("ix_jobs_run_ready", "jobs", ["run_id", "status", "pending_upstream"])
+    for column in ("dag_jobs", "dag_jobs_terminal", "dag_jobs_succeeded"):
+        op.add_column("render_runs", sa.Column(column, sa.Integer, nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    for column in ("dag_jobs_succeeded", "dag_jobs_terminal", "dag_jobs"):
+        op.drop_column("render_runs", column)
+    op.drop_index("ix_jobs_run_ready", table_name="jobs")
+    op.drop_column("jobs", "pending_upstream")
@@ -0,0 +1,70 @@
+"""add_rag_embedding_ann_index
+
+Revision ID: c1d9e7a4b2f6
+Revises: 7d1e4a9b2c01, b8f1c3d6e902
+Create Date: 2026-03-10 09:00:00.000000
+
+ANN index for cosine top-k on rag_embeddings.embedding, built with the
+SKILL_12 ``IndexConfig`` parameters (HNSW: m / ef_construction, IVF: nlist).
+``RAG_ANN_INDEX_TYPE`` (hnsw | ivf) selects the index kind; HNSW by default.
+Only primary embeddings are indexed, matching HybridSearcher's filter.
+Skipped on non-Postgres databases or when the column is not a pgvector type.
+"""
+import os
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from ainern2d_shared.schemas.skills.skill_12 import IndexConfig, IndexType
+
+revision: str = "c1d9e7a4b2f6"
+down_revision: Union[str, Sequence[str], None] = ("7d1e4a9b2c01", "b8f1c3d6e902")
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_rag_embeddings_embedding_ann"
+
+
+def _is_vector_column(bind) -> bool:
+	udt = bind.execute(
+		sa.text(
+			"SELECT udt_name FROM information_schema.columns "
+			"WHERE table_name = 'rag_embeddings' AND column_name = 'embedding'"
+		)
+	).scalar()
+	return udt == "vector"
+
+
+def _index_config() -> IndexConfig:
+	index_type = os.getenv("RAG_ANN_INDEX_TYPE", IndexType.HNSW.value).lower()
+	return IndexConfig(index_type=IndexType(index_type))
+
+
+def upgrade() -> None:
+	bind = op.get_bind()
+	if bind.dialect.name != "postgresql":
+		return
+	op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+	if not _is_vector_column(bind):
+		return
+
+	cfg = _index_config()
+	if cfg.index_type == IndexType.IVF:
+		method = "ivfflat"
+		params = f"lists = {int(cfg.nlist)}"
+	else:
+		method = "hnsw"
+		params = f"m = {int(cfg.m_parameter)}, ef_construction = {int(cfg.ef_construction)}"
+
+	op.execute(
+		f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON rag_embeddings "
+		f"USING {method} (embedding vector_cosine_ops) WITH ({params}) "
+		"WHERE is_primary"
+	)
+
+
+def downgrade() -> None:
+	if op.get_bind().dialect.name != "postgresql":
+		return
+	op.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
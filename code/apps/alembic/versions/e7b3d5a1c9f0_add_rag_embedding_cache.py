@@ -0,0 +1,53 @@
+"""add_rag_embedding_cache
+
+Revision ID: e7b3d5a1c9f0
+Revises: c1d9e7a4b2f6
+Create Date: 2026-03-12 10:00:00.000000
+
+Provider embeddings keyed by sha256(model, text) so KB re-syncs only pay
+for chunks whose text changed.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "e7b3d5a1c9f0"
+down_revision: Union[str, Sequence[str], None] = "c1d9e7a4b2f6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rag_embedding_cache",
+        sa.Column("id", sa.String(64), primary_key=True),
+        sa.Column("tenant_id", sa.String(64), nullable=False),
+        sa.Column("project_id", sa.String(64), nullable=False),
+        sa.Column("trace_id", sa.String(128), nullable=True),
+        sa.Column("correlation_id", sa.String(128), nullable=True),
+        sa.Column("idempotency_key", sa.String(256), nullable=True),
+        sa.Column("version", sa.String(32), nullable=False, server_default="v1"),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("created_by", sa.String(64), nullable=True),
+        sa.Column("updated_by", sa.String(64), nullable=True),
+        sa.Column("error_code", sa.String(64), nullable=True),
+        sa.Column("error_message", sa.String(1024), nullable=True),
+        sa.Column("retry_count", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("content_hash", sa.String(64), nullable=False),
+        sa.Column("model_name", sa.String(128), nullable=False),
+        sa.Column("embedding_dim", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("embedding", postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.UniqueConstraint("tenant_id", "project_id", "content_hash", name="uq_rag_embedding_cache_scope_hash"),
+    )
+    op.create_index("ix_rag_embedding_cache_tenant_id", "rag_embedding_cache", ["tenant_id"])
+    op.create_index("ix_rag_embedding_cache_project_id", "rag_embedding_cache", ["project_id"])
+    op.create_index("ix_rag_embedding_cache_deleted_at", "rag_embedding_cache", ["deleted_at"])
+    op.create_index("ix_rag_embedding_cache_created_at", "rag_embedding_cache", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("rag_embedding_cache")
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Benchmark LLM provider calls: a fresh client per job vs the pooled client registry.
+
+Runs the same chat-completion jobs against ``tools/mock_provider_server.py``
+(started in a child process on a free port unless ``--base-url`` is given)
+twice:
+
+  per-job  – a new client per call, as the provider workers used to do
+  pooled   – ``ProviderClientRegistry`` clients shared by every job
+
+and reports p50/p99 latency and throughput for each at the given concurrency.
+The local mock speaks plain HTTP/1.1, so it shows TCP setup and pool reuse
+only; point ``--base-url`` at a TLS endpoint to include handshake cost.
+
+Usage:
+  python3 code/scripts/bench_llm_client_pool.py --jobs 2000 --concurrency 64
+  python3 code/scripts/bench_llm_client_pool.py --client httpx   # GenericLLMWorker path
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import sys
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "shared"))
+sys.path.insert(0, str(ROOT / "apps" / "ainern2-worker-runtime"))
+sys.path.insert(0, str(ROOT / "tools"))
+
+import httpx
+
+from ainern2d_shared.config.setting import settings
+
+from app.common.http_clients import ProviderClientRegistry
+from mock_provider_server import Handler
+
+API_KEY = "sk-bench"
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+def _p(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    sorted_vals = sorted(values)
+    idx = max(0, min(len(sorted_vals) - 1, int(len(sorted_vals) * q) - 1))
+    return sorted_vals[idx]
+
+
+class _MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default backlog of 5 resets connections under load
+
+
+def _serve_mock(port: int) -> None:
+    _MockServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+def _start_mock() -> tuple[multiprocessing.Process, str]:
+    """Run the mock in its own process so it does not share the client's GIL."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    proc = multiprocessing.Process(target=_serve_mock, args=(port,), daemon=True)
+    proc.start()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/healthz", timeout=1).raise_for_status()
+            break
+        except httpx.HTTPError:
+            time.sleep(0.05)
+    return proc, f"http://127.0.0.1:{port}/v1"
+
+
+async def _call_openai(client, model: str) -> None:
+    await client.chat.completions.create(model=model, messages=MESSAGES, max_tokens=32)
+
+
+async def _call_httpx(client: httpx.AsyncClient, base_url: str, model: str) -> None:
+    resp = await client.post(
+        f"{base_url}/chat/completions",
+        headers={"Authorization": f"Bearer {API_KEY}"},
+        json={"model": model, "messages": MESSAGES},
+        timeout=60,
+    )
+    resp.raise_for_status()
+    resp.json()
+
+
+async def _run(mode: str, kind: str, base_url: str, jobs: int, concurrency: int, model: str) -> dict:
+    registry = ProviderClientRegistry(
+        max_connections=settings.llm_http_max_connections,
+        max_keepalive_connections=settings.llm_http_max_keepalive,
+        keepalive_expiry=settings.llm_http_keepalive_expiry_sec,
+        http2=settings.llm_http2,
+    )
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def _job() -> None:
+        nonlocal errors
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                if kind == "openai":
+                    if mode == "pooled":
+                        await _call_openai(registry.openai(base_url, API_KEY), model)
+                    else:
+                        from openai import AsyncOpenAI
+
+                        client = AsyncOpenAI(api_key=API_KEY, base_url=base_url)
+                        try:
+                            await _call_openai(client, model)
+                        finally:
+                            await client.close()
+                elif mode == "pooled":
+                    await _call_httpx(registry.http(), base_url, model)
+                else:
+                    async with httpx.AsyncClient(timeout=60) as client:
+                        await _call_httpx(client, base_url, model)
+            except Exception:
+                errors += 1
+                return
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_job() for _ in range(jobs)))
+    elapsed = time.perf_counter() - started
+    await registry.aclose()
+    return {
+        "mode": mode,
+        "p50_ms": _p(latencies, 0.50),
+        "p99_ms": _p(latencies, 0.99),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "errors": errors,
+        "http2": registry.http2,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--client", choices=["openai", "httpx"], default="openai")
+    parser.add_argument("--base-url", default="", help="OpenAI-compatible base URL (default: in-process mock)")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url.rstrip("/")
+    if not base_url:
+        server, base_url = _start_mock()
+
+    print(f"{args.jobs} jobs, concurrency={args.concurrency}, client={args.client}, target={base_url}")
+    results = [
+        asyncio.run(_run(mode, args.client, base_url, args.jobs, args.concurrency, args.model))
+        for mode in ("per-job", "pooled")
+    ]
+    print(f"{'mode':<10}{'p50 ms':>10}{'p99 ms':>10}{'jobs/s':>10}{'errors':>8}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['throughput']:>10.1f}{r['errors']:>8}")
+    base, pooled = results
+    if base["throughput"]:
+        print(
+            f"pooled vs per-job: p50 {pooled['p50_ms'] - base['p50_ms']:+.2f}ms, "
+            f"p99 {pooled['p99_ms'] - base['p99_ms']:+.2f}ms, "
+            f"throughput x{pooled['throughput'] / base['throughput']:.2f} (http2={pooled['http2']})"
+        )
+    if server is not None:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -63,7 +63,7 @@ from .pipeline_models import (
 )
 from .provider_models import CostLedger, ModelProfile, ModelProvider, ProviderAdapter, RouteDecision
 from .ops_bridge_models import OpsBridgeToken, OpsProviderReport
-from .rag_models import FeedbackEvent, KBPack, KBSource, KbProposal, KbRollout, KbVersion, NovelKBMap, PersonaKBMap, RagCollection, RagDocument, RagEmbedding, RagEvalReport, RoleKBMap
+from .rag_models import FeedbackEvent, KBPack, KBSource, KbProposal, KbRollout, KbVersion, NovelKBMap, PersonaKBMap, RagCollection, RagDocument, RagEmbedding, RagEmbeddingCache, RagEvalReport, RoleKBMap
 from .governance_models import (
 	CreativePolicyStack,
 	CriticEvaluation,
@@ -182,6 +182,7 @@ __all__ = [
 	"NovelKBMap",
 	"RagDocument",
 	"RagEmbedding",
+	"RagEmbeddingCache",
 	"FeedbackEvent",
 	"KbProposal",
 	"RagEvalReport",
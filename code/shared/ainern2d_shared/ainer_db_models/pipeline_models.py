@@ -51,6 +51,10 @@ class RenderRun(Base, StandardColumnsMixin):
 	started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 	finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 	config_json: Mapped[dict | None] = mapped_column(JSONB)
+	# DAG rollups, kept current by ainern2d_shared.db.dag_progress.
+	dag_jobs: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+	dag_jobs_terminal: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+	dag_jobs_succeeded: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
 
 class TrackRun(Base, StandardColumnsMixin):
@@ -202,6 +206,7 @@ class Job(Base, StandardColumnsMixin):
 		Index("ix_jobs_scope_status", "tenant_id", "project_id", "status"),
 		Index("ix_jobs_scope_type", "tenant_id", "project_id", "job_type"),
 		Index("ix_jobs_scope_stage", "tenant_id", "project_id", "stage"),
+		Index("ix_jobs_run_ready", "run_id", "status", "pending_upstream"),
 	)
 
 	run_id: Mapped[str | None] = mapped_column(ForeignKey("render_runs.id", ondelete="CASCADE"))
@@ -219,6 +224,8 @@ class Job(Base, StandardColumnsMixin):
 	locked_by: Mapped[str | None] = mapped_column(String(128))
 	locked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 	next_retry_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+	# Upstream DAG jobs that have not succeeded yet; NULL for jobs outside the run's DAG.
+	pending_upstream: Mapped[int | None] = mapped_column(Integer)
 
 
 class WorkflowEvent(Base, StandardColumnsMixin):
@@ -91,6 +91,19 @@ class RagEmbedding(Base, StandardColumnsMixin):
 	is_primary: Mapped[bool] = mapped_column(default=False, nullable=False)
 
 
+class RagEmbeddingCache(Base, StandardColumnsMixin):
+	"""Provider embeddings keyed by sha256(model, text), reused across KB re-syncs."""
+	__tablename__ = "rag_embedding_cache"
+	__table_args__ = (
+		UniqueConstraint("tenant_id", "project_id", "content_hash", name="uq_rag_embedding_cache_scope_hash"),
+	)
+
+	content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+	model_name: Mapped[str] = mapped_column(String(128), nullable=False)
+	embedding_dim: Mapped[int] = mapped_column(nullable=False, default=0)
+	embedding: Mapped[list[float]] = mapped_column(ARRAY(Float), nullable=False)
+
+
 class FeedbackEvent(Base, StandardColumnsMixin):
 	__tablename__ = "feedback_events"
 	__table_args__ = (
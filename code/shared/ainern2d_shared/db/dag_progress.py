@@ -0,0 +1,99 @@
+"""DAG readiness kept on the rows, for every replica to read directly.
+
+A job of a run's DAG (``Job.pending_upstream`` is not NULL) is ready once it
+is queued and ``pending_upstream`` is 0; the run counts its DAG jobs and how
+many are terminal / succeeded. :func:`track_dag_progress` keeps both current
+from the ``Job.status`` changes a session flushes, touching only the
+downstream edges of the job that changed.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from ainern2d_shared.ainer_db_models.enum_models import JobStatus
+from ainern2d_shared.ainer_db_models.pipeline_models import Job, JobDependency, RenderRun
+
+TERMINAL_JOB_STATUSES = frozenset({JobStatus.success, JobStatus.failed, JobStatus.canceled})
+
+_TRACKED = "dag_progress.tracked"
+_PENDING = "dag_progress.pending"
+
+
+def track_dag_progress(db: Session) -> None:
+	"""Apply the DAG counter updates for every job status change ``db`` flushes.
+
+	Install it on each session that moves DAG jobs into or out of a terminal
+	status; calling it again on the same session is a no-op.
+	"""
+	if db.info.get(_TRACKED):
+		return
+	db.info[_TRACKED] = True
+	event.listen(db, "before_flush", _read_committed_statuses)
+	event.listen(db, "after_flush", _apply_transitions)
+
+
+def add_dag_jobs(db: Session, run_id: str, count: int) -> None:
+	"""Count ``count`` freshly inserted (queued) DAG jobs on the run."""
+	if count:
+		db.execute(
+			update(RenderRun)
+			.where(RenderRun.id == run_id)
+			.values(dag_jobs=RenderRun.dag_jobs + count)
+			.execution_options(synchronize_session=False)
+		)
+
+
+def _read_committed_statuses(db: Session, _flush_context, _instances) -> None:
+	changed = {
+		obj.id: obj for obj in db.dirty
+		if isinstance(obj, Job) and inspect(obj).attrs.status.history.has_changes()
+	}
+	if not changed:
+		return
+	# The row lock serialises writers of the same job: whoever comes second
+	# reads the status the first one committed and counts nothing.
+	rows = db.execute(
+		select(Job.id, Job.run_id, Job.status)
+		.where(Job.id.in_(list(changed)), Job.pending_upstream.is_not(None))
+		.with_for_update()
+	).all()
+	db.info[_PENDING] = [(changed[job_id], run_id, old) for job_id, run_id, old in rows]
+
+
+def _apply_transitions(db: Session, _flush_context) -> None:
+	pending = db.info.pop(_PENDING, None)
+	if not pending:
+		return
+	rollups: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+	for job, run_id, old in pending:
+		new = job.status
+		if new == old:
+			continue
+		if (new == JobStatus.success) != (old == JobStatus.success):
+			# Leaving success (e.g. a manual rerun) re-arms the downstream edges.
+			delta = -1 if new == JobStatus.success else 1
+			db.execute(
+				update(Job)
+				.where(
+					Job.id.in_(select(JobDependency.job_id).where(JobDependency.depends_on_job_id == job.id)),
+					Job.pending_upstream.is_not(None),
+				)
+				.values(pending_upstream=Job.pending_upstream + delta)
+				.execution_options(synchronize_session=False)
+			)
+			rollups[run_id][1] -= delta
+		rollups[run_id][0] += (new in TERMINAL_JOB_STATUSES) - (old in TERMINAL_JOB_STATUSES)
+	for run_id, (terminal, succeeded) in rollups.items():
+		if run_id and (terminal or succeeded):
+			db.execute(
+				update(RenderRun)
+				.where(RenderRun.id == run_id)
+				.values(
+					dag_jobs_terminal=RenderRun.dag_jobs_terminal + terminal,
+					dag_jobs_succeeded=RenderRun.dag_jobs_succeeded + succeeded,
+				)
+				.execution_options(synchronize_session=False)
+			)
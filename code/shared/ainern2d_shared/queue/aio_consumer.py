@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import signal
+import threading
+from typing import Any, Awaitable, Callable, Sequence
+
+from ainern2d_shared.telemetry.logging import get_logger
+
+try:
+	import aio_pika
+except Exception:
+	aio_pika = None
+
+_logger = get_logger("queue.aio_consumer")
+
+AsyncHandler = Callable[[dict], Awaitable[None]]
+
+
+def _decode(body: bytes) -> dict:
+	try:
+		return json.loads(body.decode("utf-8"))
+	except Exception:
+		return {"raw": body.decode("utf-8", errors="replace")}
+
+
+class AsyncQueueConsumer:
+	"""Asyncio-native RabbitMQ consumer with bounded concurrency.
+
+	- one persistent event loop / connection for the whole process
+	- ``max_in_flight`` handlers run concurrently; ``basic_qos`` prefetch is
+	  set to the same value so the broker never pushes more than we run
+	- a message is acked only after its handler returns (i.e. after the
+	  worker has reported its result)
+	- ``request_stop()`` / SIGTERM cancels the consumer and drains in-flight
+	  handlers for up to ``drain_timeout_s`` before closing; anything still
+	  unacked is redelivered by the broker
+	"""
+
+	def __init__(
+		self,
+		amqp_url: str,
+		*,
+		max_in_flight: int = 1,
+		drain_timeout_s: float = 60.0,
+		connect: Callable[[str], Awaitable[Any]] | None = None,
+	):
+		if aio_pika is None and connect is None:
+			raise RuntimeError("aio-pika is required for AsyncQueueConsumer")
+		self._amqp_url = amqp_url
+		self.max_in_flight = max(max_in_flight, 1)
+		self._drain_timeout_s = drain_timeout_s
+		self._connect = connect or aio_pika.connect_robust
+		self._in_flight: set[asyncio.Task] = set()
+		self._slots: asyncio.Semaphore | None = None
+		self._stop: asyncio.Event | None = None
+		self._loop: asyncio.AbstractEventLoop | None = None
+
+	@property
+	def in_flight(self) -> int:
+		return len(self._in_flight)
+
+	def consume(self, topic: str, handler: AsyncHandler, **kwargs: Any) -> None:
+		"""Blocking entry point: run :meth:`run` on a fresh event loop."""
+		asyncio.run(self.run(topic, handler, **kwargs))
+
+	async def run(
+		self,
+		topic: str,
+		handler: AsyncHandler,
+		*,
+		exchange: str | None = None,
+		routing_keys: Sequence[str] = (),
+	) -> None:
+		"""Consume queue ``topic`` until :meth:`request_stop` is called, then drain.
+
+		When ``exchange`` is given the queue is bound to that topic exchange
+		under each of ``routing_keys`` before consuming starts.
+		"""
+		self._loop = asyncio.get_running_loop()
+		self._stop = asyncio.Event()
+		self._slots = asyncio.Semaphore(self.max_in_flight)
+		self._install_signal_handlers()
+
+		connection = await self._connect(self._amqp_url)
+		try:
+			channel = await connection.channel()
+			await channel.set_qos(prefetch_count=self.max_in_flight)
+			queue = await channel.declare_queue(topic, durable=True)
+			if exchange:
+				ex = await channel.declare_exchange(exchange, "topic", durable=True)
+				for key in routing_keys:
+					await queue.bind(ex, routing_key=key)
+
+			async def _on_message(message: Any) -> None:
+				await self._slots.acquire()
+				task = asyncio.create_task(self._process(message, handler))
+				self._in_flight.add(task)
+				task.add_done_callback(self._in_flight.discard)
+
+			consumer_tag = await queue.consume(_on_message)
+			_logger.info(
+				"async consumer started topic={} max_in_flight={}", topic, self.max_in_flight,
+			)
+			await self._stop.wait()
+
+			await queue.cancel(consumer_tag)
+			await self._drain()
+		finally:
+			await connection.close()
+			_logger.info("async consumer stopped topic={}", topic)
+
+	def request_stop(self) -> None:
+		"""Stop taking new deliveries; safe to call from any thread."""
+		if self._loop is None or self._stop is None:
+			return
+		self._loop.call_soon_threadsafe(self._stop.set)
+
+	# ------------------------------------------------------------------
+
+	async def _process(self, message: Any, handler: AsyncHandler) -> None:
+		try:
+			await handler(_decode(message.body))
+		except asyncio.CancelledError:
+			raise
+		except Exception:
+			# Give the message exactly one more chance before dropping it.
+			requeue = not getattr(message, "redelivered", False)
+			_logger.exception("async consumer handler failed requeue={}", requeue)
+			await message.nack(requeue=requeue)
+		else:
+			await message.ack()
+		finally:
+			self._slots.release()
+
+	async def _drain(self) -> None:
+		if not self._in_flight:
+			return
+		_logger.info("async consumer draining in_flight={}", len(self._in_flight))
+		_done, pending = await asyncio.wait(
+			set(self._in_flight), timeout=self._drain_timeout_s,
+		)
+		for task in pending:
+			task.cancel()
+		if pending:
+			_logger.warning("async consumer drain timed out; {} jobs left for redelivery", len(pending))
+			await asyncio.gather(*pending, return_exceptions=True)
+
+	def _install_signal_handlers(self) -> None:
+		if threading.current_thread() is not threading.main_thread():
+			return
+		for sig in (signal.SIGTERM, signal.SIGINT):
+			try:
+				self._loop.add_signal_handler(sig, self._stop.set)
+			except (NotImplementedError, RuntimeError):
+				pass
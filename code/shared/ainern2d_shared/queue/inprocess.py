@@ -0,0 +1,314 @@
+"""In-process broker stand-in for local runs and tests.
+
+Implements just enough AMQP semantics (default + topic exchanges, durable
+queues, competing consumers, prefetch, ack/nack/requeue) to exercise
+:class:`~ainern2d_shared.queue.rabbitmq.PublisherPool` and
+:class:`~ainern2d_shared.queue.aio_consumer.AsyncQueueConsumer` without a
+RabbitMQ server::
+
+	broker = InProcessBroker()
+	pool = PublisherPool("amqp://local", connection_factory=broker.connection)
+	consumer = AsyncQueueConsumer("amqp://local", connect=broker.connect)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import threading
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable
+
+
+def topic_matches(pattern: str, routing_key: str) -> bool:
+	"""AMQP topic matching: ``*`` is exactly one word, ``#`` zero or more."""
+	return _match(pattern.split("."), routing_key.split("."))
+
+
+def _match(pattern: list[str], words: list[str]) -> bool:
+	if not pattern:
+		return not words
+	head, rest = pattern[0], pattern[1:]
+	if head == "#":
+		return any(_match(rest, words[i:]) for i in range(len(words) + 1))
+	if not words:
+		return False
+	if head == "*" or head == words[0]:
+		return _match(rest, words[1:])
+	return False
+
+
+class InProcessMessage:
+	def __init__(self, broker: "InProcessBroker", queue: str, body: bytes, redelivered: bool = False):
+		self._broker = broker
+		self._consumer: "_Consumer | None" = None
+		self.queue = queue
+		self.body = body
+		self.redelivered = redelivered
+		self.settled = False
+
+	async def ack(self) -> None:
+		self._broker._settle(self, requeue=None)
+
+	async def nack(self, requeue: bool = True) -> None:
+		self._broker._settle(self, requeue=requeue)
+
+	async def reject(self, requeue: bool = False) -> None:
+		self._broker._settle(self, requeue=requeue)
+
+
+class _Consumer:
+	def __init__(self, tag: str, queue: str, channel: "_AsyncChannel", callback: Callable[[Any], Awaitable[None]]):
+		self.tag = tag
+		self.queue = queue
+		self.channel = channel
+		self.callback = callback
+		self.loop = asyncio.get_running_loop()
+
+
+class InProcessBroker:
+	"""Thread-safe in-memory broker shared by sync publishers and async consumers."""
+
+	def __init__(self) -> None:
+		self._lock = threading.RLock()
+		self.exchanges: dict[str, str] = {"": "direct"}
+		self.queues: dict[str, deque[InProcessMessage]] = {}
+		self.bindings: dict[str, list[tuple[str, str]]] = {}
+		self._consumers: dict[str, list[_Consumer]] = {}
+		self._unacked: dict[int, set[InProcessMessage]] = {}
+		self._tags = itertools.count(1)
+		self.published = 0
+		self.unroutable = 0
+		self.deliveries: Counter[str] = Counter()
+
+	# ------------------------------------------------------------------
+	# Topology
+	# ------------------------------------------------------------------
+
+	def declare_queue(self, name: str) -> None:
+		with self._lock:
+			self.queues.setdefault(name, deque())
+
+	def declare_exchange(self, name: str, exchange_type: str = "topic") -> None:
+		with self._lock:
+			self.exchanges.setdefault(name, str(exchange_type))
+
+	def bind(self, queue: str, exchange: str, routing_key: str) -> None:
+		with self._lock:
+			self.declare_queue(queue)
+			pairs = self.bindings.setdefault(exchange, [])
+			if (routing_key, queue) not in pairs:
+				pairs.append((routing_key, queue))
+
+	def route(self, exchange: str, routing_key: str) -> list[str]:
+		with self._lock:
+			if not exchange:
+				return [routing_key] if routing_key in self.queues else []
+			return sorted({
+				queue for pattern, queue in self.bindings.get(exchange, [])
+				if topic_matches(pattern, routing_key)
+			})
+
+	# ------------------------------------------------------------------
+	# Messaging
+	# ------------------------------------------------------------------
+
+	def publish(self, exchange: str, routing_key: str, body: bytes) -> list[str]:
+		with self._lock:
+			self.published += 1
+			targets = self.route(exchange, routing_key)
+			if not targets:
+				self.unroutable += 1
+			for queue in targets:
+				self.queues[queue].append(InProcessMessage(self, queue, body))
+				self._pump(queue)
+			return targets
+
+	def depth(self, queue: str) -> int:
+		with self._lock:
+			return len(self.queues.get(queue, ()))
+
+	def _pump(self, queue: str) -> None:
+		consumers = self._consumers.get(queue) or []
+		pending = self.queues.get(queue)
+		while pending and consumers:
+			ready = [c for c in consumers if c.channel.has_capacity()]
+			if not ready:
+				return
+			consumer = ready[0]
+			# Round-robin: move the chosen consumer to the back.
+			consumers.remove(consumer)
+			consumers.append(consumer)
+			message = pending.popleft()
+			message._consumer = consumer
+			consumer.channel.unacked.add(message)
+			self.deliveries[queue] += 1
+			consumer.loop.call_soon_threadsafe(
+				lambda c=consumer, m=message: c.loop.create_task(c.callback(m))
+			)
+
+	def _settle(self, message: InProcessMessage, requeue: bool | None) -> None:
+		with self._lock:
+			if message.settled:
+				return
+			message.settled = True
+			consumer = message._consumer
+			if consumer is not None:
+				consumer.channel.unacked.discard(message)
+			if requeue:
+				self.queues[message.queue].appendleft(
+					InProcessMessage(self, message.queue, message.body, redelivered=True)
+				)
+			self._pump(message.queue)
+			if consumer is not None:
+				for queue in {c.queue for c in consumer.channel.consumers}:
+					self._pump(queue)
+
+	def _add_consumer(self, consumer: _Consumer) -> None:
+		with self._lock:
+			self._consumers.setdefault(consumer.queue, []).append(consumer)
+			self._pump(consumer.queue)
+
+	def _remove_consumer(self, tag: str) -> None:
+		with self._lock:
+			for consumers in self._consumers.values():
+				consumers[:] = [c for c in consumers if c.tag != tag]
+
+	def _close_channel(self, channel: "_AsyncChannel") -> None:
+		with self._lock:
+			for consumer in list(channel.consumers):
+				self._remove_consumer(consumer.tag)
+			for message in list(channel.unacked):
+				message.settled = True
+				self.queues[message.queue].appendleft(
+					InProcessMessage(self, message.queue, message.body, redelivered=True)
+				)
+			channel.unacked.clear()
+			for queue in list(self.queues):
+				self._pump(queue)
+
+	# ------------------------------------------------------------------
+	# Client factories
+	# ------------------------------------------------------------------
+
+	def connection(self) -> "_SyncConnection":
+		"""pika-style blocking connection (``PublisherPool(connection_factory=...)``)."""
+		return _SyncConnection(self)
+
+	async def connect(self, _url: str = "") -> "_AsyncConnection":
+		"""aio-pika-style connection (``AsyncQueueConsumer(connect=...)``)."""
+		return _AsyncConnection(self)
+
+
+# ----------------------------------------------------------------------
+# pika-style blocking client
+# ----------------------------------------------------------------------
+
+
+class _SyncChannel:
+	def __init__(self, broker: InProcessBroker):
+		self._broker = broker
+		self.is_open = True
+
+	def confirm_delivery(self) -> None:
+		return None
+
+	def tx_select(self) -> None:
+		return None
+
+	def tx_commit(self) -> None:
+		return None
+
+	def queue_declare(self, queue: str, durable: bool = True, **_kwargs: Any) -> None:
+		self._broker.declare_queue(queue)
+
+	def exchange_declare(self, exchange: str, exchange_type: str = "topic", durable: bool = True, **_kwargs: Any) -> None:
+		self._broker.declare_exchange(exchange, exchange_type)
+
+	def queue_bind(self, queue: str, exchange: str, routing_key: str) -> None:
+		self._broker.bind(queue, exchange, routing_key)
+
+	def basic_publish(self, exchange: str, routing_key: str, body: bytes, properties: Any = None) -> None:
+		self._broker.publish(exchange, routing_key, body)
+
+
+class _SyncConnection:
+	def __init__(self, broker: InProcessBroker):
+		self._broker = broker
+		self.is_open = True
+
+	def channel(self) -> _SyncChannel:
+		return _SyncChannel(self._broker)
+
+	def close(self) -> None:
+		self.is_open = False
+
+
+# ----------------------------------------------------------------------
+# aio-pika-style async client
+# ----------------------------------------------------------------------
+
+
+class _Exchange:
+	def __init__(self, name: str):
+		self.name = name
+
+
+class _AsyncQueue:
+	def __init__(self, broker: InProcessBroker, channel: "_AsyncChannel", name: str):
+		self._broker = broker
+		self._channel = channel
+		self.name = name
+
+	async def bind(self, exchange: _Exchange | str, routing_key: str) -> None:
+		name = exchange.name if isinstance(exchange, _Exchange) else exchange
+		self._broker.bind(self.name, name, routing_key)
+
+	async def consume(self, callback: Callable[[Any], Awaitable[None]]) -> str:
+		tag = f"ctag-{next(self._broker._tags)}"
+		consumer = _Consumer(tag, self.name, self._channel, callback)
+		self._channel.consumers.append(consumer)
+		self._broker._add_consumer(consumer)
+		return tag
+
+	async def cancel(self, tag: str) -> None:
+		self._channel.consumers = [c for c in self._channel.consumers if c.tag != tag]
+		self._broker._remove_consumer(tag)
+
+
+class _AsyncChannel:
+	def __init__(self, broker: InProcessBroker):
+		self._broker = broker
+		self.prefetch = 0
+		self.unacked: set[InProcessMessage] = set()
+		self.consumers: list[_Consumer] = []
+
+	def has_capacity(self) -> bool:
+		return self.prefetch <= 0 or len(self.unacked) < self.prefetch
+
+	async def set_qos(self, prefetch_count: int) -> None:
+		self.prefetch = prefetch_count
+
+	async def declare_queue(self, name: str, durable: bool = True, **_kwargs: Any) -> _AsyncQueue:
+		self._broker.declare_queue(name)
+		return _AsyncQueue(self._broker, self, name)
+
+	async def declare_exchange(self, name: str, type: str = "topic", durable: bool = True, **_kwargs: Any) -> _Exchange:
+		self._broker.declare_exchange(name, type)
+		return _Exchange(name)
+
+
+class _AsyncConnection:
+	def __init__(self, broker: InProcessBroker):
+		self._broker = broker
+		self._channels: list[_AsyncChannel] = []
+
+	async def channel(self) -> _AsyncChannel:
+		channel = _AsyncChannel(self._broker)
+		self._channels.append(channel)
+		return channel
+
+	async def close(self) -> None:
+		for channel in self._channels:
+			self._broker._close_channel(channel)
+		self._channels.clear()
@@ -0,0 +1,31 @@
+"""Dispatch priority lanes shared by job producers and worker-hub."""
+
+from __future__ import annotations
+
+from typing import Any, Mapping
+
+LANE_INTERACTIVE = "interactive"
+LANE_NORMAL = "normal"
+LANE_BULK = "bulk"
+# Highest first; an idle lane worker steals from the lanes after its own.
+LANES = (LANE_INTERACTIVE, LANE_NORMAL, LANE_BULK)
+
+# ``Job.priority`` values producers use to pick a lane.
+JOB_PRIORITY = {
+	LANE_INTERACTIVE: 100,
+	LANE_NORMAL: 0,
+	LANE_BULK: -100,
+}
+
+
+def lane_for(priority: int | None, payload: Mapping[str, Any] | None = None) -> str:
+	"""Lane of a job: an explicit ``payload["lane"]`` wins, else ``Job.priority``."""
+	explicit = str((payload or {}).get("lane") or "").strip().lower()
+	if explicit in LANES:
+		return explicit
+	value = int(priority or 0)
+	if value >= JOB_PRIORITY[LANE_INTERACTIVE] // 2:
+		return LANE_INTERACTIVE
+	if value <= JOB_PRIORITY[LANE_BULK] // 2:
+		return LANE_BULK
+	return LANE_NORMAL
@@ -1,34 +1,461 @@
 from __future__ import annotations
 
+import atexit
 import json
-from typing import Callable
+import threading
+import time
+from typing import Any, Callable
+
+from ainern2d_shared.config.setting import settings
+from ainern2d_shared.telemetry.logging import get_logger
 
 try:
 	import pika
+	from pika.exceptions import AMQPError
 except Exception:
 	pika = None
+	AMQPError = Exception
+
+_logger = get_logger("queue.rabbitmq")
+
+
+def _encode(message: str | dict) -> bytes:
+	body = message if isinstance(message, str) else json.dumps(message, ensure_ascii=False)
+	return body.encode("utf-8")
+
+
+class PublishError(RuntimeError):
+	"""Messages the broker did not confirm, even after retrying them."""
+
+
+class _Lane:
+	"""Long-lived connection + channel owned by a single thread.
+
+	pika's BlockingConnection is not thread-safe, so every publishing thread
+	gets its own lane instead of sharing one channel.
+	"""
+
+	def __init__(self, connection: Any, confirm: bool):
+		self.connection = connection
+		self.channel = connection.channel()
+		# Publisher confirms, not channel transactions: tx_commit makes the
+		# broker fsync every batch and is far slower under load.  Confirms are
+		# enabled on pika's underlying channel when it is reachable, so a
+		# batch goes out back to back and its acks are awaited once;
+		# BlockingChannel.confirm_delivery waits for every single message.
+		self.pipelined = False
+		self._next_tag = 1
+		self._outstanding: set[int] = set()
+		self._acked: set[int] = set()
+		if confirm:
+			impl = getattr(self.channel, "_impl", None)
+			if impl is not None:
+				impl.confirm_delivery(ack_nack_callback=self._on_confirm)
+				self.pipelined = True
+			else:
+				self.channel.confirm_delivery()
+		self.declared: set[tuple[str, str, str | None]] = set()
+		self.buffer: list[tuple[str, str, str | None, bytes]] = []
+		self.oldest_at: float | None = None
+		# Set when the idle flusher could not deliver this lane's buffer; the
+		# owning thread's next publish() raises it.
+		self.error: BaseException | None = None
+		# ``lock`` guards the buffer; ``flush_lock`` serialises whole flushes
+		# so the idle flusher and the owning thread never reorder a batch.
+		self.lock = threading.Lock()
+		self.flush_lock = threading.Lock()
+
+	@property
+	def is_open(self) -> bool:
+		return bool(self.connection.is_open and self.channel.is_open)
+
+	def publish(
+		self,
+		entries: list[tuple[str, str, str | None, bytes]],
+		done: set[int],
+		declare: Callable[["_Lane", str, str, str | None], None],
+		properties: Any,
+		confirm_timeout_s: float,
+	) -> None:
+		"""Publish the entries whose index is not in *done*, adding the index
+		of every entry the broker confirmed (or that needs no confirm)."""
+		tags: dict[int, int] = {}
+		for index, (exchange, topic, queue, body) in enumerate(entries):
+			if index in done:
+				continue
+			declare(self, exchange, topic, queue)
+			self.channel.basic_publish(exchange=exchange, routing_key=topic, body=body, properties=properties)
+			if not self.pipelined:
+				done.add(index)
+				continue
+			tags[self._next_tag] = index
+			self._outstanding.add(self._next_tag)
+			self._next_tag += 1
+		if not tags:
+			return
+		deadline = time.monotonic() + confirm_timeout_s
+		while self._outstanding.intersection(tags):
+			remaining = deadline - time.monotonic()
+			if remaining <= 0:
+				break
+			self.connection.process_data_events(time_limit=min(remaining, 0.1))
+		for tag, index in tags.items():
+			self._outstanding.discard(tag)
+			if tag in self._acked:
+				self._acked.discard(tag)
+				done.add(index)
+
+	def _on_confirm(self, frame: Any) -> None:
+		method = frame.method
+		if method.multiple:
+			tags = [tag for tag in self._outstanding if tag <= method.delivery_tag]
+		else:
+			tags = [method.delivery_tag]
+		acked = method.NAME == "Basic.Ack"
+		for tag in tags:
+			self._outstanding.discard(tag)
+			if acked:
+				self._acked.add(tag)
+
+	def requeue(self, entries: list[tuple[str, str, str | None, bytes]]) -> None:
+		"""Put undelivered entries back at the front of the buffer."""
+		if not entries:
+			return
+		with self.lock:
+			self.buffer[:0] = entries
+			self.oldest_at = self.oldest_at or time.monotonic()
+
+	def close(self) -> None:
+		try:
+			if self.connection.is_open:
+				self.connection.close()
+		except Exception:
+			pass
+
+
+class PublisherPool:
+	"""Process-wide RabbitMQ publisher.
+
+	- one long-lived connection/channel per publishing thread
+	- ``queue_declare`` memoized per lane
+	- publisher confirms, optionally batched over a flush window
+	- transparent reconnect on connection/channel loss; a retry re-sends
+	  only the messages the broker has not confirmed
+
+	With ``flush_window_ms=0`` (default) every ``publish`` is sent and
+	confirmed before returning.  With a positive window, messages are
+	buffered per thread and sent when the batch fills, when ``flush()`` is
+	called, or once the oldest message is a window old: a background
+	flusher sends idle buffers over its own lane, so a burst's tail never
+	waits for the next publish on the same thread.  Messages the broker
+	does not confirm stay buffered, and the failure is raised to the owning
+	thread by ``flush()`` or its next ``publish()``.
+	"""
+
+	def __init__(
+		self,
+		amqp_url: str,
+		*,
+		confirm: bool = True,
+		flush_window_ms: int = 0,
+		max_batch: int = 100,
+		max_retries: int = 2,
+		confirm_timeout_s: float = 30.0,
+		connection_factory: Callable[[], Any] | None = None,
+	):
+		if pika is None and connection_factory is None:
+			raise RuntimeError("pika is required for PublisherPool")
+		self._amqp_url = amqp_url
+		self._confirm = confirm
+		self._flush_window_s = max(flush_window_ms, 0) / 1000.0
+		self._batched = flush_window_ms > 0
+		self._max_batch = max(max_batch, 1)
+		self._max_retries = max_retries
+		self._confirm_timeout_s = confirm_timeout_s
+		self._connection_factory = connection_factory or self._default_connection
+		self._local = threading.local()
+		self._lanes: dict[int, _Lane] = {}
+		self._lock = threading.Lock()
+		self._closed = False
+		self._flusher: threading.Thread | None = None
+		self._stop = threading.Event()
+
+	def publish(
+		self,
+		topic: str,
+		message: str | dict,
+		*,
+		exchange: str = "",
+		queue: str | None = None,
+	) -> None:
+		"""Publish ``message``.
+
+		With the default exchange ``topic`` is the queue name.  With a named
+		(topic) ``exchange`` it is the routing key; pass ``queue`` to make
+		sure a durable queue is bound to that key before the first publish,
+		so nothing is dropped before its consumers come up.
+		"""
+		entry = (exchange, topic, queue, _encode(message))
+		if not self._batched:
+			self._send([entry])
+			return
+
+		self._ensure_flusher()
+		lane = self._lane()
+		now = time.monotonic()
+		with lane.lock:
+			error, lane.error = lane.error, None
+			if error is None:
+				lane.buffer.append(entry)
+		if error is not None:
+			raise PublishError("buffered messages could not be delivered; they stay queued for the next flush") from error
+		with lane.lock:
+			if lane.oldest_at is None:
+				lane.oldest_at = now
+			due = len(lane.buffer) >= self._max_batch or now - lane.oldest_at >= self._flush_window_s
+		if due:
+			self.flush()
+
+	def flush(self) -> None:
+		"""Send and confirm everything buffered by the calling thread."""
+		lane: _Lane | None = getattr(self._local, "lane", None)
+		if lane is not None:
+			self._flush_lane(lane)
+
+	def close(self) -> None:
+		"""Flush every buffer, stop the idle flusher and close every lane."""
+		self._stop.set()
+		if self._flusher is not None and self._flusher is not threading.current_thread():
+			self._flusher.join(timeout=5)
+		self._flusher = None
+		try:
+			self.flush()
+			self._flush_idle(max_age_s=0.0)
+		except Exception as exc:
+			_logger.warning("publisher flush on close failed reason={}", str(exc))
+		with self._lock:
+			lanes = list(self._lanes.values())
+			self._lanes.clear()
+			self._closed = True
+		for lane in lanes:
+			if lane.buffer:
+				_logger.warning("publisher closed with {} unflushed messages", len(lane.buffer))
+			lane.close()
+
+	# ------------------------------------------------------------------
+
+	def _flush_lane(self, lane: _Lane) -> None:
+		with lane.flush_lock:
+			with lane.lock:
+				if not lane.buffer:
+					return
+				batch = list(lane.buffer)
+				lane.buffer.clear()
+				lane.oldest_at = None
+			undelivered, error = self._deliver(batch)
+			# A reconnect replaces the calling thread's lane; keep the
+			# leftovers on whichever lane it owns now.
+			owner = getattr(self._local, "lane", None) or lane
+			if error is not None:
+				owner.requeue(undelivered)
+				raise error
+			owner.error = None
+
+	def _ensure_flusher(self) -> None:
+		if self._flusher is not None and self._flusher.is_alive():
+			return
+		with self._lock:
+			if self._flusher is None or not self._flusher.is_alive():
+				self._stop.clear()
+				self._flusher = threading.Thread(
+					target=self._flush_idle_forever, name="publisher-flush", daemon=True
+				)
+				self._flusher.start()
+
+	def _flush_idle_forever(self) -> None:
+		while not self._stop.wait(self._flush_window_s):
+			self._flush_idle(self._flush_window_s)
+
+	def _flush_idle(self, max_age_s: float) -> None:
+		"""Send buffers whose oldest message is at least ``max_age_s`` old.
+
+		Runs on the flusher thread and sends over that thread's own lane.
+		Undelivered messages go back to the front of their buffer and the
+		error is left on the lane for its owning thread.
+		"""
+		now = time.monotonic()
+		with self._lock:
+			lanes = list(self._lanes.values())
+		for lane in lanes:
+			if lane.oldest_at is None or now - lane.oldest_at < max_age_s:
+				continue
+			with lane.flush_lock:
+				with lane.lock:
+					batch = list(lane.buffer)
+					lane.buffer.clear()
+					lane.oldest_at = None
+				if not batch:
+					continue
+				undelivered, error = self._deliver(batch)
+				if error is not None:
+					_logger.warning("idle publisher flush failed count={} reason={}", len(undelivered), str(error))
+					lane.requeue(undelivered)
+					lane.error = error
+
+	def _send(self, batch: list[tuple[str, str, str | None, bytes]]) -> None:
+		_undelivered, error = self._deliver(batch)
+		if error is not None:
+			raise error
+
+	def _deliver(
+		self, batch: list[tuple[str, str, str | None, bytes]]
+	) -> tuple[list[tuple[str, str, str | None, bytes]], BaseException | None]:
+		"""Publish ``batch``, retrying only what the broker has not confirmed.
+
+		Returns the entries still unconfirmed after the last attempt and the
+		error that left them so, or ``([], None)``.
+		"""
+		done: set[int] = set()
+		error: BaseException | None = None
+		for attempt in range(self._max_retries + 1):
+			lane: _Lane | None = None
+			try:
+				lane = self._lane()
+				lane.publish(batch, done, self._declare, self._properties(), self._confirm_timeout_s)
+			except AMQPError as exc:
+				# Closing is enough: the next _lane() reconnects and carries
+				# this thread's buffer over.
+				if lane is not None:
+					lane.close()
+				error = exc
+			else:
+				if len(done) == len(batch):
+					return [], None
+				error = PublishError(f"{len(batch) - len(done)} message(s) not confirmed by the broker")
+			if attempt < self._max_retries:
+				_logger.warning(
+					"publisher retrying unconfirmed={} attempt={} reason={}",
+					len(batch) - len(done), attempt + 1, str(error),
+				)
+		return [entry for index, entry in enumerate(batch) if index not in done], error
+
+	@staticmethod
+	def _declare(lane: _Lane, exchange: str, topic: str, queue: str | None) -> None:
+		key = (exchange, topic, queue)
+		if key in lane.declared:
+			return
+		if not exchange:
+			lane.channel.queue_declare(queue=topic, durable=True)
+		else:
+			lane.channel.exchange_declare(exchange=exchange, exchange_type="topic", durable=True)
+			if queue:
+				lane.channel.queue_declare(queue=queue, durable=True)
+				lane.channel.queue_bind(queue=queue, exchange=exchange, routing_key=topic)
+		lane.declared.add(key)
+
+	def _lane(self) -> _Lane:
+		lane: _Lane | None = getattr(self._local, "lane", None)
+		if lane is not None and lane.is_open:
+			return lane
+		# Connect before dropping the old lane so a failed reconnect keeps
+		# this thread's buffer (and any pending error) where it is.
+		fresh = _Lane(self._connection_factory(), self._confirm)
+		if lane is not None:
+			with lane.lock:
+				fresh.buffer.extend(lane.buffer)
+				fresh.oldest_at = lane.oldest_at
+				fresh.error = lane.error
+			self._drop_lane(lane)
+		lane = fresh
+		self._local.lane = lane
+		with self._lock:
+			self._lanes[threading.get_ident()] = lane
+			self._closed = False
+		return lane
+
+	def _drop_lane(self, lane: _Lane) -> None:
+		with self._lock:
+			if self._lanes.get(threading.get_ident()) is lane:
+				del self._lanes[threading.get_ident()]
+		if getattr(self._local, "lane", None) is lane:
+			self._local.lane = None
+		lane.close()
+
+	def _default_connection(self) -> Any:
+		return pika.BlockingConnection(pika.URLParameters(self._amqp_url))
+
+	@staticmethod
+	def _properties() -> Any:
+		if pika is None:
+			return None
+		return pika.BasicProperties(delivery_mode=2)
+
+
+_POOLS: dict[str, PublisherPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_publisher(amqp_url: str | None = None) -> PublisherPool:
+	"""Return the process-wide publisher pool for ``amqp_url``."""
+	url = amqp_url or settings.rabbitmq_url
+	with _POOLS_LOCK:
+		pool = _POOLS.get(url)
+		if pool is None:
+			pool = PublisherPool(
+				url,
+				confirm=settings.rabbitmq_publish_confirm,
+				flush_window_ms=settings.rabbitmq_publish_flush_ms,
+				max_batch=settings.rabbitmq_publish_max_batch,
+			)
+			_POOLS[url] = pool
+		return pool
+
+
+def close_publishers() -> None:
+	"""Close every pooled publisher (registered with ``atexit``)."""
+	with _POOLS_LOCK:
+		pools = list(_POOLS.values())
+		_POOLS.clear()
+	for pool in pools:
+		pool.close()
+
+
+atexit.register(close_publishers)
 
 
 class RabbitMQPublisher:
+	"""Backward-compatible facade over the process-wide :class:`PublisherPool`.
+
+	``close()`` is a no-op: connections belong to the pool.
+	"""
+
 	def __init__(self, amqp_url: str):
 		if pika is None:
 			raise RuntimeError("pika is required for RabbitMQPublisher")
-		self._connection = pika.BlockingConnection(pika.URLParameters(amqp_url))
-		self._channel = self._connection.channel()
+		self._pool = get_publisher(amqp_url)
 
-	def publish(self, topic: str, message: str | dict):
-		self._channel.queue_declare(queue=topic, durable=True)
-		body = message if isinstance(message, str) else json.dumps(message, ensure_ascii=False)
-		self._channel.basic_publish(
-			exchange="",
-			routing_key=topic,
-			body=body.encode("utf-8"),
-			properties=pika.BasicProperties(delivery_mode=2),
-		)
+	def publish(self, topic: str, message: str | dict, **kwargs):
+		self._pool.publish(topic, message, **kwargs)
+
+	def flush(self):
+		self._pool.flush()
 
 	def close(self):
-		if self._connection and not self._connection.is_closed:
-			self._connection.close()
+		return None
+
+
+def _on_message(handler: Callable[[dict], None], auto_ack: bool) -> Callable[..., None]:
+	def _callback(ch, method, _properties, body):
+		try:
+			payload = json.loads(body.decode("utf-8"))
+		except Exception:
+			payload = {"raw": body.decode("utf-8", errors="replace")}
+
+		handler(payload)
+		if not auto_ack:
+			ch.basic_ack(delivery_tag=method.delivery_tag)
+
+	return _callback
 
 
 class RabbitMQConsumer:
@@ -40,19 +467,21 @@ class RabbitMQConsumer:
 
 	def consume(self, topic: str, handler: Callable[[dict], None], auto_ack: bool = False) -> None:
 		self._channel.queue_declare(queue=topic, durable=True)
+		self._channel.basic_qos(prefetch_count=10)
+		self._channel.basic_consume(queue=topic, on_message_callback=_on_message(handler, auto_ack), auto_ack=auto_ack)
+		self._channel.start_consuming()
 
-		def _on_message(ch, method, _properties, body):
-			try:
-				payload = json.loads(body.decode("utf-8"))
-			except Exception:
-				payload = {"raw": body.decode("utf-8", errors="replace")}
-
-			handler(payload)
-			if not auto_ack:
-				ch.basic_ack(delivery_tag=method.delivery_tag)
+	def subscribe(self, exchange: str, handler: Callable[[dict], None], routing_key: str = "#") -> None:
+		"""Receive every message routed through the topic ``exchange``.
 
-		self._channel.basic_qos(prefetch_count=10)
-		self._channel.basic_consume(queue=topic, on_message_callback=_on_message, auto_ack=auto_ack)
+		The queue is server-named, exclusive and deleted with the connection,
+		so each subscriber gets its own copy instead of competing for them.
+		Messages published while nobody is subscribed are dropped.
+		"""
+		self._channel.exchange_declare(exchange=exchange, exchange_type="topic", durable=True)
+		queue = self._channel.queue_declare(queue="", exclusive=True, auto_delete=True).method.queue
+		self._channel.queue_bind(queue=queue, exchange=exchange, routing_key=routing_key)
+		self._channel.basic_consume(queue=queue, on_message_callback=_on_message(handler, True), auto_ack=True)
 		self._channel.start_consuming()
 
 	def close(self):
@@ -3,6 +3,8 @@ from __future__ import annotations
 
 class SYSTEM_TOPICS:
 	TASK_SUBMITTED = "task.submitted"
+	# Hub ingress: producers publish ``job.created`` here.  Workers no longer
+	# read it directly unless AINER_DISPATCH_ROUTING=legacy (migration mode).
 	JOB_DISPATCH = "job.dispatch"
 	JOB_STATUS = "job.status"
 	WORKER_DETAIL = "worker.detail"
@@ -12,3 +14,30 @@ class SYSTEM_TOPICS:
 	COMPOSE_STATUS = "compose.status"
 	SKILL_EVENTS = "skill.events"
 	ALERT_EVENTS = "alert.events"
+	# Topic exchange the hub routes claimed jobs through; one durable queue
+	# per (worker_type, gpu_tier), see dispatch_routing_key / dispatch_queue.
+	DISPATCH_EXCHANGE = "ainer.dispatch"
+	# Topic exchange the JOB_STATUS consumer relays job.progress and terminal
+	# job events to; every studio-api replica binds an exclusive queue, so
+	# each one sees all of them (JOB_STATUS itself has competing consumers).
+	JOB_PROGRESS_EXCHANGE = "ainer.job.progress"
+
+
+DISPATCH_ROUTING_LEGACY = "legacy"
+DISPATCH_ROUTING_ROUTED = "routed"
+DEFAULT_GPU_TIER = "default"
+
+
+def _tier(gpu_tier: str | None) -> str:
+	tier = (gpu_tier or DEFAULT_GPU_TIER).strip().lower().replace(".", "-")
+	return tier or DEFAULT_GPU_TIER
+
+
+def dispatch_routing_key(worker_type: str, gpu_tier: str | None = None) -> str:
+	"""Routing key on ``DISPATCH_EXCHANGE``: ``job.dispatch.<worker_type>.<tier>``."""
+	return f"{SYSTEM_TOPICS.JOB_DISPATCH}.{worker_type}.{_tier(gpu_tier)}"
+
+
+def dispatch_queue(worker_type: str, gpu_tier: str | None = None) -> str:
+	"""Durable queue consumed by workers of ``worker_type`` on ``gpu_tier``."""
+	return f"ainer.{dispatch_routing_key(worker_type, gpu_tier)}"
@@ -219,6 +219,8 @@ class Skill08Input(BaseSchema):
     unresolved_entities: list[dict[str, Any]] = []
     # Asset index source (spec §3.1)
     asset_library_index: dict[str, Any] = {}
+    # RAG collections whose documents describe assets in metadata_json
+    asset_collection_ids: list[str] = []
     # From SKILL 21 (optional continuity enrichment)
     entity_registry_continuity_result: dict[str, Any] = {}
     continuity_exports: dict[str, Any] = {}
@@ -179,6 +179,7 @@ class RetrievalQuery(BaseSchema):
     strength_filter: Strength | None = None
     enable_reranking: bool = True
     hybrid_alpha: float = Field(0.7, ge=0.0, le=1.0)
+    fusion: str = Field("weighted", description="weighted (alpha on min-max scores) | rrf")
 
 
 class RetrievalResult(BaseSchema):
@@ -199,6 +200,7 @@ class RetrievalResponse(BaseSchema):
     total_candidates: int = 0
     filtered_count: int = 0
     latency_ms: float = 0.0
+    stage_timings_ms: dict[str, float] = Field(default_factory=dict)
     conflict_candidates: list[RetrievalResult] = Field(default_factory=list)
 
 
@@ -185,6 +185,9 @@ class Skill16FeatureFlags(BaseSchema):
     enable_audio_visual_sync_critic: bool = True
     enable_prompt_traceability_critic: bool = True
     enable_auto_fix_suggestions: bool = True
+    # Probe artifacts (ffprobe/ffmpeg) for the technical_quality checks.
+    # Off by default: it costs one probe per artifact on the request path.
+    enable_media_probe: bool = False
 
 
 # ── Artifact reference ─────────────────────────────────────────
@@ -1,3 +1,15 @@
 from .base_skill import BaseSkillService, SkillContext
+from .media_probe import MediaProbe, MediaProbeError, MediaProbeService, get_media_probe_service
+from .skill_events import SkillEventBuffer, add_skill_event_observer, remove_skill_event_observer
 
-__all__ = ["BaseSkillService", "SkillContext"]
+__all__ = [
+    "BaseSkillService",
+    "SkillContext",
+    "MediaProbe",
+    "MediaProbeError",
+    "MediaProbeService",
+    "get_media_probe_service",
+    "SkillEventBuffer",
+    "add_skill_event_observer",
+    "remove_skill_event_observer",
+]
@@ -12,8 +12,11 @@ from uuid import uuid4
 from loguru import logger
 from sqlalchemy.orm import Session
 
+from ainern2d_shared.config.setting import settings
 from ainern2d_shared.utils.time import utcnow
 
+from .skill_events import SkillEventBuffer, notify_skill_event_observers
+
 InputT = TypeVar("InputT")
 OutputT = TypeVar("OutputT")
 
@@ -53,6 +56,8 @@ class BaseSkillService(ABC, Generic[InputT, OutputT]):
 
     def __init__(self, db: Session) -> None:
         self.db = db
+        # run_id → 该次 run() 的状态事件缓冲；完成/失败时一次性批量写入
+        self._event_buffers: dict[str, SkillEventBuffer] = {}
 
     # ── public entry ──────────────────────────────────────────────
 
@@ -69,10 +74,17 @@ class BaseSkillService(ABC, Generic[InputT, OutputT]):
             logger.info(f"[{self.skill_id}] IDEMPOTENT HIT — returning cached result")
             return existing
 
+        self._event_buffers[ctx.run_id] = SkillEventBuffer(
+            self.db,
+            max_events=settings.skill_event_buffer_max_events,
+            max_age_s=settings.skill_event_buffer_max_age_ms / 1000.0,
+        )
         self._record_state(ctx, "INIT", "IN_PROGRESS")
 
         try:
             result = self.execute(input_dto, ctx)
+            # 状态事件走独立会话；SKILL 自身写入的业务数据在成功时一次性提交
+            self.db.commit()
             self._record_state(ctx, "IN_PROGRESS", "COMPLETED")
             logger.info(f"[{self.skill_id}] COMPLETED | run={ctx.run_id}")
             return result
@@ -80,6 +92,10 @@ class BaseSkillService(ABC, Generic[InputT, OutputT]):
             self._record_state(ctx, "IN_PROGRESS", "FAILED", error=str(exc))
             logger.error(f"[{self.skill_id}] FAILED | run={ctx.run_id} error={exc}")
             raise
+        finally:
+            buffer = self._event_buffers.pop(ctx.run_id, None)
+            if buffer is not None:
+                buffer.flush()
 
     # ── abstract — 子类必须实现 ────────────────────────────────────
 
@@ -102,29 +118,39 @@ class BaseSkillService(ABC, Generic[InputT, OutputT]):
         to_state: str,
         error: str | None = None,
     ) -> None:
-        """记录状态转换到 workflow_events 表。"""
+        """记录状态转换到 workflow_events 表。
+
+        run() 内的事件先进入本次运行的缓冲，完成/失败（或达到数量/时间阈值）
+        时批量写入，并在独立的短会话中提交，调用方回滚也不会丢失；
+        run() 之外的调用直接 add 到会话，随调用方提交。
+        """
+        now = utcnow()
+        row = {
+            "id": f"WE_{uuid4().hex[:16].upper()}",
+            "tenant_id": ctx.tenant_id,
+            "project_id": ctx.project_id,
+            "run_id": ctx.run_id,
+            "trace_id": ctx.trace_id,
+            "correlation_id": ctx.correlation_id,
+            "idempotency_key": f"{ctx.idempotency_key}:{self.skill_id}:{to_state}",
+            "event_type": f"{self.skill_id}.state.{to_state.lower()}",
+            "producer": self.skill_id,
+            "occurred_at": now,
+            "payload_json": {
+                "from_state": from_state,
+                "to_state": to_state,
+                "timestamp": now.isoformat(),
+                "error": error,
+            },
+        }
+        buffer = self._event_buffers.get(ctx.run_id)
+        if buffer is not None:
+            buffer.add(row)
+            return
         try:
             from ainern2d_shared.ainer_db_models.pipeline_models import WorkflowEvent
 
-            evt = WorkflowEvent(
-                id=f"WE_{uuid4().hex[:16].upper()}",
-                tenant_id=ctx.tenant_id,
-                project_id=ctx.project_id,
-                run_id=ctx.run_id,
-                trace_id=ctx.trace_id,
-                correlation_id=ctx.correlation_id,
-                idempotency_key=f"{ctx.idempotency_key}:{self.skill_id}:{to_state}",
-                event_type=f"{self.skill_id}.state.{to_state.lower()}",
-                producer=self.skill_id,
-                occurred_at=utcnow(),
-                payload_json={
-                    "from_state": from_state,
-                    "to_state": to_state,
-                    "timestamp": utcnow().isoformat(),
-                    "error": error,
-                },
-            )
-            self.db.add(evt)
-            self.db.commit()
+            self.db.add(WorkflowEvent(**row))
+            notify_skill_event_observers(row)
         except Exception as e:
             logger.warning(f"[{self.skill_id}] Failed to record state: {e}")
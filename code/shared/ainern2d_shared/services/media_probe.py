@@ -0,0 +1,500 @@
+"""Media probe service – one process per file, results cached by content.
+
+Audio alignment, lipsync and the SKILL 16 technical checks all need the
+same facts about a file: format, streams, duration and, for audio,
+loudness and silence. This service extracts them in a single process per
+file.
+
+* ``analyze_audio=False`` runs ``ffprobe -show_format -show_streams``.
+  It reads the container header only and does not decode. ``s3://``
+  objects are opened through a presigned URL, so only the header bytes
+  are fetched.
+* ``analyze_audio=True`` runs one ``ffmpeg`` decode pass with
+  ``silencedetect`` and ``ebur128``. Format and streams are parsed from the
+  input header that ffmpeg prints on the same run.
+
+Results are cached in-process by URI plus a content fingerprint:
+``size:mtime`` for local files, the stored sha256 (or size) for ``s3://``,
+and ETag or Last-Modified for ``http(s)://``. A changed file is therefore
+probed again, and an unchanged one never is. :meth:`MediaProbeService.probe_many`
+probes a batch concurrently under one semaphore per event loop, and
+concurrent probes of the same file share one process.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import shutil
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from loguru import logger
+
+_SILENCE_NOISE_DB = -40.0
+_SILENCE_MIN_S = 0.3
+
+
+class MediaProbeError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class MediaProbe:
+    uri: str
+    format_name: str = ""
+    duration_ms: float = 0.0
+    start_ms: float = 0.0
+    bit_rate: int = 0
+    # ffprobe-style stream dicts: codec_type, codec_name, width, height, ...
+    streams: tuple[dict, ...] = ()
+    # Set when the file was decoded (analyze_audio=True) and it has audio.
+    analyzed: bool = False
+    integrated_lufs: float | None = None
+    true_peak_db: float | None = None
+    loudness_range: float | None = None
+    silence_regions: tuple[tuple[float, float], ...] = ()
+
+    def first_stream(self, codec_type: str) -> dict | None:
+        return next((s for s in self.streams if s.get("codec_type") == codec_type), None)
+
+    @property
+    def video(self) -> dict | None:
+        return self.first_stream("video")
+
+    @property
+    def audio(self) -> dict | None:
+        return self.first_stream("audio")
+
+    @property
+    def has_video(self) -> bool:
+        return self.video is not None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio is not None
+
+
+# ── ffprobe JSON ─────────────────────────────────────────────────────
+
+
+def _float(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_ffprobe_json(uri: str, data: dict) -> MediaProbe:
+    fmt = data.get("format") or {}
+    streams = tuple(data.get("streams") or ())
+    duration_s = _float(fmt.get("duration"))
+    if not duration_s:
+        duration_s = max((_float(s.get("duration")) for s in streams), default=0.0)
+    return MediaProbe(
+        uri=uri,
+        format_name=str(fmt.get("format_name", "")),
+        duration_ms=duration_s * 1000.0,
+        start_ms=_float(fmt.get("start_time")) * 1000.0,
+        bit_rate=int(_float(fmt.get("bit_rate"))),
+        streams=streams,
+    )
+
+
+# ── ffmpeg decode pass (stderr) ──────────────────────────────────────
+
+_INPUT_RE = re.compile(r"^Input #0, (?P<fmt>.+?), from ")
+_DURATION_RE = re.compile(
+    r"Duration: (?:(?P<h>\d+):(?P<m>\d+):(?P<s>\d+(?:\.\d+)?)|N/A)"
+    r"(?:, start: (?P<start>-?\d+(?:\.\d+)?))?(?:, bitrate: (?P<br>\d+) kb/s)?"
+)
+_STREAM_RE = re.compile(
+    r"^\s*Stream #0:(?P<index>\d+)(?:\[[^\]]*\])?(?:\([^)]*\))?: "
+    r"(?P<type>Video|Audio|Subtitle|Data): (?P<codec>\w+)(?P<rest>.*)$"
+)
+_SIZE_RE = re.compile(r"\b(\d{2,5})x(\d{2,5})\b")
+_FPS_RE = re.compile(r"([\d.]+)(k?) fps")
+_HZ_RE = re.compile(r"(\d+) Hz")
+_KBPS_RE = re.compile(r"(\d+) kb/s")
+_SUMMARY_RE = {
+    "integrated_lufs": re.compile(r"\bI:\s+(-?[\d.]+|-inf) LUFS"),
+    "loudness_range": re.compile(r"\bLRA:\s+(-?[\d.]+) LU\b"),
+    "true_peak_db": re.compile(r"\bPeak:\s+(-?[\d.]+|-inf) dBFS"),
+}
+_LAYOUT_CHANNELS = {"mono": 1, "stereo": 2, "2.1": 3, "quad": 4, "5.0": 5, "5.1": 6, "7.1": 8}
+
+
+def _top_level_split(text: str) -> list[str]:
+    """Split ``a (x, y), b, c`` on commas outside brackets."""
+    parts: list[str] = []
+    depth = 0
+    current = ""
+    for ch in text:
+        if ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += ch
+    parts.append(current.strip())
+    return parts
+
+
+def _parse_stream(match: re.Match) -> dict:
+    kind = match["type"].lower()
+    rest = match["rest"]
+    parts = _top_level_split(rest)
+    stream: dict[str, Any] = {
+        "index": int(match["index"]),
+        "codec_type": kind,
+        "codec_name": match["codec"],
+    }
+    if kind == "video":
+        if len(parts) > 1:
+            stream["pix_fmt"] = parts[1].split("(")[0].strip()
+        size = _SIZE_RE.search(rest)
+        if size:
+            stream["width"], stream["height"] = int(size.group(1)), int(size.group(2))
+        fps = _FPS_RE.search(rest)
+        if fps:
+            stream["avg_frame_rate"] = str(float(fps.group(1)) * (1000 if fps.group(2) else 1))
+    elif kind == "audio":
+        hz = _HZ_RE.search(rest)
+        if hz:
+            stream["sample_rate"] = hz.group(1)
+        if len(parts) > 2:
+            layout = parts[2]
+            stream["channel_layout"] = layout
+            base = layout.split("(")[0]
+            channels = re.match(r"(\d+) channels", layout)
+            stream["channels"] = int(channels.group(1)) if channels else _LAYOUT_CHANNELS.get(base, 0)
+    kbps = _KBPS_RE.search(rest)
+    if kbps:
+        stream["bit_rate"] = str(int(kbps.group(1)) * 1000)
+    return stream
+
+
+def _parse_silence(lines: list[str]) -> list[tuple[float, float]]:
+    regions: list[tuple[float, float]] = []
+    start_s: float | None = None
+    for line in lines:
+        if "silence_start:" in line:
+            try:
+                start_s = float(line.split("silence_start:")[-1].strip())
+            except ValueError:
+                pass
+        elif "silence_end:" in line and start_s is not None:
+            try:
+                end_s = float(line.split("silence_end:")[-1].split("|")[0].strip())
+            except ValueError:
+                continue
+            regions.append((start_s * 1000.0, end_s * 1000.0))
+            start_s = None
+    return regions
+
+
+def parse_ffmpeg_analysis(uri: str, stderr: str) -> MediaProbe:
+    """Build a :class:`MediaProbe` from the stderr of the decode pass."""
+    lines = stderr.splitlines()
+    format_name = ""
+    duration_ms = start_ms = 0.0
+    bit_rate = 0
+    streams: list[dict] = []
+    in_input = False
+    for line in lines:
+        if line.startswith("Input #0"):
+            in_input = True
+            m = _INPUT_RE.match(line)
+            format_name = m["fmt"] if m else ""
+            continue
+        if line.startswith(("Output #", "Stream mapping:")):
+            in_input = False
+        if not in_input:
+            continue
+        m = _DURATION_RE.search(line)
+        if m:
+            if m["h"] is not None:
+                duration_ms = (int(m["h"]) * 3600 + int(m["m"]) * 60 + float(m["s"])) * 1000.0
+            start_ms = float(m["start"] or 0.0) * 1000.0
+            bit_rate = int(m["br"] or 0) * 1000
+            continue
+        m = _STREAM_RE.match(line)
+        if m:
+            streams.append(_parse_stream(m))
+
+    if not format_name and not streams:
+        raise MediaProbeError(f"ffmpeg printed no input header for {uri}")
+
+    stats: dict[str, float | None] = {}
+    summary = stderr.rsplit("Summary:", 1)[1] if "Summary:" in stderr else ""
+    for name, pattern in _SUMMARY_RE.items():
+        m = pattern.search(summary)
+        stats[name] = None if m is None else (float("-inf") if m.group(1) == "-inf" else float(m.group(1)))
+
+    has_audio = any(s["codec_type"] == "audio" for s in streams)
+    return MediaProbe(
+        uri=uri,
+        format_name=format_name,
+        duration_ms=duration_ms,
+        start_ms=start_ms,
+        bit_rate=bit_rate,
+        streams=tuple(streams),
+        analyzed=has_audio,
+        silence_regions=tuple(_parse_silence(lines)) if has_audio else (),
+        **stats,
+    )
+
+
+# ── service ──────────────────────────────────────────────────────────
+
+
+class MediaProbeService:
+    def __init__(
+        self,
+        settings: Any = None,
+        max_concurrency: int = 4,
+        cache_entries: int = 4096,
+        timeout_s: float = 120.0,
+    ) -> None:
+        self._settings = settings
+        self._max_concurrency = max(1, max_concurrency)
+        self._cache_entries = max(1, cache_entries)
+        self._timeout_s = timeout_s
+        self._cache: OrderedDict[tuple, MediaProbe] = OrderedDict()
+        self._lock = threading.Lock()
+        self._gates: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "probes": 0}
+
+    # ── public API ───────────────────────────────────────────────────
+    async def probe(
+        self,
+        uri: str,
+        *,
+        analyze_audio: bool = False,
+        silence_noise_db: float = _SILENCE_NOISE_DB,
+        silence_min_s: float = _SILENCE_MIN_S,
+    ) -> MediaProbe:
+        """Probe *uri* (local path, ``file://``, ``s3://`` or ``http(s)://``).
+
+        Raises :class:`MediaProbeError` when the tools are missing or the
+        file cannot be read.
+        """
+        tool = "ffmpeg" if analyze_audio else "ffprobe"
+        binary = shutil.which(tool)
+        if not binary:
+            raise MediaProbeError(f"{tool} not found on PATH")
+
+        fingerprint = await self._fingerprint(uri)
+        mode = ("analyze", silence_noise_db, silence_min_s) if analyze_audio else ("header",)
+        key = (uri, fingerprint, mode)
+        if fingerprint is not None:
+            cached = self._lookup(key, uri, fingerprint)
+            if cached is not None:
+                return cached
+            loop = asyncio.get_running_loop()
+            shared = self._inflight.get(key)
+            if shared is not None and shared.get_loop() is loop:
+                return await asyncio.shield(shared)
+            future = self._inflight[key] = loop.create_future()
+        else:
+            future = None
+        self._count("misses")
+
+        try:
+            async with self._gate():
+                result = await self._run(binary, uri, analyze_audio, silence_noise_db, silence_min_s)
+        except BaseException as exc:
+            if future is not None:
+                self._inflight.pop(key, None)
+                if not future.done():
+                    future.set_exception(exc)
+                    future.exception()  # consumed here; waiters re-raise it
+            raise
+        if future is not None:
+            self._remember(key, result)
+            self._inflight.pop(key, None)
+            future.set_result(result)
+        return result
+
+    async def probe_many(
+        self,
+        uris: list[str],
+        *,
+        analyze_audio: bool = False,
+        return_exceptions: bool = True,
+    ) -> list[MediaProbe | BaseException]:
+        """Probe *uris* concurrently; results keep the input order.
+
+        With ``return_exceptions`` (the default) a failed file yields its
+        exception in place instead of failing the batch.
+        """
+        return await asyncio.gather(
+            *(self.probe(uri, analyze_audio=analyze_audio) for uri in uris),
+            return_exceptions=return_exceptions,
+        )
+
+    def probe_many_sync(self, uris: list[str], *, analyze_audio: bool = False) -> list[MediaProbe | BaseException]:
+        """Blocking :meth:`probe_many` for synchronous callers (skills)."""
+        coro = self.probe_many(uris, analyze_audio=analyze_audio)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="media-probe") as pool:
+            return pool.submit(asyncio.run, coro).result()
+
+    # ── cache ────────────────────────────────────────────────────────
+    def _lookup(self, key: tuple, uri: str, fingerprint: str) -> MediaProbe | None:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None and key[2] == ("header",):
+                # A decode pass already knows everything the header holds.
+                entry = self._cache.get((uri, fingerprint, ("analyze", _SILENCE_NOISE_DB, _SILENCE_MIN_S)))
+                key = (uri, fingerprint, ("analyze", _SILENCE_NOISE_DB, _SILENCE_MIN_S))
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+        return entry
+
+    def _remember(self, key: tuple, probe: MediaProbe) -> None:
+        with self._lock:
+            self._cache[key] = probe
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_entries:
+                self._cache.popitem(last=False)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def _gate(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            gate = self._gates.get(loop)
+            if gate is None:
+                gate = self._gates[loop] = asyncio.Semaphore(self._max_concurrency)
+        return gate
+
+    async def _fingerprint(self, uri: str) -> str | None:
+        """Cheap identity of the current content; ``None`` disables caching."""
+        try:
+            if uri.startswith("s3://"):
+                obj = await self._storage().stat(uri)
+                return obj.sha256 or f"size:{obj.size}"
+            if uri.startswith(("http://", "https://")):
+                import httpx
+
+                async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
+                    resp = await client.head(uri)
+                if resp.status_code >= 400:
+                    return None
+                tag = resp.headers.get("etag") or resp.headers.get("last-modified")
+                return f"{tag}:{resp.headers.get('content-length', '')}" if tag else None
+            st = await asyncio.to_thread(os.stat, _local_path(uri))
+            return f"{st.st_size}:{st.st_mtime_ns}"
+        except FileNotFoundError:
+            raise MediaProbeError(f"media not found: {uri}") from None
+        except Exception as exc:
+            logger.debug(f"media probe fingerprint failed for {uri}: {exc}")
+            return None
+
+    def _storage(self):
+        from ainern2d_shared.storage.client import get_storage_client
+
+        return get_storage_client(self._settings)
+
+    # ── process ──────────────────────────────────────────────────────
+    async def _run(
+        self,
+        binary: str,
+        uri: str,
+        analyze_audio: bool,
+        silence_noise_db: float,
+        silence_min_s: float,
+    ) -> MediaProbe:
+        if uri.startswith("s3://"):
+            # A presigned URL lets ffprobe range-read the container header
+            # instead of pulling the whole object down first.
+            try:
+                target = await self._storage().read_url(uri, expires_s=int(self._timeout_s) + 60)
+            except FileNotFoundError:
+                raise MediaProbeError(f"media not found: {uri}") from None
+        elif uri.startswith(("http://", "https://")):
+            target = uri
+        else:
+            target = _local_path(uri)
+
+        if analyze_audio:
+            cmd = [
+                binary, "-hide_banner", "-nostats", "-i", target,
+                "-map", "0:a:0?", "-vn", "-sn", "-dn",
+                "-af", (
+                    f"silencedetect=noise={silence_noise_db}dB:d={silence_min_s},"
+                    "ebur128=peak=true:framelog=verbose"
+                ),
+                "-f", "null", "-",
+            ]
+        else:
+            cmd = [binary, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", target]
+
+        self._count("probes")
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=self._timeout_s)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise MediaProbeError(f"probe timed out after {self._timeout_s}s: {uri}") from None
+
+        err = stderr.decode(errors="replace")
+        if analyze_audio:
+            # A file without audio makes ffmpeg exit non-zero ("no output
+            # streams"), but the input header is still complete.
+            try:
+                return parse_ffmpeg_analysis(uri, err)
+            except MediaProbeError:
+                raise MediaProbeError(f"ffmpeg failed for {uri}: {err[-300:]}") from None
+        if proc.returncode != 0:
+            raise MediaProbeError(f"ffprobe failed for {uri}: {err[-300:]}")
+        try:
+            return parse_ffprobe_json(uri, json.loads(stdout.decode() or "{}"))
+        except json.JSONDecodeError as exc:
+            raise MediaProbeError(f"ffprobe returned invalid JSON for {uri}") from exc
+
+
+def _local_path(uri: str) -> str:
+    return uri[len("file://"):] if uri.startswith("file://") else uri
+
+
+_services: dict[tuple, MediaProbeService] = {}
+_services_lock = threading.Lock()
+
+
+def get_media_probe_service(settings: Any = None) -> MediaProbeService:
+    """Process-wide service, so every caller shares one probe cache."""
+    if settings is None:
+        from ainern2d_shared.config.setting import settings
+    key = (settings.storage_backend, settings.s3_endpoint, settings.storage_local_root)
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = _services[key] = MediaProbeService(
+                settings,
+                max_concurrency=settings.media_probe_concurrency,
+                cache_entries=settings.media_probe_cache_max_entries,
+                timeout_s=settings.media_probe_timeout_sec,
+            )
+        return service
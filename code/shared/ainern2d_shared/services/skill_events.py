@@ -0,0 +1,134 @@
+"""Buffered writer for SKILL state-transition events.
+
+A skill records six to ten state transitions per run. Writing each one
+with its own ``commit()`` costs a round trip and an fsync per transition,
+and it commits the skill's half-finished business state along the way;
+``BaseSkillService.run`` now commits the business rows once, on success.
+:class:`SkillEventBuffer` keeps the events of one run in memory and
+writes them with a single bulk ``INSERT`` in three cases: when the skill
+completes or fails, when ``max_events`` are buffered, or when the oldest
+buffered event is older than ``max_age_s``.
+
+The insert runs in its own short-lived session and commits there, so the
+events are an audit trail that outlives the caller's transaction: a
+skill that fails and whose caller rolls back still leaves its FAILED
+event and everything before it. If that write fails (for instance a
+``run_id`` the caller has not committed yet), the batch falls back to a
+SAVEPOINT in the caller's session and becomes durable with the caller's
+commit; a rejected batch never poisons the caller's transaction. Every
+event also goes straight to the registered observers, so live tracing
+does not wait for the flush.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Optional
+
+from loguru import logger
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+SkillEventObserver = Callable[[dict[str, Any]], None]
+
+_observers: list[SkillEventObserver] = []
+
+
+def add_skill_event_observer(observer: SkillEventObserver) -> None:
+    """Receive every recorded skill event as it happens (before the flush)."""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def remove_skill_event_observer(observer: SkillEventObserver) -> None:
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+def notify_skill_event_observers(row: dict[str, Any]) -> None:
+    """Hand one ``workflow_events`` row to the observers as an event dict."""
+    if not _observers:
+        return
+    event = {
+        "event_id": row["id"],
+        "run_id": row.get("run_id"),
+        "event_type": row["event_type"],
+        "producer": row["producer"],
+        "occurred_at": row["occurred_at"].isoformat(),
+        "payload": row["payload_json"],
+    }
+    for observer in list(_observers):
+        try:
+            observer(event)
+        except Exception as exc:  # observers are best-effort
+            logger.warning(f"skill event observer failed: {exc}")
+
+
+class SkillEventBuffer:
+    """State events of one skill run, flushed in one bulk insert."""
+
+    def __init__(
+        self,
+        db: Session,
+        max_events: int = 50,
+        max_age_s: float = 2.0,
+        session_factory: Optional[Callable[[], Session]] = None,
+    ) -> None:
+        self.db = db
+        self._session_factory = session_factory or (lambda: Session(bind=db.get_bind()))
+        self._max_events = max(1, max_events)
+        self._max_age_s = max_age_s
+        self._rows: list[dict[str, Any]] = []
+        self._keys: set[str] = set()
+        self._first_at: float | None = None
+        self.written = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, row: dict[str, Any]) -> None:
+        """Buffer one ``workflow_events`` row (column → value)."""
+        key = row.get("idempotency_key")
+        if key in self._keys:
+            return  # the unique (scope, idempotency_key) index would reject the whole batch
+        if key:
+            self._keys.add(key)
+        self._rows.append(row)
+        if self._first_at is None:
+            self._first_at = time.monotonic()
+        notify_skill_event_observers(row)
+        if len(self._rows) >= self._max_events or time.monotonic() - self._first_at >= self._max_age_s:
+            self.flush()
+
+    def flush(self) -> int:
+        """Insert everything buffered; returns the number of rows sent."""
+        if not self._rows:
+            return 0
+        rows, self._rows, self._first_at = self._rows, [], None
+
+        try:
+            with self._session_factory() as events_db, events_db.begin():
+                self._insert(events_db, rows)
+        except Exception as exc:
+            logger.warning(f"Committing {len(rows)} skill state event(s) failed, using the caller's session: {exc}")
+            try:
+                with self.db.begin_nested():
+                    self._insert(self.db, rows)
+            except Exception as exc:
+                logger.warning(f"Failed to write {len(rows)} skill state event(s): {exc}")
+                return 0
+        self.written += len(rows)
+        return len(rows)
+
+    @staticmethod
+    def _insert(db: Session, rows: list[dict[str, Any]]) -> None:
+        from ainern2d_shared.ainer_db_models.pipeline_models import WorkflowEvent
+
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(
+                pg_insert(WorkflowEvent)
+                .values(rows)
+                .on_conflict_do_nothing(constraint="uq_workflow_events_scope_idem")
+            )
+        else:
+            db.execute(insert(WorkflowEvent), rows)
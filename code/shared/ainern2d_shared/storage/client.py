@@ -0,0 +1,299 @@
+"""Async streaming object storage shared by workers and services.
+
+:class:`StorageClient` moves files between local disk and object storage
+without holding them in memory:
+
+* uploads above ``part_size`` go up as multipart uploads, at most
+  ``max_concurrency`` parts in flight, each read from disk only when its
+  turn comes;
+* downloads are split into byte ranges fetched in parallel and streamed
+  into place in the destination file;
+* every object carries a ``sha256`` metadata entry that full downloads
+  are verified against.
+
+Peak memory per transfer is therefore about ``part_size * max_concurrency``
+however large the video is. Backends (:class:`~.s3.S3StorageBackend`,
+:class:`~.local.LocalStorageBackend`) expose blocking primitives that the
+client runs in threads, and one backend per configuration is shared by the
+whole process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import mimetypes
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Protocol
+from urllib.parse import urlparse
+
+from ainern2d_shared.telemetry.logging import get_logger
+
+logger = get_logger(__name__)
+
+_CHUNK = 1024 * 1024
+_MIN_S3_PART = 5 * 1024 * 1024  # S3/MinIO minimum for every part but the last
+SHA256_META = "sha256"
+
+
+class ChecksumMismatchError(RuntimeError):
+	pass
+
+
+class StorageBackend(Protocol):
+	def put_object(self, bucket: str, key: str, data: bytes, content_type: str, metadata: dict[str, str]) -> None: ...
+	def create_upload(self, bucket: str, key: str, content_type: str, metadata: dict[str, str]) -> str: ...
+	def upload_part(self, bucket: str, key: str, upload_id: str, number: int, data: bytes) -> str: ...
+	def complete_upload(self, bucket: str, key: str, upload_id: str, parts: list[tuple[int, str]]) -> None: ...
+	def abort_upload(self, bucket: str, key: str, upload_id: str) -> None: ...
+	def head(self, bucket: str, key: str) -> tuple[int, dict[str, str]]: ...
+	def get_range(self, bucket: str, key: str, start: int, end: int) -> Iterator[bytes]: ...
+	def read_url(self, bucket: str, key: str, expires_s: int) -> str: ...
+
+
+@dataclass(frozen=True)
+class StoredObject:
+	bucket: str
+	key: str
+	size: int
+	sha256: str | None = None
+	metadata: dict[str, str] = field(default_factory=dict, compare=False)
+
+	@property
+	def uri(self) -> str:
+		return f"s3://{self.bucket}/{self.key}"
+
+
+def parse_s3_uri(uri: str) -> tuple[str, str]:
+	"""``s3://bucket/a/b.mp4`` → ``("bucket", "a/b.mp4")``."""
+	parsed = urlparse(uri)
+	if parsed.scheme != "s3" or not parsed.netloc:
+		raise ValueError(f"not an s3:// URI: {uri!r}")
+	return parsed.netloc, parsed.path.lstrip("/")
+
+
+def file_sha256(path: str) -> str:
+	digest = hashlib.sha256()
+	with open(path, "rb") as fh:
+		for chunk in iter(lambda: fh.read(_CHUNK), b""):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+def _read_at(path: str, offset: int, size: int) -> bytes:
+	with open(path, "rb") as fh:
+		fh.seek(offset)
+		return fh.read(size)
+
+
+class StorageClient:
+	def __init__(
+		self,
+		backend: StorageBackend,
+		bucket: str,
+		part_size: int = 8 * 1024 * 1024,
+		max_concurrency: int = 4,
+	):
+		self.backend = backend
+		self.bucket = bucket
+		self.part_size = max(1, part_size)
+		self.max_concurrency = max(1, max_concurrency)
+
+	def _locate(self, uri_or_key: str, bucket: str | None) -> tuple[str, str]:
+		if uri_or_key.startswith("s3://"):
+			return parse_s3_uri(uri_or_key)
+		return bucket or self.bucket, uri_or_key
+
+	# ── upload ────────────────────────────────────────────────────────
+	async def upload_file(
+		self,
+		path: str,
+		key: str,
+		*,
+		bucket: str | None = None,
+		content_type: str | None = None,
+		metadata: dict[str, str] | None = None,
+	) -> StoredObject:
+		"""Upload *path* to *key*; multipart with parallel parts when large.
+
+		*metadata* is stored with the object (string values) next to the
+		``sha256`` entry and comes back from :meth:`stat`.
+		"""
+		bucket = bucket or self.bucket
+		content_type = content_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+		size = os.path.getsize(path)
+		sha256 = await asyncio.to_thread(file_sha256, path)
+		metadata = {**{k: str(v) for k, v in (metadata or {}).items()}, SHA256_META: sha256}
+
+		if size <= self.part_size:
+			data = await asyncio.to_thread(_read_at, path, 0, size)
+			await asyncio.to_thread(self.backend.put_object, bucket, key, data, content_type, metadata)
+		else:
+			await self._multipart_upload(path, size, bucket, key, content_type, metadata)
+		logger.debug("uploaded %s -> s3://%s/%s (%d bytes)", path, bucket, key, size)
+		return StoredObject(bucket, key, size, sha256, metadata)
+
+	async def _multipart_upload(
+		self, path: str, size: int, bucket: str, key: str, content_type: str, metadata: dict[str, str],
+	) -> None:
+		upload_id = await asyncio.to_thread(self.backend.create_upload, bucket, key, content_type, metadata)
+		gate = asyncio.Semaphore(self.max_concurrency)
+
+		async def _part(number: int, offset: int) -> tuple[int, str]:
+			async with gate:
+				# Read inside the gate so only max_concurrency parts are in memory.
+				data = await asyncio.to_thread(_read_at, path, offset, self.part_size)
+				etag = await asyncio.to_thread(self.backend.upload_part, bucket, key, upload_id, number, data)
+				return number, etag
+
+		try:
+			parts = await asyncio.gather(*(
+				_part(i + 1, offset) for i, offset in enumerate(range(0, size, self.part_size))
+			))
+			await asyncio.to_thread(self.backend.complete_upload, bucket, key, upload_id, list(parts))
+		except BaseException:
+			try:
+				await asyncio.to_thread(self.backend.abort_upload, bucket, key, upload_id)
+			except Exception:
+				logger.warning("failed to abort multipart upload %s for s3://%s/%s", upload_id, bucket, key)
+			raise
+
+	# ── download ──────────────────────────────────────────────────────
+	async def stat(self, uri_or_key: str, *, bucket: str | None = None) -> StoredObject:
+		bucket, key = self._locate(uri_or_key, bucket)
+		size, metadata = await asyncio.to_thread(self.backend.head, bucket, key)
+		return StoredObject(bucket, key, size, metadata.get(SHA256_META), metadata)
+
+	async def download_file(
+		self,
+		uri_or_key: str,
+		dest: str,
+		*,
+		bucket: str | None = None,
+		byte_range: tuple[int, int] | None = None,
+		verify: bool = True,
+	) -> StoredObject:
+		"""Stream an object (or the inclusive *byte_range* of it) into *dest*.
+
+		Full downloads are checked against the stored ``sha256``; on mismatch
+		*dest* is removed and :class:`ChecksumMismatchError` raised.
+		"""
+		obj = await self.stat(uri_or_key, bucket=bucket)
+		if byte_range is not None:
+			start, end = byte_range[0], min(byte_range[1], obj.size - 1)
+		else:
+			start, end = 0, obj.size - 1
+
+		with open(dest, "wb") as fh:
+			fh.truncate(max(0, end - start + 1))
+		if end >= start:
+			gate = asyncio.Semaphore(self.max_concurrency)
+
+			async def _range(offset: int) -> None:
+				async with gate:
+					last = min(offset + self.part_size - 1, end)
+					await asyncio.to_thread(self._fetch_range, obj, offset, last, dest, offset - start)
+
+			await asyncio.gather(*(_range(offset) for offset in range(start, end + 1, self.part_size)))
+
+		if verify and byte_range is None and obj.sha256:
+			actual = await asyncio.to_thread(file_sha256, dest)
+			if actual != obj.sha256:
+				os.unlink(dest)
+				raise ChecksumMismatchError(f"{obj.uri}: expected sha256 {obj.sha256}, got {actual}")
+		return obj
+
+	async def read_url(self, uri_or_key: str, *, bucket: str | None = None, expires_s: int = 900) -> str:
+		"""A location ffmpeg/ffprobe can open directly, without downloading.
+
+		S3 yields a presigned GET URL, so the tool issues its own range
+		requests and reads only what it needs; the local backend yields the
+		file path.
+		"""
+		bucket, key = self._locate(uri_or_key, bucket)
+		return await asyncio.to_thread(self.backend.read_url, bucket, key, expires_s)
+
+	def _fetch_range(self, obj: StoredObject, start: int, end: int, dest: str, dest_offset: int) -> None:
+		with open(dest, "r+b") as fh:
+			fh.seek(dest_offset)
+			for chunk in self.backend.get_range(obj.bucket, obj.key, start, end):
+				fh.write(chunk)
+
+	async def download_to_temp(self, uri: str, default_suffix: str = "") -> str:
+		"""Fetch an ``s3://``, ``http(s)://`` or ``file://`` URI to a temp file.
+
+		``file://`` URIs are returned as-is; the caller owns any temp file.
+		"""
+		if uri.startswith("file://"):
+			return uri[len("file://"):]
+		suffix = os.path.splitext(urlparse(uri).path)[1] or default_suffix
+		fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+		os.close(fd)
+		try:
+			if uri.startswith("s3://"):
+				await self.download_file(uri, tmp_path)
+			else:
+				await _http_download(uri, tmp_path)
+		except BaseException:
+			os.unlink(tmp_path)
+			raise
+		return tmp_path
+
+
+async def _http_download(url: str, dest: str, timeout: float = 60.0) -> None:
+	import httpx
+
+	async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
+		async with client.stream("GET", url) as resp:
+			resp.raise_for_status()
+			with open(dest, "wb") as fh:
+				async for chunk in resp.aiter_bytes(_CHUNK):
+					fh.write(chunk)
+
+
+# ── process-wide backends ─────────────────────────────────────────────
+
+_backends: dict[tuple, StorageBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def storage_backend_for(settings: Any = None) -> tuple[StorageBackend, str, int, int]:
+	"""Shared backend plus ``(bucket, part_size, max_concurrency)`` for *settings*."""
+	if settings is None:
+		from ainern2d_shared.config.setting import settings
+	concurrency = max(1, int(settings.storage_max_concurrency))
+	kind = (settings.storage_backend or "minio").lower()
+	if kind == "local":
+		key: tuple = ("local", settings.storage_local_root)
+		part_size = max(1, int(settings.storage_part_size_mb)) * 1024 * 1024
+	else:
+		key = ("s3", settings.s3_endpoint, settings.s3_access_key, settings.s3_secret_key, settings.s3_region)
+		part_size = max(_MIN_S3_PART, int(settings.storage_part_size_mb) * 1024 * 1024)
+
+	with _backends_lock:
+		backend = _backends.get(key)
+		if backend is None:
+			if kind == "local":
+				from .local import LocalStorageBackend
+
+				backend = LocalStorageBackend(settings.storage_local_root)
+			else:
+				from .s3 import S3StorageBackend
+
+				backend = S3StorageBackend(
+					settings.s3_endpoint,
+					settings.s3_access_key,
+					settings.s3_secret_key,
+					region=settings.s3_region,
+					max_pool_connections=max(10, concurrency * 2),
+				)
+			_backends[key] = backend
+	return backend, settings.s3_bucket, part_size, concurrency
+
+
+def get_storage_client(settings: Any = None) -> StorageClient:
+	backend, bucket, part_size, concurrency = storage_backend_for(settings)
+	return StorageClient(backend, bucket, part_size=part_size, max_concurrency=concurrency)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Iterator
+
+_CHUNK = 1024 * 1024
+
+
+class LocalStorageBackend:
+	"""Filesystem stand-in for S3: ``<root>/<bucket>/<key>``.
+
+	Implements the same primitives as :class:`S3StorageBackend`, including
+	multipart uploads (parts are staged under ``<root>/.uploads``), so tests
+	and single-box setups exercise the real client code paths. Object
+	metadata lives in ``<root>/.meta``.
+	"""
+
+	def __init__(self, root: str):
+		self._root = Path(root)
+
+	def _path(self, bucket: str, key: str) -> Path:
+		base = (self._root / bucket).resolve()
+		path = (base / key).resolve()
+		if base not in path.parents:
+			raise ValueError(f"invalid object key: {key!r}")
+		return path
+
+	def _meta_path(self, bucket: str, key: str) -> Path:
+		return self._root / ".meta" / bucket / f"{key}.json"
+
+	def _write_meta(self, bucket: str, key: str, content_type: str, metadata: dict[str, str]) -> None:
+		meta_path = self._meta_path(bucket, key)
+		meta_path.parent.mkdir(parents=True, exist_ok=True)
+		meta_path.write_text(json.dumps({"content_type": content_type, "metadata": metadata}))
+
+	# ── single request ────────────────────────────────────────────────
+	def put_object(self, bucket: str, key: str, data: bytes, content_type: str, metadata: dict[str, str]) -> None:
+		path = self._path(bucket, key)
+		path.parent.mkdir(parents=True, exist_ok=True)
+		tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+		tmp.write_bytes(data)
+		os.replace(tmp, path)
+		self._write_meta(bucket, key, content_type, metadata)
+
+	# ── multipart ─────────────────────────────────────────────────────
+	def create_upload(self, bucket: str, key: str, content_type: str, metadata: dict[str, str]) -> str:
+		self._path(bucket, key)  # validate before staging anything
+		upload_id = uuid.uuid4().hex
+		staging = self._root / ".uploads" / upload_id
+		staging.mkdir(parents=True)
+		(staging / "meta.json").write_text(json.dumps({"content_type": content_type, "metadata": metadata}))
+		return upload_id
+
+	def upload_part(self, bucket: str, key: str, upload_id: str, number: int, data: bytes) -> str:
+		(self._root / ".uploads" / upload_id / f"{number:05d}").write_bytes(data)
+		return f"part-{number}"
+
+	def complete_upload(self, bucket: str, key: str, upload_id: str, parts: list[tuple[int, str]]) -> None:
+		staging = self._root / ".uploads" / upload_id
+		path = self._path(bucket, key)
+		path.parent.mkdir(parents=True, exist_ok=True)
+		tmp = path.with_name(f".{path.name}.{upload_id}")
+		with open(tmp, "wb") as out:
+			for number, _ in sorted(parts):
+				with open(staging / f"{number:05d}", "rb") as part:
+					shutil.copyfileobj(part, out, _CHUNK)
+		os.replace(tmp, path)
+		meta = json.loads((staging / "meta.json").read_text())
+		self._write_meta(bucket, key, meta["content_type"], meta["metadata"])
+		shutil.rmtree(staging, ignore_errors=True)
+
+	def abort_upload(self, bucket: str, key: str, upload_id: str) -> None:
+		shutil.rmtree(self._root / ".uploads" / upload_id, ignore_errors=True)
+
+	# ── reads ─────────────────────────────────────────────────────────
+	def head(self, bucket: str, key: str) -> tuple[int, dict[str, str]]:
+		path = self._path(bucket, key)
+		if not path.is_file():
+			raise FileNotFoundError(f"s3://{bucket}/{key}")
+		meta_path = self._meta_path(bucket, key)
+		metadata = json.loads(meta_path.read_text())["metadata"] if meta_path.is_file() else {}
+		return path.stat().st_size, metadata
+
+	def get_range(self, bucket: str, key: str, start: int, end: int) -> Iterator[bytes]:
+		"""Yield bytes ``start..end`` (inclusive) in chunks."""
+		with open(self._path(bucket, key), "rb") as fh:
+			fh.seek(start)
+			remaining = end - start + 1
+			while remaining > 0:
+				chunk = fh.read(min(_CHUNK, remaining))
+				if not chunk:
+					break
+				remaining -= len(chunk)
+				yield chunk
+
+	def read_url(self, bucket: str, key: str, expires_s: int) -> str:
+		path = self._path(bucket, key)
+		if not path.is_file():
+			raise FileNotFoundError(f"s3://{bucket}/{key}")
+		return str(path)
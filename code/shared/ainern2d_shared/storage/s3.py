@@ -1,9 +1,19 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+from typing import Any, Iterator
+
 try:
 	import boto3
+	from botocore.config import Config as BotoConfig
 except Exception:
 	boto3 = None
+	BotoConfig = None
+
+from .client import StorageClient, storage_backend_for
+
+_CHUNK = 1024 * 1024
 
 
 class S3Storage:
@@ -20,3 +30,99 @@ class S3Storage:
 	def put_object(self, bucket: str, key: str, data: bytes, content_type: str = "application/octet-stream") -> None:
 		self._client.put_object(Bucket=bucket, Key=key, Body=data, ContentType=content_type)
 
+
+def _content_md5(data: bytes) -> str:
+	return base64.b64encode(hashlib.md5(data).digest()).decode("ascii")
+
+
+class S3StorageBackend:
+	"""Storage primitives on one boto3 client (S3 or MinIO).
+
+	boto3 clients are thread-safe, so one instance – and its connection
+	pool – is shared by every upload/download thread of the process. Every
+	request body carries ``Content-MD5`` so the server rejects corrupted
+	parts.
+	"""
+
+	def __init__(
+		self,
+		endpoint: str,
+		access_key: str,
+		secret_key: str,
+		region: str = "us-east-1",
+		max_pool_connections: int = 10,
+	):
+		if boto3 is None:
+			raise RuntimeError("boto3 is required for S3StorageBackend")
+		self._client = boto3.client(
+			"s3",
+			endpoint_url=endpoint or None,
+			aws_access_key_id=access_key or None,
+			aws_secret_access_key=secret_key or None,
+			region_name=region or None,
+			config=BotoConfig(max_pool_connections=max_pool_connections, retries={"mode": "standard"}),
+		)
+
+	def put_object(self, bucket: str, key: str, data: bytes, content_type: str, metadata: dict[str, str]) -> None:
+		self._client.put_object(
+			Bucket=bucket, Key=key, Body=data, ContentType=content_type,
+			ContentMD5=_content_md5(data), Metadata=metadata,
+		)
+
+	def create_upload(self, bucket: str, key: str, content_type: str, metadata: dict[str, str]) -> str:
+		resp = self._client.create_multipart_upload(
+			Bucket=bucket, Key=key, ContentType=content_type, Metadata=metadata,
+		)
+		return resp["UploadId"]
+
+	def upload_part(self, bucket: str, key: str, upload_id: str, number: int, data: bytes) -> str:
+		resp = self._client.upload_part(
+			Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number,
+			Body=data, ContentMD5=_content_md5(data),
+		)
+		return resp["ETag"]
+
+	def complete_upload(self, bucket: str, key: str, upload_id: str, parts: list[tuple[int, str]]) -> None:
+		self._client.complete_multipart_upload(
+			Bucket=bucket, Key=key, UploadId=upload_id,
+			MultipartUpload={"Parts": [{"PartNumber": n, "ETag": etag} for n, etag in sorted(parts)]},
+		)
+
+	def abort_upload(self, bucket: str, key: str, upload_id: str) -> None:
+		self._client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+
+	def head(self, bucket: str, key: str) -> tuple[int, dict[str, str]]:
+		try:
+			resp = self._client.head_object(Bucket=bucket, Key=key)
+		except Exception as exc:
+			status = getattr(exc, "response", {}).get("ResponseMetadata", {}).get("HTTPStatusCode")
+			if status == 404:
+				raise FileNotFoundError(f"s3://{bucket}/{key}") from exc
+			raise
+		return int(resp["ContentLength"]), dict(resp.get("Metadata") or {})
+
+	def get_range(self, bucket: str, key: str, start: int, end: int) -> Iterator[bytes]:
+		"""Yield bytes ``start..end`` (inclusive) as they arrive."""
+		body: Any = self._client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}")["Body"]
+		try:
+			yield from body.iter_chunks(_CHUNK)
+		finally:
+			body.close()
+
+	def read_url(self, bucket: str, key: str, expires_s: int) -> str:
+		"""Presigned GET URL; range requests against it need no credentials."""
+		return self._client.generate_presigned_url(
+			"get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=expires_s,
+		)
+
+
+class S3Client(StorageClient):
+	"""Storage client for the configured backend – cheap to construct.
+
+	``S3Client(settings)`` reuses the process-wide backend (and connection
+	pool) for those settings; it only picks the default bucket.
+	"""
+
+	def __init__(self, settings: Any = None):
+		backend, bucket, part_size, concurrency = storage_backend_for(settings)
+		super().__init__(backend, bucket, part_size=part_size, max_concurrency=concurrency)
@@ -0,0 +1,149 @@
+"""In-memory BM25 inverted index with a CJK-aware tokenizer.
+
+Latin/digit runs become lower-cased word tokens; CJK runs become overlapping
+character bigrams (a lone CJK character is kept as a unigram), the same
+scheme as Lucene's CJKAnalyzer. This gives zh text meaningful term overlap
+without a segmentation dictionary.
+
+Queries only walk the postings of their own terms, so scoring cost grows
+with those postings' lengths rather than with the collection size.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Collection, Iterable
+
+_CJK = (
+	"\u3400-\u4dbf"  # CJK extension A
+	"\u4e00-\u9fff"  # CJK unified ideographs
+	"\uf900-\ufaff"  # compatibility ideographs
+	"\u3040-\u30ff"  # hiragana / katakana
+	"\uac00-\ud7af"  # hangul syllables
+)
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+", re.UNICODE)
+_CJK_RUN_RE = re.compile(rf"[{_CJK}]+")
+
+
+def tokenize(text: str) -> list[str]:
+	"""Split ``text`` into index terms (words for latin, bigrams for CJK)."""
+	if not text:
+		return []
+	terms: list[str] = []
+	for run in _TOKEN_RE.findall(unicodedata.normalize("NFKC", text).lower()):
+		if _CJK_RUN_RE.fullmatch(run):
+			if len(run) == 1:
+				terms.append(run)
+			else:
+				terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+		else:
+			terms.append(run)
+	return terms
+
+
+class BM25Index:
+	"""Thread-safe incremental BM25 (Okapi) index over ``doc_id -> text``."""
+
+	def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+		self.k1 = k1
+		self.b = b
+		self._lock = threading.RLock()
+		self._postings: dict[str, dict[str, int]] = {}
+		self._doc_terms: dict[str, tuple[str, ...]] = {}
+		self._doc_len: dict[str, int] = {}
+		self._total_len = 0
+
+	def __len__(self) -> int:
+		return len(self._doc_len)
+
+	def __contains__(self, doc_id: object) -> bool:
+		return doc_id in self._doc_len
+
+	@property
+	def avg_doc_len(self) -> float:
+		return self._total_len / len(self._doc_len) if self._doc_len else 0.0
+
+	def add(self, doc_id: str, text: str) -> None:
+		"""Index (or re-index) one document."""
+		counts = Counter(tokenize(text))
+		with self._lock:
+			self._remove_locked(doc_id)
+			for term, tf in counts.items():
+				self._postings.setdefault(term, {})[doc_id] = tf
+			length = sum(counts.values())
+			self._doc_terms[doc_id] = tuple(counts)
+			self._doc_len[doc_id] = length
+			self._total_len += length
+
+	def add_many(self, docs: Iterable[tuple[str, str]]) -> None:
+		for doc_id, text in docs:
+			self.add(doc_id, text)
+
+	def remove(self, doc_id: str) -> None:
+		with self._lock:
+			self._remove_locked(doc_id)
+
+	def _remove_locked(self, doc_id: str) -> None:
+		terms = self._doc_terms.pop(doc_id, None)
+		if terms is None:
+			return
+		for term in terms:
+			posting = self._postings.get(term)
+			if posting is None:
+				continue
+			posting.pop(doc_id, None)
+			if not posting:
+				del self._postings[term]
+		self._total_len -= self._doc_len.pop(doc_id, 0)
+
+	def idf(self, term: str) -> float:
+		df = len(self._postings.get(term, ()))
+		n = len(self._doc_len)
+		return math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+	def search(
+		self,
+		query: str,
+		top_k: int | None = 10,
+		candidates: Collection[str] | None = None,
+	) -> list[tuple[str, float]]:
+		"""Return ``(doc_id, bm25)`` best first; ``top_k=None`` returns all hits.
+
+		``candidates`` restricts scoring to a pre-filtered doc-id set.
+		"""
+		query_terms = Counter(tokenize(query))
+		if not query_terms:
+			return []
+		with self._lock:
+			if not self._doc_len:
+				return []
+			avg_len = self.avg_doc_len or 1.0
+			k1, b = self.k1, self.b
+			scores: dict[str, float] = {}
+			for term, qtf in query_terms.items():
+				posting = self._postings.get(term)
+				if not posting:
+					continue
+				weight = self.idf(term) * qtf
+				for doc_id, tf in posting.items():
+					if candidates is not None and doc_id not in candidates:
+						continue
+					norm = k1 * (1.0 - b + b * self._doc_len[doc_id] / avg_len)
+					scores[doc_id] = scores.get(doc_id, 0.0) + weight * tf * (k1 + 1.0) / (tf + norm)
+
+		if top_k is None:
+			return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+		return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+def normalize_scores(hits: list[tuple[str, float]]) -> dict[str, float]:
+	"""Scale BM25 scores into ``[0, 1]`` by the best hit, for score fusion."""
+	if not hits:
+		return {}
+	top = max(score for _, score in hits) or 1.0
+	return {doc_id: score / top for doc_id, score in hits}
@@ -0,0 +1,91 @@
+"""Rank/score fusion for hybrid retrieval, plus a per-stage latency timer.
+
+Keyword (BM25) and vector (cosine) scores live on incomparable scales, so
+fusion is either rank-based (RRF) or done on per-source min-max normalised
+scores.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Iterator, Mapping, Sequence
+
+FUSION_RRF = "rrf"
+FUSION_WEIGHTED = "weighted"
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+	rankings: Mapping[str, Sequence[str]],
+	*,
+	k: int = RRF_K,
+	weights: Mapping[str, float] | None = None,
+) -> dict[str, float]:
+	"""``score(d) = sum_s w_s / (k + rank_s(d))`` with 1-based ranks."""
+	fused: dict[str, float] = {}
+	for source, ranked_ids in rankings.items():
+		weight = 1.0 if weights is None else weights.get(source, 0.0)
+		if weight == 0.0:
+			continue
+		for rank, doc_id in enumerate(ranked_ids, start=1):
+			fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+	return fused
+
+
+def min_max_normalize(scores: Mapping[str, float]) -> dict[str, float]:
+	"""Scale into ``[0, 1]``; a single (or all-equal) score maps to 1.0."""
+	if not scores:
+		return {}
+	lo = min(scores.values())
+	hi = max(scores.values())
+	if hi == lo:
+		return {doc_id: 1.0 for doc_id in scores}
+	span = hi - lo
+	return {doc_id: (score - lo) / span for doc_id, score in scores.items()}
+
+
+def weighted_score_fusion(
+	scores: Mapping[str, Mapping[str, float]],
+	weights: Mapping[str, float],
+) -> dict[str, float]:
+	"""``score(d) = sum_s w_s * minmax_s(d)``; missing sources count as 0."""
+	fused: dict[str, float] = {}
+	for source, source_scores in scores.items():
+		weight = weights.get(source, 0.0)
+		for doc_id, score in min_max_normalize(source_scores).items():
+			fused[doc_id] = fused.get(doc_id, 0.0) + weight * score
+	return fused
+
+
+def ranked(scores: Mapping[str, float]) -> list[tuple[str, float]]:
+	return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class StageTimer:
+	"""Collects wall-clock milliseconds per named pipeline stage.
+
+	Stages may be timed from worker threads; a stage timed twice accumulates.
+	"""
+
+	def __init__(self) -> None:
+		self._t0 = time.perf_counter()
+		self.timings_ms: dict[str, float] = {}
+
+	@contextmanager
+	def stage(self, name: str) -> Iterator[None]:
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.add(name, (time.perf_counter() - start) * 1000.0)
+
+	def add(self, name: str, elapsed_ms: float) -> None:
+		self.timings_ms[name] = round(self.timings_ms.get(name, 0.0) + elapsed_ms, 3)
+
+	def total_ms(self) -> float:
+		return round((time.perf_counter() - self._t0) * 1000.0, 3)
+
+	def report(self) -> dict[str, float]:
+		return {**self.timings_ms, "total": self.total_ms()}
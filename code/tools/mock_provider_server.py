@@ -6,6 +6,7 @@ from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 class Handler(BaseHTTPRequestHandler):
     server_version = "MockProvider/1.0"
+    protocol_version = "HTTP/1.1"  # keep-alive, like real provider endpoints
 
     def _write_json(self, status: int, payload: dict):
         body = json.dumps(payload).encode("utf-8")